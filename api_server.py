@@ -1,5 +1,29 @@
+import os
+import sys
 from fastapi import FastAPI
+
+# Backend modules import each other as top-level modules (e.g. `from config import Config`)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from startup import mark
+
+import logging
+from config import Config
+from logging_pipeline import setup_logging
+
+# Under `uvicorn api_server:app` nothing else configures the app's loggers
+if not logging.getLogger().handlers:
+    setup_logging(
+        level=Config.LOG_LEVEL,
+        json_format=Config.LOG_JSON,
+        repeat_window=Config.LOG_REPEAT_WINDOW,
+        repeat_burst=Config.LOG_REPEAT_BURST
+    )
+
+from backend.routes.admin import router as admin_router
 from backend.routes.exchanges import router as exchange_router
+from backend.routes.metrics import router as metrics_router
+from backend.routes.stream import router as stream_router
 
 app = FastAPI(title="HybridBot API")
 
@@ -8,6 +32,10 @@ async def read_root():
     return {"message": "HybridBot API is running!"}
 
 app.include_router(exchange_router)
+app.include_router(stream_router)
+app.include_router(metrics_router)
+app.include_router(admin_router)
+mark('app created')
 
 # This block is for local development, not directly used by Cloud Run's CMD
 if __name__ == "__main__":
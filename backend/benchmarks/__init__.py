@@ -0,0 +1,14 @@
+"""
+Offline performance benchmarks.
+
+Run from the backend directory:
+
+    python -m benchmarks                       # all suites, results to benchmarks/results/latest.json
+    python -m benchmarks --suites orders,api --quick
+    python -m benchmarks --save-baseline       # record this machine's baseline
+    python -m benchmarks --baseline benchmarks/results/baseline.json
+
+Everything runs against FakeExchange and synthetic data; no exchange or
+social media credentials are needed. With a baseline, the run exits with
+status 1 when any metric regresses past its threshold in thresholds.json.
+"""
@@ -0,0 +1,82 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+from logging_pipeline import setup_logging, shutdown_logging
+from .harness import Results, compare, format_report, load_thresholds
+from .suites import SUITES
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+logger = logging.getLogger('benchmarks')
+
+
+async def run(suites, quick: bool) -> Results:
+    results = Results()
+    for name in suites:
+        logger.info(f"Running {name} benchmarks")
+        try:
+            await SUITES[name](results, quick)
+        except Exception as e:
+            logger.error(f"{name} benchmarks failed: {e}", exc_info=True)
+            results.skip(name, f"failed: {e}")
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Offline performance benchmarks')
+    parser.add_argument('--suites', default=','.join(SUITES),
+                        help=f"comma-separated subset of: {', '.join(SUITES)}")
+    parser.add_argument('--quick', action='store_true', help='fewer iterations, for a fast sanity check')
+    parser.add_argument('--output', default=os.path.join(RESULTS_DIR, 'latest.json'))
+    parser.add_argument('--baseline', help='results file to compare against (default: results/baseline.json if present)')
+    parser.add_argument('--thresholds', help='regression thresholds file (default: benchmarks/thresholds.json)')
+    parser.add_argument('--save-baseline', action='store_true', help='also write the results as the new baseline')
+    args = parser.parse_args()
+
+    suites = [name.strip() for name in args.suites.split(',') if name.strip()]
+    unknown = [name for name in suites if name not in SUITES]
+    if unknown:
+        parser.error(f"unknown suites: {', '.join(unknown)}")
+
+    # Only warnings from the code under test; INFO order logs would dominate the order-path numbers
+    setup_logging(level='WARNING')
+    logger.setLevel(logging.INFO)
+    try:
+        results = asyncio.run(run(suites, args.quick))
+    finally:
+        shutdown_logging()
+
+    results.save(args.output)
+    baseline_path = args.baseline or os.path.join(RESULTS_DIR, 'baseline.json')
+    rows = []
+    if args.save_baseline:
+        pass
+    elif os.path.exists(baseline_path):
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        rows = compare(results.to_dict(), baseline, load_thresholds(args.thresholds))
+    elif args.baseline:
+        print(f"Baseline {args.baseline} not found", file=sys.stderr)
+        return 2
+
+    print(format_report(results, rows))
+    print(f"\nResults written to {args.output}")
+    if args.save_baseline:
+        results.save(baseline_path)
+        print(f"Baseline written to {baseline_path}")
+
+    failed = [row for row in rows if row['failed']]
+    if failed:
+        print(f"\n{len(failed)} metric(s) regressed past their threshold:", file=sys.stderr)
+        for row in failed:
+            print(f"  {row['metric']}: {row['baseline']} -> {row['current']} {row['unit']} "
+                  f"({row['regression'] * 100:.1f}% worse, {row['allowed'] * 100:.0f}% allowed)", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,211 @@
+"""
+Offline stand-in for a ccxt async exchange.
+
+Implements the subset of the ccxt surface ExchangeClient uses, backed by
+seeded random-walk prices, with an optional per-request latency and a
+rateLimit-spaced throttler that behaves like ccxt's (requests queue up and
+leave one every rateLimit milliseconds), so rate-limited fan-out can be
+measured without touching a real venue.
+"""
+import asyncio
+import itertools
+import random
+import time
+import zlib
+from collections import deque
+from typing import Dict, List, Optional
+
+TIMEFRAME_SECONDS = {'1m': 60, '5m': 300, '15m': 900, '1h': 3600, '4h': 14400, '1d': 86400}
+
+
+def synthetic_ohlcv(limit: int, start_price: float = 100.0, timeframe: str = '1h',
+                    seed: int = 0, end_ms: Optional[int] = None) -> List[List]:
+    """Random-walk candles in ccxt's [timestamp, open, high, low, close, volume] layout"""
+    rng = random.Random(seed)
+    step_ms = TIMEFRAME_SECONDS.get(timeframe, 3600) * 1000
+    end_ms = end_ms if end_ms is not None else 1_700_000_000_000
+    price = start_price
+    candles = []
+    for i in range(limit):
+        open_price = price
+        close_price = max(0.01, open_price * (1 + rng.gauss(0, 0.01)))
+        high = max(open_price, close_price) * (1 + abs(rng.gauss(0, 0.004)))
+        low = min(open_price, close_price) * (1 - abs(rng.gauss(0, 0.004)))
+        volume = rng.uniform(10, 1000)
+        candles.append([end_ms - (limit - 1 - i) * step_ms, open_price, high, low, close_price, volume])
+        price = close_price
+    return candles
+
+
+_WORDS = {
+    'bullish': ['moon', 'bullish', 'breakout', 'pump', 'great', 'buying', 'love', 'strong', 'rally'],
+    'bearish': ['dump', 'bearish', 'crash', 'scam', 'selling', 'terrible', 'weak', 'rekt', 'fear'],
+    'neutral': ['price', 'chart', 'today', 'volume', 'exchange', 'market', 'update', 'holding', 'news'],
+}
+
+
+def synthetic_texts(count: int, symbol: str = 'BTC', seed: int = 0) -> List[str]:
+    """Tweet-sized texts with a mix of bullish, bearish and neutral wording"""
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        mood = rng.choice(list(_WORDS))
+        words = rng.choices(_WORDS[mood], k=rng.randint(4, 10)) + rng.choices(_WORDS['neutral'], k=rng.randint(2, 8))
+        rng.shuffle(words)
+        texts.append(f"${symbol} " + ' '.join(words) + rng.choice(['!', '.', '?', ' #crypto']))
+    return texts
+
+
+class FakeThrottler:
+    """Spaces requests rateLimit milliseconds apart; `queue` mirrors ccxt's throttler"""
+
+    def __init__(self, rate_limit_ms: float):
+        self.interval = rate_limit_ms / 1000.0
+        self.queue: deque = deque()
+        self._next_slot = 0.0
+        self.max_depth = 0
+
+    async def __call__(self):
+        if self.interval <= 0:
+            return
+        waiter = object()
+        self.queue.append(waiter)
+        self.max_depth = max(self.max_depth, len(self.queue))
+        try:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+            if slot > now:
+                await asyncio.sleep(slot - now)
+        finally:
+            self.queue.remove(waiter)
+
+
+class FakeExchange:
+    """
+    ccxt-compatible fake venue.
+
+    `latency` is added to every request (simulated network round trip) and
+    `rate_limit_ms` enables the throttler. `calls` counts requests per
+    method so benchmarks can report how many upstream calls a path made.
+    """
+
+    def __init__(self, symbols: List[str], latency: float = 0.0, rate_limit_ms: float = 0.0,
+                 fetch_tickers: bool = True, seed: int = 0):
+        self.id = 'fake'
+        self.latency = latency
+        self.rateLimit = rate_limit_ms
+        self.enableRateLimit = rate_limit_ms > 0
+        self.throttler = FakeThrottler(rate_limit_ms)
+        self.has = {'fetchTickers': fetch_tickers, 'fetchOHLCV': True}
+        self.calls: Dict[str, int] = {}
+        self._rng = random.Random(seed)
+        self._prices = {symbol: self._rng.uniform(1, 50000) for symbol in symbols}
+        self._order_ids = itertools.count(1)
+        self._orders: Dict[str, Dict] = {}
+
+    async def _request(self, method: str):
+        self.calls[method] = self.calls.get(method, 0) + 1
+        await self.throttler()
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+        else:
+            await asyncio.sleep(0)
+
+    def _price(self, symbol: str) -> float:
+        price = self._prices.get(symbol)
+        if price is None:
+            price = self._prices[symbol] = self._rng.uniform(1, 50000)
+        price *= 1 + self._rng.gauss(0, 0.0005)
+        self._prices[symbol] = price
+        return price
+
+    def _ticker(self, symbol: str) -> Dict:
+        price = self._price(symbol)
+        return {
+            'symbol': symbol,
+            'last': price,
+            'bid': price * 0.9995,
+            'ask': price * 1.0005,
+            'high': price * 1.02,
+            'low': price * 0.98,
+            'baseVolume': 1000.0,
+            'quoteVolume': 1000.0 * price,
+            'percentage': self._rng.uniform(-5, 5),
+            'timestamp': int(time.time() * 1000),
+        }
+
+    async def fetch_ticker(self, symbol: str) -> Dict:
+        await self._request('fetch_ticker')
+        return self._ticker(symbol)
+
+    async def fetch_tickers(self, symbols: Optional[List[str]] = None) -> Dict[str, Dict]:
+        await self._request('fetch_tickers')
+        return {symbol: self._ticker(symbol) for symbol in (symbols or list(self._prices))}
+
+    async def fetch_ohlcv(self, symbol: str, timeframe: str = '1h', since=None, limit: int = 100) -> List[List]:
+        await self._request('fetch_ohlcv')
+        seed = zlib.crc32(f"{symbol}:{timeframe}".encode())
+        return synthetic_ohlcv(limit, self._prices.get(symbol, 100.0), timeframe, seed=seed)
+
+    async def fetch_order_book(self, symbol: str, limit: Optional[int] = None, params=None) -> Dict:
+        await self._request('fetch_order_book')
+        price = self._price(symbol)
+        depth = limit or 50
+        tick = price * 0.0001
+        return {
+            'symbol': symbol,
+            'bids': [[price - (i + 1) * tick, self._rng.uniform(0.1, 5.0)] for i in range(depth)],
+            'asks': [[price + (i + 1) * tick, self._rng.uniform(0.1, 5.0)] for i in range(depth)],
+            'timestamp': int(time.time() * 1000),
+            'nonce': None,
+        }
+
+    async def fetch_balance(self) -> Dict:
+        await self._request('fetch_balance')
+        return {'total': {'USDT': 10000.0}, 'free': {'USDT': 10000.0}, 'used': {'USDT': 0.0}}
+
+    def _order(self, symbol: str, order_type: str, side: str, amount: float, price: Optional[float]) -> Dict:
+        fill_price = price if price is not None else self._price(symbol)
+        order = {
+            'id': str(next(self._order_ids)),
+            'symbol': symbol,
+            'type': order_type,
+            'side': side,
+            'amount': amount,
+            'price': fill_price,
+            'average': fill_price,
+            'filled': amount if order_type == 'market' else 0.0,
+            'status': 'closed' if order_type == 'market' else 'open',
+            'timestamp': int(time.time() * 1000),
+        }
+        self._orders[order['id']] = order
+        return dict(order)
+
+    async def create_market_order(self, symbol: str, side: str, amount: float, price=None, params=None) -> Dict:
+        await self._request('create_market_order')
+        return self._order(symbol, 'market', side, amount, None)
+
+    async def create_limit_order(self, symbol: str, side: str, amount: float, price: float, params=None) -> Dict:
+        await self._request('create_limit_order')
+        return self._order(symbol, 'limit', side, amount, price)
+
+    async def fetch_order(self, order_id: str, symbol: Optional[str] = None, params=None) -> Dict:
+        """An open limit order fills once the walked price trades through it"""
+        await self._request('fetch_order')
+        order = self._orders[order_id]
+        if order['status'] == 'open':
+            price = self._price(order['symbol'])
+            if (price <= order['price']) if order['side'] == 'buy' else (price >= order['price']):
+                order.update(filled=order['amount'], status='closed')
+        return dict(order)
+
+    async def cancel_order(self, order_id: str, symbol: Optional[str] = None, params=None) -> Dict:
+        await self._request('cancel_order')
+        order = self._orders[order_id]
+        if order['status'] == 'open':
+            order['status'] = 'canceled'
+        return dict(order)
+
+    async def close(self):
+        pass
@@ -0,0 +1,133 @@
+"""
+Result collection and regression checks for the benchmark suites.
+
+Every metric records which direction is better, so a comparison against a
+baseline run can flag a throughput drop and a latency rise the same way.
+Allowed regressions are relative and configured per metric pattern in
+thresholds.json.
+"""
+import fnmatch
+import json
+import math
+import os
+import platform
+import sys
+import time
+from typing import Dict, List, Optional
+
+THRESHOLDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'thresholds.json')
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of unsorted samples"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Results:
+    """Metrics from one benchmark run, keyed 'suite.case.metric'"""
+
+    def __init__(self):
+        self.metrics: Dict[str, Dict] = {}
+        self.skipped: Dict[str, str] = {}
+        self.started_at = time.time()
+
+    def add(self, name: str, value: float, unit: str, better: str = 'lower'):
+        if better not in ('lower', 'higher'):
+            raise ValueError(f"better must be 'lower' or 'higher', not {better}")
+        self.metrics[name] = {'value': round(float(value), 6), 'unit': unit, 'better': better}
+
+    def add_latencies(self, prefix: str, samples: List[float]):
+        """p50/p95/p99 in milliseconds from per-operation durations in seconds"""
+        for pct in (50, 95, 99):
+            self.add(f"{prefix}.p{pct}_ms", percentile(samples, pct) * 1000, 'ms')
+
+    def add_throughput(self, name: str, operations: int, seconds: float, unit: str = 'ops/s'):
+        self.add(name, operations / seconds if seconds > 0 else 0.0, unit, better='higher')
+
+    def skip(self, suite: str, reason: str):
+        self.skipped[suite] = reason
+
+    def to_dict(self) -> Dict:
+        return {
+            'started_at': self.started_at,
+            'duration': time.time() - self.started_at,
+            'environment': {
+                'python': sys.version.split()[0],
+                'implementation': platform.python_implementation(),
+                'platform': platform.platform(),
+                'machine': platform.machine(),
+                'cpus': os.cpu_count(),
+            },
+            'metrics': self.metrics,
+            'skipped': self.skipped,
+        }
+
+    def save(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2, sort_keys=True)
+
+
+def load_thresholds(path: Optional[str] = None) -> Dict:
+    with open(path or THRESHOLDS_PATH) as f:
+        return json.load(f)
+
+
+def threshold_for(name: str, thresholds: Dict) -> float:
+    """Allowed relative regression for a metric; the longest matching pattern wins"""
+    matches = [pattern for pattern in thresholds.get('metrics', {}) if fnmatch.fnmatch(name, pattern)]
+    if not matches:
+        return thresholds.get('default', 0.2)
+    return thresholds['metrics'][max(matches, key=len)]
+
+
+def compare(current: Dict, baseline: Dict, thresholds: Dict) -> List[Dict]:
+    """One row per metric present in both runs, flagging those past their threshold"""
+    rows = []
+    min_abs = thresholds.get('min_absolute', {})
+    for name, metric in sorted(current['metrics'].items()):
+        previous = baseline.get('metrics', {}).get(name)
+        if previous is None:
+            continue
+        old, new = previous['value'], metric['value']
+        allowed = threshold_for(name, thresholds)
+        if metric['better'] == 'higher':
+            change = (old - new) / old if old else 0.0
+        else:
+            change = (new - old) / old if old else (1.0 if new > 0 else 0.0)
+        # Ignore changes smaller than the unit's noise floor (e.g. sub-millisecond latency jitter)
+        noise = abs(new - old) < min_abs.get(metric['unit'], 0.0)
+        rows.append({
+            'metric': name,
+            'baseline': old,
+            'current': new,
+            'unit': metric['unit'],
+            'regression': change,
+            'allowed': allowed,
+            'failed': change > allowed and not noise,
+        })
+    return rows
+
+
+def format_report(results: Results, rows: Optional[List[Dict]] = None) -> str:
+    lines = []
+    by_name = {row['metric']: row for row in rows or []}
+    width = max((len(name) for name in results.metrics), default=10)
+    for name, metric in sorted(results.metrics.items()):
+        line = f"{name:<{width}}  {metric['value']:>14.3f} {metric['unit']}"
+        row = by_name.get(name)
+        if row is not None:
+            direction = 'worse' if row['regression'] > 0 else 'better'
+            line += f"  (baseline {row['baseline']:.3f}, {abs(row['regression']) * 100:.1f}% {direction})"
+            if row['failed']:
+                line += f"  REGRESSION > {row['allowed'] * 100:.0f}%"
+        lines.append(line)
+    for suite, reason in sorted(results.skipped.items()):
+        lines.append(f"{suite}: skipped ({reason})")
+    return '\n'.join(lines)
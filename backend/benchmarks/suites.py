@@ -0,0 +1,326 @@
+"""
+Benchmark suites. Each one runs against FakeExchange and synthetic data
+and records its metrics into a Results; suites whose optional libraries
+are missing are recorded as skipped instead of failing the run.
+"""
+import asyncio
+import importlib.util
+import os
+import socket
+import sys
+import tempfile
+import time
+import zlib
+from typing import Awaitable, Callable, Dict, List
+from config import Config
+from exchange_client import ExchangeClient
+from .fake_exchange import FakeExchange, synthetic_texts
+from .harness import Results
+
+SYMBOLS = [f"{base}/USDT" for base in (
+    'BTC', 'ETH', 'SOL', 'XRP', 'ADA', 'DOGE', 'AVAX', 'DOT', 'LINK', 'MATIC',
+    'LTC', 'TRX', 'ATOM', 'NEAR', 'UNI', 'XLM', 'ETC', 'FIL', 'APT', 'ARB',
+)]
+
+
+def _missing(*modules: str) -> List[str]:
+    return [name for name in modules if importlib.util.find_spec(name) is None]
+
+
+def _client(exchange: FakeExchange, cache=None) -> ExchangeClient:
+    return ExchangeClient(exchange.id, Config, cache=cache, exchange=exchange)
+
+
+async def _timed(operation: Callable[[], Awaitable], iterations: int, warmup: int = 0) -> List[float]:
+    for _ in range(warmup):
+        await operation()
+    durations = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await operation()
+        durations.append(time.perf_counter() - started)
+    return durations
+
+
+async def bench_technical(results: Results, quick: bool):
+    """TechnicalAnalyzer.analyze and get_support_resistance over 100/200 candles"""
+    missing = _missing('pandas', 'ta')
+    if missing:
+        results.skip('technical', f"missing {', '.join(missing)}")
+        return
+    from technical_analyzer import TechnicalAnalyzer
+
+    analyzer = TechnicalAnalyzer(_client(FakeExchange(SYMBOLS)))
+    iterations = 20 if quick else 200
+
+    # First call pays for importing pandas and ta
+    await analyzer.analyze('BTC/USDT')
+    samples = await _timed(lambda: analyzer.analyze('BTC/USDT', '1h', 100), iterations)
+    results.add_throughput('technical.analyze.ops_per_sec', iterations, sum(samples))
+    results.add_latencies('technical.analyze', samples)
+
+    samples = await _timed(lambda: analyzer.get_support_resistance('BTC/USDT', '1d', 200), iterations)
+    results.add_throughput('technical.support_resistance.ops_per_sec', iterations, sum(samples))
+    results.add_latencies('technical.support_resistance', samples)
+
+
+async def bench_sentiment(results: Results, quick: bool):
+    """VADER + TextBlob scoring of tweet-sized texts, and the scored-post log append"""
+    missing = _missing('aiohttp', 'textblob', 'vaderSentiment')
+    if missing:
+        results.skip('sentiment', f"missing {', '.join(missing)}")
+        return
+    from sentiment_analyzer import SentimentAnalyzer
+    from sentiment_log import SentimentLog
+
+    texts = synthetic_texts(200 if quick else 2000)
+    with tempfile.TemporaryDirectory() as directory:
+        post_log = SentimentLog(directory)
+        analyzer = SentimentAnalyzer(post_log=post_log)
+        analyzer._score_text(texts[0])  # Loads the VADER lexicon
+
+        started = time.perf_counter()
+        scored = []
+        for text in texts:
+            vader_compound, textblob_polarity = analyzer._score_text(text)
+            scored.append({
+                'text': text,
+                'vader_compound': vader_compound,
+                'textblob_polarity': textblob_polarity,
+                'engagement': 0,
+                'created_at': None,
+            })
+        elapsed = time.perf_counter() - started
+        results.add_throughput('sentiment.score.texts_per_sec', len(texts), elapsed, 'texts/s')
+
+        started = time.perf_counter()
+        analyzer._log_items('twitter', {'BTC': scored})
+        analyzer._summarize_twitter('BTC', scored)
+        post_log.flush()
+        elapsed = time.perf_counter() - started
+        results.add_throughput('sentiment.record.items_per_sec', len(scored), elapsed, 'items/s')
+        await analyzer.close()
+
+
+async def bench_fanout(results: Results, quick: bool):
+    """Concurrent ticker reads through the cache and the rate limiter"""
+    from cache import build_cache
+
+    callers = 20 if quick else 100
+    rate_limit_ms, latency = 20.0, 0.005
+
+    # Batched endpoint behind the shared cache: concurrent callers should cost one request
+    exchange = FakeExchange(SYMBOLS, latency=latency, rate_limit_ms=rate_limit_ms)
+    client = _client(exchange, cache=build_cache('local'))
+    started = time.perf_counter()
+    await asyncio.gather(*(client.get_tickers(SYMBOLS) for _ in range(callers)))
+    results.add('fanout.batched_cached.wall_ms', (time.perf_counter() - started) * 1000, 'ms')
+    results.add('fanout.batched_cached.exchange_calls', sum(exchange.calls.values()), 'calls')
+
+    # Uncached per-symbol fallback: every caller queues on the rate limiter
+    exchange = FakeExchange(SYMBOLS, latency=latency, rate_limit_ms=rate_limit_ms, fetch_tickers=False)
+    client = _client(exchange)
+    per_symbol_callers = max(1, callers // 20)
+    started = time.perf_counter()
+    samples = []
+
+    async def read():
+        call_started = time.perf_counter()
+        await client.get_tickers(SYMBOLS)
+        samples.append(time.perf_counter() - call_started)
+
+    await asyncio.gather(*(read() for _ in range(per_symbol_callers)))
+    elapsed = time.perf_counter() - started
+    requests = sum(exchange.calls.values())
+    results.add('fanout.per_symbol.wall_ms', elapsed * 1000, 'ms')
+    results.add_throughput('fanout.per_symbol.requests_per_sec', requests, elapsed, 'req/s')
+    results.add('fanout.per_symbol.max_queue_depth', exchange.throttler.max_depth, 'requests')
+    results.add_latencies('fanout.per_symbol', samples)
+
+
+async def bench_orders(results: Results, quick: bool):
+    """ExchangeClient order-path overhead (metrics, tracing, logging) over a zero-latency venue"""
+    client = _client(FakeExchange(SYMBOLS))
+    iterations = 500 if quick else 5000
+
+    samples = await _timed(lambda: client.place_market_order('BTC/USDT', 'buy', 0.01), iterations, iterations // 10)
+    results.add_throughput('orders.market.ops_per_sec', iterations, sum(samples))
+    results.add_latencies('orders.market', samples)
+
+    samples = await _timed(lambda: client.place_limit_order('ETH/USDT', 'sell', 0.5, 2000.0), iterations,
+                           iterations // 10)
+    results.add_throughput('orders.limit.ops_per_sec', iterations, sum(samples))
+    results.add_latencies('orders.limit', samples)
+
+
+async def bench_orderbook(results: Results, quick: bool):
+    """L2 level updates and VWAP/slippage queries on a 1000-level book; top-of-book churn at 50-10000 levels"""
+    import random
+    from order_book import OrderBook
+
+    rng = random.Random(0)
+    book = OrderBook('BTC/USDT')
+    book.apply_snapshot({
+        'bids': [[30000 - i * 0.5, rng.uniform(0.1, 5)] for i in range(1, 1001)],
+        'asks': [[30000 + i * 0.5, rng.uniform(0.1, 5)] for i in range(1, 1001)],
+    })
+    iterations = 10000 if quick else 100000
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        offset = rng.randint(1, 1000) * 0.5
+        size = rng.choice((0.0, rng.uniform(0.1, 5)))
+        if rng.random() < 0.5:
+            book.apply_deltas(bids=[(30000 - offset, size)])
+        else:
+            book.apply_deltas(asks=[(30000 + offset, size)])
+    results.add_throughput('orderbook.update.ops_per_sec', iterations, time.perf_counter() - started)
+
+    # Queries between top-of-book updates, the pattern a live feed produces
+    started = time.perf_counter()
+    for i in range(iterations):
+        book.apply_deltas(asks=[(30000.5, rng.uniform(0.1, 5))])
+        book.vwap_for_size('buy', 50.0)
+        book.size_for_slippage('sell', 0.002)
+    results.add_throughput('orderbook.update_and_query.ops_per_sec', iterations, time.perf_counter() - started)
+
+    # A level appearing and vanishing at the top shifts every level behind it: the worst case for the arrays
+    for depth in (50, 1000, 10000):
+        deep = OrderBook('BTC/USDT')
+        deep.apply_snapshot({'asks': [[30000 + i * 0.5, 1.0] for i in range(1, depth + 1)]})
+        started = time.perf_counter()
+        for i in range(iterations):
+            deep.apply_deltas(asks=[(30000.25, 0.0 if i % 2 else 1.0)])
+        results.add_throughput(f"orderbook.top_churn_{depth}.ops_per_sec", iterations, time.perf_counter() - started)
+
+
+async def bench_fusion(results: Results, quick: bool):
+    """Hybrid signal fusion over many symbols, warm and with a slow sentiment source"""
+    from signal_fusion import InputSource, SignalFusion, sentiment_reading, technical_reading
+
+    count = 200 if quick else 1000
+    targets = [('binance', f"SYM{i}/USDT", '1h') for i in range(count)]
+
+    def build(sentiment_latency: float, timeout: float) -> SignalFusion:
+        async def load_technical(keys):
+            await asyncio.sleep(0.001)
+            return {key: {'overall_signal': 'buy', 'signal_score': (zlib.crc32(key[1].encode()) % 7 - 3) / 6,
+                          'current_price': 100.0} for key in keys}
+
+        async def load_sentiment(assets):
+            await asyncio.sleep(sentiment_latency)
+            return {asset: {'combined_sentiment_score': 0.3, 'sentiment_label': 'bullish',
+                            'sources': {'twitter': {'sentiment_score': 0.3}}} for asset in assets}
+
+        return SignalFusion([
+            InputSource('technical', load_technical, technical_reading, 0.6, 60, 300, timeout),
+            InputSource('sentiment', load_sentiment, sentiment_reading, 0.4, 300, 1800, timeout,
+                        key=lambda target: target[1].split('/')[0]),
+        ], neutral_band=0.15)
+
+    # Warm inputs: the pass is pure combination work
+    fusion = build(0.001, 1.0)
+    await fusion.fuse_many(targets)
+    rounds = 5 if quick else 20
+    started = time.perf_counter()
+    for _ in range(rounds):
+        await fusion.fuse_many(targets)
+    results.add_throughput('fusion.warm.symbols_per_sec', rounds * count, time.perf_counter() - started, 'symbols/s')
+    await fusion.close()
+
+    # Cold start with a sentiment source far slower than the input timeout
+    fusion = build(1.0, 0.05)
+    started = time.perf_counter()
+    fused = await fusion.fuse_many(targets)
+    results.add('fusion.cold_slow_source.wall_ms', (time.perf_counter() - started) * 1000, 'ms')
+    results.add('fusion.cold_slow_source.fused', sum(1 for signal in fused.values() if signal), 'signals',
+                better='higher')
+    await fusion.close()
+
+
+def _seed_market_state(state):
+    for i in range(20):
+        state.upsert_bot({'id': f"bench-{i}", 'name': f"Bench {i}", 'pair': SYMBOLS[i % len(SYMBOLS)],
+                          'status': 'running'})
+    for i, symbol in enumerate(SYMBOLS):
+        state.update_price({'symbol': symbol, 'price': 100.0 + i, 'change': 1.0, 'volume': 1000.0})
+    for i in range(200):
+        state.add_signal({'symbol': SYMBOLS[i % len(SYMBOLS)], 'signalType': 'buy', 'strength': 0.5,
+                          'content': 'benchmark signal', 'botId': f"bench-{i % 20}"})
+    for i in range(500):
+        state.add_trade({'symbol': SYMBOLS[i % len(SYMBOLS)], 'side': 'buy', 'amount': 0.1, 'price': 100.0,
+                         'botId': f"bench-{i % 20}"})
+
+
+async def bench_api(results: Results, quick: bool):
+    """Dashboard endpoint latency for concurrent HTTP clients while prices keep changing"""
+    missing = _missing('fastapi', 'uvicorn', 'aiohttp')
+    if missing:
+        results.skip('api', f"missing {', '.join(missing)}")
+        return
+    import aiohttp
+    import uvicorn
+
+    # api_server lives in the repository root, next to backend/
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    from api_server import app
+    from market_state import market_state
+
+    _seed_market_state(market_state)
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    # lifespan='off' keeps the routers' startup hooks (exchange refreshers, storage) from running
+    server = uvicorn.Server(uvicorn.Config(app, lifespan='off', log_level='warning', access_log=False))
+    server_task = asyncio.create_task(server.serve(sockets=[sock]))
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    async def keep_prices_moving():
+        tick = 0
+        while True:
+            tick += 1
+            market_state.update_price({'symbol': SYMBOLS[tick % len(SYMBOLS)], 'price': 100.0 + tick % 97})
+            await asyncio.sleep(0.01)
+
+    endpoints = ['/prices', '/bots', '/signals', '/portfolio', '/trades']
+    clients = 10 if quick else 50
+    requests_per_client = 20 if quick else 100
+    samples: Dict[str, List[float]] = {endpoint: [] for endpoint in endpoints}
+    writer = asyncio.create_task(keep_prices_moving())
+    try:
+        async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=clients)) as session:
+            async def client(index: int):
+                for n in range(requests_per_client):
+                    endpoint = endpoints[(index + n) % len(endpoints)]
+                    call_started = time.perf_counter()
+                    async with session.get(f"http://127.0.0.1:{port}{endpoint}") as response:
+                        await response.read()
+                        if response.status != 200:
+                            raise RuntimeError(f"{endpoint} returned {response.status}")
+                    samples[endpoint].append(time.perf_counter() - call_started)
+
+            started = time.perf_counter()
+            await asyncio.gather(*(client(i) for i in range(clients)))
+            elapsed = time.perf_counter() - started
+    finally:
+        writer.cancel()
+        server.should_exit = True
+        await server_task
+
+    results.add_throughput('api.all.requests_per_sec', clients * requests_per_client, elapsed, 'req/s')
+    for endpoint, endpoint_samples in samples.items():
+        results.add_latencies(f"api.{endpoint.strip('/')}", endpoint_samples)
+
+
+SUITES: Dict[str, Callable[[Results, bool], Awaitable[None]]] = {
+    'technical': bench_technical,
+    'sentiment': bench_sentiment,
+    'fanout': bench_fanout,
+    'orders': bench_orders,
+    'orderbook': bench_orderbook,
+    'fusion': bench_fusion,
+    'api': bench_api,
+}
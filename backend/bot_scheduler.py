@@ -0,0 +1,641 @@
+import asyncio
+import heapq
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from cache import TieredCache, cache as default_cache
+from config import Config
+from metrics import registry
+from startup import lazy_module, mark
+from tracing import CpuMeter, cpu_block, tracer
+import logging
+
+logger = logging.getLogger(__name__)
+
+BOT_RUN_LATENCY = registry.histogram(
+    'hybridbot_bot_run_seconds', 'Bot run latency including shared data loads', ('strategy',)
+)
+BOT_RUN_FAILURES = registry.counter(
+    'hybridbot_bot_run_failures_total', 'Bot runs that raised or overran a budget', ('strategy', 'reason')
+)
+GROUP_LOAD_CPU = registry.histogram(
+    'hybridbot_group_load_cpu_seconds', 'CPU time of shared group data loads (indicators and scoring)'
+)
+SCHEDULER_BOTS = registry.gauge('hybridbot_scheduler_bots', 'Scheduled bots by state', ('state',))
+SCHEDULER_RUNS = registry.gauge('hybridbot_scheduler_runs', 'Bot runs in flight by phase', ('phase',))
+
+GroupKey = Tuple[str, str, str]  # (exchange, symbol, timeframe)
+
+STRATEGIES = ('technical', 'sentiment', 'hybrid')
+
+
+@dataclass
+class ScheduledBot:
+    """A bot known to the scheduler, with its cadence and run statistics"""
+    id: str
+    name: str
+    strategy: str
+    exchange: str
+    symbol: str
+    timeframe: str = '1h'
+    interval: float = 60.0
+    paused: bool = False
+    pause_reason: Optional[str] = None
+
+    runs: int = 0
+    errors: int = 0
+    overruns: int = 0
+    consecutive_overruns: int = 0
+    skipped: int = 0
+    last_run: Optional[float] = None
+    last_duration: float = 0.0
+    last_cpu: float = 0.0
+    last_decision: Optional[str] = None
+    running: bool = False
+    schedule_seq: int = 0  # Only the heap entry with this sequence number is live
+
+    @property
+    def group_key(self) -> GroupKey:
+        return (self.exchange, self.symbol, self.timeframe)
+
+    def stats(self) -> Dict:
+        return {
+            'id': self.id,
+            'strategy': self.strategy,
+            'group': '|'.join(self.group_key),
+            'paused': self.paused,
+            'pause_reason': self.pause_reason,
+            'runs': self.runs,
+            'errors': self.errors,
+            'overruns': self.overruns,
+            'skipped': self.skipped,
+            'last_run': self.last_run,
+            'last_duration': self.last_duration,
+            'last_cpu': self.last_cpu,
+            'last_decision': self.last_decision,
+        }
+
+
+@dataclass
+class BotGroup:
+    """Bots sharing (exchange, symbol, timeframe); their market data is fetched once per refresh"""
+    key: GroupKey
+    members: Set[str] = field(default_factory=set)
+    data: Optional[Dict] = None
+    fetched_at: float = 0.0
+    loads: int = 0
+    last_load_cpu: float = 0.0  # Charged to the group, not to the member whose run started the load
+    _inflight: Optional[asyncio.Task] = None
+
+    async def get(self, loader: Callable[[], Awaitable[Dict]], max_age: float) -> Dict:
+        """Return group data, reloading it at most once per max_age across all members"""
+        if self.data is not None and time.monotonic() - self.fetched_at < max_age:
+            return self.data
+        if self._inflight is None:
+            # The load is its own task: a member that times out stops waiting without cancelling it
+            self._inflight = _shared_task(self._load(loader))
+        return await asyncio.shield(self._inflight)
+
+    async def _load(self, loader: Callable[[], Awaitable[Dict]]) -> Dict:
+        meter = CpuMeter()
+        try:
+            with meter:
+                data = await loader()
+            self.data, self.fetched_at = data, time.monotonic()
+            return data
+        finally:
+            self._inflight = None
+            self.loads += 1
+            self.last_load_cpu = meter.used
+            GROUP_LOAD_CPU.observe(meter.used)
+
+    def stats(self) -> Dict:
+        return {
+            'group': '|'.join(self.key),
+            'members': len(self.members),
+            'loads': self.loads,
+            'fetched_at': self.fetched_at or None,
+            'last_load_cpu': self.last_load_cpu,
+        }
+
+
+class BotScheduler:
+    """
+    Runs every active bot on its own cadence from a single timer heap.
+
+    Bots are grouped by (exchange, symbol, timeframe) so the OHLCV fetch and
+    indicator computation are shared by all bots in a group, and sentiment is
+    refreshed for all symbols in one batched call. Hybrid bots read both
+    through SignalFusion, which gathers them concurrently and falls back to
+    recent cached values rather than waiting on a slow source. Each run is bounded by a
+    wall-clock budget and a CPU budget for the strategy itself; bots that keep
+    overrunning are paused.
+    """
+
+    def __init__(self, market_state=None, max_concurrency: int = 64, jitter: float = 0.1,
+                 time_budget: float = 30.0, cpu_budget: float = 0.05, max_overruns: int = 5,
+                 on_decision: Optional[Callable[[ScheduledBot, Dict], Awaitable[None]]] = None,
+                 symbols: Optional[Set[str]] = None, cache: Optional[TieredCache] = None,
+                 client_for: Optional[Callable[[str], object]] = None,
+                 sentiment_factory: Optional[Callable[[], object]] = None):
+        self.market_state = market_state
+        self.cache = cache or default_cache
+        # Builders for the exchange clients and sentiment analyzer (e.g. capture replays); live ones by default
+        self._client_for = client_for
+        self._sentiment_factory = sentiment_factory
+        # When set, only bots trading these symbols are scheduled (multi-worker sharding)
+        self.symbols = set(symbols) if symbols is not None else None
+        self.jitter = jitter
+        self.time_budget = time_budget
+        self.cpu_budget = cpu_budget
+        self.max_overruns = max_overruns
+        self.on_decision = on_decision
+
+        self.bots: Dict[str, ScheduledBot] = {}
+        self.groups: Dict[GroupKey, BotGroup] = {}
+
+        self._heap: List[Tuple[float, int, str]] = []
+        self._seq = 0
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop_task: Optional[asyncio.Task] = None
+        self._inflight: Set[asyncio.Task] = set()
+        self._executing = 0
+        self._warm_up_task: Optional[asyncio.Task] = None
+        self._accepting = False
+
+        # Lazily created per-exchange analyzers and the shared sentiment analyzer
+        self._exchange_clients: Dict[str, object] = {}
+        self._technical_analyzers: Dict[str, object] = {}
+        self._sentiment_analyzer = None
+        self._sentiment: Dict[str, Dict] = {}
+        self._sentiment_fetched_at = 0.0
+        self._sentiment_inflight: Optional[asyncio.Task] = None
+        self._fusion = None
+
+    # ------------------------------------------------------------------
+    # Bot registry
+    # ------------------------------------------------------------------
+
+    def upsert_bot(self, record: Dict):
+        """Add or update a bot from its API record (id, name, strategy, exchange, pair, status)"""
+        if record.get('strategy') not in STRATEGIES:
+            logger.warning(f"Bot {record.get('id')} has unsupported strategy {record.get('strategy')!r}, not scheduling")
+            return
+
+        bot_id = str(record['id'])
+        bot = self.bots.get(bot_id)
+        symbol = record.get('pair') or record.get('symbol') or 'BTC/USDT'
+        if self.symbols is not None and symbol not in self.symbols:
+            self.remove_bot(bot_id)  # Owned by another worker
+            return
+        timeframe = record.get('timeframe', '1h')
+        if bot is not None and bot.group_key != (record['exchange'], symbol, timeframe):
+            self._leave_group(bot)
+            bot = None
+
+        if bot is None:
+            bot = ScheduledBot(
+                id=bot_id,
+                name=record.get('name', bot_id),
+                strategy=record['strategy'],
+                exchange=record['exchange'],
+                symbol=symbol,
+                timeframe=timeframe,
+                interval=float(record.get('interval', Config.BOT_DEFAULT_INTERVAL)),
+            )
+            self.bots[bot_id] = bot
+            self.groups.setdefault(bot.group_key, BotGroup(bot.group_key)).members.add(bot_id)
+            self._schedule(bot, initial=True)
+        else:
+            bot.name = record.get('name', bot.name)
+            bot.interval = float(record.get('interval', bot.interval))
+
+        if record.get('status', 'active') == 'active':
+            self.resume(bot_id)
+        else:
+            self.pause(bot_id, record.get('status'))
+
+    def set_symbols(self, symbols: Optional[Set[str]]):
+        """Change the symbol shard this scheduler owns, dropping and adopting bots to match"""
+        self.symbols = set(symbols) if symbols is not None else None
+        for bot in list(self.bots.values()):
+            if self.symbols is not None and bot.symbol not in self.symbols:
+                self.remove_bot(bot.id)
+        if self.market_state is not None:
+            for record in self.market_state.snapshot('bots'):
+                self.upsert_bot(record)
+
+    def remove_bot(self, bot_id: str):
+        bot = self.bots.pop(bot_id, None)
+        if bot is not None:
+            self._leave_group(bot)
+
+    def _leave_group(self, bot: ScheduledBot):
+        group = self.groups.get(bot.group_key)
+        if group is not None:
+            group.members.discard(bot.id)
+            if not group.members:
+                del self.groups[bot.group_key]
+
+    def pause(self, bot_id: str, reason: Optional[str] = 'paused'):
+        """Stop scheduling a bot without removing it"""
+        bot = self.bots.get(bot_id)
+        if bot is not None and not bot.paused:
+            bot.paused = True
+            bot.pause_reason = reason
+            logger.info(f"Paused bot {bot_id} ({reason})")
+
+    def resume(self, bot_id: str):
+        """Resume a paused bot; its next run is scheduled immediately with jitter"""
+        bot = self.bots.get(bot_id)
+        if bot is not None and bot.paused:
+            bot.paused = False
+            bot.pause_reason = None
+            bot.consecutive_overruns = 0
+            self._schedule(bot, initial=True)
+            logger.info(f"Resumed bot {bot_id}")
+
+    def stats(self) -> Dict:
+        return {
+            'bots': len(self.bots),
+            'active': sum(1 for b in self.bots.values() if not b.paused),
+            'groups': len(self.groups),
+            'running': len(self._inflight),
+            'fusion': self._fusion.stats() if self._fusion is not None else None,
+            'per_bot': [bot.stats() for bot in self.bots.values()],
+            'per_group': [group.stats() for group in self.groups.values()],
+        }
+
+    def _collect_metrics(self):
+        paused = sum(1 for b in self.bots.values() if b.paused)
+        SCHEDULER_BOTS.labels('active').set(len(self.bots) - paused)
+        SCHEDULER_BOTS.labels('paused').set(paused)
+        SCHEDULER_RUNS.labels('executing').set(self._executing)
+        SCHEDULER_RUNS.labels('waiting').set(len(self._inflight) - self._executing)
+
+    def _on_market_state_change(self, dataset: str, item: Optional[Dict]):
+        if dataset == 'bots' and item is not None:
+            self.upsert_bot(item)
+
+    # ------------------------------------------------------------------
+    # Timer heap
+    # ------------------------------------------------------------------
+
+    def _schedule(self, bot: ScheduledBot, initial: bool = False):
+        if initial:
+            # Spread first runs over one interval so bots don't fire in lockstep
+            delay = random.uniform(0, bot.interval)
+        else:
+            delay = bot.interval * (1 + random.uniform(-self.jitter, self.jitter))
+        self._seq += 1
+        bot.schedule_seq = self._seq
+        heapq.heappush(self._heap, (time.monotonic() + delay, self._seq, bot.id))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _dispatch_loop(self):
+        while self._accepting:
+            now = time.monotonic()
+            while self._heap and self._heap[0][0] <= now:
+                _, seq, bot_id = heapq.heappop(self._heap)
+                bot = self.bots.get(bot_id)
+                if bot is None or bot.paused or bot.schedule_seq != seq:
+                    continue  # Removed, paused (resume reschedules) or superseded entry
+                self._schedule(bot)
+                if bot.running:
+                    bot.skipped += 1  # Previous run still in progress
+                    continue
+                task = asyncio.create_task(self._run_bot(bot))
+                self._inflight.add(task)
+                task.add_done_callback(self._inflight.discard)
+
+            timeout = self._heap[0][0] - time.monotonic() if self._heap else None
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    # ------------------------------------------------------------------
+    # Bot execution
+    # ------------------------------------------------------------------
+
+    async def _run_bot(self, bot: ScheduledBot):
+        bot.running = True
+        started = time.monotonic()
+        try:
+            with tracer.trace('bot.run', bot_id=bot.id, strategy=bot.strategy, symbol=bot.symbol):
+                async with self._semaphore:
+                    self._executing += 1
+                    try:
+                        await asyncio.wait_for(self._execute(bot), self.time_budget)
+                    finally:
+                        self._executing -= 1
+        except asyncio.TimeoutError:
+            self._record_overrun(bot, f"exceeded {self.time_budget:.1f}s time budget")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            bot.errors += 1
+            BOT_RUN_FAILURES.labels(bot.strategy, 'error').inc()
+            logger.error(f"Error running bot {bot.id}: {e}", exc_info=True)
+        finally:
+            bot.running = False
+            bot.runs += 1
+            bot.last_run = time.time()
+            bot.last_duration = time.monotonic() - started
+            BOT_RUN_LATENCY.labels(bot.strategy).observe(bot.last_duration)
+
+    async def _execute(self, bot: ScheduledBot):
+        group = self.groups.get(bot.group_key)
+        if group is None:
+            return  # Removed (or moved to another group) while waiting for a slot
+        with tracer.span('group.data', group='|'.join(group.key)):
+            data = await group.get(lambda: self._load_group_data(group), max_age=self._group_max_age(group))
+        # Only the bot's own evaluation counts against its CPU budget; shared loads are charged to the group
+        with CpuMeter() as meter:
+            with tracer.span('strategy.evaluate'), cpu_block():
+                decision = self._evaluate(bot, data)
+        bot.last_cpu = meter.used
+        if bot.last_cpu > self.cpu_budget:
+            self._record_overrun(bot, f"used {bot.last_cpu * 1000:.1f}ms CPU")
+        else:
+            bot.consecutive_overruns = 0
+
+        if decision is None:
+            return
+        if decision['action'] != bot.last_decision:
+            bot.last_decision = decision['action']
+            self._publish_signal(bot, decision)
+        if self.on_decision is not None:
+            with tracer.span('decision.handle', action=decision['action']):
+                await self.on_decision(bot, decision)
+
+    def _record_overrun(self, bot: ScheduledBot, detail: str):
+        bot.overruns += 1
+        bot.consecutive_overruns += 1
+        BOT_RUN_FAILURES.labels(bot.strategy, 'overrun').inc()
+        logger.warning(f"Bot {bot.id} overran its budget: {detail}")
+        if bot.consecutive_overruns >= self.max_overruns:
+            self.pause(bot.id, 'overrun')
+
+    def _group_max_age(self, group: BotGroup) -> float:
+        """Group data is reused for half of the fastest member's interval"""
+        intervals = [self.bots[b].interval for b in group.members if b in self.bots]
+        return min(intervals, default=60.0) / 2
+
+    async def _load_group_data(self, group: BotGroup) -> Dict:
+        exchange, symbol, timeframe = group.key
+        strategies = {self.bots[b].strategy for b in group.members if b in self.bots}
+        data: Dict = {}
+        tracer.annotate(loaded=True)  # Tells a fresh load apart from reused group data
+        if 'technical' in strategies:
+            data['technical'] = await self._analysis(group.key)
+        if 'sentiment' in strategies:
+            with tracer.span('sentiment.refresh'):
+                data['sentiment'] = (await self._sentiment_for_all()).get(_base_asset(symbol))
+        if 'hybrid' in strategies:
+            with tracer.span('fusion'):
+                data['hybrid'] = await self._signal_fusion().fuse(group.key)
+        return data
+
+    async def _analysis(self, key: GroupKey) -> Dict:
+        """Technical analysis for a group, shared with other processes through the cache"""
+        exchange, symbol, timeframe = key
+        analyzer = self._technical_analyzer(exchange)
+        analysis = await self.cache.get_or_load(
+            'analysis', f"{exchange}:{symbol}:{timeframe}",
+            lambda: analyzer.analyze(symbol, timeframe), Config.CACHE_ANALYSIS_TTL
+        )
+        if analysis is None:
+            return {'error': 'Technical analysis unavailable'}
+        if self.market_state is not None and 'error' not in analysis:
+            self.market_state.update_indicators(symbol, {
+                'exchange': exchange,
+                'timeframe': timeframe,
+                'signal': analysis.get('overall_signal'),
+                'indicators': analysis.get('indicators'),
+            })
+        return analysis
+
+    def _evaluate(self, bot: ScheduledBot, data: Dict) -> Optional[Dict]:
+        """Turn shared group data into this bot's decision"""
+        if bot.strategy == 'technical':
+            analysis = data.get('technical') or {}
+            if 'error' in analysis:
+                return None
+            action = analysis.get('overall_signal', 'neutral')
+            return {
+                'action': action,
+                'source': 'technical',
+                'strength': 0.0 if action == 'neutral' else 0.5,
+                'price': analysis.get('current_price'),
+                'content': f"{bot.name}: technical signal {action} on {bot.timeframe}",
+            }
+
+        if bot.strategy == 'hybrid':
+            fused = data.get('hybrid')
+            if fused is None:
+                return None
+            return {
+                'action': {'bullish': 'buy', 'bearish': 'sell'}.get(fused['sentiment'], 'neutral'),
+                'source': fused['source'],
+                'strength': fused['strength'],
+                'price': fused.get('price'),
+                'content': f"{bot.name}: {fused['content']}",
+            }
+
+        sentiment = data.get('sentiment') or {}
+        if 'combined_sentiment_score' not in sentiment:
+            return None
+        label = sentiment['sentiment_label']
+        return {
+            'action': {'bullish': 'buy', 'bearish': 'sell'}.get(label, 'neutral'),
+            'source': _sentiment_source(sentiment),
+            'strength': min(1.0, sentiment['confidence']),
+            'price': None,
+            'content': f"{bot.name}: combined sentiment {sentiment['combined_sentiment_score']:+.2f}",
+        }
+
+    def _publish_signal(self, bot: ScheduledBot, decision: Dict):
+        if self.market_state is None:
+            return
+        self.market_state.add_signal({
+            'botId': bot.id,
+            'source': decision['source'],
+            'symbol': bot.symbol,
+            'sentiment': {'buy': 'bullish', 'sell': 'bearish'}.get(decision['action'], 'neutral'),
+            'strength': decision['strength'],
+            'content': decision['content'],
+        })
+
+    # ------------------------------------------------------------------
+    # Shared analyzers
+    # ------------------------------------------------------------------
+
+    def _technical_analyzer(self, exchange_id: str):
+        analyzer = self._technical_analyzers.get(exchange_id)
+        if analyzer is None:
+            from technical_analyzer import TechnicalAnalyzer
+            if self._client_for is not None:
+                client = self._client_for(exchange_id)
+            else:
+                from exchange_client import ExchangeClient
+                client = ExchangeClient(exchange_id, Config, cache=self.cache)
+            self._exchange_clients[exchange_id] = client
+            analyzer = self._technical_analyzers[exchange_id] = TechnicalAnalyzer(client)
+        return analyzer
+
+    async def _sentiment_for_all(self) -> Dict[str, Dict]:
+        """Refresh sentiment for every sentiment bot's asset in one batched call"""
+        if time.monotonic() - self._sentiment_fetched_at < Config.SENTIMENT_REFRESH_INTERVAL:
+            return self._sentiment
+        if self._sentiment_inflight is None:
+            # Shared like group loads, so a bot run timing out doesn't cancel it for the others
+            self._sentiment_inflight = _shared_task(self._refresh_sentiment())
+        return await asyncio.shield(self._sentiment_inflight)
+
+    async def _refresh_sentiment(self) -> Dict[str, Dict]:
+        try:
+            assets = sorted({_base_asset(b.symbol) for b in self.bots.values() if b.strategy == 'sentiment'})
+            self._sentiment = await self._load_sentiment(assets)
+            self._sentiment_fetched_at = time.monotonic()
+            return self._sentiment
+        finally:
+            self._sentiment_inflight = None
+
+    async def _load_sentiment(self, assets: List[str]) -> Dict[str, Dict]:
+        if self._sentiment_analyzer is None:
+            if self._sentiment_factory is not None:
+                self._sentiment_analyzer = self._sentiment_factory()
+            else:
+                from sentiment_analyzer import SentimentAnalyzer
+                self._sentiment_analyzer = SentimentAnalyzer()
+        return await self.cache.get_or_load_many(
+            'sentiment', assets, self._sentiment_analyzer.get_combined_sentiment_many,
+            Config.SENTIMENT_REFRESH_INTERVAL
+        )
+
+    async def _load_analyses(self, keys: List[GroupKey]) -> Dict[GroupKey, Dict]:
+        analyses = await asyncio.gather(*(self._analysis(key) for key in keys), return_exceptions=True)
+        return {key: analysis for key, analysis in zip(keys, analyses) if isinstance(analysis, dict)}
+
+    def _signal_fusion(self):
+        """Fusion of technical analysis and combined sentiment for hybrid bots"""
+        if self._fusion is None:
+            from signal_fusion import InputSource, SignalFusion, sentiment_reading, technical_reading
+            self._fusion = SignalFusion([
+                InputSource(
+                    'technical', self._load_analyses, technical_reading,
+                    weight=Config.FUSION_TECHNICAL_WEIGHT, max_age=Config.FUSION_TECHNICAL_MAX_AGE,
+                    max_stale=Config.FUSION_TECHNICAL_MAX_STALE, timeout=Config.FUSION_INPUT_TIMEOUT,
+                ),
+                InputSource(
+                    'sentiment', self._load_sentiment, sentiment_reading,
+                    weight=Config.FUSION_SENTIMENT_WEIGHT, max_age=Config.FUSION_SENTIMENT_MAX_AGE,
+                    max_stale=Config.FUSION_SENTIMENT_MAX_STALE, timeout=Config.FUSION_INPUT_TIMEOUT,
+                    key=lambda key: _base_asset(key[1]),
+                ),
+            ])
+        return self._fusion
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def start(self):
+        """Load bots from market state and start dispatching"""
+        if self._loop_task is not None:
+            return
+        if self.market_state is not None:
+            for record in self.market_state.snapshot('bots'):
+                self.upsert_bot(record)
+            self.market_state.add_listener(self._on_market_state_change)
+        self._wakeup = asyncio.Event()
+        self._accepting = True
+        registry.add_collector(self._collect_metrics)
+        self._warm_up_task = asyncio.create_task(self._warm_up())
+        self._loop_task = asyncio.create_task(self._dispatch_loop())
+        mark('bot scheduler started')
+        logger.info(f"Bot scheduler started with {len(self.bots)} bots in {len(self.groups)} groups")
+
+    async def _warm_up(self):
+        """Import what the configured strategies need in a worker thread, ahead of their first runs"""
+        strategies = {bot.strategy for bot in self.bots.values()}
+        modules = []
+        if strategies & {'technical', 'hybrid'}:
+            modules += ['ccxt.async_support', 'pandas', 'ta', 'technical_analyzer']
+        if strategies & {'sentiment', 'hybrid'}:
+            modules += ['textblob', 'vaderSentiment.vaderSentiment', 'sentiment_analyzer']
+        for name in modules:
+            try:
+                await asyncio.to_thread(lazy_module(name).load)
+            except Exception as e:
+                logger.warning(f"Could not preload {name}: {e}")
+        if modules:
+            mark('strategy dependencies loaded')
+
+    async def stop(self, drain_timeout: float = 30.0):
+        """Stop dispatching, let in-flight runs finish within drain_timeout, then release clients"""
+        self._accepting = False
+        registry.remove_collector(self._collect_metrics)
+        if self._warm_up_task is not None:
+            self._warm_up_task.cancel()
+            self._warm_up_task = None
+        if self.market_state is not None:
+            self.market_state.remove_listener(self._on_market_state_change)
+        if self._loop_task is not None:
+            self._wakeup.set()
+            await self._loop_task
+            self._loop_task = None
+
+        if self._inflight:
+            logger.info(f"Draining {len(self._inflight)} in-flight bot runs")
+            _, pending = await asyncio.wait(set(self._inflight), timeout=drain_timeout)
+            for task in pending:
+                task.cancel()
+            if pending:
+                logger.warning(f"Cancelled {len(pending)} bot runs that did not finish draining")
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        loads = [group._inflight for group in self.groups.values() if group._inflight is not None]
+        if self._sentiment_inflight is not None:
+            loads.append(self._sentiment_inflight)
+        for load in loads:
+            load.cancel()
+        await asyncio.gather(*loads, return_exceptions=True)
+        if self._fusion is not None:
+            await self._fusion.close()
+            self._fusion = None
+        for client in self._exchange_clients.values():
+            await client.close()
+        self._exchange_clients.clear()
+        self._technical_analyzers.clear()
+        if self._sentiment_analyzer is not None:
+            await self._sentiment_analyzer.close()
+            self._sentiment_analyzer = None
+        logger.info("Bot scheduler stopped")
+
+
+def _shared_task(coro: Awaitable) -> asyncio.Task:
+    """Task awaited by several callers; its exception counts as retrieved even if all of them gave up"""
+    task = asyncio.ensure_future(coro)
+    task.add_done_callback(lambda done: done.cancelled() or done.exception())
+    return task
+
+
+def _sentiment_source(sentiment: Dict) -> str:
+    """Source a combined sentiment is attributed to: the strongest one that returned a score, not an error"""
+    scores = {
+        name: abs(result['sentiment_score'])
+        for name, result in (sentiment.get('sources') or {}).items()
+        if isinstance(result, dict) and 'sentiment_score' in result
+    }
+    return max(scores, key=scores.get) if scores else 'twitter'
+
+
+def _base_asset(symbol: str) -> str:
+    """'BTC/USDT' -> 'BTC'"""
+    return symbol.split('/')[0].upper()
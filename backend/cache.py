@@ -0,0 +1,493 @@
+"""
+Two-tier cache for market data shared by the API, bot engine and workers.
+
+Lookups go to an in-process LRU/TTL tier first and then to an optional
+shared tier (Redis, or an in-memory stand-in for tests), so several API
+replicas or worker processes fetch each ticker batch, candle set, analysis
+and sentiment score from upstream once per TTL. Concurrent misses for the
+same key are coalesced in-process, and a short lock in the shared tier
+keeps other processes waiting for the first loader instead of stampeding.
+"""
+import asyncio
+import secrets
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+from config import Config
+from fast_json import dumps, loads
+from metrics import registry
+from startup import lazy_module
+import logging
+
+# Optional dependency, only imported when the Redis backend is configured
+aioredis = lazy_module('redis.asyncio')
+
+logger = logging.getLogger(__name__)
+
+CACHE_LOOKUPS = registry.counter(
+    'hybridbot_cache_lookups_total', 'Cache lookups by namespace and outcome', ('namespace', 'result')
+)
+CACHE_HIT_RATIO = registry.gauge('hybridbot_cache_hit_ratio', 'Cache hit ratio by namespace', ('namespace',))
+CACHE_ENTRIES = registry.gauge('hybridbot_cache_local_entries', 'Entries in the in-process cache tier')
+
+NAMESPACES = ('tickers', 'candles', 'analysis', 'sentiment')
+
+KEY_PREFIX = 'hybridbot'
+
+
+def cache_key(namespace: str, key: str) -> str:
+    """'candles', 'kucoin:BTC/USDT:1h:100' -> 'hybridbot:candles:kucoin:BTC/USDT:1h:100'"""
+    if namespace not in NAMESPACES:
+        raise ValueError(f"Unknown cache namespace: {namespace}")
+    return f"{KEY_PREFIX}:{namespace}:{key}"
+
+
+def is_cacheable(value) -> bool:
+    """Error results and empty responses are never cached"""
+    if value is None:
+        return False
+    if isinstance(value, dict):
+        return bool(value) and 'error' not in value
+    if isinstance(value, (list, tuple)):
+        return bool(value)
+    return True
+
+
+class LocalCache:
+    """In-process LRU cache with per-entry expiry"""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+
+    def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value, expires_at: float):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class MemorySharedCache:
+    """
+    In-memory stand-in for the shared tier.
+
+    Behaves like the Redis tier (serialized values, expiry, NX locks) within
+    one process, which makes it suitable for tests and single-process runs.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[float, bytes]] = {}
+
+    def _live(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.time():
+            del self._entries[key]
+            return None
+        return entry[1]
+
+    async def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        return [self._live(key) for key in keys]
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        self._entries[key] = (time.time() + ttl, value)
+
+    async def add(self, key: str, value: bytes, ttl: float) -> bool:
+        """Set only if the key does not exist; used for loader locks"""
+        if self._live(key) is not None:
+            return False
+        await self.set(key, value, ttl)
+        return True
+
+    async def delete(self, key: str):
+        self._entries.pop(key, None)
+
+    async def release(self, key: str, token: bytes) -> bool:
+        """Delete a loader lock only if it still holds this owner's token"""
+        if self._live(key) != token:
+            return False
+        del self._entries[key]
+        return True
+
+    async def close(self):
+        self._entries.clear()
+
+
+# Compare-and-delete: a lock that expired and was taken over by another loader is left alone
+RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisSharedCache:
+    """Shared tier backed by Redis (redis-py's asyncio client)"""
+
+    def __init__(self, url: str):
+        self.url = url
+        try:
+            self._client = aioredis.from_url(url)
+        except ImportError:
+            raise RuntimeError('The redis package is required for the Redis cache backend')
+        self._release = self._client.register_script(RELEASE_SCRIPT)
+
+    async def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        return await self._client.mget(keys)
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        await self._client.set(key, value, px=max(1, int(ttl * 1000)))
+
+    async def add(self, key: str, value: bytes, ttl: float) -> bool:
+        return bool(await self._client.set(key, value, px=max(1, int(ttl * 1000)), nx=True))
+
+    async def delete(self, key: str):
+        await self._client.delete(key)
+
+    async def release(self, key: str, token: bytes) -> bool:
+        """Delete a loader lock only if it still holds this owner's token"""
+        return bool(await self._release(keys=[key], args=[token]))
+
+    async def close(self):
+        await self._client.close()
+
+
+class TieredCache:
+    """
+    Local LRU/TTL tier in front of an optional shared tier.
+
+    Values written to the shared tier carry their absolute expiry, so a
+    process that picks a value up from the shared tier keeps it locally only
+    for the time the original loader granted. Shared-tier failures degrade
+    to local-only caching for a short back-off instead of failing requests.
+    """
+
+    def __init__(self, local: Optional[LocalCache] = None, shared=None, lock_timeout: float = 10.0,
+                 poll_interval: float = 0.05, shared_retry_after: float = 30.0):
+        self.local = local or LocalCache()
+        self.shared = shared
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+        self.shared_retry_after = shared_retry_after
+
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._shared_down_until = 0.0
+        self._stats: Dict[str, Dict[str, int]] = {
+            namespace: {
+                'local_hits': 0, 'shared_hits': 0, 'misses': 0, 'loads': 0,
+                'coalesced': 0, 'load_errors': 0, 'shared_errors': 0,
+            }
+            for namespace in NAMESPACES
+        }
+
+    # ------------------------------------------------------------------
+    # Shared tier helpers
+    # ------------------------------------------------------------------
+
+    def _shared_available(self) -> bool:
+        return self.shared is not None and time.monotonic() >= self._shared_down_until
+
+    def _shared_failed(self, namespace: str, error: Exception):
+        self._stats[namespace]['shared_errors'] += 1
+        if time.monotonic() >= self._shared_down_until:
+            logger.warning(f"Shared cache unavailable, using local cache only for "
+                           f"{self.shared_retry_after:.0f}s: {error}")
+        self._shared_down_until = time.monotonic() + self.shared_retry_after
+
+    async def _shared_get_many(self, namespace: str, keys: List[str]) -> Dict[str, Any]:
+        """Fetch keys from the shared tier and promote hits into the local tier"""
+        if not keys or not self._shared_available():
+            return {}
+        try:
+            raw_values = await self.shared.get_many(keys)
+        except Exception as e:
+            self._shared_failed(namespace, e)
+            return {}
+
+        found = {}
+        now = time.time()
+        for key, raw in zip(keys, raw_values):
+            if raw is None:
+                continue
+            envelope = loads(raw)
+            if envelope['e'] <= now:
+                continue
+            self.local.set(key, envelope['v'], envelope['e'])
+            found[key] = envelope['v']
+        return found
+
+    async def _shared_set(self, namespace: str, key: str, value, expires_at: float):
+        if not self._shared_available():
+            return
+        try:
+            await self.shared.set(key, dumps({'v': value, 'e': expires_at}), expires_at - time.time())
+        except Exception as e:
+            self._shared_failed(namespace, e)
+
+    async def _acquire_load_lock(self, namespace: str, key: str, token: bytes) -> bool:
+        """True when this process should load the key; False when another process already is"""
+        if not self._shared_available():
+            return True
+        try:
+            return await self.shared.add(f"{key}:lock", token, self.lock_timeout)
+        except Exception as e:
+            self._shared_failed(namespace, e)
+            return True
+
+    async def _release_load_lock(self, namespace: str, key: str, token: bytes):
+        """Release a lock this load took; one that expired and was taken over is not ours to delete"""
+        if not self._shared_available():
+            return
+        try:
+            await self.shared.release(f"{key}:lock", token)
+        except Exception as e:
+            self._shared_failed(namespace, e)
+
+    async def _wait_for_other_loader(self, namespace: str, keys: List[str]) -> Dict[str, Any]:
+        """Poll the shared tier until another process has stored the keys or its lock expires"""
+        found: Dict[str, Any] = {}
+        deadline = time.monotonic() + self.lock_timeout
+        pending = list(keys)
+        while pending and time.monotonic() < deadline and self._shared_available():
+            await asyncio.sleep(self.poll_interval)
+            found.update(await self._shared_get_many(namespace, pending))
+            pending = [key for key in pending if key not in found]
+        return found
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def get(self, namespace: str, key: str):
+        """Cached value for a key, or None"""
+        full_key = cache_key(namespace, key)
+        value = self.local.get(full_key)
+        if value is not None:
+            self._stats[namespace]['local_hits'] += 1
+            return value
+        value = (await self._shared_get_many(namespace, [full_key])).get(full_key)
+        if value is not None:
+            self._stats[namespace]['shared_hits'] += 1
+        else:
+            self._stats[namespace]['misses'] += 1
+        return value
+
+    async def set(self, namespace: str, key: str, value, ttl: float):
+        """Store a value in both tiers"""
+        full_key = cache_key(namespace, key)
+        expires_at = time.time() + ttl
+        self.local.set(full_key, value, expires_at)
+        await self._shared_set(namespace, full_key, value, expires_at)
+
+    async def invalidate(self, namespace: str, key: str):
+        full_key = cache_key(namespace, key)
+        self.local.delete(full_key)
+        if self._shared_available():
+            try:
+                await self.shared.delete(full_key)
+            except Exception as e:
+                self._shared_failed(namespace, e)
+
+    async def get_or_load(self, namespace: str, key: str, loader: Callable[[], Awaitable[Any]],
+                          ttl: float, cacheable: Callable[[Any], bool] = is_cacheable):
+        """
+        Return the cached value for key, calling loader at most once across
+        concurrent callers in this process and, with a shared tier, across
+        processes. Values rejected by cacheable are returned but not stored.
+        """
+        async def load_many(keys: List[str]) -> Dict[str, Any]:
+            return {key: await loader()}
+
+        results = await self.get_or_load_many(namespace, [key], load_many, ttl, cacheable)
+        return results.get(key)
+
+    async def get_or_load_many(self, namespace: str, keys: Iterable[str],
+                               loader: Callable[[List[str]], Awaitable[Dict[str, Any]]],
+                               ttl: float, cacheable: Callable[[Any], bool] = is_cacheable) -> Dict[str, Any]:
+        """
+        Batched get_or_load: keys missing from both tiers are passed to one
+        loader call, which returns a dict keyed by the same keys.
+        """
+        stats = self._stats[namespace]
+        keys = list(dict.fromkeys(keys))
+        full_keys = {key: cache_key(namespace, key) for key in keys}
+        results: Dict[str, Any] = {}
+
+        # Local tier
+        remaining = []
+        for key in keys:
+            value = self.local.get(full_keys[key])
+            if value is not None:
+                stats['local_hits'] += 1
+                results[key] = value
+            else:
+                remaining.append(key)
+
+        # Shared tier
+        if remaining:
+            found = await self._shared_get_many(namespace, [full_keys[k] for k in remaining])
+            stats['shared_hits'] += len(found)
+            missing = []
+            for key in remaining:
+                if full_keys[key] in found:
+                    results[key] = found[full_keys[key]]
+                else:
+                    missing.append(key)
+            remaining = missing
+        if not remaining:
+            return results
+        stats['misses'] += len(remaining)
+
+        # Join loads already running in this process
+        waiting = {key: self._inflight[full_keys[key]] for key in remaining if full_keys[key] in self._inflight}
+        to_load = [key for key in remaining if key not in waiting]
+        stats['coalesced'] += len(waiting)
+
+        futures: Dict[str, asyncio.Future] = {}
+        if to_load:
+            loop = asyncio.get_running_loop()
+            for key in to_load:
+                futures[key] = self._inflight[full_keys[key]] = loop.create_future()
+            try:
+                results.update(await self._load(namespace, to_load, full_keys, futures, loader, ttl, cacheable))
+            finally:
+                for key in to_load:
+                    self._inflight.pop(full_keys[key], None)
+
+        orphaned = []
+        for key, future in waiting.items():
+            try:
+                value = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                orphaned.append(key)  # The caller that started the load was cancelled
+                continue
+            if value is not None:
+                results[key] = value
+        if orphaned:
+            # Load them here rather than handing the waiters None
+            results.update(await self.get_or_load_many(namespace, orphaned, loader, ttl, cacheable))
+        return results
+
+    async def _load(self, namespace: str, keys: List[str], full_keys: Dict[str, str],
+                    futures: Dict[str, asyncio.Future], loader, ttl: float, cacheable) -> Dict[str, Any]:
+        stats = self._stats[namespace]
+        results: Dict[str, Any] = {}
+        locked: List[str] = []
+        token = secrets.token_hex(16).encode()  # Identifies this load's locks in the shared tier
+        try:
+            # Keys another process is loading are awaited from the shared tier
+            others = []
+            for key in keys:
+                if await self._acquire_load_lock(namespace, full_keys[key], token):
+                    locked.append(key)
+                else:
+                    others.append(key)
+            if others:
+                found = await self._wait_for_other_loader(namespace, [full_keys[k] for k in others])
+                stats['coalesced'] += len(found)
+                for key in others:
+                    if full_keys[key] in found:
+                        results[key] = found[full_keys[key]]
+                    else:
+                        locked.append(key)  # The other loader gave up; load it here
+
+            to_load = [key for key in keys if key not in results]
+            if to_load:
+                stats['loads'] += 1
+                loaded = await loader(to_load) or {}
+                expires_at = time.time() + ttl
+                for key in to_load:
+                    value = loaded.get(key)
+                    results[key] = value
+                    if cacheable(value):
+                        self.local.set(full_keys[key], value, expires_at)
+                        await self._shared_set(namespace, full_keys[key], value, expires_at)
+        except asyncio.CancelledError:
+            for future in futures.values():
+                future.cancel()
+            raise
+        except Exception as e:
+            stats['load_errors'] += 1
+            for future in futures.values():
+                if not future.done():
+                    future.set_exception(e)
+                    future.exception()  # Mark retrieved when nobody else is waiting
+            raise
+        finally:
+            for key in locked:
+                await self._release_load_lock(namespace, full_keys[key], token)
+
+        for key, future in futures.items():
+            if not future.done():
+                future.set_result(results.get(key))
+        return results
+
+    def stats(self) -> Dict[str, Dict]:
+        """Hit/miss counters per namespace"""
+        report = {}
+        for namespace, counters in self._stats.items():
+            hits = counters['local_hits'] + counters['shared_hits']
+            lookups = hits + counters['misses']
+            report[namespace] = {**counters, 'hit_ratio': hits / lookups if lookups else 0.0}
+        report['local_entries'] = len(self.local)
+        report['shared'] = type(self.shared).__name__ if self.shared is not None else None
+        return report
+
+    def collect_metrics(self):
+        """Metrics collector mirroring the hit/miss counters"""
+        for namespace, counters in self._stats.items():
+            for result in ('local_hits', 'shared_hits', 'misses', 'loads', 'coalesced', 'load_errors', 'shared_errors'):
+                CACHE_LOOKUPS.labels(namespace, result).set_total(counters[result])
+            hits = counters['local_hits'] + counters['shared_hits']
+            lookups = hits + counters['misses']
+            CACHE_HIT_RATIO.labels(namespace).set(hits / lookups if lookups else 0.0)
+        CACHE_ENTRIES.set(len(self.local))
+
+    async def close(self):
+        if self.shared is not None:
+            await self.shared.close()
+
+
+def build_cache(backend: str, redis_url: Optional[str] = None, max_entries: int = 10000) -> TieredCache:
+    """Create the cache for a CACHE_BACKEND setting: 'local', 'memory' or 'redis'"""
+    backend = (backend or 'local').lower()
+    shared = None
+    if backend == 'redis':
+        try:
+            shared = RedisSharedCache(redis_url)
+        except Exception as e:
+            logger.error(f"Could not set up Redis cache at {redis_url}, using local cache only: {e}")
+    elif backend == 'memory':
+        shared = MemorySharedCache()
+    elif backend != 'local':
+        raise ValueError(f"Unknown cache backend: {backend}")
+    return TieredCache(LocalCache(max_entries), shared)
+
+
+# Process-wide cache shared by exchange clients, analyzers and the bot engine
+cache = build_cache(Config.CACHE_BACKEND, Config.REDIS_URL, Config.CACHE_MAX_ENTRIES)
+registry.add_collector(cache.collect_metrics)
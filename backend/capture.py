@@ -0,0 +1,403 @@
+"""
+Record and replay of exchange and social API traffic.
+
+CaptureWriter appends every upstream response (ccxt calls made through
+ExchangeClient, order acks, and the Twitter, Reddit and LunarCrush payloads
+SentimentAnalyzer scores) to a capture file as timestamped JSON records,
+packed into zlib-compressed blocks whose headers carry the block's time
+range, like the scored-post log.
+
+Replay loads one or more capture files and answers the same requests from
+them on a ReplayClock running at 1x, Nx or as fast as possible. Pass a
+ReplayExchange to ExchangeClient(exchange=...) and the Replay to
+SentimentAnalyzer(replay=...), and bots run their normal code paths
+against the recorded market.
+"""
+import asyncio
+import atexit
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+from array import array
+from bisect import bisect_right
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from config import Config
+import fast_json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Block header: magic, compressed payload length, record count, min timestamp, max timestamp
+BLOCK_MAGIC = b'HBC1'
+BLOCK_HEADER = struct.Struct('<4sIIdd')
+
+CAPTURE_PREFIX = 'capture-'
+CAPTURE_SUFFIX = '.hbc'
+
+# Record layout: [timestamp, latency, source, name, request, response, error]
+TIMESTAMP, LATENCY, SOURCE, NAME, REQUEST, RESPONSE, ERROR = range(7)
+
+# Request fields re-stamped onto replayed order acks
+ORDER_FIELDS = ('symbol', 'side', 'amount', 'price')
+# Calls on an order placed earlier, taking (id, symbol)
+ORDER_UPDATES = ('fetch_order', 'cancel_order')
+
+
+class CaptureWriter:
+    """Append-only capture file; records are buffered and written a compressed block at a time"""
+
+    def __init__(self, path: str, block_size: int = 256, flush_interval: float = 5.0):
+        self.path = path
+        self.block_size = block_size
+        self.flush_interval = flush_interval
+        self.records = 0
+        self._lock = threading.Lock()
+        self._block: List[bytes] = []
+        self._min_ts = self._max_ts = 0.0
+        self._block_started = time.monotonic()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def record(self, source: str, name: str, request, response=None, error: Optional[str] = None,
+               latency: float = 0.0, timestamp: Optional[float] = None):
+        """Append one upstream call: what was asked, what came back (or the error) and how long it took"""
+        timestamp = time.time() if timestamp is None else timestamp
+        try:
+            line = fast_json.dumps([timestamp, round(latency, 6), source, name, request, response, error])
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Could not capture {source}.{name} response: {e}")
+            return
+        with self._lock:
+            if not self._block:
+                self._min_ts = self._max_ts = timestamp
+            self._block.append(line)
+            self._min_ts = min(self._min_ts, timestamp)
+            self._max_ts = max(self._max_ts, timestamp)
+            self.records += 1
+            if (len(self._block) >= self.block_size
+                    or time.monotonic() - self._block_started >= self.flush_interval):
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        self.flush()
+
+    def _flush_locked(self):
+        if not self._block:
+            return
+        payload = zlib.compress(b'\n'.join(self._block), 6)
+        header = BLOCK_HEADER.pack(BLOCK_MAGIC, len(payload), len(self._block), self._min_ts, self._max_ts)
+        try:
+            with open(self.path, 'ab') as f:
+                f.write(header + payload)
+        except OSError as e:
+            logger.error(f"Error writing capture file {self.path}: {e}")
+            return
+        self._block = []
+        self._block_started = time.monotonic()
+
+
+_default_writer: Optional[CaptureWriter] = None
+_default_writer_lock = threading.Lock()
+
+
+def default_writer() -> Optional[CaptureWriter]:
+    """This process's writer into CAPTURE_DIR, or None when capture is disabled"""
+    global _default_writer
+    if not Config.CAPTURE_DIR:
+        return None
+    with _default_writer_lock:
+        if _default_writer is None:
+            # One file per process, so supervisor workers never interleave writes
+            name = f"{CAPTURE_PREFIX}{time.time_ns():020d}-{os.getpid()}{CAPTURE_SUFFIX}"
+            _default_writer = CaptureWriter(os.path.join(Config.CAPTURE_DIR, name))
+            atexit.register(_default_writer.close)
+            logger.info(f"Capturing upstream traffic to {_default_writer.path}")
+        return _default_writer
+
+
+def capture_files(path: str) -> List[str]:
+    """A capture file, or every capture file in a directory in write order"""
+    if not os.path.isdir(path):
+        return [path]
+    names = sorted(n for n in os.listdir(path) if n.startswith(CAPTURE_PREFIX) and n.endswith(CAPTURE_SUFFIX))
+    return [os.path.join(path, n) for n in names]
+
+
+def read_capture(path: str, start: float = float('-inf'), end: float = float('inf')) -> Iterator[List]:
+    """Records within [start, end) from a capture file or directory, block by block"""
+    for file_path in capture_files(path):
+        with open(file_path, 'rb') as f:
+            while True:
+                header = f.read(BLOCK_HEADER.size)
+                if len(header) < BLOCK_HEADER.size:
+                    break
+                magic, length, count, min_ts, max_ts = BLOCK_HEADER.unpack(header)
+                if magic != BLOCK_MAGIC:
+                    logger.warning(f"Corrupt block in capture file {file_path}, skipping rest")
+                    break
+                if max_ts < start or min_ts >= end:
+                    f.seek(length, os.SEEK_CUR)
+                    continue
+                payload = f.read(length)
+                if len(payload) < length:
+                    break  # Torn write at the tail of the file
+                for line in zlib.decompress(payload).split(b'\n'):
+                    record = fast_json.loads(line)
+                    if start <= record[TIMESTAMP] < end:
+                        yield record
+
+
+def request_key(source: str, name: str, request) -> str:
+    """Canonical form of a request, equal for the same call however it was serialized"""
+    return json.dumps([source, name, request], sort_keys=True, separators=(',', ':'), default=str)
+
+
+class RecordedError(Exception):
+    """An upstream error replayed from a capture"""
+
+
+class ReplayMiss(LookupError):
+    """The capture holds no response for a request"""
+
+
+class ReplayClock:
+    """
+    Capture time driven by the wall clock at `speed`x, or, when speed is
+    None, by the replay itself: each response moves time forward to when it
+    was recorded, so the capture plays back as fast as requests arrive.
+    """
+
+    def __init__(self, start: float, speed: Optional[float] = 1.0):
+        if speed is not None and speed <= 0:
+            raise ValueError(f"Replay speed must be positive, not {speed}")
+        self.start = start
+        self.speed = speed
+        self._wall_start: Optional[float] = None
+        self._cursor = start
+
+    @property
+    def paced(self) -> bool:
+        return self.speed is not None
+
+    def begin(self):
+        self._wall_start = time.monotonic()
+
+    def now(self) -> float:
+        if self.paced:
+            if self._wall_start is None:
+                self.begin()  # Starts with the first request unless begun explicitly
+            return self.start + (time.monotonic() - self._wall_start) * self.speed
+        return self._cursor
+
+    def advance(self, timestamp: float):
+        if not self.paced:
+            self._cursor = max(self._cursor, timestamp)
+
+    def wall_seconds(self, capture_seconds: float) -> float:
+        """Wall time for a span of capture time (0 when unpaced)"""
+        return capture_seconds / self.speed if self.paced else 0.0
+
+    async def sleep_until(self, timestamp: float):
+        if self.paced:
+            delay = self.wall_seconds(timestamp - self.now())
+            if delay > 0:
+                await asyncio.sleep(delay)
+        else:
+            self.advance(timestamp)
+
+
+class _Recording:
+    """Every recorded response to one request, in capture order"""
+
+    __slots__ = ('times', 'latencies', 'responses', 'errors', 'served')
+
+    def __init__(self):
+        self.times = array('d')
+        self.latencies = array('d')
+        self.responses: List[bytes] = []  # Re-parsed per serve so callers can't mutate the capture
+        self.errors: List[Optional[str]] = []
+        self.served = -1
+
+
+class Replay:
+    """
+    Recorded responses keyed by request, served on a ReplayClock.
+
+    Paced, a request gets the latest response recorded at or before the
+    current capture time, waiting for the first one if the request comes
+    early. Unpaced, each request gets the next response after the one it
+    was last served, or the latest one if capture time has moved past it.
+    Order requests (create_*) can't match the recording exactly once bots
+    decide differently, so they take the recorded acks for that method in
+    order, re-stamped with the requested symbol, side, amount and price
+    (fills keep the recorded fill ratio). fetch_order and cancel_order
+    likewise take the recorded responses in order, applied to the order
+    this replay placed under the requested id.
+    """
+
+    def __init__(self, path: str, speed: Optional[float] = 1.0, simulate_latency: bool = True,
+                 start: float = float('-inf'), end: float = float('inf')):
+        self._exact: Dict[Tuple[str, str], _Recording] = {}
+        self._orders: Dict[Tuple[str, str], _Recording] = {}  # create_* acks and order updates by (source, method)
+        self._requests: Dict[Tuple[str, str], Dict[str, object]] = {}
+        records = sorted(read_capture(path, start, end), key=lambda r: r[TIMESTAMP])
+        if not records:
+            raise ValueError(f"No capture records in {path}")
+        for record in records:
+            source, name = record[SOURCE], record[NAME]
+            key = request_key(source, name, record[REQUEST])
+            if name.startswith('create_') or name in ORDER_UPDATES:
+                index, index_key = self._orders, (source, name)
+            else:
+                index, index_key = self._exact, (source, key)
+            recording = index.get(index_key)
+            if recording is None:
+                recording = index[index_key] = _Recording()
+            recording.times.append(record[TIMESTAMP])
+            recording.latencies.append(record[LATENCY])
+            recording.responses.append(fast_json.dumps(record[RESPONSE]))
+            recording.errors.append(record[ERROR])
+            self._requests.setdefault((source, name), {}).setdefault(key, record[REQUEST])
+
+        self.records = len(records)
+        self.start = records[0][TIMESTAMP]
+        self.end = records[-1][TIMESTAMP]
+        self.clock = ReplayClock(self.start, speed)
+        self.simulate_latency = simulate_latency and self.clock.paced
+        self.served = 0
+        self.misses: Dict[str, int] = {}
+        self._order_ids = 0
+        self._placed: Dict[str, Dict] = {}  # Latest state of each order placed during the replay
+
+    @property
+    def finished(self) -> bool:
+        return self.clock.now() >= self.end
+
+    def sources(self) -> Set[str]:
+        return {source for source, _ in self._requests}
+
+    def names(self, source: str) -> Set[str]:
+        return {name for recorded_source, name in self._requests if recorded_source == source}
+
+    def requests(self, source: str, name: str) -> List:
+        """Distinct recorded requests for a call, e.g. the watchlists passed to fetch_tickers"""
+        return list(self._requests.get((source, name), {}).values())
+
+    def _pick(self, recording: _Recording) -> int:
+        now = self.clock.now()
+        latest = bisect_right(recording.times, now) - 1
+        if self.clock.paced:
+            return max(latest, 0)
+        return min(max(latest, recording.served + 1), len(recording.times) - 1)
+
+    async def fetch(self, source: str, name: str, request):
+        """The recorded response to a request, at the pace of the replay clock"""
+        if name.startswith('create_') or name in ORDER_UPDATES:
+            return await self._order_ack(source, name, request)
+        recording = self._exact.get((source, request_key(source, name, request)))
+        if recording is None:
+            label = f"{source}.{name}"
+            self.misses[label] = self.misses.get(label, 0) + 1
+            raise ReplayMiss(f"No recorded {label} response for {request}")
+
+        index = self._pick(recording)
+        recording.served = max(recording.served, index)
+        await self.clock.sleep_until(recording.times[index])
+        if self.simulate_latency and recording.latencies[index]:
+            await asyncio.sleep(self.clock.wall_seconds(recording.latencies[index]))
+        self.served += 1
+        error = recording.errors[index]
+        if error is not None:
+            raise RecordedError(error)
+        return fast_json.loads(recording.responses[index])
+
+    async def _order_ack(self, source: str, name: str, request) -> Dict:
+        placed = None
+        if name in ORDER_UPDATES:
+            args, kwargs = (request[0], request[1]) if request else ([], {})
+            order_id = args[0] if args else kwargs.get('id')
+            placed = self._placed.get(order_id)
+            if placed is None:
+                label = f"{source}.{name}"
+                self.misses[label] = self.misses.get(label, 0) + 1
+                raise ReplayMiss(f"No order {order_id} was placed during the replay")
+            fields = {key: placed[key] for key in ORDER_FIELDS if key in placed}
+        else:
+            # create_market_order / create_limit_order take (symbol, side, amount, price) positionally or by name
+            fields = dict(zip(ORDER_FIELDS, request[0])) if request else {}
+            if request and len(request) > 1:
+                fields.update((key, value) for key, value in request[1].items() if key in ORDER_FIELDS)
+        recording = self._orders.get((source, name))
+        ack: Dict = {}
+        if recording is not None:
+            index = recording.served = (recording.served + 1) % len(recording.times)
+            if recording.errors[index] is not None:
+                self.served += 1
+                raise RecordedError(recording.errors[index])
+            ack = fast_json.loads(recording.responses[index]) or {}
+        if fields.get('symbol', ack.get('symbol')) != ack.get('symbol'):
+            # Prices recorded for another market would be read as this order's fill
+            for key in ('price', 'average', 'cost'):
+                ack.pop(key, None)
+        if 'amount' in fields and ack.get('amount'):
+            # Keep the recorded fill ratio for the requested amount
+            ratio = fields['amount'] / ack['amount']
+            for key in ('filled', 'remaining', 'cost'):
+                if isinstance(ack.get(key), (int, float)):
+                    ack[key] *= ratio
+        ack.update(fields)
+        if placed is not None:
+            ack = {**placed, **{key: value for key, value in ack.items()
+                                if value is not None and key not in ('id', 'timestamp')}}
+            if name == 'cancel_order' and placed.get('status') != 'closed':
+                ack['status'] = 'canceled'
+        else:
+            self._order_ids += 1
+            ack.update({'id': f"replay-{self._order_ids}", 'timestamp': int(self.clock.now() * 1000)})
+        self._placed[ack['id']] = ack
+        self.served += 1
+        return dict(ack)
+
+    def stats(self) -> Dict:
+        return {
+            'records': self.records,
+            'capture_seconds': self.end - self.start,
+            'position': self.clock.now() - self.start,
+            'served': self.served,
+            'misses': dict(self.misses),
+        }
+
+
+class ReplayExchange:
+    """ccxt-compatible exchange answering from a Replay, for ExchangeClient(exchange=...)"""
+
+    def __init__(self, replay: Replay, exchange_id: str):
+        self.id = exchange_id
+        self.replay = replay
+        names = replay.names(exchange_id)
+        self.has = {
+            'fetchTickers': 'fetch_tickers' in names,
+            'fetchOHLCV': 'fetch_ohlcv' in names,
+            'fetchOrderBook': 'fetch_order_book' in names,
+        }
+
+    def __getattr__(self, name: str):
+        if not name.startswith(('fetch_', 'create_', 'cancel_')):
+            raise AttributeError(name)
+
+        async def call(*args, **kwargs):
+            # Same request shape ExchangeClient records: [positional args, keyword args]
+            return await self.replay.fetch(self.id, name, [list(args), kwargs])
+
+        return call
+
+    async def close(self):
+        pass
@@ -1,27 +1,108 @@
-# Binance API Keys
-BINANCE_API_KEY = os.getenv('BINANCE_API_KEY')
-BINANCE_API_SECRET = os.getenv('BINANCE_API_SECRET')
-
-# Coinbase API Keys
-COINBASE_API_KEY = os.getenv('COINBASE_API_KEY')
-COINBASE_API_SECRET = os.getenv('COINBASE_API_SECRET')
-COINBASE_API_PASSPHRASE = os.getenv('COINBASE_API_PASSPHRASE')
-
-# Social Media APIs
-TWITTER_BEARER_TOKEN = os.getenv('TWITTER_BEARER_TOKEN')
-REDDIT_CLIENT_ID = os.getenv('REDDIT_CLIENT_ID')
-REDDIT_CLIENT_SECRET = os.getenv('REDDIT_CLIENT_SECRET')
-LUNARCRUSH_API_KEY = os.getenv('LUNARCRUSH_API_KEY')
-
-# Database
-DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///trading_bot.db')
-REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379')
-
-# Bot Configuration
-MAX_POSITION_SIZE = float(os.getenv('MAX_POSITION_SIZE', '0.1'))  # 10% of portfolio
-STOP_LOSS_PERCENTAGE = float(os.getenv('STOP_LOSS_PERCENTAGE', '0.05'))  # 5%
-TAKE_PROFIT_PERCENTAGE = float(os.getenv('TAKE_PROFIT_PERCENTAGE', '0.15'))  # 15%
-
-# API Server
-API_HOST = os.getenv('API_HOST', '0.0.0.0')
-API_PORT = int(os.getenv('API_PORT', '8000'))
\ No newline at end of file
+import os
+
+
+class Config:
+    # KuCoin API Keys
+    KUCOIN_API_KEY = os.getenv('KUCOIN_API_KEY')
+    KUCOIN_API_SECRET = os.getenv('KUCOIN_API_SECRET')
+    KUCOIN_API_PASSPHRASE = os.getenv('KUCOIN_API_PASSPHRASE')
+    KUCOIN_SANDBOX = os.getenv('KUCOIN_SANDBOX', 'true').lower() == 'true'
+
+    # Binance API Keys
+    BINANCE_API_KEY = os.getenv('BINANCE_API_KEY')
+    BINANCE_API_SECRET = os.getenv('BINANCE_API_SECRET')
+
+    # Coinbase API Keys
+    COINBASE_API_KEY = os.getenv('COINBASE_API_KEY')
+    COINBASE_API_SECRET = os.getenv('COINBASE_API_SECRET')
+    COINBASE_API_PASSPHRASE = os.getenv('COINBASE_API_PASSPHRASE')
+
+    # Kraken API Keys
+    KRAKEN_API_KEY = os.getenv('KRAKEN_API_KEY')
+    KRAKEN_API_SECRET = os.getenv('KRAKEN_API_SECRET')
+
+    # Social Media APIs
+    TWITTER_BEARER_TOKEN = os.getenv('TWITTER_BEARER_TOKEN')
+    REDDIT_CLIENT_ID = os.getenv('REDDIT_CLIENT_ID')
+    REDDIT_CLIENT_SECRET = os.getenv('REDDIT_CLIENT_SECRET')
+    LUNARCRUSH_API_KEY = os.getenv('LUNARCRUSH_API_KEY')
+
+    # Sentiment HTTP client
+    SENTIMENT_HTTP_CONNECTION_LIMIT = int(os.getenv('SENTIMENT_HTTP_CONNECTION_LIMIT', '20'))
+    SENTIMENT_HTTP_TIMEOUT = float(os.getenv('SENTIMENT_HTTP_TIMEOUT', '10'))  # seconds
+    LUNARCRUSH_CACHE_TTL = float(os.getenv('LUNARCRUSH_CACHE_TTL', '60'))  # seconds
+    SENTIMENT_LOG_DIR = os.getenv('SENTIMENT_LOG_DIR')  # Scored-post log for replay; disabled when unset
+
+    # Database
+    DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///trading_bot.db')
+    REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379')
+
+    # Market data cache
+    CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'local')  # 'local', 'redis' (shared via REDIS_URL) or 'memory'
+    CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', '10000'))
+    CACHE_TICKER_TTL = float(os.getenv('CACHE_TICKER_TTL', '4'))  # seconds
+    CACHE_CANDLE_TTL = float(os.getenv('CACHE_CANDLE_TTL', '30'))  # seconds
+    CACHE_ANALYSIS_TTL = float(os.getenv('CACHE_ANALYSIS_TTL', '30'))  # seconds
+
+    # Bot Configuration
+    BOT_LIVE_TRADING = os.getenv('BOT_LIVE_TRADING', 'false').lower() == 'true'  # Off: bot orders are logged, not sent
+    MAX_POSITION_SIZE = float(os.getenv('MAX_POSITION_SIZE', '0.1'))  # 10% of portfolio
+    BOT_ORDER_SIZE = float(os.getenv('BOT_ORDER_SIZE', '0.05'))  # 5% of portfolio per entry a bot's buy signal opens
+    STOP_LOSS_PERCENTAGE = float(os.getenv('STOP_LOSS_PERCENTAGE', '0.05'))  # 5%
+    TAKE_PROFIT_PERCENTAGE = float(os.getenv('TAKE_PROFIT_PERCENTAGE', '0.15'))  # 15%
+    RISK_EXIT_RETRY_DELAY = float(os.getenv('RISK_EXIT_RETRY_DELAY', '5'))  # seconds before re-arming a failed exit
+    ORDER_FILL_TIMEOUT = float(os.getenv('ORDER_FILL_TIMEOUT', '30'))  # seconds an unfilled order rests before it is cancelled
+    ORDER_POLL_INTERVAL = float(os.getenv('ORDER_POLL_INTERVAL', '1'))  # seconds between order status checks
+
+    # Depth-aware order sizing
+    ORDER_BOOK_DEPTH = int(os.getenv('ORDER_BOOK_DEPTH', '50'))  # levels per side fetched for sizing
+    ORDER_MAX_SLIPPAGE = float(os.getenv('ORDER_MAX_SLIPPAGE', '0.005'))  # 0.5% VWAP slippage vs best price
+    ORDER_MAX_SLICES = int(os.getenv('ORDER_MAX_SLICES', '10'))
+    ORDER_SLICE_INTERVAL = float(os.getenv('ORDER_SLICE_INTERVAL', '2'))  # seconds between limit slices
+
+    # Market data served by the API
+    MARKET_EXCHANGE = os.getenv('MARKET_EXCHANGE', 'kucoin')
+    MARKET_SYMBOLS = [s.strip() for s in os.getenv('MARKET_SYMBOLS', 'BTC/USDT,ETH/USDT').split(',') if s.strip()]
+    PRICE_REFRESH_INTERVAL = float(os.getenv('PRICE_REFRESH_INTERVAL', '5'))  # seconds
+    API_CACHE_TTL = float(os.getenv('API_CACHE_TTL', '1'))  # seconds
+    STREAM_MAX_HZ = float(os.getenv('STREAM_MAX_HZ', '4'))  # max pushes per second per stream client
+    SEED_DATA_PATH = os.getenv('SEED_DATA_PATH', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'db.json'))
+
+    # Bot scheduler
+    BOT_DEFAULT_INTERVAL = float(os.getenv('BOT_DEFAULT_INTERVAL', '60'))  # seconds between runs
+    BOT_MAX_CONCURRENCY = int(os.getenv('BOT_MAX_CONCURRENCY', '64'))
+    BOT_TIME_BUDGET = float(os.getenv('BOT_TIME_BUDGET', '30'))  # wall seconds per run
+    BOT_CPU_BUDGET = float(os.getenv('BOT_CPU_BUDGET', '0.05'))  # CPU seconds per strategy evaluation
+    BOT_DRAIN_TIMEOUT = float(os.getenv('BOT_DRAIN_TIMEOUT', '30'))  # seconds to finish runs on shutdown
+    BOT_WORKERS = int(os.getenv('BOT_WORKERS', '1'))  # >1 shards symbols across worker processes
+    SENTIMENT_REFRESH_INTERVAL = float(os.getenv('SENTIMENT_REFRESH_INTERVAL', '300'))  # seconds
+
+    # Hybrid signal fusion
+    FUSION_TECHNICAL_WEIGHT = float(os.getenv('FUSION_TECHNICAL_WEIGHT', '0.6'))
+    FUSION_SENTIMENT_WEIGHT = float(os.getenv('FUSION_SENTIMENT_WEIGHT', '0.4'))
+    FUSION_TECHNICAL_MAX_AGE = float(os.getenv('FUSION_TECHNICAL_MAX_AGE', '60'))  # seconds at full weight
+    FUSION_TECHNICAL_MAX_STALE = float(os.getenv('FUSION_TECHNICAL_MAX_STALE', '300'))  # seconds until ignored
+    FUSION_SENTIMENT_MAX_AGE = float(os.getenv('FUSION_SENTIMENT_MAX_AGE', '300'))  # seconds at full weight
+    FUSION_SENTIMENT_MAX_STALE = float(os.getenv('FUSION_SENTIMENT_MAX_STALE', '1800'))  # seconds until ignored
+    FUSION_INPUT_TIMEOUT = float(os.getenv('FUSION_INPUT_TIMEOUT', '2'))  # seconds to wait for an input with no usable value
+    FUSION_NEUTRAL_BAND = float(os.getenv('FUSION_NEUTRAL_BAND', '0.15'))  # |score| below this is neutral
+
+    # Logging
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    LOG_FILE = os.getenv('LOG_FILE', 'trading_bot.log')  # Empty logs to stdout only
+    LOG_JSON = os.getenv('LOG_JSON', 'false').lower() == 'true'
+    LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', str(10 * 1024 * 1024)))  # rotate at 10MB
+    LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', '5'))
+    LOG_REPEAT_WINDOW = float(os.getenv('LOG_REPEAT_WINDOW', '60'))  # seconds
+    LOG_REPEAT_BURST = int(os.getenv('LOG_REPEAT_BURST', '5'))  # identical warnings/errors allowed per window
+
+    # Diagnostics
+    TRACE_SLOW_THRESHOLD = float(os.getenv('TRACE_SLOW_THRESHOLD', '1.0'))  # seconds; slower bot runs are kept
+    TRACE_BUFFER_SIZE = int(os.getenv('TRACE_BUFFER_SIZE', '100'))
+    PROFILER_INTERVAL = float(os.getenv('PROFILER_INTERVAL', '0.005'))  # seconds between stack samples
+    ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')  # Enables /admin endpoints when set
+    CAPTURE_DIR = os.getenv('CAPTURE_DIR')  # Upstream traffic capture for replay_bot.py; disabled when unset
+
+    # API Server
+    API_HOST = os.getenv('API_HOST', '0.0.0.0')
+    API_PORT = int(os.getenv('API_PORT', '8000'))
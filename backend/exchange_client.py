@@ -1,21 +1,136 @@
-import ccxt
+import asyncio
+import time
+import weakref
 from typing import Dict, List, Optional
+from capture import default_writer
 from config import Config
+from metrics import registry
+from order_book import OrderBook
+from startup import lazy_module
+from tracing import tracer
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Importing ccxt loads every exchange class; defer it until a client is used
+ccxt = lazy_module('ccxt.async_support')
+
+EXCHANGE_LATENCY = registry.histogram(
+    'hybridbot_exchange_request_seconds', 'Exchange API call latency', ('exchange', 'endpoint')
+)
+EXCHANGE_ERRORS = registry.counter(
+    'hybridbot_exchange_errors_total', 'Exchange API calls that raised', ('exchange', 'endpoint')
+)
+EXCHANGE_THROTTLE_QUEUE = registry.gauge(
+    'hybridbot_exchange_throttle_queue', 'Requests waiting on the ccxt rate limiter', ('exchange',)
+)
+
+_clients: 'weakref.WeakSet[ExchangeClient]' = weakref.WeakSet()
+
+
+def _collect_throttle_queues():
+    depths: Dict[str, int] = {}
+    for client in list(_clients):
+        throttler = getattr(client._exchange, 'throttler', None)
+        queue = getattr(throttler, 'queue', None)
+        depths[client.exchange_id] = depths.get(client.exchange_id, 0) + (len(queue) if queue is not None else 0)
+    for exchange_id, depth in depths.items():
+        EXCHANGE_THROTTLE_QUEUE.labels(exchange_id).set(depth)
+
+
+registry.add_collector(_collect_throttle_queues)
+
+# ccxt order statuses after which an order no longer fills
+ORDER_DONE = ('closed', 'canceled', 'cancelled', 'expired', 'rejected')
+
+
+def filled_amount(order: Dict, amount: float) -> float:
+    """How much of an order filled; a closed order that doesn't say filled all of it"""
+    filled = order.get('filled')
+    if filled is None:
+        return amount if order.get('status') == 'closed' else 0.0
+    return filled
+
+
+def _merge_order(order: Dict, update: Dict) -> Dict:
+    """Apply the fields an order status response reports; exchanges often omit the rest"""
+    return {**order, **{key: value for key, value in update.items() if value is not None}}
+
+
+def _fee_cost(fee) -> float:
+    """Fee in quote currency from a number or a ccxt {'cost': ...} dict"""
+    if isinstance(fee, dict):
+        return float(fee.get('cost') or 0.0)
+    return float(fee or 0.0)
+
+
+def _fill_summary(result: Dict) -> Dict:
+    """Total filled amount, fill VWAP and fees over a depth-aware order's child orders"""
+    filled = cost = fees = 0.0
+    for order in result['orders']:
+        price = order.get('average') or order.get('price')
+        if order['filled'] and price:
+            filled += order['filled']
+            cost += order['filled'] * price
+        fees += _fee_cost(order.get('fee'))
+    return {**result, 'filled': filled, 'average': cost / filled if filled else None,
+            'fee': {'cost': fees} if fees else None}
 
 
 class ExchangeClient:
-    def __init__(self, exchange_id: str, config: Config):
+    def __init__(self, exchange_id: str, config: Config, cache=None, exchange=None, recorder=None):
         self.exchange_id = exchange_id.lower()
         self.config = config
-        self.exchange = self._init_exchange()
-        if self.exchange:
-            self.exchange.enableRateLimit = True  # Enable ccxt's built-in rate limit handling
+        # Optional TieredCache for market data reads; orders and balances are never cached
+        self.cache = cache
+        # A pre-built ccxt-compatible exchange (e.g. the benchmarks' fake venue) skips ccxt entirely
+        self._exchange = exchange
+        self._initialized = exchange is not None
+        # CaptureWriter for every call and its response; ccxt-backed clients record into CAPTURE_DIR when set
+        if recorder is None and exchange is None:
+            recorder = default_writer()
+        self.recorder = recorder
+        # Latest L2 book per symbol, updated in place by fetch_order_book
+        self.order_books: Dict[str, OrderBook] = {}
+        _clients.add(self)
 
-    def _init_exchange(self) -> Optional[ccxt.Exchange]:
+    @property
+    def exchange(self) -> Optional['ccxt.Exchange']:
+        """The ccxt exchange instance, created (and ccxt imported) on first use"""
+        if not self._initialized:
+            self._initialized = True
+            self._exchange = self._init_exchange()
+            if self._exchange:
+                self._exchange.enableRateLimit = True  # Enable ccxt's built-in rate limit handling
+        return self._exchange
+
+    async def warm_up(self):
+        """Import ccxt and create the exchange in a worker thread so the event loop keeps serving"""
+        if not self._initialized:
+            await asyncio.to_thread(lambda: self.exchange)
+
+    async def _call(self, endpoint: str, method, *args, **kwargs):
+        """Invoke a ccxt method, recording its latency, errors and a trace span"""
+        with tracer.span(f"exchange.{endpoint}", exchange=self.exchange_id), \
+                EXCHANGE_LATENCY.time(self.exchange_id, endpoint, errors=EXCHANGE_ERRORS):
+            if self.recorder is None:
+                return await method(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                result = await method(*args, **kwargs)
+            except Exception as e:
+                self.recorder.record(self.exchange_id, endpoint, [list(args), kwargs],
+                                     error=f"{type(e).__name__}: {e}", latency=time.perf_counter() - started)
+                raise
+            self.recorder.record(self.exchange_id, endpoint, [list(args), kwargs], result,
+                                 latency=time.perf_counter() - started)
+            return result
+
+    def _init_exchange(self) -> Optional['ccxt.Exchange']:
         """Initializes the ccxt exchange instance based on exchange_id."""
         try:
             if self.exchange_id == 'kucoin':
-                return ccxt.kucoin({
+                exchange = ccxt.kucoin({
                     'apiKey': self.config.KUCOIN_API_KEY,
                     'secret': self.config.KUCOIN_API_SECRET,
                     'password': self.config.KUCOIN_API_PASSPHRASE,
@@ -25,6 +140,9 @@ class ExchangeClient:
                     },
                     'enableRateLimit': True,
                 })
+                if self.config.KUCOIN_SANDBOX:
+                    exchange.set_sandbox_mode(True)
+                return exchange
             elif self.exchange_id == 'binance':
                 return ccxt.binance({
                     'apiKey': self.config.BINANCE_API_KEY,
@@ -57,8 +175,7 @@ class ExchangeClient:
             else:
                 raise ValueError(f"Unsupported exchange ID: {self.exchange_id}")
         except Exception as e:
-            # Handle exceptions without logging
-            print(f"Error initializing {self.exchange_id} client: {e}")
+            logger.error(f"Error initializing {self.exchange_id} client: {e}")
             return None
 
     async def get_balance(self) -> Dict:
@@ -66,7 +183,7 @@ class ExchangeClient:
         if not self.exchange:
             return {'error': 'Exchange not initialized'}
         try:
-            balance = await self.exchange.fetch_balance()
+            balance = await self._call('fetch_balance', self.exchange.fetch_balance)
             return {
                 'total': balance['total'],
                 'free': balance['free'],
@@ -84,7 +201,7 @@ class ExchangeClient:
         if not self.exchange:
             return {'error': 'Exchange not initialized'}
         try:
-            ticker = await self.exchange.fetch_ticker(symbol)
+            ticker = await self._call('fetch_ticker', self.exchange.fetch_ticker, symbol)
             return {
                 'symbol': symbol,
                 'price': ticker['last'],
@@ -100,16 +217,58 @@ class ExchangeClient:
         except Exception as e:
             return {'error': str(e)}
 
+    async def get_tickers(self, symbols: List[str]) -> Dict[str, Dict]:
+        """Get current prices for several symbols, in one request where the exchange supports it"""
+        if not self.exchange:
+            return {}
+        if self.cache is not None:
+            key = f"{self.exchange_id}:{','.join(sorted(symbols))}"
+            return await self.cache.get_or_load(
+                'tickers', key, lambda: self._fetch_tickers(symbols), self.config.CACHE_TICKER_TTL
+            ) or {}
+        return await self._fetch_tickers(symbols)
+
+    async def _fetch_tickers(self, symbols: List[str]) -> Dict[str, Dict]:
+        try:
+            if self.exchange.has.get('fetchTickers'):
+                tickers = await self._call('fetch_tickers', self.exchange.fetch_tickers, symbols)
+            else:
+                tickers = {}
+                for symbol in symbols:
+                    tickers[symbol] = await self._call('fetch_ticker', self.exchange.fetch_ticker, symbol)
+            return {
+                symbol: {
+                    'symbol': symbol,
+                    'price': ticker['last'],
+                    'bid': ticker['bid'],
+                    'ask': ticker['ask'],
+                    'high': ticker.get('high'),
+                    'low': ticker.get('low'),
+                    'volume': ticker.get('quoteVolume') or ticker.get('baseVolume'),
+                    'change': ticker.get('percentage')
+                }
+                for symbol, ticker in tickers.items()
+                if symbol in symbols
+            }
+        except ccxt.NetworkError as e:
+            return {}
+        except ccxt.ExchangeError as e:
+            return {}
+        except Exception as e:
+            return {}
+
     async def place_market_order(self, symbol: str, side: str, amount: float) -> Dict:
         """Place market order"""
         if not self.exchange:
             return {'error': 'Exchange not initialized'}
         try:
-            order = await self.exchange.create_market_order(
+            order = await self._call(
+                'create_market_order', self.exchange.create_market_order,
                 symbol=symbol,
                 side=side,
                 amount=amount
             )
+            logger.info(f"Market order placed: {order.get('id')} {side} {amount} {symbol}", extra={'order': order})
             return order
         except ccxt.NetworkError as e:
             return {'error': f"Network error: {e}"}
@@ -124,8 +283,16 @@ class ExchangeClient:
         """Fetch OHLCV data"""
         if not self.exchange:
             return []
+        if self.cache is not None:
+            key = f"{self.exchange_id}:{symbol}:{timeframe}:{limit}"
+            return await self.cache.get_or_load(
+                'candles', key, lambda: self._fetch_ohlcv(symbol, timeframe, limit), self.config.CACHE_CANDLE_TTL
+            ) or []
+        return await self._fetch_ohlcv(symbol, timeframe, limit)
+
+    async def _fetch_ohlcv(self, symbol: str, timeframe: str, limit: int) -> List[List]:
         try:
-            ohlcv = await self.exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
+            ohlcv = await self._call('fetch_ohlcv', self.exchange.fetch_ohlcv, symbol, timeframe, limit=limit)
             return ohlcv
         except ccxt.NetworkError as e:
             return []
@@ -139,15 +306,178 @@ class ExchangeClient:
         if not self.exchange:
             return {'error': 'Exchange not initialized'}
         try:
-            order = await self.exchange.create_limit_order(
+            order = await self._call(
+                'create_limit_order', self.exchange.create_limit_order,
                 symbol=symbol,
                 side=side,
                 amount=amount,
                 price=price
             )
+            logger.info(f"Limit order placed: {order.get('id')} {side} {amount} {symbol} @ {price}",
+                        extra={'order': order})
             return order
         except ccxt.NetworkError as e:
             return {'error': f"Network error: {e}"}
         except ccxt.ExchangeError as e:
             return {'error': f"Exchange error: {e}"}
-        except ccxt
\ No newline at end of file
+        except ccxt.InvalidOrder as e:
+            return {'error': f"Invalid order: {e}"}
+        except Exception as e:
+            return {'error': str(e)}
+
+    async def fetch_order(self, order_id: str, symbol: str) -> Dict:
+        """Current state of an order: status, filled amount and average price"""
+        if not self.exchange:
+            return {'error': 'Exchange not initialized'}
+        try:
+            return await self._call('fetch_order', self.exchange.fetch_order, order_id, symbol)
+        except ccxt.NetworkError as e:
+            return {'error': f"Network error: {e}"}
+        except ccxt.ExchangeError as e:
+            return {'error': f"Exchange error: {e}"}
+        except Exception as e:
+            return {'error': str(e)}
+
+    async def cancel_order(self, order_id: str, symbol: str) -> Dict:
+        """Cancel an open order"""
+        if not self.exchange:
+            return {'error': 'Exchange not initialized'}
+        try:
+            order = await self._call('cancel_order', self.exchange.cancel_order, order_id, symbol)
+            logger.info(f"Order cancelled: {order_id} {symbol}")
+            return order or {}
+        except ccxt.NetworkError as e:
+            return {'error': f"Network error: {e}"}
+        except ccxt.ExchangeError as e:
+            return {'error': f"Exchange error: {e}"}
+        except Exception as e:
+            return {'error': str(e)}
+
+    async def fetch_order_book(self, symbol: str, limit: Optional[int] = None) -> Optional[OrderBook]:
+        """Fetch an L2 snapshot into the symbol's OrderBook; None if it could not be fetched"""
+        if not self.exchange:
+            return None
+        try:
+            snapshot = await self._call(
+                'fetch_order_book', self.exchange.fetch_order_book, symbol, limit or self.config.ORDER_BOOK_DEPTH
+            )
+        except Exception as e:
+            logger.warning(f"Could not fetch {symbol} order book from {self.exchange_id}: {e}")
+            return None
+        book = self.order_books.get(symbol)
+        if book is None:
+            book = self.order_books[symbol] = OrderBook(symbol)
+        book.apply_snapshot(snapshot)
+        return book
+
+    async def follow_order(self, order: Dict, symbol: str, timeout: float,
+                           poll_interval: Optional[float] = None) -> Dict:
+        """
+        Poll an order until it is done, cancelling it once it has rested for
+        `timeout`; its final state. If the cancel can't be confirmed the order
+        is returned as the exchange last reported it, with an `error`: it may
+        still fill.
+        """
+        poll_interval = self.config.ORDER_POLL_INTERVAL if poll_interval is None else poll_interval
+        deadline = time.monotonic() + timeout
+        while order.get('status') not in ORDER_DONE and order.get('id') is not None:
+            if time.monotonic() >= deadline:
+                cancelled = await self.cancel_order(order['id'], symbol)
+                # It may have filled before the cancel landed; the exchange has the final word
+                final = await self.fetch_order(order['id'], symbol)
+                for update in (cancelled, final):
+                    if 'error' not in update:
+                        order = _merge_order(order, update)
+                if order.get('status') not in ORDER_DONE:
+                    reason = final.get('error') or cancelled.get('error') or f"order is {order.get('status')}"
+                    logger.warning(f"Could not confirm cancel of order {order['id']} {symbol}: {reason}")
+                    order = {**order, 'error': f"Cancel of order {order['id']} not confirmed: {reason}"}
+                return order
+            await asyncio.sleep(min(poll_interval, max(0.0, deadline - time.monotonic())))
+            update = await self.fetch_order(order['id'], symbol)
+            if 'error' in update:
+                logger.warning(f"Could not fetch order {order['id']} {symbol}: {update['error']}")
+                continue
+            order = _merge_order(order, update)
+        return order
+
+    async def place_depth_aware_order(self, symbol: str, side: str, amount: float,
+                                      max_slippage: Optional[float] = None, split: bool = True,
+                                      fill_timeout: Optional[float] = None) -> Dict:
+        """
+        Place an order sized against current book depth and follow it until done.
+
+        If the book absorbs `amount` within `max_slippage` (VWAP against the
+        best price) it goes out as one market order, cancelled if still open
+        after `fill_timeout`. Otherwise, with `split`, it is sent as limit
+        slices that each take only the depth within the slippage bound; each
+        slice rests for ORDER_SLICE_INTERVAL, what it hasn't filled by then is
+        cancelled, and the next slice is planned for the unfilled rest against
+        a refreshed book. Without `split` the order is capped to what the book
+        absorbs. `filled` and `average` report what actually filled.
+        """
+        max_slippage = self.config.ORDER_MAX_SLIPPAGE if max_slippage is None else max_slippage
+        fill_timeout = self.config.ORDER_FILL_TIMEOUT if fill_timeout is None else fill_timeout
+        book = await self.fetch_order_book(symbol)
+        if book is None:
+            return {'error': f"No order book available for {symbol}", 'filled': 0.0}
+
+        absorbable = book.size_for_slippage(side, max_slippage)
+        expected_vwap, _ = book.vwap_for_size(side, min(amount, absorbable) or amount)
+        result = {'symbol': symbol, 'side': side, 'requested': amount, 'placed': 0.0,
+                  'expected_vwap': expected_vwap, 'orders': []}
+        if absorbable >= amount or not split:
+            size = min(amount, absorbable)
+            if size <= 0:
+                return _fill_summary({**result, 'error': f"No depth within {max_slippage:.2%} of the best price"})
+            if size < amount:
+                logger.info(f"Capped {side} {symbol} from {amount} to {size} to stay within {max_slippage:.2%} slippage")
+            order = await self.place_market_order(symbol, side, size)
+            if 'error' in order:
+                return _fill_summary({**result, 'error': order['error']})
+            order = await self.follow_order(order, symbol, fill_timeout)
+            result = {**result, 'placed': size, 'orders': [{**order, 'filled': filled_amount(order, size)}]}
+            if 'error' in order:
+                result['error'] = order['error']
+            return _fill_summary(result)
+
+        remaining = amount
+        rested = True
+        for attempt in range(self.config.ORDER_MAX_SLICES):
+            if attempt:
+                if not rested:
+                    # Give the book time to refill before planning again
+                    await asyncio.sleep(self.config.ORDER_SLICE_INTERVAL)
+                book = await self.fetch_order_book(symbol)
+                if book is None:
+                    break
+            size, price = book.plan_slice(side, remaining, max_slippage)
+            rested = size > 0
+            if not rested:
+                continue
+            order = await self.place_limit_order(symbol, side, size, price)
+            if 'error' in order:
+                result['error'] = order['error']
+                break
+            # The slice rests while the book refills; an unfilled rest is cancelled and re-planned
+            order = await self.follow_order(order, symbol, self.config.ORDER_SLICE_INTERVAL)
+            filled = filled_amount(order, size)
+            result['orders'].append({**order, 'filled': filled})
+            result['placed'] += size
+            remaining -= filled
+            if 'error' in order:
+                # The slice may still be working; planning another could overfill
+                result['error'] = order['error']
+                break
+            if remaining <= 1e-12:
+                break
+        result = _fill_summary(result)
+        if remaining > 1e-12 and 'error' not in result:
+            logger.warning(f"Filled {result['filled']} of {amount} {symbol} in {len(result['orders'])} slices; "
+                           f"book too thin within {max_slippage:.2%}")
+        return result
+
+    async def close(self):
+        """Release the underlying HTTP session"""
+        if self._exchange:
+            await self._exchange.close()
@@ -0,0 +1,25 @@
+"""
+JSON serialization helpers for API responses.
+
+Uses orjson when it is installed and falls back to the standard library.
+"""
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def dumps(obj) -> bytes:
+    """Serialize an object to compact UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS, default=str)
+    return json.dumps(obj, separators=(',', ':'), default=str).encode()
+
+
+def loads(data):
+    """Parse JSON from bytes or str"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
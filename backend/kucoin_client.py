@@ -53,7 +53,8 @@ class KuCoinClient:
                 side=side,
                 amount=amount
             )
-            logger.info(f"Order placed: {order}")
+            # Full order goes out as a structured field; the line itself stays short
+            logger.info(f"Order placed: {order.get('id')} {side} {amount} {symbol}", extra={'order': order})
             return order
         except Exception as e:
             logger.error(f"Error placing order: {e}")
@@ -68,7 +69,8 @@ class KuCoinClient:
                 amount=amount,
                 price=price
             )
-            logger.info(f"Limit order placed: {order}")
+            logger.info(f"Limit order placed: {order.get('id')} {side} {amount} {symbol} @ {price}",
+                        extra={'order': order})
             return order
         except Exception as e:
             logger.error(f"Error placing limit order: {e}")
@@ -0,0 +1,168 @@
+"""
+Queue-based logging for the trading path.
+
+Callers only put records on an in-memory queue; a QueueListener thread
+does the filtering, formatting (including tracebacks) and file/stdout
+I/O, so a slow disk never stalls the event loop. Identical warning and
+error lines are rate-limited per window, with a count of what was
+suppressed. shutdown_logging() drains the queue before the process exits.
+"""
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+from fast_json import dumps
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_STANDARD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener: Optional['FilteringQueueListener'] = None
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener thread.
+
+    The stock handler formats the record (and its traceback) on the calling
+    thread. Here only the message is resolved, so later mutation of the
+    arguments cannot change it, and exc_info travels with the record.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including any `extra` fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'process': record.processName,
+            'thread': record.threadName,
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry['stack'] = self.formatStack(record.stack_info)
+        return dumps(entry).decode()
+
+
+class RepeatFilter(logging.Filter):
+    """
+    Lets at most `burst` identical records (same logger, level and message)
+    through per `window` seconds. The first record after a suppressed run
+    notes how many were dropped. Only applies at or above `min_level`.
+    """
+
+    def __init__(self, window: float = 60.0, burst: int = 5, min_level: int = logging.WARNING,
+                 max_keys: int = 10000):
+        super().__init__()
+        self.window = window
+        self.burst = burst
+        self.min_level = min_level
+        self.max_keys = max_keys
+        # key -> [window start, records seen in window, suppressed in window]
+        self._seen: Dict[Tuple[str, int, str], list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < self.min_level or self.burst <= 0:
+            return True
+        key = (record.name, record.levelno, record.getMessage())
+        now = time.monotonic()
+        state = self._seen.get(key)
+        if state is None or now - state[0] >= self.window:
+            suppressed = state[2] if state is not None else 0
+            if len(self._seen) >= self.max_keys:
+                self._seen.clear()
+            self._seen[key] = [now, 1, 0]
+            if suppressed:
+                record.msg = f"{record.getMessage()} (suppressed {suppressed} identical messages)"
+                record.args = None
+                record.suppressed = suppressed
+            return True
+        state[1] += 1
+        if state[1] <= self.burst:
+            return True
+        state[2] += 1
+        return False
+
+
+class FilteringQueueListener(logging.handlers.QueueListener):
+    """QueueListener that applies one filter per record before fanning out to handlers"""
+
+    def __init__(self, log_queue, *handlers, record_filter: Optional[logging.Filter] = None):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.record_filter = record_filter
+
+    def handle(self, record: logging.LogRecord):
+        if self.record_filter is None or self.record_filter.filter(record):
+            super().handle(record)
+
+
+def setup_logging(level: str = 'INFO', log_file: Optional[str] = None, json_format: bool = False,
+                  max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5,
+                  repeat_window: float = 60.0, repeat_burst: int = 5,
+                  process_label: Optional[str] = None) -> 'FilteringQueueListener':
+    """Route the root logger through a queue to stdout and, optionally, a rotating file"""
+    global _listener
+    if _listener is not None:
+        shutdown_logging()
+
+    if json_format:
+        formatter: logging.Formatter = JsonFormatter()
+    else:
+        text_format = TEXT_FORMAT.replace('%(name)s', f'{process_label} - %(name)s') if process_label else TEXT_FORMAT
+        formatter = logging.Formatter(text_format)
+
+    handlers = [logging.StreamHandler(sys.stdout)]
+    if log_file:
+        handlers.append(logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8'
+        ))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    # The repeat filter runs on the listener thread, so its state needs no locking
+    _listener = FilteringQueueListener(
+        log_queue, *handlers, record_filter=RepeatFilter(repeat_window, repeat_burst)
+    )
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+        existing.close()
+    root.addHandler(queue_handler)
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return _listener
+
+
+def shutdown_logging():
+    """Write out every queued record, then close the handlers"""
+    global _listener
+    if _listener is None:
+        return
+    listener, _listener = _listener, None
+    listener.stop()  # Processes everything queued so far before returning
+    for handler in listener.handlers:
+        handler.flush()
+        handler.close()
@@ -0,0 +1,278 @@
+import asyncio
+import json
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from typing import Callable, Deque, Dict, List, Optional
+from config import Config
+from pnl_engine import PnlEngine
+import logging
+
+logger = logging.getLogger(__name__)
+
+DATASETS = ('bots', 'portfolio', 'signals', 'prices', 'trades', 'indicators')
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class MarketState:
+    """
+    In-memory snapshot of everything the dashboard reads.
+
+    Background refreshers and the bot engine write into it; API handlers only
+    read from it. Every dataset carries a version number that is bumped on
+    each change, so readers can cache serialized responses per version.
+    """
+
+    def __init__(self, max_signals: int = 200, max_trades: int = 500):
+        self._bots: Dict[str, Dict] = {}
+        self._prices: Dict[str, Dict] = {}
+        self._indicators: Dict[str, Dict] = {}
+        self._signals: Deque[Dict] = deque(maxlen=max_signals)
+        self._trades: Deque[Dict] = deque(maxlen=max_trades)
+        # Bot and portfolio PnL, updated incrementally from fills and price ticks
+        self.pnl = PnlEngine()
+        self._versions: Dict[str, int] = {name: 0 for name in DATASETS}
+        self._listeners: List[Callable[[str, Dict], None]] = []
+
+        # Set when prices arrive from worker processes instead of an in-process refresher
+        self.external_price_feed = False
+
+    # ------------------------------------------------------------------
+    # Change tracking
+    # ------------------------------------------------------------------
+
+    def version(self, dataset: str) -> int:
+        """Current version of a dataset"""
+        if dataset in ('portfolio', 'bots'):
+            # Portfolio values and bot PnL are marked to the latest prices
+            return self._versions[dataset] + self._versions['prices']
+        return self._versions[dataset]
+
+    def add_listener(self, callback: Callable[[str, Dict], None]):
+        """Register a callback invoked with (dataset, item) for every change"""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[str, Dict], None]):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _changed(self, dataset: str, item: Optional[Dict] = None):
+        self._versions[dataset] += 1
+        for callback in self._listeners:
+            try:
+                callback(dataset, item)
+            except Exception as e:
+                logger.error(f"Error in market state listener: {e}", exc_info=True)
+
+    # ------------------------------------------------------------------
+    # Writers
+    # ------------------------------------------------------------------
+
+    def load_seed(self, path: str):
+        """Load initial bots, portfolio, signals, trades and prices from a JSON file"""
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load seed data from {path}: {e}")
+            return
+
+        for bot in data.get('bots', []):
+            self.upsert_bot(bot)
+
+        for signal in data.get('signals', []):
+            self.add_signal(signal)
+        for trade in data.get('trades', []):
+            self.add_trade(trade)
+
+        # The seeded balance is the current one, i.e. it already reflects the seeded trades
+        portfolio = data.get('portfolio', {})
+        self.pnl.set_portfolio(
+            float(portfolio.get('balance', 0)),
+            {a['symbol']: float(a.get('amount', 0)) for a in portfolio.get('assets', [])}
+        )
+        self._changed('portfolio')
+
+        for price in data.get('prices', []):
+            self.update_price(price)
+
+    def upsert_bot(self, bot: Dict):
+        """Insert or update a bot record"""
+        bot_id = str(bot.get('id') or uuid.uuid4().hex)
+        current = self._bots.get(bot_id, {})
+        record = {
+            'id': bot_id,
+            'name': bot.get('name', current.get('name', f"Bot {bot_id}")),
+            'status': bot.get('status', current.get('status', 'paused')),
+            'exchange': bot.get('exchange', current.get('exchange', Config.MARKET_EXCHANGE)),
+            'pair': bot.get('pair', current.get('pair', 'BTC/USDT')),
+            'strategy': bot.get('strategy', current.get('strategy', 'technical')),
+            'pnl': bot.get('pnl', current.get('pnl', 0.0)),
+            'pnlPercent': bot.get('pnlPercent', current.get('pnlPercent', 0.0)),
+            'trades': bot.get('trades', current.get('trades', 0)),
+            'winRate': bot.get('winRate', current.get('winRate', 0.0)),
+            'createdAt': bot.get('createdAt', current.get('createdAt', _now_iso())),
+        }
+        self._bots[bot_id] = record
+        self._changed('bots', record)
+        return record
+
+    def update_price(self, price: Dict):
+        """Update the latest price for a symbol"""
+        record = {
+            'symbol': price['symbol'],
+            'price': price.get('price'),
+            'change24h': price.get('change24h', price.get('change')) or 0.0,
+            'volume24h': price.get('volume24h', price.get('volume')) or 0.0,
+            'high24h': price.get('high24h', price.get('high')) or 0.0,
+            'low24h': price.get('low24h', price.get('low')) or 0.0,
+        }
+        if self._prices.get(record['symbol']) == record:
+            return
+        self._prices[record['symbol']] = record
+        self.pnl.update_price(record['symbol'], record['price'], record['change24h'])
+        self._changed('prices', record)
+
+    def update_indicators(self, symbol: str, indicators: Dict):
+        """Update the latest indicator snapshot for a symbol"""
+        record = {**indicators, 'symbol': symbol}
+        self._indicators[symbol] = record
+        self._changed('indicators', record)
+
+    def add_signal(self, signal: Dict):
+        """Append a signal to the feed"""
+        sentiment = signal.get('sentiment')
+        if sentiment is None:
+            sentiment = {'buy': 'bullish', 'sell': 'bearish'}.get(signal.get('signalType'), 'neutral')
+        record = {
+            'id': str(signal.get('id') or uuid.uuid4().hex),
+            'botId': str(signal['botId']) if signal.get('botId') is not None else None,
+            'source': signal.get('source', 'technical'),
+            'symbol': signal['symbol'],
+            'sentiment': sentiment,
+            'strength': signal.get('strength', 0.0),
+            'content': signal.get('content', ''),
+            'timestamp': signal.get('timestamp') or _now_iso(),
+        }
+        self._signals.appendleft(record)
+        self._changed('signals', record)
+        return record
+
+    def add_trade(self, trade: Dict):
+        """Append a trade to the history; filled trades update bot and portfolio PnL"""
+        record = {
+            'id': str(trade.get('id') or uuid.uuid4().hex),
+            'botId': str(trade.get('botId', '')),
+            'pair': trade.get('pair', trade.get('symbol')),
+            'side': trade['side'],
+            'amount': trade.get('amount', trade.get('quantity', 0.0)),
+            'price': trade.get('price', 0.0),
+            'pnl': trade.get('pnl', 0.0),
+            'timestamp': trade.get('timestamp') or _now_iso(),
+            'status': trade.get('status', 'filled'),
+        }
+        if record['status'] == 'filled':
+            realized = self.pnl.apply_fill(
+                record['botId'] or None, record['pair'], record['side'],
+                float(record['amount'] or 0.0), float(record['price'] or 0.0), trade.get('fee')
+            )
+            if 'pnl' not in trade:
+                record['pnl'] = realized
+        self._trades.appendleft(record)
+        self._changed('trades', record)
+        self._changed('portfolio')
+        if self.pnl.has_bot(record['botId']):
+            # No item: the bot record itself did not change, only its derived PnL
+            self._changed('bots')
+        return record
+
+    def settle_trade(self, trade: Dict):
+        """Replace a pending trade with its outcome; a fill updates PnL as in add_trade"""
+        trade_id = str(trade.get('id'))
+        for index, record in enumerate(self._trades):
+            if record['id'] == trade_id and record['status'] == 'pending':
+                del self._trades[index]
+                break
+        return self.add_trade(trade)
+
+    # ------------------------------------------------------------------
+    # Readers
+    # ------------------------------------------------------------------
+
+    def bot(self, bot_id: str) -> Optional[Dict]:
+        """A single bot record, without PnL fields"""
+        return self._bots.get(bot_id)
+
+    def _bot_record(self, bot: Dict) -> Dict:
+        """Bot record with PnL fields from the engine once the bot has fills"""
+        if not self.pnl.has_bot(bot['id']):
+            return bot
+        return {**bot, **self.pnl.bot_stats(bot['id'])}
+
+    def snapshot(self, dataset: str):
+        """Return the current payload for a dataset in the frontend's shape"""
+        if dataset == 'bots':
+            return [self._bot_record(bot) for bot in self._bots.values()]
+        if dataset == 'portfolio':
+            return self.pnl.portfolio()
+        if dataset == 'signals':
+            return list(self._signals)
+        if dataset == 'prices':
+            return list(self._prices.values())
+        if dataset == 'trades':
+            return list(self._trades)
+        if dataset == 'indicators':
+            return list(self._indicators.values())
+        raise KeyError(dataset)
+
+
+class PriceRefresher:
+    """Periodically pulls tickers for the watchlist into MarketState"""
+
+    def __init__(self, state: MarketState, exchange_client, symbols: List[str],
+                 interval: float = 5.0):
+        self.state = state
+        self.exchange_client = exchange_client
+        self.symbols = symbols
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def refresh(self):
+        """Fetch all watchlist tickers in one batch and publish them"""
+        tickers = await self.exchange_client.get_tickers(self.symbols)
+        for ticker in tickers.values():
+            if ticker.get('price') is not None:
+                self.state.update_price(ticker)
+
+    async def _run(self):
+        await self.exchange_client.warm_up()
+        while True:
+            started = time.monotonic()
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error refreshing prices: {e}", exc_info=True)
+            await asyncio.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Process-wide state shared by the API routes and the bot engine
+market_state = MarketState()
@@ -0,0 +1,273 @@
+"""
+Array-backed L2 order book with depth and VWAP-for-size queries.
+
+Each side keeps its price levels in a sorted array('d') (bids stored
+negated, so index 0 is the best level on both sides) with a parallel size
+array. A level update is a binary search plus an in-place insert/delete.
+Inserting or removing a level shifts the levels behind it, which is O(n),
+but it is a single memmove: at the depths books are fetched at (50 to a
+few thousand levels) it adds little to the fixed per-update cost, and it
+only dominates around 10000 levels (orderbook.top_churn_* in the
+benchmarks). A tree would make it O(log n) at the price of slower queries,
+and the prefix arrays are rebuilt from the changed level either way.
+Cumulative size and notional are kept as prefix arrays that are valid up
+to the first level changed since they were built, and queries only extend
+them as deep as they need, so VWAP-for-size, depth-within and
+size-for-slippage queries cost a binary search plus the levels they reach.
+
+Books are fed from REST snapshots (ccxt fetch_order_book) or stream deltas.
+"""
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BookSide:
+    """One side of the book; `sign` is +1 for asks and -1 for bids"""
+
+    __slots__ = ('sign', '_keys', '_sizes', '_cum_size', '_cum_notional', '_valid')
+
+    def __init__(self, sign: int):
+        self.sign = sign
+        self._keys = array('d')  # sign * price, ascending
+        self._sizes = array('d')
+        self._cum_size = array('d')
+        self._cum_notional = array('d')
+        self._valid = 0  # Leading prefix entries that are up to date
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def clear(self):
+        del self._keys[:]
+        del self._sizes[:]
+        self._valid = 0
+
+    def load(self, levels: Iterable[Sequence[float]]):
+        """Replace every level from [price, size] pairs in any order"""
+        ordered = sorted((self.sign * float(level[0]), float(level[1])) for level in levels if float(level[1]) > 0)
+        self._keys = array('d', (key for key, _ in ordered))
+        self._sizes = array('d', (size for _, size in ordered))
+        self._valid = 0
+
+    def update(self, price: float, size: float):
+        """Set the size at a price level; a size of 0 removes the level"""
+        key = self.sign * price
+        index = bisect_left(self._keys, key)
+        exists = index < len(self._keys) and self._keys[index] == key
+        if size <= 0:
+            if not exists:
+                return
+            del self._keys[index]
+            del self._sizes[index]
+        elif exists:
+            self._sizes[index] = size
+        else:
+            self._keys.insert(index, key)
+            self._sizes.insert(index, size)
+        self._valid = min(self._valid, index)
+
+    def _extend(self, count: int):
+        """Make the first `count` prefix entries valid"""
+        count = min(count, len(self._keys))
+        start = self._valid
+        if start >= count:
+            return
+        del self._cum_size[start:]
+        del self._cum_notional[start:]
+        size_total = self._cum_size[start - 1] if start else 0.0
+        notional_total = self._cum_notional[start - 1] if start else 0.0
+        sign = self.sign
+        for i in range(start, count):
+            size = self._sizes[i]
+            size_total += size
+            notional_total += size * self._keys[i] * sign
+            self._cum_size.append(size_total)
+            self._cum_notional.append(notional_total)
+        self._valid = count
+
+    def _extend_until(self, reached) -> int:
+        """Extend the prefix a chunk at a time until `reached(valid)` holds; returns the valid length"""
+        count = len(self._keys)
+        chunk = 16
+        while self._valid < count and (not self._valid or not reached(self._valid)):
+            self._extend(self._valid + chunk)
+            chunk *= 2
+        return self._valid
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def best(self) -> Optional[float]:
+        return self._keys[0] * self.sign if self._keys else None
+
+    def levels(self, count: Optional[int] = None) -> List[Tuple[float, float]]:
+        count = len(self._keys) if count is None else min(count, len(self._keys))
+        return [(self._keys[i] * self.sign, self._sizes[i]) for i in range(count)]
+
+    def total_size(self) -> float:
+        self._extend(len(self._keys))
+        return self._cum_size[len(self._keys) - 1] if self._keys else 0.0
+
+    def depth_to(self, price: float) -> Tuple[float, float]:
+        """(size, notional) available at prices at least as good as `price`"""
+        index = bisect_right(self._keys, self.sign * price)
+        if not index:
+            return 0.0, 0.0
+        self._extend(index)
+        return self._cum_size[index - 1], self._cum_notional[index - 1]
+
+    def vwap_for_size(self, amount: float) -> Tuple[Optional[float], float]:
+        """(average fill price, fillable amount) for taking `amount` from this side"""
+        if amount <= 0 or not self._keys:
+            return None, 0.0
+        valid = self._extend_until(lambda n: self._cum_size[n - 1] >= amount)
+        index = bisect_left(self._cum_size, amount, 0, valid)
+        if index >= valid:
+            filled, notional = self._cum_size[valid - 1], self._cum_notional[valid - 1]
+            return notional / filled, filled
+        before_size = self._cum_size[index - 1] if index else 0.0
+        before_notional = self._cum_notional[index - 1] if index else 0.0
+        notional = before_notional + (amount - before_size) * self._keys[index] * self.sign
+        return notional / amount, amount
+
+    def size_for_vwap(self, limit_vwap: float) -> float:
+        """Largest amount whose average fill price is no worse than `limit_vwap`"""
+        if not self._keys or self._keys[0] > self.sign * limit_vwap:
+            return 0.0
+        sign, bound = self.sign, self.sign * limit_vwap
+
+        def within(n: int) -> bool:
+            return sign * self._cum_notional[n - 1] / self._cum_size[n - 1] <= bound
+
+        # The running VWAP only gets worse level by level, so binary search the last full level within the limit
+        count = self._extend_until(lambda n: not within(n))
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if within(mid + 1):
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo >= count:
+            return self._cum_size[count - 1]
+        size, notional = self._cum_size[lo - 1], self._cum_notional[lo - 1]
+        price = self._keys[lo] * self.sign
+        # Part of the next level: (notional + price * x) / (size + x) == limit_vwap
+        partial = (limit_vwap * size - notional) / (price - limit_vwap) if price != limit_vwap else self._sizes[lo]
+        return size + max(0.0, min(partial, self._sizes[lo]))
+
+
+class OrderBook:
+    """L2 book for one symbol"""
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.bids = BookSide(-1)
+        self.asks = BookSide(1)
+        self.timestamp: Optional[int] = None
+        self.sequence: Optional[int] = None
+        self.updated_at = 0.0
+
+    def apply_snapshot(self, book: Dict):
+        """Replace the book from a ccxt order book ({'bids', 'asks', 'timestamp', 'nonce'})"""
+        self.bids.load(book.get('bids') or [])
+        self.asks.load(book.get('asks') or [])
+        self.timestamp = book.get('timestamp')
+        self.sequence = book.get('nonce')
+        self.updated_at = time.monotonic()
+
+    def apply_deltas(self, bids: Iterable[Sequence[float]] = (), asks: Iterable[Sequence[float]] = (),
+                     sequence: Optional[int] = None, timestamp: Optional[int] = None) -> bool:
+        """Apply [price, size] level changes; deltas older than the book are ignored"""
+        if sequence is not None and self.sequence is not None and sequence <= self.sequence:
+            return False
+        for price, size, *_ in bids:
+            self.bids.update(float(price), float(size))
+        for price, size, *_ in asks:
+            self.asks.update(float(price), float(size))
+        if sequence is not None:
+            self.sequence = sequence
+        if timestamp is not None:
+            self.timestamp = timestamp
+        self.updated_at = time.monotonic()
+        return True
+
+    def side_for(self, order_side: str) -> BookSide:
+        """The side an order of `order_side` takes liquidity from"""
+        return self.asks if order_side == 'buy' else self.bids
+
+    @property
+    def mid(self) -> Optional[float]:
+        bid, ask = self.bids.best(), self.asks.best()
+        if bid is None or ask is None:
+            return bid if ask is None else ask
+        return (bid + ask) / 2
+
+    @property
+    def spread(self) -> Optional[float]:
+        bid, ask = self.bids.best(), self.asks.best()
+        return ask - bid if bid is not None and ask is not None else None
+
+    def age(self) -> float:
+        return time.monotonic() - self.updated_at
+
+    def vwap_for_size(self, order_side: str, amount: float) -> Tuple[Optional[float], float]:
+        return self.side_for(order_side).vwap_for_size(amount)
+
+    def slippage_for_size(self, order_side: str, amount: float) -> Optional[float]:
+        """Expected VWAP slippage against the best price, as a fraction"""
+        side = self.side_for(order_side)
+        best = side.best()
+        vwap, filled = side.vwap_for_size(amount)
+        if best is None or vwap is None or filled < amount:
+            return None
+        return abs(vwap - best) / best
+
+    def size_for_slippage(self, order_side: str, max_slippage: float) -> float:
+        """Largest amount that fills with at most `max_slippage` VWAP slippage"""
+        side = self.side_for(order_side)
+        best = side.best()
+        if best is None:
+            return 0.0
+        limit = best * (1 + max_slippage) if order_side == 'buy' else best * (1 - max_slippage)
+        return side.size_for_vwap(limit)
+
+    def limit_price_for(self, order_side: str, max_slippage: float) -> Optional[float]:
+        """Worst price a slice may fill at to stay within `max_slippage` of the best price"""
+        best = self.side_for(order_side).best()
+        if best is None:
+            return None
+        return best * (1 + max_slippage) if order_side == 'buy' else best * (1 - max_slippage)
+
+    def plan_slice(self, order_side: str, remaining: float, max_slippage: float) -> Tuple[float, Optional[float]]:
+        """
+        Next limit slice for a large order: (amount, limit price).
+
+        The slice takes what the book offers up to `max_slippage` away from
+        the best price; the limit price is the worst level that slice reaches.
+        """
+        side = self.side_for(order_side)
+        limit = self.limit_price_for(order_side, max_slippage)
+        if limit is None:
+            return 0.0, None
+        available, _ = side.depth_to(limit)
+        amount = min(remaining, available)
+        if amount <= 0:
+            return 0.0, None
+        index = bisect_left(side._cum_size, amount, 0, side._valid)
+        price = side._keys[min(index, len(side) - 1)] * side.sign
+        return amount, price
+
+    def to_dict(self, levels: int = 20) -> Dict:
+        return {
+            'symbol': self.symbol,
+            'timestamp': self.timestamp,
+            'bids': self.bids.levels(levels),
+            'asks': self.asks.levels(levels),
+        }
@@ -0,0 +1,316 @@
+"""
+Incremental position and PnL accounting.
+
+Every fill updates one bot position and one portfolio position in O(1)
+(average-cost method, long or short), and every price tick updates the
+portfolio's running market value and cost basis in O(1). Bot positions
+are marked lazily against the latest price per asset when read, so a tick
+never fans out to the bots holding that asset. Only aggregates are kept,
+never the fills themselves, so memory stays flat however long the trade
+history grows.
+"""
+from typing import Dict, List, Optional, Set, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+QUOTE_CURRENCIES = ('USDT', 'USD', 'USDC')
+
+# Running totals are rebuilt from the positions this often to shed float drift
+_REBUILD_EVERY = 10000
+
+
+def split_symbol(symbol: str) -> Tuple[str, Optional[str]]:
+    """'BTC/USDT' or 'BTCUSDT' -> ('BTC', 'USDT'); unknown quotes -> (symbol, None)"""
+    symbol = symbol.upper()
+    for separator in ('/', '-'):
+        if separator in symbol:
+            base, quote = symbol.split(separator, 1)
+            return base, quote.split(':')[0]
+    for quote in QUOTE_CURRENCIES:
+        if symbol.endswith(quote) and len(symbol) > len(quote):
+            return symbol[:-len(quote)], quote
+    return symbol, None
+
+
+def _fee_cost(fee) -> float:
+    """Fee in quote currency from a number or a ccxt {'cost': ...} dict"""
+    if isinstance(fee, dict):
+        return float(fee.get('cost') or 0.0)
+    return float(fee or 0.0)
+
+
+class Position:
+    """Signed amount at an average entry price"""
+
+    __slots__ = ('amount', 'avg_price')
+
+    def __init__(self, amount: float = 0.0, avg_price: Optional[float] = None):
+        self.amount = amount
+        self.avg_price = avg_price
+
+    def fill(self, side: str, amount: float, price: float) -> Tuple[float, float]:
+        """Apply a fill; returns (realized PnL, notional that opened or added to the position)"""
+        signed = amount if side == 'buy' else -amount
+        if self.amount == 0 or (self.amount > 0) == (signed > 0):
+            total = self.amount + signed
+            avg = self.avg_price if self.avg_price is not None else price
+            self.avg_price = (avg * abs(self.amount) + price * amount) / abs(total)
+            self.amount = total
+            return 0.0, amount * price
+
+        closed = min(abs(self.amount), amount)
+        avg = self.avg_price if self.avg_price is not None else price
+        realized = (price - avg) * closed * (1 if self.amount > 0 else -1)
+        remainder = amount - closed
+        self.amount += signed
+        if abs(self.amount) < 1e-12:
+            self.amount, self.avg_price = 0.0, None
+        elif remainder > 0:
+            self.avg_price = price  # Flipped from long to short or back
+        return realized, remainder * price
+
+    def cost(self) -> float:
+        return self.amount * self.avg_price if self.avg_price is not None else 0.0
+
+    def unrealized(self, mark: Optional[float]) -> float:
+        if mark is None or self.avg_price is None:
+            return 0.0
+        return (mark - self.avg_price) * self.amount
+
+
+class BotPnl:
+    """Positions and trade counters for one bot"""
+
+    __slots__ = ('positions', 'realized', 'fees', 'trades', 'wins', 'losses', 'opened_notional')
+
+    def __init__(self):
+        self.positions: Dict[str, Position] = {}
+        self.realized = 0.0
+        self.fees = 0.0
+        self.trades = 0
+        self.wins = 0
+        self.losses = 0
+        self.opened_notional = 0.0
+
+
+class PnlEngine:
+    """
+    Bot and portfolio PnL kept up to date from fills and price ticks.
+
+    The portfolio starts from a cash balance and holdings (set_portfolio),
+    and fills move cash and holdings from there. Bot records only reflect
+    their own fills.
+    """
+
+    def __init__(self):
+        self._bots: Dict[str, BotPnl] = {}
+        # asset -> bots with an open position in it, so a tick finds the bots it moves
+        self._holders: Dict[str, Set[str]] = {}
+        self._holdings: Dict[str, Position] = {}
+        # asset -> (price, quote rank, 24h change); USDT quotes win over USD and USDC
+        self._marks: Dict[str, Tuple[float, int, float]] = {}
+        self._cash = 0.0
+        self._realized = 0.0
+        self._market_value = 0.0
+        self._cost_basis = 0.0
+        self._updates = 0
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def set_portfolio(self, cash: float, holdings: Dict[str, float]):
+        """Reset the portfolio to a known balance; holdings are costed at their first price"""
+        self._cash = float(cash)
+        self._realized = 0.0
+        self._holdings = {asset.upper(): Position(float(amount)) for asset, amount in holdings.items()}
+        for asset, position in self._holdings.items():
+            mark = self._mark(asset)
+            if mark is not None:
+                position.avg_price = mark
+        self._rebuild_totals()
+
+    def apply_fill(self, bot_id: Optional[str], symbol: str, side: str, amount: float, price: float,
+                   fee=None) -> float:
+        """Apply a filled trade; returns the PnL it realized for its bot, net of fees"""
+        if not symbol or side not in ('buy', 'sell') or amount <= 0 or price is None or price <= 0:
+            logger.warning(f"Ignoring fill {side} {amount} {symbol} @ {price}")
+            return 0.0
+        asset, _ = split_symbol(symbol)
+        fee = _fee_cost(fee)
+
+        # Portfolio: cash moves by the fill's notional, the holding is re-costed
+        holding = self._holdings.get(asset)
+        if holding is None:
+            holding = self._holdings[asset] = Position()
+        mark = self._mark(asset)
+        self._remove_contribution(holding, mark)
+        realized, _ = holding.fill(side, amount, price)
+        self._add_contribution(holding, mark)
+        self._realized += realized - fee
+        self._cash += (-amount * price if side == 'buy' else amount * price) - fee
+
+        bot_realized = 0.0
+        if bot_id is not None:
+            bot = self._bots.get(bot_id)
+            if bot is None:
+                bot = self._bots[bot_id] = BotPnl()
+            position = bot.positions.get(asset)
+            if position is None:
+                position = bot.positions[asset] = Position()
+                self._holders.setdefault(asset, set()).add(bot_id)
+            realized, opened = position.fill(side, amount, price)
+            bot_realized = realized - fee
+            bot.realized += bot_realized
+            bot.fees += fee
+            bot.trades += 1
+            bot.opened_notional += opened
+            if realized > 0:
+                bot.wins += 1
+            elif realized < 0:
+                bot.losses += 1
+            if position.amount == 0:
+                del bot.positions[asset]
+                holders = self._holders[asset]
+                holders.discard(bot_id)
+                if not holders:
+                    del self._holders[asset]
+
+        self._count_update()
+        return bot_realized
+
+    def update_price(self, symbol: str, price: Optional[float], change24h: float = 0.0) -> bool:
+        """Mark an asset to a new price; returns False if a preferred quote already marks it"""
+        if price is None:
+            return False
+        asset, quote = split_symbol(symbol)
+        if quote not in QUOTE_CURRENCIES:
+            return False
+        rank = QUOTE_CURRENCIES.index(quote)
+        current = self._marks.get(asset)
+        if current is not None and current[1] < rank:
+            return False
+        old_mark = current[0] if current is not None else None
+        self._marks[asset] = (float(price), rank, float(change24h or 0.0))
+
+        holding = self._holdings.get(asset)
+        if holding is not None and holding.amount:
+            if holding.avg_price is None:
+                # Seeded holding without a known cost: cost it at its first price
+                holding.avg_price = float(price)
+                self._cost_basis += holding.cost()
+                self._market_value += holding.amount * float(price)
+            else:
+                self._market_value += holding.amount * (float(price) - (old_mark if old_mark is not None else holding.avg_price))
+        self._count_update()
+        return True
+
+    def _mark(self, asset: str) -> Optional[float]:
+        mark = self._marks.get(asset)
+        return mark[0] if mark is not None else None
+
+    def _remove_contribution(self, position: Position, mark: Optional[float]):
+        if position.avg_price is None:
+            return
+        self._cost_basis -= position.cost()
+        self._market_value -= position.amount * (mark if mark is not None else position.avg_price)
+
+    def _add_contribution(self, position: Position, mark: Optional[float]):
+        if position.avg_price is None:
+            return
+        self._cost_basis += position.cost()
+        self._market_value += position.amount * (mark if mark is not None else position.avg_price)
+
+    def _count_update(self):
+        self._updates += 1
+        if self._updates % _REBUILD_EVERY == 0:
+            self._rebuild_totals()
+
+    def _rebuild_totals(self):
+        self._market_value = 0.0
+        self._cost_basis = 0.0
+        for asset, position in self._holdings.items():
+            self._add_contribution(position, self._mark(asset))
+
+    # ------------------------------------------------------------------
+    # Readers
+    # ------------------------------------------------------------------
+
+    def has_bot(self, bot_id: str) -> bool:
+        return bot_id in self._bots
+
+    def bot_position(self, bot_id: str, symbol: str) -> Optional[Position]:
+        """A bot's open position in a symbol's base asset, if any"""
+        bot = self._bots.get(bot_id)
+        if bot is None:
+            return None
+        return bot.positions.get(split_symbol(symbol)[0])
+
+    def mark_price(self, symbol: str) -> Optional[float]:
+        """Latest price of a symbol's base asset"""
+        return self._mark(split_symbol(symbol)[0])
+
+    def bot_stats(self, bot_id: str) -> Dict:
+        """pnl/pnlPercent/trades/winRate for a bot record, marked to the latest prices"""
+        bot = self._bots.get(bot_id)
+        if bot is None:
+            return {'pnl': 0.0, 'pnlPercent': 0.0, 'trades': 0, 'winRate': 0.0}
+        unrealized = sum(position.unrealized(self._mark(asset)) for asset, position in bot.positions.items())
+        pnl = bot.realized + unrealized
+        closed = bot.wins + bot.losses
+        return {
+            'pnl': pnl,
+            'pnlPercent': pnl / bot.opened_notional * 100.0 if bot.opened_notional else 0.0,
+            'trades': bot.trades,
+            'winRate': bot.wins / closed * 100.0 if closed else 0.0,
+        }
+
+    def bots_holding(self, symbol: str) -> List[str]:
+        """Bots with an open position in a symbol's base asset"""
+        return list(self._holders.get(split_symbol(symbol)[0], ()))
+
+    def totals(self) -> Dict:
+        """Portfolio totals from the running sums"""
+        total_value = self._cash + self._market_value
+        total_pnl = self._realized + self._market_value - self._cost_basis
+        invested = total_value - total_pnl
+        return {
+            'totalValue': total_value,
+            'totalPnl': total_pnl,
+            'totalPnlPercent': total_pnl / invested * 100.0 if invested else 0.0,
+        }
+
+    def _asset_record(self, asset: str, position: Position) -> Dict:
+        mark = self._marks.get(asset)
+        price, change = (mark[0], mark[2]) if mark is not None else (position.avg_price or 0.0, 0.0)
+        return {
+            'symbol': asset,
+            'amount': position.amount,
+            'value': position.amount * price,
+            'change24h': change,
+        }
+
+    def asset(self, symbol: str) -> Optional[Dict]:
+        """The portfolio entry for a symbol's base asset, if it is held"""
+        asset = split_symbol(symbol)[0]
+        position = self._holdings.get(asset)
+        if position is None or not position.amount:
+            return None
+        return self._asset_record(asset, position)
+
+    def portfolio(self) -> Dict:
+        """Portfolio in the frontend's shape"""
+        assets = [
+            self._asset_record(asset, position)
+            for asset, position in self._holdings.items() if position.amount
+        ]
+        return {**self.totals(), 'assets': assets}
+
+    def stats(self) -> Dict:
+        return {
+            'bots': len(self._bots),
+            'assets': len(self._holdings),
+            'marks': len(self._marks),
+            'updates': self._updates,
+        }
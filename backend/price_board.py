@@ -0,0 +1,202 @@
+import math
+import struct
+import time
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+SYMBOL_BYTES = 32
+
+# Price fields written by the ticker refresher
+PRICE_FIELDS = ('price', 'bid', 'ask', 'change24h', 'volume24h', 'high24h', 'low24h', 'price_ts')
+# Indicator snapshot fields written after each technical analysis
+INDICATOR_FIELDS = ('rsi', 'macd', 'macd_signal', 'macd_histogram', 'sma_20', 'ema_50', 'atr',
+                    'signal', 'indicators_ts')
+FIELDS = PRICE_FIELDS + INDICATOR_FIELDS
+
+# Slot: sequence counter, symbol name, then one double per field
+_SEQ = struct.Struct('<Q')
+_NAME = struct.Struct(f'<{SYMBOL_BYTES}s')
+_VALUES = struct.Struct(f'<{len(FIELDS)}d')
+SLOT_SIZE = _SEQ.size + _NAME.size + _VALUES.size
+_HEADER = struct.Struct('<4sII')  # magic, slot count, slots in use
+HEADER_SIZE = _HEADER.size
+MAGIC = b'PBD1'
+
+SIGNAL_CODES = {'sell': -1.0, 'neutral': 0.0, 'buy': 1.0}
+SIGNAL_NAMES = {v: k for k, v in SIGNAL_CODES.items()}
+
+
+class PriceBoard:
+    """
+    Shared-memory table of latest prices and indicator snapshots per symbol.
+
+    Every symbol has a fixed slot owned by exactly one writer process. Writes
+    are guarded by a per-slot sequence counter (seqlock): the writer makes it
+    odd, updates the values and makes it even again; readers retry while the
+    counter is odd or changed under them. Readers never take a lock and never
+    block the writer.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self._shm = shm
+        self._buf = shm.buf
+        self._owner = owner
+        magic, self.capacity, _ = _HEADER.unpack_from(self._buf, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Shared memory {shm.name} is not a price board")
+        self._slots: Dict[str, int] = {}
+        self._refresh_directory()
+
+    @classmethod
+    def create(cls, symbols: Iterable[str], capacity: Optional[int] = None) -> 'PriceBoard':
+        """Create a board with a slot for each symbol (owned by the calling process)"""
+        symbols = list(dict.fromkeys(symbols))
+        capacity = max(capacity or 0, len(symbols), 1)
+        shm = shared_memory.SharedMemory(create=True, size=HEADER_SIZE + capacity * SLOT_SIZE)
+        _HEADER.pack_into(shm.buf, 0, MAGIC, capacity, len(symbols))
+        for index, symbol in enumerate(symbols):
+            offset = HEADER_SIZE + index * SLOT_SIZE
+            _SEQ.pack_into(shm.buf, offset, 0)
+            _NAME.pack_into(shm.buf, offset + _SEQ.size, symbol.encode()[:SYMBOL_BYTES])
+            _VALUES.pack_into(shm.buf, offset + _SEQ.size + _NAME.size, *([math.nan] * len(FIELDS)))
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> 'PriceBoard':
+        """Attach to a board created by another process"""
+        try:
+            # Python 3.13+: keep the attaching process from unlinking the board at exit
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            shm = shared_memory.SharedMemory(name=name)
+        return cls(shm, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @property
+    def symbols(self) -> List[str]:
+        return list(self._slots)
+
+    def _refresh_directory(self):
+        _, _, used = _HEADER.unpack_from(self._buf, 0)
+        for index in range(len(self._slots), used):
+            offset = HEADER_SIZE + index * SLOT_SIZE
+            (raw,) = _NAME.unpack_from(self._buf, offset + _SEQ.size)
+            self._slots[raw.rstrip(b'\0').decode()] = offset
+
+    def _offset(self, symbol: str) -> Optional[int]:
+        offset = self._slots.get(symbol)
+        if offset is None:
+            self._refresh_directory()
+            offset = self._slots.get(symbol)
+        return offset
+
+    # ------------------------------------------------------------------
+    # Writer side (one process per symbol)
+    # ------------------------------------------------------------------
+
+    def _write(self, symbol: str, updates: Dict[str, float]) -> bool:
+        offset = self._offset(symbol)
+        if offset is None:
+            logger.warning(f"No price board slot for {symbol}")
+            return False
+        values_offset = offset + _SEQ.size + _NAME.size
+        (seq,) = _SEQ.unpack_from(self._buf, offset)
+        seq += seq & 1  # A writer that crashed mid-update left the counter odd
+        values = list(_VALUES.unpack_from(self._buf, values_offset))
+        for name, value in updates.items():
+            values[FIELDS.index(name)] = math.nan if value is None else float(value)
+
+        _SEQ.pack_into(self._buf, offset, seq + 1)  # Odd: write in progress
+        _VALUES.pack_into(self._buf, values_offset, *values)
+        _SEQ.pack_into(self._buf, offset, seq + 2)  # Even: consistent
+        return True
+
+    def publish_price(self, price: Dict) -> bool:
+        """Publish a ticker (MarketState price record or ExchangeClient ticker)"""
+        return self._write(price['symbol'], {
+            'price': price.get('price'),
+            'bid': price.get('bid'),
+            'ask': price.get('ask'),
+            'change24h': price.get('change24h', price.get('change')),
+            'volume24h': price.get('volume24h', price.get('volume')),
+            'high24h': price.get('high24h', price.get('high')),
+            'low24h': price.get('low24h', price.get('low')),
+            'price_ts': time.time(),
+        })
+
+    def publish_indicators(self, symbol: str, analysis: Dict) -> bool:
+        """Publish the indicator snapshot from a TechnicalAnalyzer result"""
+        indicators = analysis.get('indicators') or {}
+        macd = indicators.get('macd') or {}
+        return self._write(symbol, {
+            'rsi': indicators.get('rsi'),
+            'macd': macd.get('macd'),
+            'macd_signal': macd.get('signal'),
+            'macd_histogram': macd.get('histogram'),
+            'sma_20': indicators.get('sma_20'),
+            'ema_50': indicators.get('ema_50'),
+            'atr': indicators.get('atr'),
+            'signal': SIGNAL_CODES.get(analysis.get('overall_signal'), math.nan),
+            'indicators_ts': time.time(),
+        })
+
+    # ------------------------------------------------------------------
+    # Reader side (any process)
+    # ------------------------------------------------------------------
+
+    def read_slot(self, symbol: str, max_retries: int = 100) -> Optional[Tuple[int, Dict[str, float]]]:
+        """Return (sequence, values) for a symbol, or None if it has no slot"""
+        offset = self._offset(symbol)
+        if offset is None:
+            return None
+        values_offset = offset + _SEQ.size + _NAME.size
+        for _ in range(max_retries):
+            (before,) = _SEQ.unpack_from(self._buf, offset)
+            if before & 1:
+                continue
+            values = _VALUES.unpack_from(self._buf, values_offset)
+            (after,) = _SEQ.unpack_from(self._buf, offset)
+            if before == after:
+                return before, dict(zip(FIELDS, values))
+        return None
+
+    def sequence(self, symbol: str) -> int:
+        """Cheap change check: the slot's sequence counter"""
+        offset = self._offset(symbol)
+        return _SEQ.unpack_from(self._buf, offset)[0] if offset is not None else 0
+
+    def close(self):
+        """Detach; the creating process also frees the shared memory"""
+        self._buf = None
+        self._shm.close()
+        if self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def board_price_record(symbol: str, values: Dict[str, float]) -> Optional[Dict]:
+    """Convert board values into a MarketState price record"""
+    if math.isnan(values['price']):
+        return None
+    return {
+        'symbol': symbol,
+        **{k: (None if math.isnan(values[k]) else values[k]) for k in PRICE_FIELDS if k != 'price_ts'},
+    }
+
+
+def board_indicator_record(symbol: str, values: Dict[str, float]) -> Optional[Dict]:
+    """Convert board values into an indicator snapshot"""
+    if math.isnan(values['indicators_ts']):
+        return None
+    record = {k: (None if math.isnan(values[k]) else values[k]) for k in INDICATOR_FIELDS}
+    record['symbol'] = symbol
+    record['signal'] = SIGNAL_NAMES.get(values['signal'], 'neutral')
+    return record
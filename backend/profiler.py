@@ -0,0 +1,107 @@
+"""
+On-demand sampling profiler for the live process.
+
+A daemon thread snapshots every thread's Python stack at a fixed interval
+and counts identical stacks. Nothing is hooked into the profiled code, so
+the cost is one stack walk per thread per sample and zero when stopped.
+Results are returned in the collapsed "frame;frame;frame count" format
+that flamegraph.pl, speedscope and similar tools read directly.
+"""
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = code.co_filename.rsplit('/', 1)[-1]
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Samples all thread stacks until stopped or max_duration elapses"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._stacks: Counter = Counter()
+        self.interval = 0.005
+        self.started_at: Optional[float] = None
+        self.stopped_at: Optional[float] = None
+        self.samples = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval: float = 0.005, max_duration: float = 300.0) -> bool:
+        """Start sampling; returns False if a session is already running"""
+        with self._lock:
+            if self.running:
+                return False
+            self.interval = interval
+            self._stacks = Counter()
+            self.samples = 0
+            self.started_at, self.stopped_at = time.time(), None
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, args=(max_duration,), name='sampling-profiler', daemon=True
+            )
+            self._thread.start()
+            logger.info(f"Sampling profiler started ({interval * 1000:.1f}ms interval)")
+            return True
+
+    def stop(self) -> Dict:
+        """Stop sampling and return the collected stacks"""
+        with self._lock:
+            if self._thread is not None:
+                self._stop.set()
+                self._thread.join()
+                self._thread = None
+                logger.info(f"Sampling profiler stopped after {self.samples} samples")
+            return self.report()
+
+    def _run(self, max_duration: float):
+        own_id = threading.get_ident()
+        thread_names = {}
+        deadline = time.monotonic() + max_duration
+        while not self._stop.is_set() and time.monotonic() < deadline:
+            if len(thread_names) != threading.active_count():
+                thread_names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(thread_names.get(thread_id, str(thread_id)))
+                self._stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+            self._stop.wait(self.interval)
+        self.stopped_at = time.time()
+
+    def collapsed(self) -> str:
+        """Stacks in collapsed format, hottest first"""
+        return '\n'.join(f"{stack} {count}" for stack, count in self._stacks.most_common())
+
+    def report(self) -> Dict:
+        return {
+            'running': self.running,
+            'interval': self.interval,
+            'started_at': self.started_at,
+            'stopped_at': self.stopped_at,
+            'samples': self.samples,
+            'unique_stacks': len(self._stacks),
+            'collapsed': self.collapsed(),
+        }
+
+
+# Single profiler per process; sessions are started and stopped from the admin API
+profiler = SamplingProfiler()
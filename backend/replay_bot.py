@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Replay a traffic capture through the bot engine.
+
+Recorded exchange and social responses (captured with CAPTURE_DIR) are fed
+back through ExchangeClient and SentimentAnalyzer while the price refresher,
+the bot scheduler and the risk engine run as they do in run_bot.py, at 1x,
+Nx (--speed 60 plays an hour of market in a minute) or as fast as requests
+arrive (--speed max). Time-based settings are divided by the speed so bots
+run as often per recorded minute as they would live.
+
+The run ends with a report of how well the engine kept up, written as
+benchmark results so builds can be compared with --baseline:
+
+    python replay_bot.py captures/ --speed 60 --output before.json
+    python replay_bot.py captures/ --speed 60 --baseline before.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+from benchmarks.harness import Results, compare, format_report, load_thresholds
+from bot_scheduler import BotScheduler
+from cache import build_cache
+from capture import Replay, ReplayExchange
+from config import Config
+from exchange_client import ExchangeClient
+from logging_pipeline import setup_logging, shutdown_logging
+from market_state import MarketState, PriceRefresher
+from risk_engine import RiskEngine
+
+logger = logging.getLogger('replay')
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks', 'results')
+
+# Settings measured in seconds of market time, divided by the replay speed
+TIME_SETTINGS = (
+    'BOT_DEFAULT_INTERVAL', 'PRICE_REFRESH_INTERVAL', 'SENTIMENT_REFRESH_INTERVAL',
+    'CACHE_TICKER_TTL', 'CACHE_CANDLE_TTL', 'CACHE_ANALYSIS_TTL', 'LUNARCRUSH_CACHE_TTL',
+    'FUSION_TECHNICAL_MAX_AGE', 'FUSION_TECHNICAL_MAX_STALE', 'FUSION_SENTIMENT_MAX_AGE',
+    'FUSION_SENTIMENT_MAX_STALE', 'RISK_EXIT_RETRY_DELAY', 'ORDER_FILL_TIMEOUT', 'ORDER_POLL_INTERVAL',
+)
+
+# --speed max has no fixed ratio; time-based settings are scaled as if it were this fast
+MAX_SPEED_SCALE = 1000.0
+
+# Unpaced replays end when capture time hasn't moved for this long: the rest of
+# the capture is traffic the bots no longer request (e.g. a since-paused bot's candles)
+STALL_TIMEOUT = 1.0
+
+
+def scale_settings(scale: float) -> Dict[str, float]:
+    """Divide the time-based settings by scale; returns the original values"""
+    original = {}
+    for name in TIME_SETTINGS:
+        value = getattr(Config, name, None)
+        if value is not None:
+            original[name] = value
+            setattr(Config, name, value / scale)
+    return original
+
+
+def watchlist(replay: Replay) -> Tuple[str, List[str]]:
+    """The exchange and symbols the recorded price refresher polled"""
+    exchanges = [Config.MARKET_EXCHANGE] + sorted(replay.sources() - {Config.MARKET_EXCHANGE})
+    for exchange_id in exchanges:
+        symbols = set()
+        for args, _ in replay.requests(exchange_id, 'fetch_tickers'):
+            symbols.update(args[0] if args else [])
+        for args, _ in replay.requests(exchange_id, 'fetch_ticker'):
+            if args:
+                symbols.add(args[0])
+        if symbols:
+            return exchange_id, sorted(symbols)
+    return Config.MARKET_EXCHANGE, list(Config.MARKET_SYMBOLS)
+
+
+async def run(capture: str, speed: Optional[float], seed: str, duration: Optional[float]) -> Results:
+    replay = Replay(capture, speed=speed)
+    scale = speed if speed is not None else MAX_SPEED_SCALE
+    original = scale_settings(scale)
+    logger.info(f"Replaying {replay.records} records covering {replay.end - replay.start:.0f}s "
+                f"at {'max speed' if speed is None else f'{speed:g}x'}")
+
+    state = MarketState()
+    state.load_seed(seed)
+    clients: Dict[str, ExchangeClient] = {}
+
+    def client_for(exchange_id: str) -> ExchangeClient:
+        client = clients.get(exchange_id)
+        if client is None:
+            client = clients[exchange_id] = ExchangeClient(
+                exchange_id, Config, exchange=ReplayExchange(replay, exchange_id)
+            )
+        return client
+
+    def sentiment_factory():
+        from sentiment_analyzer import SentimentAnalyzer
+        return SentimentAnalyzer(replay=replay)
+
+    counts = {'signals': 0, 'trades': 0}
+
+    def count_changes(dataset: str, item: Optional[Dict]):
+        if dataset in counts and item is not None:
+            counts[dataset] += 1
+
+    state.add_listener(count_changes)
+    exchange_id, symbols = watchlist(replay)
+    refresher = PriceRefresher(state, client_for(exchange_id), symbols, Config.PRICE_REFRESH_INTERVAL)
+    risk = RiskEngine(
+        state,
+        stop_loss=Config.STOP_LOSS_PERCENTAGE,
+        take_profit=Config.TAKE_PROFIT_PERCENTAGE,
+        max_position_size=Config.MAX_POSITION_SIZE,
+        order_size=Config.BOT_ORDER_SIZE,
+        retry_delay=Config.RISK_EXIT_RETRY_DELAY,
+        fill_timeout=Config.ORDER_FILL_TIMEOUT,
+        live_trading=True,  # Orders only reach the replayed venue
+        client_for=client_for,
+    )
+    scheduler = BotScheduler(
+        state,
+        max_concurrency=Config.BOT_MAX_CONCURRENCY,
+        time_budget=Config.BOT_TIME_BUDGET,
+        cpu_budget=Config.BOT_CPU_BUDGET,
+        on_decision=risk.on_decision,
+        cache=build_cache('local', max_entries=Config.CACHE_MAX_ENTRIES),
+        client_for=client_for,
+        sentiment_factory=sentiment_factory,
+    )
+
+    replay.clock.begin()
+    started = time.monotonic()
+    risk.start()
+    refresher.start()
+    await scheduler.start()
+    active = sum(1 for bot in scheduler.bots.values() if not bot.paused)
+    stalled_at = None
+    try:
+        position, moved_at = replay.clock.now(), time.monotonic()
+        while not replay.finished:
+            await asyncio.sleep(0.05)
+            now = time.monotonic()
+            if duration is not None and now - started >= duration:
+                break
+            if replay.clock.now() > position:
+                position, moved_at = replay.clock.now(), now
+            elif not replay.clock.paced and now - moved_at >= STALL_TIMEOUT:
+                stalled_at = moved_at
+                logger.info(f"Nothing requested past {position - replay.start:.1f}s of the capture, stopping")
+                break
+    finally:
+        elapsed = time.monotonic() - started
+        # The idle wait before giving up on a stalled replay isn't part of the run
+        wall = stalled_at - started if stalled_at is not None else elapsed
+        await refresher.stop()
+        await scheduler.stop(Config.BOT_DRAIN_TIMEOUT)
+        await risk.stop()
+        for client in clients.values():
+            await client.close()
+        state.remove_listener(count_changes)
+
+    covered = min(replay.clock.now(), replay.end) - replay.start
+    bots = list(scheduler.bots.values())
+    runs = sum(bot.runs for bot in bots)
+    # Bots are scheduled on the wall clock at the scaled interval in both modes, idle wait included
+    expected_runs = active * elapsed / Config.BOT_DEFAULT_INTERVAL if Config.BOT_DEFAULT_INTERVAL else 0
+
+    results = Results()
+    results.add('replay.capture_seconds', covered, 's', better='higher')
+    results.add('replay.wall_seconds', wall, 's')
+    results.add('replay.effective_speed', covered / wall if wall else 0.0, 'x', better='higher')
+    results.add_throughput('replay.requests_per_sec', replay.served, wall, 'req/s')
+    results.add('replay.misses', sum(replay.misses.values()), 'requests')
+    # Runs over scheduled runs; 1.0 means every active bot ran on schedule throughout
+    results.add('replay.bots.run_ratio', runs / expected_runs if expected_runs else 0.0, 'ratio', better='higher')
+    results.add('replay.bots.skipped', sum(bot.skipped for bot in bots), 'runs')
+    results.add('replay.bots.overruns', sum(bot.overruns for bot in bots), 'runs')
+    results.add('replay.bots.errors', sum(bot.errors for bot in bots), 'runs')
+
+    logger.info(f"Replayed {covered:.0f}s in {wall:.1f}s: {runs} bot runs, {counts['signals']} signals, "
+                f"{counts['trades']} trades, misses {replay.misses or 'none'}")
+    for name, value in original.items():
+        setattr(Config, name, value)
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Replay a traffic capture through the bot engine")
+    parser.add_argument('capture', help='capture file or CAPTURE_DIR directory')
+    parser.add_argument('--speed', default='1',
+                        help="playback speed: 1 for real time, N for N times faster, 'max' for as fast as possible")
+    parser.add_argument('--seed', default=Config.SEED_DATA_PATH, help='bots and portfolio to replay with')
+    parser.add_argument('--duration', type=float, help='stop after this many wall seconds')
+    parser.add_argument('--output', default=os.path.join(RESULTS_DIR, 'replay.json'))
+    parser.add_argument('--baseline', help='replay results file to compare against')
+    parser.add_argument('--thresholds', help='regression thresholds file (default: benchmarks/thresholds.json)')
+    args = parser.parse_args()
+
+    try:
+        speed = None if args.speed == 'max' else float(args.speed)
+        if speed is not None and speed <= 0:
+            raise ValueError
+    except ValueError:
+        parser.error(f"--speed must be a positive number or 'max', not {args.speed}")
+
+    setup_logging(level='WARNING')
+    logger.setLevel(logging.INFO)
+    try:
+        results = asyncio.run(run(args.capture, speed, args.seed, args.duration))
+    finally:
+        shutdown_logging()
+
+    results.save(args.output)
+    rows = []
+    if args.baseline:
+        if not os.path.exists(args.baseline):
+            print(f"Baseline {args.baseline} not found", file=sys.stderr)
+            return 2
+        with open(args.baseline) as f:
+            rows = compare(results.to_dict(), json.load(f), load_thresholds(args.thresholds))
+
+    print(format_report(results, rows))
+    print(f"\nResults written to {args.output}")
+    failed = [row for row in rows if row['failed']]
+    if failed:
+        print(f"\n{len(failed)} metric(s) regressed past their threshold", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,420 @@
+"""
+Stop-loss / take-profit enforcement and pre-trade position limits.
+
+Open bot positions are indexed per symbol in two heaps: levels that fire
+when the price falls to them (long stops, short targets) and levels that
+fire when it rises to them (long targets, short stops). A price tick pops
+only the entries it crossed, so its cost is O(k log n) for k triggered
+positions regardless of how many are open. Triggered exits go straight to
+a depth-aware order on the bot's exchange; the resulting fill flows back
+through MarketState, which updates PnL and removes the trigger.
+
+Bot decisions reach the exchange through the same engine: a buy signal
+opens a position of BOT_ORDER_SIZE of the portfolio, checked against
+MAX_POSITION_SIZE, and a sell signal closes it. Orders are followed until
+they fill or are cancelled, which happens once they have rested for
+ORDER_FILL_TIMEOUT (a depth-aware slice, ORDER_SLICE_INTERVAL); only what
+filled is recorded, and an exit that did not fill is re-armed. Decisions
+leave positions the engine did not see open (seeded or held before start())
+alone. Unless BOT_LIVE_TRADING is set, orders that pass the checks are
+logged instead of sent.
+
+Positions are tracked from fills seen after start(), and heap entries are
+invalidated lazily by a per-position version.
+"""
+import asyncio
+import heapq
+import itertools
+import time
+import uuid
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from config import Config
+from exchange_client import ORDER_DONE, ExchangeClient, filled_amount
+from market_state import market_state
+from metrics import registry
+from tracing import tracer
+import logging
+
+logger = logging.getLogger(__name__)
+
+RISK_TICK_LATENCY = registry.histogram(
+    'hybridbot_risk_tick_seconds', 'Time to check a price tick against stop-loss/take-profit triggers',
+    buckets=(0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.01)
+)
+RISK_EXITS = registry.counter(
+    'hybridbot_risk_exits_total', 'Exits triggered by stop-loss/take-profit levels', ('trigger', 'result')
+)
+RISK_REJECTIONS = registry.counter(
+    'hybridbot_risk_rejections_total', 'Orders rejected by pre-trade checks', ('reason',)
+)
+RISK_POSITIONS = registry.gauge('hybridbot_risk_open_positions', 'Positions with armed exit triggers')
+
+STOP_LOSS = 'stop_loss'
+TAKE_PROFIT = 'take_profit'
+
+
+def _normalize_symbol(symbol: str) -> str:
+    """'BTC/USDT', 'btcusdt' and 'BTC-USDT' all map to 'BTCUSDT'"""
+    return symbol.replace('/', '').replace('-', '').upper()
+
+
+class Trigger:
+    """Exit levels for one bot's position in one symbol"""
+
+    __slots__ = ('bot_id', 'symbol', 'amount', 'entry', 'stop', 'target', 'version', 'exiting')
+
+    def __init__(self, bot_id: str, symbol: str):
+        self.bot_id = bot_id
+        self.symbol = symbol
+        self.amount = 0.0
+        self.entry = 0.0
+        self.stop: Optional[float] = None
+        self.target: Optional[float] = None
+        self.version = 0
+        self.exiting = False
+
+    def to_dict(self) -> Dict:
+        return {
+            'botId': self.bot_id,
+            'symbol': self.symbol,
+            'amount': self.amount,
+            'entry': self.entry,
+            'stopLoss': self.stop,
+            'takeProfit': self.target,
+            'exiting': self.exiting,
+        }
+
+
+# Heap entry: (sort level, sequence, position key, version, trigger kind)
+_Entry = Tuple[float, int, Tuple[str, str], int, str]
+
+
+class RiskEngine:
+    """
+    Arms stop-loss/take-profit exits for bot positions and gates new orders.
+
+    `client_for(exchange_id)` returns the ExchangeClient used to place
+    orders; by default one uncached client per exchange is created lazily.
+    """
+
+    def __init__(self, market_state, stop_loss: float = 0.05, take_profit: float = 0.15,
+                 max_position_size: float = 0.1, order_size: float = 0.05, retry_delay: float = 5.0,
+                 fill_timeout: float = 30.0, live_trading: bool = False,
+                 client_for: Optional[Callable[[str], object]] = None):
+        self.market_state = market_state
+        self.stop_loss = stop_loss
+        self.take_profit = take_profit
+        self.max_position_size = max_position_size
+        self.order_size = order_size
+        self.retry_delay = retry_delay
+        self.fill_timeout = fill_timeout
+        self.live_trading = live_trading
+        self._client_for = client_for
+        self._clients: Dict[str, object] = {}
+
+        self._triggers: Dict[Tuple[str, str], Trigger] = {}
+        # normalized symbol -> heap of levels hit from above (max-heap via negated level)
+        self._falling: Dict[str, List[_Entry]] = {}
+        # normalized symbol -> heap of levels hit from below
+        self._rising: Dict[str, List[_Entry]] = {}
+        self._seq = itertools.count()
+        self._stale_entries = 0
+        self._exits: Set[asyncio.Task] = set()
+        # Positions with a decision order in flight; further decisions wait for it
+        self._working: Set[Tuple[str, str]] = set()
+        self._started = False
+
+    # ------------------------------------------------------------------
+    # Trigger index
+    # ------------------------------------------------------------------
+
+    def _on_market_state_change(self, dataset: str, item: Optional[Dict]):
+        if item is None:
+            return
+        if dataset == 'prices':
+            self.on_price(item['symbol'], item.get('price'))
+        elif dataset == 'trades' and item.get('status') == 'filled' and item.get('botId') and item.get('pair'):
+            self.on_fill(item['botId'], item['pair'])
+
+    def on_fill(self, bot_id: str, symbol: str):
+        """Re-arm a bot's triggers from its position after a fill"""
+        key = (bot_id, _normalize_symbol(symbol))
+        trigger = self._triggers.get(key)
+        position = self.market_state.pnl.bot_position(bot_id, symbol)
+        if position is None or not position.amount or position.avg_price is None:
+            if trigger is not None:
+                self._invalidate(trigger)
+                del self._triggers[key]
+                self._maybe_compact()
+            return
+
+        if trigger is None:
+            trigger = self._triggers[key] = Trigger(bot_id, symbol)
+        else:
+            self._invalidate(trigger)
+        trigger.amount = position.amount
+        trigger.entry = position.avg_price
+        trigger.exiting = False
+        self._arm(trigger)
+        self._maybe_compact()
+
+    def _arm(self, trigger: Trigger):
+        long = trigger.amount > 0
+        trigger.stop = trigger.entry * (1 - self.stop_loss if long else 1 + self.stop_loss) if self.stop_loss > 0 else None
+        trigger.target = trigger.entry * (1 + self.take_profit if long else 1 - self.take_profit) if self.take_profit > 0 else None
+        symbol = _normalize_symbol(trigger.symbol)
+        key = (trigger.bot_id, symbol)
+        if trigger.stop is not None:
+            self._push(symbol, trigger.stop, not long, key, trigger.version, STOP_LOSS)
+        if trigger.target is not None:
+            self._push(symbol, trigger.target, long, key, trigger.version, TAKE_PROFIT)
+
+    def _push(self, symbol: str, level: float, rising: bool, key: Tuple[str, str], version: int, kind: str):
+        if rising:
+            heapq.heappush(self._rising.setdefault(symbol, []), (level, next(self._seq), key, version, kind))
+        else:
+            heapq.heappush(self._falling.setdefault(symbol, []), (-level, next(self._seq), key, version, kind))
+
+    def _invalidate(self, trigger: Trigger):
+        """Orphan the trigger's heap entries; they are skipped when popped or compacted away"""
+        trigger.version += 1
+        self._stale_entries += (trigger.stop is not None) + (trigger.target is not None)
+
+    def _maybe_compact(self):
+        """Rebuild the heaps once orphaned entries outnumber live ones"""
+        if self._stale_entries <= 2 * len(self._triggers) + 1000:
+            return
+        self._falling.clear()
+        self._rising.clear()
+        self._stale_entries = 0
+        for trigger in self._triggers.values():
+            if not trigger.exiting:
+                self._arm(trigger)
+
+    def on_price(self, symbol: str, price: Optional[float]):
+        """Fire every trigger this price crossed"""
+        if price is None:
+            return
+        symbol = _normalize_symbol(symbol)
+        falling, rising = self._falling.get(symbol), self._rising.get(symbol)
+        if not falling and not rising:
+            return
+        started = time.perf_counter()
+        fired = []
+        while falling and -falling[0][0] >= price:
+            fired.append(heapq.heappop(falling))
+        while rising and rising[0][0] <= price:
+            fired.append(heapq.heappop(rising))
+        for _, _, key, version, kind in fired:
+            trigger = self._triggers.get(key)
+            if trigger is None or trigger.version != version or trigger.exiting:
+                self._stale_entries = max(0, self._stale_entries - 1)
+                continue  # Superseded by a later fill or already exiting
+            self._invalidate(trigger)
+            trigger.exiting = True
+            task = asyncio.get_running_loop().create_task(self._exit(trigger, kind, price))
+            self._exits.add(task)
+            task.add_done_callback(self._exits.discard)
+        RISK_TICK_LATENCY.observe(time.perf_counter() - started)
+
+    # ------------------------------------------------------------------
+    # Orders
+    # ------------------------------------------------------------------
+
+    def _client(self, exchange_id: str):
+        client = self._clients.get(exchange_id)
+        if client is None:
+            if self._client_for is not None:
+                client = self._client_for(exchange_id)
+            else:
+                client = ExchangeClient(exchange_id, Config)
+            self._clients[exchange_id] = client
+        return client
+
+    def check_order(self, bot_id: str, symbol: str, side: str, amount: float,
+                    price: Optional[float] = None) -> Optional[str]:
+        """Pre-trade check; returns why the order is rejected, or None if it may go ahead"""
+        if side not in ('buy', 'sell') or amount <= 0:
+            return 'invalid order'
+        position = self.market_state.pnl.bot_position(bot_id, symbol)
+        current = position.amount if position is not None else 0.0
+        after = current + (amount if side == 'buy' else -amount)
+        if abs(after) <= abs(current) and (after == 0 or (after > 0) == (current > 0)):
+            return None  # Reducing an existing position is always allowed
+
+        reference = price or self.market_state.pnl.mark_price(symbol)
+        if not reference:
+            return 'no price available to size the position'
+        portfolio_value = self.market_state.pnl.totals()['totalValue']
+        limit = self.max_position_size * portfolio_value
+        if abs(after) * reference > limit:
+            return (f"position of {abs(after) * reference:.2f} would exceed MAX_POSITION_SIZE "
+                    f"({self.max_position_size:.0%} of {portfolio_value:.2f})")
+        return None
+
+    async def on_decision(self, bot, decision: Dict):
+        """BotScheduler hook: trade a scheduled bot's decision"""
+        await self.execute_decision(bot.id, bot.symbol, decision)
+
+    async def execute_decision(self, bot_id: str, symbol: str, decision: Dict) -> Optional[Dict]:
+        """Open a long on a buy decision and close it on a sell; None when there is nothing to do"""
+        action = decision.get('action')
+        if action not in ('buy', 'sell'):
+            return None
+        key = (bot_id, _normalize_symbol(symbol))
+        trigger = self._triggers.get(key)
+        if key in self._working or (trigger is not None and trigger.exiting):
+            return None  # The position is already changing; the next run sees the outcome
+
+        position = self.market_state.pnl.bot_position(bot_id, symbol)
+        current = position.amount if position is not None else 0.0
+        if current and trigger is None:
+            # Seeded or held before start(): not the engine's to trade out of
+            logger.debug(f"Leaving bot {bot_id}'s untracked {symbol} position of {current} alone")
+            return None
+        if action == 'sell':
+            if current <= 0:
+                return None
+            side, amount = 'sell', current
+        else:
+            if current > 0:
+                return None
+            # Sized at the mark price check_order values positions at
+            reference = self.market_state.pnl.mark_price(symbol)
+            if not reference:
+                logger.debug(f"No price to size bot {bot_id}'s {symbol} entry")
+                return None
+            # A short opened since start() is covered along with the entry
+            entry = self.order_size * self.market_state.pnl.totals()['totalValue'] / reference
+            side, amount = 'buy', entry - current
+
+        self._working.add(key)
+        try:
+            return await self.place_order(bot_id, symbol, side, amount)
+        finally:
+            self._working.discard(key)
+
+    async def place_order(self, bot_id: str, symbol: str, side: str, amount: float,
+                          price: Optional[float] = None, reduce_only: bool = False) -> Dict:
+        """
+        Check, place and record an order for a bot; limit order if a price is given.
+
+        Orders without a price go out depth-aware. Returns the order once it
+        is done, with `filled` set to the amount that filled (0 when nothing
+        did) and `average` its fill price.
+        """
+        if not reduce_only:
+            with tracer.span('order.check', side=side):
+                reason = self.check_order(bot_id, symbol, side, amount, price)
+            if reason is not None:
+                RISK_REJECTIONS.labels('position_size' if 'MAX_POSITION_SIZE' in reason else 'invalid').inc()
+                logger.warning(f"Rejected {side} {amount} {symbol} for bot {bot_id}: {reason}")
+                return {'error': reason}
+        if not self.live_trading:
+            RISK_REJECTIONS.labels('dry_run').inc()
+            logger.info(f"Dry run: not sending {side} {amount} {symbol} for bot {bot_id} (BOT_LIVE_TRADING is off)")
+            return {'error': 'live trading is disabled (BOT_LIVE_TRADING)'}
+
+        bot = self.market_state.bot(bot_id) or {}
+        client = self._client(bot.get('exchange') or Config.MARKET_EXCHANGE)
+        mark = self.market_state.pnl.mark_price(symbol)
+        trade = {'id': uuid.uuid4().hex, 'botId': bot_id, 'symbol': symbol, 'side': side}
+        # Shown as pending while it works, which for a sliced order spans several slice intervals
+        self.market_state.add_trade({**trade, 'amount': amount, 'price': price or mark, 'status': 'pending'})
+        with tracer.span('order.place', side=side, symbol=symbol, amount=amount):
+            if price is not None:
+                order = await client.place_limit_order(symbol, side, amount, price)
+                if 'error' not in order:
+                    order = await client.follow_order(order, symbol, self.fill_timeout)
+                    order = {**order, 'filled': filled_amount(order, amount)}
+            else:
+                # One market order when the book absorbs it, limit slices when it is thin
+                order = await client.place_depth_aware_order(symbol, side, amount, fill_timeout=self.fill_timeout)
+
+        filled = order.get('filled') or 0.0
+        # An order whose cancel wasn't confirmed may still fill, so it stays pending
+        working = any(child.get('id') is not None and child.get('status') not in ORDER_DONE
+                      for child in order.get('orders', [order]))
+        self.market_state.settle_trade({
+            **trade,
+            'amount': filled or amount,
+            'price': order.get('average') or order.get('price') or price or mark,
+            'fee': order.get('fee'),
+            'status': 'filled' if filled else 'pending' if working else 'cancelled',
+        })
+        return {**order, 'filled': filled}
+
+    async def _exit(self, trigger: Trigger, kind: str, price: float):
+        side = 'sell' if trigger.amount > 0 else 'buy'
+        amount = abs(trigger.amount)
+        logger.warning(f"{kind} hit for bot {trigger.bot_id} {trigger.symbol} at {price} "
+                       f"(entry {trigger.entry}); closing {amount}")
+        try:
+            order = await self.place_order(trigger.bot_id, trigger.symbol, side, amount, reduce_only=True)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            order = {'error': str(e)}
+        if order.get('filled'):
+            # A partial fill re-arms the trigger for the rest through on_fill
+            RISK_EXITS.labels(kind, 'placed').inc()
+            return
+
+        RISK_EXITS.labels(kind, 'failed').inc()
+        reason = order.get('error') or f"order {order.get('id')} {order.get('status')} without filling"
+        logger.error(f"Exit order for bot {trigger.bot_id} {trigger.symbol} failed: {reason}; "
+                     f"re-arming in {self.retry_delay:.0f}s")
+        await asyncio.sleep(self.retry_delay)
+        key = (trigger.bot_id, _normalize_symbol(trigger.symbol))
+        if self._triggers.get(key) is trigger and trigger.exiting:
+            # Re-armed at the same levels; the next crossing tick retries the exit
+            trigger.exiting = False
+            self._arm(trigger)
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def open_positions(self) -> List[Dict]:
+        return [trigger.to_dict() for trigger in self._triggers.values()]
+
+    def _collect_metrics(self):
+        RISK_POSITIONS.set(len(self._triggers))
+
+    def start(self):
+        if self._started:
+            return
+        self._started = True
+        self.market_state.add_listener(self._on_market_state_change)
+        registry.add_collector(self._collect_metrics)
+        logger.info(f"Risk engine started (stop loss {self.stop_loss:.1%}, take profit {self.take_profit:.1%}, "
+                    f"max position {self.max_position_size:.0%}, "
+                    f"{'live trading' if self.live_trading else 'dry run'})")
+
+    async def stop(self, timeout: float = 10.0):
+        """Stop watching prices and give in-flight exit orders time to finish"""
+        if not self._started:
+            return
+        self._started = False
+        self.market_state.remove_listener(self._on_market_state_change)
+        registry.remove_collector(self._collect_metrics)
+        if self._exits:
+            _, pending = await asyncio.wait(set(self._exits), timeout=timeout)
+            for task in pending:
+                task.cancel()
+        for client in self._clients.values():
+            await client.close()
+        self._clients.clear()
+
+
+# Watches the process-wide market state; started with the API
+risk_engine = RiskEngine(
+    market_state,
+    stop_loss=Config.STOP_LOSS_PERCENTAGE,
+    take_profit=Config.TAKE_PROFIT_PERCENTAGE,
+    max_position_size=Config.MAX_POSITION_SIZE,
+    order_size=Config.BOT_ORDER_SIZE,
+    retry_delay=Config.RISK_EXIT_RETRY_DELAY,
+    fill_timeout=Config.ORDER_FILL_TIMEOUT,
+    live_trading=Config.BOT_LIVE_TRADING
+)
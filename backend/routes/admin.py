@@ -0,0 +1,66 @@
+"""
+Admin endpoints for diagnosing slow decisions in the live process.
+
+Disabled unless ADMIN_TOKEN is set; requests must send it in the
+X-Admin-Token header.
+"""
+import hmac
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from config import Config
+from profiler import profiler
+from startup import report as startup_report
+from tracing import tracer
+
+router = APIRouter(prefix='/admin')
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not Config.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail='Admin endpoints are disabled; set ADMIN_TOKEN')
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, Config.ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail='Invalid admin token')
+
+
+@router.get('/startup', dependencies=[Depends(require_admin)])
+async def get_startup_report():
+    return startup_report()
+
+
+@router.get('/traces', dependencies=[Depends(require_admin)])
+async def get_slow_traces(limit: int = Query(20, ge=1, le=1000)):
+    return {
+        'slow_threshold': tracer.slow_threshold,
+        'traces_started': tracer.traces_started,
+        'traces_slow': tracer.traces_slow,
+        'traces': tracer.slow_traces(limit),
+    }
+
+
+@router.delete('/traces', dependencies=[Depends(require_admin)])
+async def clear_slow_traces():
+    tracer.clear()
+    return {'cleared': True}
+
+
+@router.post('/profiler/start', dependencies=[Depends(require_admin)])
+async def start_profiler(interval: float = Query(Config.PROFILER_INTERVAL, ge=0.001, le=1.0),
+                         max_duration: float = Query(300.0, gt=0, le=3600)):
+    if not profiler.start(interval, max_duration):
+        raise HTTPException(status_code=409, detail='Profiler is already running')
+    return {'running': True, 'interval': interval, 'max_duration': max_duration}
+
+
+@router.post('/profiler/stop', dependencies=[Depends(require_admin)])
+async def stop_profiler(format: str = Query('json', pattern='^(json|collapsed)$')):
+    report = profiler.stop()
+    if format == 'collapsed':
+        return Response(content=report['collapsed'], media_type='text/plain')
+    return report
+
+
+@router.get('/profiler', dependencies=[Depends(require_admin)])
+async def get_profiler_status():
+    report = profiler.report()
+    report.pop('collapsed')
+    return report
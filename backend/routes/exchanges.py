@@ -0,0 +1,176 @@
+"""
+Dashboard REST endpoints.
+
+Handlers never call an exchange: they serve snapshots of the in-memory
+MarketState that background refreshers keep up to date. Serialized bodies
+are cached per dataset version (and reused for API_CACHE_TTL seconds while
+the data keeps changing), and clients revalidate with ETag/If-None-Match.
+Time-range history comes from the SQLite TradingStore.
+"""
+import time
+import uuid
+from typing import Dict, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from cache import cache
+from config import Config
+from exchange_client import ExchangeClient
+from fast_json import dumps
+from market_state import PriceRefresher, market_state
+from risk_engine import risk_engine
+from routes.admin import require_admin
+from startup import log_report, mark
+from storage import TradingStore
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Distinguishes ETags issued by this process from those of a previous run
+_BOOT_ID = uuid.uuid4().hex[:8]
+
+# dataset -> (version, built_at, body, etag)
+_response_cache: Dict[str, Tuple[int, float, bytes, str]] = {}
+
+_refresher: Optional[PriceRefresher] = None
+_store: Optional[TradingStore] = None
+
+
+def _cached_body(dataset: str) -> Tuple[bytes, str]:
+    """Return the serialized body and ETag for a dataset, rebuilding only when stale"""
+    version = market_state.version(dataset)
+    cached = _response_cache.get(dataset)
+    now = time.monotonic()
+    if cached and (cached[0] == version or now - cached[1] < Config.API_CACHE_TTL):
+        return cached[2], cached[3]
+
+    body = dumps(market_state.snapshot(dataset))
+    etag = f'"{_BOOT_ID}-{dataset}-{version}"'
+    _response_cache[dataset] = (version, now, body, etag)
+    return body, etag
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get('if-none-match')
+    if not header:
+        return False
+    candidates = [t.strip() for t in header.split(',')]
+    return '*' in candidates or any(t.removeprefix('W/') == etag for t in candidates)
+
+
+def _dataset_response(request: Request, dataset: str) -> Response:
+    body, etag = _cached_body(dataset)
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type='application/json', headers=headers)
+
+
+@router.on_event('startup')
+async def start_refreshers():
+    """Seed state and start background price refreshers"""
+    global _refresher, _store
+    market_state.load_seed(Config.SEED_DATA_PATH)
+    try:
+        _store = TradingStore.from_url(Config.DATABASE_URL)
+        market_state.add_listener(_store.on_market_state_change)
+    except Exception as e:
+        logger.error(f"Could not open trading store at {Config.DATABASE_URL}: {e}")
+    # Started after seeding so seeded demo trades do not arm live exit orders
+    risk_engine.start()
+    if not market_state.external_price_feed:
+        # Worker processes publish prices through the shared price board otherwise.
+        # ccxt is imported by the refresher in a worker thread, after the API is up.
+        client = ExchangeClient(Config.MARKET_EXCHANGE, Config, cache=cache)
+        _refresher = PriceRefresher(market_state, client, Config.MARKET_SYMBOLS, Config.PRICE_REFRESH_INTERVAL)
+        _refresher.start()
+    mark('api ready')
+    log_report()
+
+
+@router.on_event('shutdown')
+async def stop_refreshers():
+    """Stop background refreshers and release exchange sessions"""
+    global _refresher, _store
+    if _refresher is not None:
+        await _refresher.stop()
+        await _refresher.exchange_client.close()
+        _refresher = None
+    await risk_engine.stop()
+    if _store is not None:
+        market_state.remove_listener(_store.on_market_state_change)
+        _store.close()
+        _store = None
+    await cache.close()
+
+
+@router.get('/bots')
+async def get_bots(request: Request):
+    return _dataset_response(request, 'bots')
+
+
+@router.get('/portfolio')
+async def get_portfolio(request: Request):
+    return _dataset_response(request, 'portfolio')
+
+
+@router.get('/signals')
+async def get_signals(request: Request):
+    return _dataset_response(request, 'signals')
+
+
+@router.get('/prices')
+async def get_prices(request: Request):
+    return _dataset_response(request, 'prices')
+
+
+@router.get('/risk/positions', dependencies=[Depends(require_admin)])
+async def get_risk_positions():
+    return risk_engine.open_positions()
+
+
+@router.get('/cache/stats', dependencies=[Depends(require_admin)])
+async def get_cache_stats():
+    return cache.stats()
+
+
+def _history_response(rows) -> Response:
+    return Response(content=dumps(rows), media_type='application/json')
+
+
+def _require_store() -> TradingStore:
+    if _store is None:
+        raise HTTPException(status_code=503, detail='Trade history store is not available')
+    return _store
+
+
+# History endpoints query SQLite; they are plain functions so FastAPI runs them in its threadpool
+
+@router.get('/prices/history')
+def get_price_history(symbol: str, start: Optional[float] = None, end: Optional[float] = None,
+                      limit: int = Query(1000, ge=1, le=10000)):
+    return _history_response(_require_store().price_ticks(symbol, start, end, limit))
+
+
+@router.get('/trades/history')
+def get_trade_history(symbol: Optional[str] = None, bot_id: Optional[str] = None,
+                      start: Optional[float] = None, end: Optional[float] = None,
+                      limit: int = Query(100, ge=1, le=5000)):
+    return _history_response(_require_store().trades(symbol, bot_id, start, end, limit))
+
+
+@router.get('/signals/history')
+def get_signal_history(symbol: Optional[str] = None, bot_id: Optional[str] = None,
+                       start: Optional[float] = None, end: Optional[float] = None,
+                       limit: int = Query(100, ge=1, le=5000)):
+    return _history_response(_require_store().signals(symbol, bot_id, start, end, limit))
+
+
+@router.get('/trades')
+async def get_trades(request: Request):
+    return _dataset_response(request, 'trades')
+
+
+@router.get('/indicators')
+async def get_indicators(request: Request):
+    return _dataset_response(request, 'indicators')
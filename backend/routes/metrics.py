@@ -0,0 +1,16 @@
+"""
+Prometheus scrape endpoint.
+
+Counters and histograms are updated where the work happens (exchange
+calls, analyzer stages, sentiment sources, bot runs); gauges for queues,
+rate limiters and caches are refreshed by collectors at scrape time.
+"""
+from fastapi import APIRouter, Response
+from metrics import CONTENT_TYPE, registry
+
+router = APIRouter()
+
+
+@router.get('/metrics')
+async def get_metrics():
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,29 @@
+"""
+Server-push stream replacing dashboard polling.
+
+Clients connect to /ws/stream and receive a snapshot followed by coalesced
+price, signal, trade, bot and portfolio deltas. Price ticks move PnL as
+"botPnl" records and a "portfolioDelta" (changed assets plus totals), to be
+merged into the last bots/portfolio snapshot. Send
+{"action": "subscribe", "symbols": [...], "channels": [...], "max_hz": 2}
+to narrow the feed; omitting "symbols" subscribes to everything.
+"""
+from fastapi import APIRouter, WebSocket
+from stream_hub import stream_hub
+
+router = APIRouter()
+
+
+@router.on_event('startup')
+async def attach_stream_hub():
+    stream_hub.attach()
+
+
+@router.on_event('shutdown')
+async def detach_stream_hub():
+    stream_hub.detach()
+
+
+@router.websocket('/ws/stream')
+async def market_stream(websocket: WebSocket):
+    await stream_hub.serve(websocket)
@@ -2,30 +2,56 @@
 """
 Main script to run the crypto trading bot
 """
+import argparse
 import asyncio
 import logging
+import os
 import signal
 import sys
 from typing import Dict, List
+
+# api_server.py lives at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 from api_server import app
+from bot_scheduler import BotScheduler
 from config import Config
+from logging_pipeline import setup_logging, shutdown_logging
+from market_state import market_state
+from price_board import PriceBoard
+from risk_engine import risk_engine
+from supervisor import BoardReader, Supervisor, shard_symbols
 import uvicorn
 
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('trading_bot.log'),
-        logging.StreamHandler(sys.stdout)
-    ]
+# Setup logging: records are queued and written by a background thread
+setup_logging(
+    level=Config.LOG_LEVEL,
+    log_file=Config.LOG_FILE,
+    json_format=Config.LOG_JSON,
+    max_bytes=Config.LOG_MAX_BYTES,
+    backup_count=Config.LOG_BACKUP_COUNT,
+    repeat_window=Config.LOG_REPEAT_WINDOW,
+    repeat_burst=Config.LOG_REPEAT_BURST
 )
 
 logger = logging.getLogger(__name__)
 
 class TradingBotManager:
-    def __init__(self):
+    def __init__(self, workers: int = 1):
         self.running = True
+        self.server = None
+        self.workers = workers
+        self.board = None
+        self.supervisor = None
+        self.board_reader = None
+        self.bots_stopped = False
+        self.scheduler = BotScheduler(
+            market_state,
+            max_concurrency=Config.BOT_MAX_CONCURRENCY,
+            time_budget=Config.BOT_TIME_BUDGET,
+            cpu_budget=Config.BOT_CPU_BUDGET,
+            on_decision=risk_engine.on_decision
+        )
         
     async def start_api_server(self):
         """Start the FastAPI server"""
@@ -33,44 +59,92 @@ class TradingBotManager:
             app, 
             host=Config.API_HOST, 
             port=Config.API_PORT,
-            log_level="info"
+            log_level="info",
+            log_config=None  # Keep uvicorn's loggers on the queued root handler
         )
-        server = uvicorn.Server(config)
-        await server.serve()
+        self.server = uvicorn.Server(config)
+        await self.server.serve()
     
-    def signal_handler(self, signum, frame):
+    def signal_handler(self, signum, frame=None):
         """Handle shutdown signals"""
         logger.info(f"Received signal {signum}, shutting down...")
         self.running = False
+        if self.server is not None:
+            self.server.should_exit = True
     
     async def run(self):
         """Main run loop"""
         # Setup signal handlers
-        signal.signal(signal.SIGINT, self.signal_handler)
-        signal.signal(signal.SIGTERM, self.signal_handler)
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, self.signal_handler, signum)
         
         logger.info("Starting Crypto Trading Bot Manager")
         logger.info(f"API Server will be available at http://{Config.API_HOST}:{Config.API_PORT}")
         
+        # Bots drain ahead of the router's shutdown hook, while the risk engine, store and cache are still up
+        app.router.on_shutdown.insert(0, self.stop_bots)
         try:
-            # Start the API server
+            if self.workers > 1:
+                self.start_workers()
+            else:
+                # Bots are picked up from market state as the API seeds it
+                await self.scheduler.start()
             await self.start_api_server()
         except Exception as e:
             logger.error(f"Error running bot manager: {e}")
         finally:
+            # No-op when the server shut down cleanly
+            await self.stop_bots()
+            app.router.on_shutdown.remove(self.stop_bots)
             logger.info("Bot manager stopped")
+    
+    async def stop_bots(self):
+        """Let in-flight bot runs finish"""
+        if self.bots_stopped:
+            return
+        self.bots_stopped = True
+        if self.supervisor is not None:
+            await self.stop_workers()
+        else:
+            await self.scheduler.stop(Config.BOT_DRAIN_TIMEOUT)
+    
+    def start_workers(self):
+        """Shard symbols across worker processes that publish to a shared price board"""
+        symbols = shard_symbols(Config.SEED_DATA_PATH)
+        self.board = PriceBoard.create(symbols)
+        market_state.external_price_feed = True
+        self.supervisor = Supervisor(self.board, symbols, self.workers, market_state,
+                                     on_decision=risk_engine.execute_decision)
+        self.supervisor.start()
+        self.board_reader = BoardReader(self.board, market_state)
+        self.board_reader.start()
+        logger.info(f"Sharded {len(symbols)} symbols across {self.workers} workers")
+    
+    async def stop_workers(self):
+        await self.board_reader.stop()
+        await self.supervisor.stop(Config.BOT_DRAIN_TIMEOUT)
+        self.board.close()
 
 def main():
     """Main entry point"""
-    manager = TradingBotManager()
+    parser = argparse.ArgumentParser(description="Run the crypto trading bot")
+    parser.add_argument('--workers', type=int, default=Config.BOT_WORKERS,
+                        help="worker processes to shard symbols across (1 runs everything in-process)")
+    args = parser.parse_args()
+    
+    manager = TradingBotManager(workers=args.workers)
     
     try:
         asyncio.run(manager.run())
     except KeyboardInterrupt:
         logger.info("Received keyboard interrupt, shutting down...")
     except Exception as e:
-        logger.error(f"Unexpected error: {e}")
+        logger.error(f"Unexpected error: {e}", exc_info=True)
+        shutdown_logging()
         sys.exit(1)
+    # Write out queued records before the interpreter exits
+    shutdown_logging()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
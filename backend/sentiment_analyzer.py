@@ -1,19 +1,106 @@
 import asyncio
+import re
+import time
 import aiohttp
-import tweepy
-import praw
-from textblob import TextBlob
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-from typing import Dict, List
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from capture import default_writer
 from config import Config
+from metrics import registry
+from sentiment_log import SentimentLog
+from startup import lazy_module
+from tracing import cpu_block, tracer
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Loaded when first used: clients only for configured sources, NLP models on first score
+tweepy = lazy_module('tweepy')
+praw = lazy_module('praw')
+textblob = lazy_module('textblob')
+vader = lazy_module('vaderSentiment.vaderSentiment')
+
+SENTIMENT_LATENCY = registry.histogram(
+    'hybridbot_sentiment_request_seconds', 'Upstream sentiment fetch latency per source', ('source',)
+)
+SENTIMENT_ERRORS = registry.counter(
+    'hybridbot_sentiment_errors_total', 'Upstream sentiment fetches that raised', ('source',)
+)
+
+LUNARCRUSH_URL = "https://api.lunarcrush.com/v2"
+SUBREDDITS = ['cryptocurrency', 'CryptoMarkets', 'Bitcoin', 'ethereum', 'altcoin']
+# Newest posts from this window, so each refresh sees what was posted since the last one
+REDDIT_TIME_FILTER = 'day'
+
+# Weights used when blending sources into the combined score
+SOURCE_WEIGHTS = {'twitter': 0.4, 'reddit': 0.3, 'lunarcrush': 0.3}
+
+# Upstream query length limits for packed OR-queries
+TWITTER_MAX_QUERY_LENGTH = 512
+REDDIT_MAX_QUERY_LENGTH = 512
+
+# Extra tweet fields needed for timestamps and engagement in the scored-post log
+TWEET_FIELDS = ['created_at', 'public_metrics']
+
+def _tweet_payload(tweet) -> Dict:
+    """The fields of a tweet that scoring reads, as captured"""
+    created_at = getattr(tweet, 'created_at', None)
+    return {
+        'id': getattr(tweet, 'id', None),
+        'text': tweet.text,
+        'public_metrics': getattr(tweet, 'public_metrics', None),
+        'created_at': created_at.timestamp() if created_at else None,
+    }
+
+
+def _post_payload(post) -> Dict:
+    """The fields of a Reddit post that scoring reads, as captured"""
+    return {
+        'id': getattr(post, 'id', None),
+        'title': post.title,
+        'selftext': post.selftext,
+        'score': post.score,
+        'num_comments': post.num_comments,
+        'created_utc': post.created_utc,
+    }
+
+
+def _replayed_tweet(payload: Dict) -> SimpleNamespace:
+    created_at = payload.get('created_at')
+    return SimpleNamespace(
+        id=payload.get('id'),
+        text=payload['text'],
+        public_metrics=payload.get('public_metrics'),
+        created_at=datetime.fromtimestamp(created_at, timezone.utc) if created_at else None,
+    )
+
+
 class SentimentAnalyzer:
-    def __init__(self):
-        self.vader_analyzer = SentimentIntensityAnalyzer()
-        self.setup_apis()
+    def __init__(self, post_log: Optional[SentimentLog] = None, recorder=None, replay=None):
+        self._vader_analyzer = None
+        
+        # Append-only log of every scored item, used for replay and backtesting
+        if post_log is None and Config.SENTIMENT_LOG_DIR:
+            post_log = SentimentLog(Config.SENTIMENT_LOG_DIR)
+        self.post_log = post_log
+        
+        # Long-lived HTTP session, created lazily on first use and closed via close()
+        self._http_session: Optional[aiohttp.ClientSession] = None
+        
+        # LunarCrush response cache (symbol -> (expires_at, asset data or None))
+        # and in-flight requests shared by concurrent callers
+        self._lunarcrush_cache: Dict[str, Tuple[float, Optional[Dict]]] = {}
+        self._lunarcrush_inflight: Dict[str, asyncio.Future] = {}
+        
+        # Upstream payloads are captured to CAPTURE_DIR when set; a capture Replay answers them instead
+        self.replay = replay
+        if recorder is None and replay is None:
+            recorder = default_writer()
+        self.recorder = recorder
+        
+        if replay is None:
+            self.setup_apis()
     
     def setup_apis(self):
         """Setup social media API clients"""
@@ -32,52 +119,54 @@ class SentimentAnalyzer:
                 user_agent="CryptoBotPro/1.0"
             )
     
+    @property
+    def vader_analyzer(self):
+        """VADER analyzer; its lexicon is loaded on the first scored item"""
+        if self._vader_analyzer is None:
+            self._vader_analyzer = vader.SentimentIntensityAnalyzer()
+        return self._vader_analyzer
+    
+    async def _get_http_session(self) -> aiohttp.ClientSession:
+        """Return the shared keep-alive HTTP session, creating it if needed"""
+        if self._http_session is None or self._http_session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=Config.SENTIMENT_HTTP_CONNECTION_LIMIT,
+                ttl_dns_cache=300,
+                keepalive_timeout=60
+            )
+            timeout = aiohttp.ClientTimeout(
+                total=Config.SENTIMENT_HTTP_TIMEOUT,
+                connect=Config.SENTIMENT_HTTP_TIMEOUT / 2
+            )
+            self._http_session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self._http_session
+    
+    async def close(self):
+        """Close the shared HTTP session and flush the scored-post log"""
+        if self._http_session is not None and not self._http_session.closed:
+            await self._http_session.close()
+        self._http_session = None
+        if self.post_log is not None:
+            await asyncio.to_thread(self.post_log.close)
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+    
     async def get_twitter_sentiment(self, symbol: str, count: int = 100) -> Dict:
         """Analyze Twitter sentiment for a cryptocurrency"""
         try:
             # Search for tweets about the cryptocurrency
             query = f"${symbol} OR #{symbol} OR {symbol} crypto -is:retweet lang:en"
-            tweets = tweepy.Paginator(
-                self.twitter_client.search_recent_tweets,
-                query=query,
-                max_results=min(count, 100)
-            ).flatten(limit=count)
+            with tracer.span('sentiment.twitter', symbols=1), \
+                    SENTIMENT_LATENCY.time('twitter', errors=SENTIMENT_ERRORS):
+                tweets = await self._search_tweets(query, count)
             
-            sentiments = []
-            for tweet in tweets:
-                # Analyze sentiment using VADER
-                vader_score = self.vader_analyzer.polarity_scores(tweet.text)
-                
-                # Analyze sentiment using TextBlob
-                blob = TextBlob(tweet.text)
-                textblob_score = blob.sentiment.polarity
-                
-                sentiments.append({
-                    'text': tweet.text,
-                    'vader_compound': vader_score['compound'],
-                    'textblob_polarity': textblob_score,
-                    'created_at': tweet.created_at
-                })
-            
-            # Calculate overall sentiment
-            if sentiments:
-                avg_vader = sum(s['vader_compound'] for s in sentiments) / len(sentiments)
-                avg_textblob = sum(s['textblob_polarity'] for s in sentiments) / len(sentiments)
-                
-                # Combine scores (weighted average)
-                combined_score = (avg_vader * 0.6) + (avg_textblob * 0.4)
-                
-                return {
-                    'symbol': symbol,
-                    'source': 'twitter',
-                    'sentiment_score': combined_score,
-                    'sentiment_label': self._get_sentiment_label(combined_score),
-                    'tweet_count': len(sentiments),
-                    'confidence': abs(combined_score),
-                    'raw_sentiments': sentiments[-10:]  # Last 10 for debugging
-                }
-            
-            return {'error': 'No tweets found'}
+            sentiments = [self._score_tweet(tweet) for tweet in tweets]
+            await self._record_items('twitter', {symbol: sentiments})
+            return self._summarize_twitter(symbol, sentiments)
             
         except Exception as e:
             logger.error(f"Error analyzing Twitter sentiment: {e}")
@@ -87,55 +176,17 @@ class SentimentAnalyzer:
         """Analyze Reddit sentiment for a cryptocurrency"""
         try:
             # Search in crypto-related subreddits
-            subreddits = ['cryptocurrency', 'CryptoMarkets', 'Bitcoin', 'ethereum', 'altcoin']
             all_posts = []
             
-            for subreddit_name in subreddits:
-                subreddit = self.reddit.subreddit(subreddit_name)
-                
-                # Search for posts mentioning the symbol
-                for post in subreddit.search(symbol, limit=limit//len(subreddits)):
-                    # Analyze post title and content
-                    text = f"{post.title} {post.selftext}"
-                    
-                    vader_score = self.vader_analyzer.polarity_scores(text)
-                    blob = TextBlob(text)
-                    
-                    all_posts.append({
-                        'title': post.title,
-                        'score': post.score,
-                        'num_comments': post.num_comments,
-                        'vader_compound': vader_score['compound'],
-                        'textblob_polarity': blob.sentiment.polarity,
-                        'created_utc': post.created_utc
-                    })
-            
-            if all_posts:
-                # Weight by post score (upvotes)
-                total_weight = sum(max(post['score'], 1) for post in all_posts)
-                weighted_vader = sum(
-                    post['vader_compound'] * max(post['score'], 1) 
-                    for post in all_posts
-                ) / total_weight
-                
-                weighted_textblob = sum(
-                    post['textblob_polarity'] * max(post['score'], 1) 
-                    for post in all_posts
-                ) / total_weight
-                
-                combined_score = (weighted_vader * 0.6) + (weighted_textblob * 0.4)
-                
-                return {
-                    'symbol': symbol,
-                    'source': 'reddit',
-                    'sentiment_score': combined_score,
-                    'sentiment_label': self._get_sentiment_label(combined_score),
-                    'post_count': len(all_posts),
-                    'confidence': abs(combined_score),
-                    'avg_score': sum(post['score'] for post in all_posts) / len(all_posts)
-                }
+            with tracer.span('sentiment.reddit', symbols=1), \
+                    SENTIMENT_LATENCY.time('reddit', errors=SENTIMENT_ERRORS):
+                for subreddit_name in SUBREDDITS:
+                    # Search for posts mentioning the symbol
+                    for post in await self._search_reddit(subreddit_name, symbol, limit//len(SUBREDDITS)):
+                        all_posts.append(self._score_post(post))
             
-            return {'error': 'No Reddit posts found'}
+            await self._record_items('reddit', {symbol: all_posts})
+            return self._summarize_reddit(symbol, all_posts)
             
         except Exception as e:
             logger.error(f"Error analyzing Reddit sentiment: {e}")
@@ -144,30 +195,12 @@ class SentimentAnalyzer:
     async def get_lunarcrush_sentiment(self, symbol: str) -> Dict:
         """Get sentiment data from LunarCrush API"""
         try:
-            url = f"https://api.lunarcrush.com/v2"
-            params = {
-                'data': 'assets',
-                'key': Config.LUNARCRUSH_API_KEY,
-                'symbol': symbol
-            }
+            assets = await self._fetch_lunarcrush_assets([symbol])
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, params=params) as response:
-                    data = await response.json()
-                    
-                    if data.get('data') and len(data['data']) > 0:
-                        asset_data = data['data'][0]
-                        
-                        return {
-                            'symbol': symbol,
-                            'source': 'lunarcrush',
-                            'sentiment_score': asset_data.get('sentiment', 0) / 5.0,  # Normalize to -1 to 1
-                            'social_score': asset_data.get('social_score', 0),
-                            'social_volume': asset_data.get('social_volume', 0),
-                            'social_dominance': asset_data.get('social_dominance', 0),
-                            'market_cap': asset_data.get('market_cap', 0),
-                            'price_score': asset_data.get('price_score', 0)
-                        }
+            if symbol in assets:
+                result = self._parse_lunarcrush_asset(symbol, assets[symbol])
+                await self._record_lunarcrush([result])
+                return result
             
             return {'error': 'No LunarCrush data found'}
             
@@ -175,6 +208,276 @@ class SentimentAnalyzer:
             logger.error(f"Error fetching LunarCrush sentiment: {e}")
             return {'error': str(e)}
     
+    async def _fetch_lunarcrush_assets(self, symbols: List[str]) -> Dict[str, Dict]:
+        """Fetch LunarCrush asset data for several symbols, served from cache where fresh"""
+        now = time.monotonic()
+        assets: Dict[str, Dict] = {}
+        pending: Dict[str, asyncio.Future] = {}
+        missing: List[str] = []
+        
+        for symbol in symbols:
+            cached = self._lunarcrush_cache.get(symbol)
+            if cached and cached[0] > now:
+                if cached[1] is not None:
+                    assets[symbol] = cached[1]
+            elif symbol in self._lunarcrush_inflight:
+                # Another caller is already fetching this symbol
+                pending[symbol] = self._lunarcrush_inflight[symbol]
+            else:
+                missing.append(symbol)
+        
+        if missing:
+            loop = asyncio.get_running_loop()
+            futures = {symbol: loop.create_future() for symbol in missing}
+            self._lunarcrush_inflight.update(futures)
+            try:
+                fetched = await self._request_lunarcrush_assets(missing)
+                expires_at = time.monotonic() + Config.LUNARCRUSH_CACHE_TTL
+                for symbol, future in futures.items():
+                    # Cache misses too, so unknown symbols are not re-requested every refresh
+                    self._lunarcrush_cache[symbol] = (expires_at, fetched.get(symbol))
+                    future.set_result(fetched.get(symbol))
+                assets.update(fetched)
+            except Exception as e:
+                for future in futures.values():
+                    future.set_exception(e)
+                    future.exception()  # Mark retrieved when nobody else is waiting
+                raise
+            finally:
+                for symbol, future in futures.items():
+                    if not future.done():
+                        # Fetch was cancelled; waiters get an ordinary error, not a cancellation of their own task
+                        future.set_exception(ConnectionError('LunarCrush fetch was cancelled'))
+                        future.exception()
+                    self._lunarcrush_inflight.pop(symbol, None)
+        
+        for symbol, future in pending.items():
+            asset_data = await future
+            if asset_data is not None:
+                assets[symbol] = asset_data
+        
+        return assets
+    
+    async def _request_lunarcrush_assets(self, symbols: List[str]) -> Dict[str, Dict]:
+        """Request LunarCrush asset data for several symbols in a single call"""
+        params = {
+            'data': 'assets',
+            'key': Config.LUNARCRUSH_API_KEY,
+            'symbol': ','.join(symbols)
+        }
+        
+        async def request():
+            session = await self._get_http_session()
+            async with session.get(LUNARCRUSH_URL, params=params) as response:
+                return await response.json()
+        
+        with tracer.span('sentiment.lunarcrush', symbols=len(symbols)), \
+                SENTIMENT_LATENCY.time('lunarcrush', errors=SENTIMENT_ERRORS):
+            # The request is captured by symbols only, never with the API key
+            data = await self._upstream('lunarcrush', 'assets', [symbols], request)
+        
+        # Route each returned asset back to the symbol it describes
+        wanted = {s.upper(): s for s in symbols}
+        assets = {}
+        for asset_data in data.get('data') or []:
+            symbol = wanted.get(str(asset_data.get('symbol', '')).upper())
+            if symbol and symbol not in assets:
+                assets[symbol] = asset_data
+        
+        # A single-symbol request may come back without the symbol field
+        if len(symbols) == 1 and not assets and data.get('data'):
+            assets[symbols[0]] = data['data'][0]
+        
+        # Stamp each reading once, when fetched, so cached copies keep its time
+        fetched_at = time.time()
+        return {
+            symbol: dict(asset_data, reading_time=asset_data.get('time') or fetched_at)
+            for symbol, asset_data in assets.items()
+        }
+    
+    async def _upstream(self, source: str, name: str, request, fetch: Callable[[], Awaitable],
+                        payload: Callable = lambda result: result):
+        """Call an upstream API, capturing the exchange; with a replay the capture answers instead"""
+        if self.replay is not None:
+            return await self.replay.fetch(source, name, request)
+        if self.recorder is None:
+            return await fetch()
+        started = time.perf_counter()
+        try:
+            result = await fetch()
+        except Exception as e:
+            self.recorder.record(source, name, request, error=f"{type(e).__name__}: {e}",
+                                 latency=time.perf_counter() - started)
+            raise
+        self.recorder.record(source, name, request, payload(result), latency=time.perf_counter() - started)
+        return result
+    
+    async def _search_tweets(self, query: str, limit: int) -> List:
+        """Recent tweets matching a search query"""
+        def search():
+            return list(tweepy.Paginator(
+                self.twitter_client.search_recent_tweets,
+                query=query,
+                max_results=min(limit, 100),
+                tweet_fields=TWEET_FIELDS
+            ).flatten(limit=limit))
+        
+        # tweepy blocks, for up to 15 minutes when rate limited, so it runs off the event loop
+        tweets = await self._upstream('twitter', 'search', [query, limit], lambda: asyncio.to_thread(search),
+                                      lambda found: [_tweet_payload(tweet) for tweet in found])
+        if self.replay is not None:
+            return [_replayed_tweet(tweet) for tweet in tweets]
+        return tweets
+    
+    async def _search_reddit(self, subreddit_name: str, query: str, limit: int) -> List:
+        """Posts matching a search in a subreddit (or a '+'-joined multireddit)"""
+        def search():
+            return list(self.reddit.subreddit(subreddit_name).search(
+                query, sort='new', time_filter=REDDIT_TIME_FILTER, limit=limit
+            ))
+        
+        # praw is blocking too
+        posts = await self._upstream('reddit', 'search', [subreddit_name, query, limit],
+                                     lambda: asyncio.to_thread(search),
+                                     lambda found: [_post_payload(post) for post in found])
+        if self.replay is not None:
+            return [SimpleNamespace(**post) for post in posts]
+        return posts
+    
+    def _score_text(self, text: str) -> Tuple[float, float]:
+        """Score a piece of text with VADER and TextBlob"""
+        with cpu_block():
+            vader_score = self.vader_analyzer.polarity_scores(text)
+            blob = textblob.TextBlob(text)
+            return vader_score['compound'], blob.sentiment.polarity
+    
+    def _score_tweet(self, tweet) -> Dict:
+        """Score a single tweet"""
+        vader_compound, textblob_polarity = self._score_text(tweet.text)
+        metrics = getattr(tweet, 'public_metrics', None) or {}
+        return {
+            'id': getattr(tweet, 'id', None),
+            'text': tweet.text,
+            'vader_compound': vader_compound,
+            'textblob_polarity': textblob_polarity,
+            'engagement': sum(metrics.get(k, 0) for k in ('like_count', 'retweet_count', 'reply_count')),
+            'created_at': tweet.created_at
+        }
+    
+    def _score_post(self, post) -> Dict:
+        """Score a single Reddit post (title and content)"""
+        vader_compound, textblob_polarity = self._score_text(f"{post.title} {post.selftext}")
+        return {
+            'id': getattr(post, 'id', None),
+            'title': post.title,
+            'score': post.score,
+            'num_comments': post.num_comments,
+            'vader_compound': vader_compound,
+            'textblob_polarity': textblob_polarity,
+            'created_utc': post.created_utc
+        }
+    
+    async def _record_items(self, source: str, items_by_symbol: Dict[str, List[Dict]]):
+        """Append scored tweets or posts to the scored-post log; ones already logged are skipped"""
+        if self.post_log is not None:
+            # Block compression, segment writes and the first dedup scan of the log stay off the event loop
+            await asyncio.to_thread(self._log_items, source, items_by_symbol)
+    
+    def _log_items(self, source: str, items_by_symbol: Dict[str, List[Dict]]):
+        now = time.time()
+        for symbol, items in items_by_symbol.items():
+            for item in items:
+                if source == 'twitter':
+                    created_at = item.get('created_at')
+                    timestamp = created_at.timestamp() if created_at else now
+                    engagement = item.get('engagement', 0)
+                else:
+                    timestamp = item.get('created_utc') or now
+                    engagement = item.get('score', 0)
+                self.post_log.append(
+                    source, symbol, timestamp, engagement,
+                    item['vader_compound'], item['textblob_polarity'],
+                    item['vader_compound'] * 0.6 + item['textblob_polarity'] * 0.4,
+                    item_id=item.get('id')
+                )
+    
+    async def _record_lunarcrush(self, results: List[Dict]):
+        """Append LunarCrush readings to the scored-post log, once per reading however often it is served"""
+        if self.post_log is not None and results:
+            await asyncio.to_thread(self._log_lunarcrush, results)
+    
+    def _log_lunarcrush(self, results: List[Dict]):
+        for result in results:
+            self.post_log.append(
+                'lunarcrush', result['symbol'], result['timestamp'],
+                result.get('social_volume', 0), score=result['sentiment_score'],
+                item_id=result['timestamp']
+            )
+    
+    def _summarize_twitter(self, symbol: str, sentiments: List[Dict]) -> Dict:
+        """Aggregate scored tweets into a Twitter sentiment result"""
+        if not sentiments:
+            return {'error': 'No tweets found'}
+        
+        avg_vader = sum(s['vader_compound'] for s in sentiments) / len(sentiments)
+        avg_textblob = sum(s['textblob_polarity'] for s in sentiments) / len(sentiments)
+        
+        # Combine scores (weighted average)
+        combined_score = (avg_vader * 0.6) + (avg_textblob * 0.4)
+        
+        return {
+            'symbol': symbol,
+            'source': 'twitter',
+            'sentiment_score': combined_score,
+            'sentiment_label': self._get_sentiment_label(combined_score),
+            'tweet_count': len(sentiments),
+            'confidence': abs(combined_score),
+            'raw_sentiments': sentiments[-10:]  # Last 10 for debugging
+        }
+    
+    def _summarize_reddit(self, symbol: str, all_posts: List[Dict]) -> Dict:
+        """Aggregate scored posts into a Reddit sentiment result"""
+        if not all_posts:
+            return {'error': 'No Reddit posts found'}
+        
+        # Weight by post score (upvotes)
+        total_weight = sum(max(post['score'], 1) for post in all_posts)
+        weighted_vader = sum(
+            post['vader_compound'] * max(post['score'], 1) 
+            for post in all_posts
+        ) / total_weight
+        
+        weighted_textblob = sum(
+            post['textblob_polarity'] * max(post['score'], 1) 
+            for post in all_posts
+        ) / total_weight
+        
+        combined_score = (weighted_vader * 0.6) + (weighted_textblob * 0.4)
+        
+        return {
+            'symbol': symbol,
+            'source': 'reddit',
+            'sentiment_score': combined_score,
+            'sentiment_label': self._get_sentiment_label(combined_score),
+            'post_count': len(all_posts),
+            'confidence': abs(combined_score),
+            'avg_score': sum(post['score'] for post in all_posts) / len(all_posts)
+        }
+    
+    def _parse_lunarcrush_asset(self, symbol: str, asset_data: Dict) -> Dict:
+        """Normalize a LunarCrush asset record"""
+        return {
+            'symbol': symbol,
+            'source': 'lunarcrush',
+            'timestamp': asset_data.get('reading_time') or time.time(),
+            'sentiment_score': asset_data.get('sentiment', 0) / 5.0,  # Normalize to -1 to 1
+            'social_score': asset_data.get('social_score', 0),
+            'social_volume': asset_data.get('social_volume', 0),
+            'social_dominance': asset_data.get('social_dominance', 0),
+            'market_cap': asset_data.get('market_cap', 0),
+            'price_score': asset_data.get('price_score', 0)
+        }
+    
     def _get_sentiment_label(self, score: float) -> str:
         """Convert sentiment score to label"""
         if score > 0.1:
@@ -184,6 +487,42 @@ class SentimentAnalyzer:
         else:
             return 'neutral'
     
+    def _combine_sources(self, symbol: str, twitter_sentiment, reddit_sentiment, lunarcrush_sentiment) -> Dict:
+        """Blend per-source results into the combined sentiment result"""
+        # Combine sentiments with weights
+        sentiments = []
+        weights = []
+        
+        if isinstance(twitter_sentiment, dict) and 'sentiment_score' in twitter_sentiment:
+            sentiments.append(twitter_sentiment['sentiment_score'])
+            weights.append(SOURCE_WEIGHTS['twitter'])
+        
+        if isinstance(reddit_sentiment, dict) and 'sentiment_score' in reddit_sentiment:
+            sentiments.append(reddit_sentiment['sentiment_score'])
+            weights.append(SOURCE_WEIGHTS['reddit'])
+        
+        if isinstance(lunarcrush_sentiment, dict) and 'sentiment_score' in lunarcrush_sentiment:
+            sentiments.append(lunarcrush_sentiment['sentiment_score'])
+            weights.append(SOURCE_WEIGHTS['lunarcrush'])
+        
+        if sentiments:
+            # Calculate weighted average
+            combined_score = sum(s * w for s, w in zip(sentiments, weights)) / sum(weights)
+            
+            return {
+                'symbol': symbol,
+                'combined_sentiment_score': combined_score,
+                'sentiment_label': self._get_sentiment_label(combined_score),
+                'confidence': abs(combined_score),
+                'sources': {
+                    'twitter': twitter_sentiment,
+                    'reddit': reddit_sentiment,
+                    'lunarcrush': lunarcrush_sentiment
+                }
+            }
+        
+        return {'error': 'No sentiment data available'}
+    
     async def get_combined_sentiment(self, symbol: str) -> Dict:
         """Get combined sentiment from all sources"""
         try:
@@ -196,40 +535,156 @@ class SentimentAnalyzer:
                 twitter_task, reddit_task, lunarcrush_task, return_exceptions=True
             )
             
-            # Combine sentiments with weights
-            sentiments = []
-            weights = []
+            return self._combine_sources(symbol, twitter_sentiment, reddit_sentiment, lunarcrush_sentiment)
+            
+        except Exception as e:
+            logger.error(f"Error getting combined sentiment: {e}")
+            return {'error': str(e)}
+    
+    # ------------------------------------------------------------------
+    # Batch (multi-symbol) API
+    # ------------------------------------------------------------------
+    
+    def _symbol_pattern(self, symbols: List[str]) -> re.Pattern:
+        """Build a regex matching any of the symbols as a bare word, cashtag or hashtag"""
+        alternatives = '|'.join(re.escape(s) for s in sorted(symbols, key=len, reverse=True))
+        return re.compile(rf"(?<![A-Za-z0-9])[$#]?({alternatives})(?![A-Za-z0-9])", re.IGNORECASE)
+    
+    def _mentioned_symbols(self, text: str, pattern: re.Pattern, lookup: Dict[str, str]) -> set:
+        """Return every requested symbol mentioned in the text"""
+        return {lookup[m.upper()] for m in pattern.findall(text or '')}
+    
+    def _pack_queries(self, symbols: List[str], term_fn, suffix: str, max_length: int) -> List[Tuple[List[str], str]]:
+        """Pack symbols into as few OR-queries as the upstream length limit allows"""
+        queries = []
+        chunk: List[str] = []
+        terms: List[str] = []
+        
+        def build(chunk_terms):
+            return f"({' OR '.join(chunk_terms)}){suffix}"
+        
+        for symbol in symbols:
+            term = term_fn(symbol)
+            if chunk and len(build(terms + [term])) > max_length:
+                queries.append((chunk, build(terms)))
+                chunk, terms = [], []
+            chunk.append(symbol)
+            terms.append(term)
+        
+        if chunk:
+            queries.append((chunk, build(terms)))
+        return queries
+    
+    async def get_twitter_sentiment_many(self, symbols: List[str], limit_per_query: int = 300) -> Dict[str, Dict]:
+        """Analyze Twitter sentiment for several symbols using packed OR-queries"""
+        results: Dict[str, List[Dict]] = {s: [] for s in symbols}
+        try:
+            queries = self._pack_queries(
+                symbols,
+                lambda s: f"${s} OR #{s} OR ({s} crypto)",
+                " -is:retweet lang:en",
+                TWITTER_MAX_QUERY_LENGTH
+            )
             
-            if isinstance(twitter_sentiment, dict) and 'sentiment_score' in twitter_sentiment:
-                sentiments.append(twitter_sentiment['sentiment_score'])
-                weights.append(0.4)  # Twitter weight
+            with tracer.span('sentiment.twitter', symbols=len(symbols), queries=len(queries)), \
+                    SENTIMENT_LATENCY.time('twitter', errors=SENTIMENT_ERRORS):
+                for chunk, query in queries:
+                    pattern = self._symbol_pattern(chunk)
+                    lookup = {s.upper(): s for s in chunk}
+                    tweets = await self._search_tweets(query, limit_per_query)
+                
+                    # Score each tweet once and route it to every symbol it mentions
+                    for tweet in tweets:
+                        mentioned = self._mentioned_symbols(tweet.text, pattern, lookup)
+                        if not mentioned:
+                            continue
+                        scored = self._score_tweet(tweet)
+                        for symbol in mentioned:
+                            results[symbol].append(scored)
             
-            if isinstance(reddit_sentiment, dict) and 'sentiment_score' in reddit_sentiment:
-                sentiments.append(reddit_sentiment['sentiment_score'])
-                weights.append(0.3)  # Reddit weight
+            await self._record_items('twitter', results)
+            return {s: self._summarize_twitter(s, results[s]) for s in symbols}
             
-            if isinstance(lunarcrush_sentiment, dict) and 'sentiment_score' in lunarcrush_sentiment:
-                sentiments.append(lunarcrush_sentiment['sentiment_score'])
-                weights.append(0.3)  # LunarCrush weight
+        except Exception as e:
+            logger.error(f"Error analyzing batch Twitter sentiment: {e}")
+            return {s: {'error': str(e)} for s in symbols}
+    
+    async def get_reddit_sentiment_many(self, symbols: List[str], limit_per_query: int = 100) -> Dict[str, Dict]:
+        """Analyze Reddit sentiment for several symbols across all subreddits in one search per query"""
+        results: Dict[str, List[Dict]] = {s: [] for s in symbols}
+        try:
+            # A multireddit searches every crypto subreddit in one request
+            multireddit = '+'.join(SUBREDDITS)
+            queries = self._pack_queries(symbols, lambda s: s, "", REDDIT_MAX_QUERY_LENGTH)
             
-            if sentiments:
-                # Calculate weighted average
-                combined_score = sum(s * w for s, w in zip(sentiments, weights)) / sum(weights)
+            with tracer.span('sentiment.reddit', symbols=len(symbols), queries=len(queries)), \
+                    SENTIMENT_LATENCY.time('reddit', errors=SENTIMENT_ERRORS):
+                for chunk, query in queries:
+                    pattern = self._symbol_pattern(chunk)
+                    lookup = {s.upper(): s for s in chunk}
                 
-                return {
-                    'symbol': symbol,
-                    'combined_sentiment_score': combined_score,
-                    'sentiment_label': self._get_sentiment_label(combined_score),
-                    'confidence': abs(combined_score),
-                    'sources': {
-                        'twitter': twitter_sentiment,
-                        'reddit': reddit_sentiment,
-                        'lunarcrush': lunarcrush_sentiment
-                    }
-                }
+                    for post in await self._search_reddit(multireddit, query, limit_per_query):
+                        mentioned = self._mentioned_symbols(f"{post.title} {post.selftext}", pattern, lookup)
+                        if not mentioned:
+                            continue
+                        scored = self._score_post(post)
+                        for symbol in mentioned:
+                            results[symbol].append(scored)
             
-            return {'error': 'No sentiment data available'}
+            await self._record_items('reddit', results)
+            return {s: self._summarize_reddit(s, results[s]) for s in symbols}
             
         except Exception as e:
-            logger.error(f"Error getting combined sentiment: {e}")
-            return {'error': str(e)}
\ No newline at end of file
+            logger.error(f"Error analyzing batch Reddit sentiment: {e}")
+            return {s: {'error': str(e)} for s in symbols}
+    
+    async def get_lunarcrush_sentiment_many(self, symbols: List[str]) -> Dict[str, Dict]:
+        """Get LunarCrush sentiment for several symbols in a single request"""
+        try:
+            assets = await self._fetch_lunarcrush_assets(symbols)
+            results = {}
+            for symbol in symbols:
+                if symbol in assets:
+                    results[symbol] = self._parse_lunarcrush_asset(symbol, assets[symbol])
+                else:
+                    results[symbol] = {'error': 'No LunarCrush data found'}
+            await self._record_lunarcrush([r for r in results.values() if 'error' not in r])
+            return results
+            
+        except Exception as e:
+            logger.error(f"Error fetching batch LunarCrush sentiment: {e}")
+            return {s: {'error': str(e)} for s in symbols}
+    
+    async def get_combined_sentiment_many(self, symbols: List[str]) -> Dict[str, Dict]:
+        """Get combined sentiment for a list of symbols with shared upstream queries"""
+        # Preserve order while dropping duplicates
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return {}
+        
+        try:
+            # Each source runs in its own task; their spans nest under this one
+            with tracer.span('sentiment.gather', symbols=len(symbols)):
+                twitter, reddit, lunarcrush = await asyncio.gather(
+                    self.get_twitter_sentiment_many(symbols),
+                    self.get_reddit_sentiment_many(symbols),
+                    self.get_lunarcrush_sentiment_many(symbols),
+                    return_exceptions=True
+                )
+            
+            def source_result(results, symbol):
+                return results.get(symbol) if isinstance(results, dict) else results
+            
+            return {
+                symbol: self._combine_sources(
+                    symbol,
+                    source_result(twitter, symbol),
+                    source_result(reddit, symbol),
+                    source_result(lunarcrush, symbol)
+                )
+                for symbol in symbols
+            }
+            
+        except Exception as e:
+            logger.error(f"Error getting batch combined sentiment: {e}")
+            return {s: {'error': str(e)} for s in symbols}
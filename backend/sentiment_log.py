@@ -0,0 +1,329 @@
+import hashlib
+import json
+import math
+import os
+import struct
+import threading
+import time
+import zlib
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Block header: magic, compressed payload length, record count, min timestamp, max timestamp
+BLOCK_MAGIC = b'SPL2'
+BLOCK_HEADER = struct.Struct('<4sIIdd')
+
+SEGMENT_PREFIX = 'posts-'
+SEGMENT_SUFFIX = '.seg'
+
+# Fixed-width numeric columns and their array typecodes
+NUMERIC_COLUMNS = (
+    ('timestamp', 'd'),
+    ('engagement', 'd'),
+    ('vader', 'f'),
+    ('textblob', 'f'),
+    ('score', 'f'),
+    ('item_key', 'Q'),  # 64-bit hash of (source, symbol, item id); 0 when the item has no id
+)
+# Dictionary-encoded string columns
+STRING_COLUMNS = ('source', 'symbol')
+
+
+class _Block:
+    """In-memory columnar buffer for records not yet written to disk"""
+
+    def __init__(self):
+        self.numeric = {name: array(code) for name, code in NUMERIC_COLUMNS}
+        self.codes = {name: array('H') for name in STRING_COLUMNS}
+        self.dictionaries: Dict[str, Dict[str, int]] = {name: {} for name in STRING_COLUMNS}
+
+    def __len__(self):
+        return len(self.numeric['timestamp'])
+
+    def append(self, source: str, symbol: str, timestamp: float, engagement: float,
+               vader: float, textblob: float, score: float, item_key: int = 0):
+        for name, value in (('source', source), ('symbol', symbol)):
+            dictionary = self.dictionaries[name]
+            code = dictionary.get(value)
+            if code is None:
+                code = dictionary[value] = len(dictionary)
+            self.codes[name].append(code)
+        self.numeric['timestamp'].append(timestamp)
+        self.numeric['engagement'].append(engagement)
+        self.numeric['vader'].append(vader)
+        self.numeric['textblob'].append(textblob)
+        self.numeric['score'].append(score)
+        self.numeric['item_key'].append(item_key)
+
+    def encode(self) -> bytes:
+        """Serialize the block column by column and compress it"""
+        dictionaries = {
+            name: sorted(dictionary, key=dictionary.get)
+            for name, dictionary in self.dictionaries.items()
+        }
+        parts = [json.dumps(dictionaries, separators=(',', ':')).encode()]
+        parts.extend(self.numeric[name].tobytes() for name, _ in NUMERIC_COLUMNS)
+        parts.extend(self.codes[name].tobytes() for name in STRING_COLUMNS)
+        body = b''.join(struct.pack('<I', len(part)) + part for part in parts)
+        return zlib.compress(body, 6)
+
+
+def _decode_block(payload: bytes, count: int) -> Dict[str, List]:
+    """Decode a compressed block back into column lists"""
+    body = zlib.decompress(payload)
+    parts = []
+    offset = 0
+    while offset < len(body):
+        (length,) = struct.unpack_from('<I', body, offset)
+        offset += 4
+        parts.append(body[offset:offset + length])
+        offset += length
+
+    dictionaries = json.loads(parts[0])
+    columns: Dict[str, List] = {}
+    for (name, code), raw in zip(NUMERIC_COLUMNS, parts[1:]):
+        values = array(code)
+        values.frombytes(raw)
+        columns[name] = values.tolist()
+    for name, raw in zip(STRING_COLUMNS, parts[1 + len(NUMERIC_COLUMNS):]):
+        codes = array('H')
+        codes.frombytes(raw)
+        lookup = dictionaries[name]
+        columns[name] = [lookup[c] for c in codes]
+
+    if len(columns['timestamp']) != count:
+        raise ValueError('Block record count mismatch')
+    return columns
+
+
+def item_key(source: str, symbol: str, item_id) -> int:
+    """Stable 64-bit key for a logged item; an item counts once per symbol it mentions"""
+    digest = hashlib.blake2b(f"{source}|{symbol}|{item_id}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') or 1
+
+
+class SentimentLog:
+    """
+    Append-only, segment-rotated log of every scored social item.
+
+    Records are buffered into columnar blocks (dictionary-encoded strings,
+    packed float arrays) which are zlib-compressed and appended to the current
+    segment file. Each block header carries its min/max timestamp so time-range
+    reads skip non-matching blocks without decompressing them.
+
+    Searches return the same tweets and posts on every refresh, so items
+    appended with an id are logged once: ids seen within `dedup_window`
+    seconds (loaded from the log on first use) are skipped.
+    """
+
+    def __init__(self, directory: str, block_size: int = 1024,
+                 max_segment_bytes: int = 64 * 1024 * 1024, flush_interval: float = 30.0,
+                 dedup_window: float = 7 * 86400, max_item_keys: int = 500000):
+        self.directory = directory
+        self.block_size = block_size
+        self.max_segment_bytes = max_segment_bytes
+        self.flush_interval = flush_interval
+        self.dedup_window = dedup_window
+        self.max_item_keys = max_item_keys
+        self._item_keys: Optional[Dict[int, None]] = None  # Insertion-ordered, oldest evicted first
+
+        self._lock = threading.Lock()
+        self._block = _Block()
+        self._block_started = time.monotonic()
+        self._segment_path: Optional[str] = None
+        self._segment_size = 0
+
+        # A fresh segment is started on the first flush, so a torn tail left by
+        # a crash in an older segment is never appended to
+        os.makedirs(self.directory, exist_ok=True)
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def append(self, source: str, symbol: str, timestamp: float, engagement: float = 0.0,
+               vader: float = math.nan, textblob: float = math.nan, score: float = math.nan,
+               item_id=None) -> bool:
+        """Append one scored item unless its id was already logged; False when skipped"""
+        key = item_key(source, symbol, item_id) if item_id is not None else 0
+        with self._lock:
+            if key:
+                seen = self._seen_keys()
+                if key in seen:
+                    return False
+                seen[key] = None
+                if len(seen) > self.max_item_keys:
+                    del seen[next(iter(seen))]
+            self._block.append(source, symbol, timestamp, engagement, vader, textblob, score, key)
+            if (len(self._block) >= self.block_size
+                    or time.monotonic() - self._block_started >= self.flush_interval):
+                self._flush_locked()
+        return True
+
+    def _seen_keys(self) -> Dict[int, None]:
+        """Item keys logged within the dedup window, loaded from disk on first use"""
+        if self._item_keys is None:
+            self._item_keys = {}
+            start = time.time() - self.dedup_window
+            for columns in self._iter_blocks(start, math.inf):
+                for ts, key in zip(columns['timestamp'], columns['item_key']):
+                    if key and ts >= start:
+                        self._item_keys[key] = None
+            while len(self._item_keys) > self.max_item_keys:
+                del self._item_keys[next(iter(self._item_keys))]
+        return self._item_keys
+
+    def flush(self):
+        """Write any buffered records to the current segment"""
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        """Flush buffered records; the log stays readable afterwards"""
+        self.flush()
+
+    def _flush_locked(self):
+        count = len(self._block)
+        if not count:
+            return
+
+        timestamps = self._block.numeric['timestamp']
+        payload = self._block.encode()
+        header = BLOCK_HEADER.pack(BLOCK_MAGIC, len(payload), count, min(timestamps), max(timestamps))
+
+        if self._segment_path is None or self._segment_size >= self.max_segment_bytes:
+            self._rotate()
+
+        try:
+            with open(self._segment_path, 'ab') as f:
+                f.write(header + payload)
+            self._segment_size += len(header) + len(payload)
+        except OSError as e:
+            logger.error(f"Error writing sentiment log segment {self._segment_path}: {e}")
+            return
+
+        self._block = _Block()
+        self._block_started = time.monotonic()
+
+    def _rotate(self):
+        """Start a new segment; names sort in creation order"""
+        name = f"{SEGMENT_PREFIX}{time.time_ns():020d}{SEGMENT_SUFFIX}"
+        self._segment_path = os.path.join(self.directory, name)
+        self._segment_size = 0
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def segments(self) -> List[str]:
+        """Return segment paths in write order"""
+        names = sorted(
+            n for n in os.listdir(self.directory)
+            if n.startswith(SEGMENT_PREFIX) and n.endswith(SEGMENT_SUFFIX)
+        )
+        return [os.path.join(self.directory, n) for n in names]
+
+    def _iter_blocks(self, start: float, end: float) -> Iterator[Dict[str, List]]:
+        """Yield decoded blocks that may contain records within [start, end)"""
+        for path in self.segments():
+            with open(path, 'rb') as f:
+                while True:
+                    header = f.read(BLOCK_HEADER.size)
+                    if len(header) < BLOCK_HEADER.size:
+                        break
+                    magic, length, count, min_ts, max_ts = BLOCK_HEADER.unpack(header)
+                    if magic != BLOCK_MAGIC:
+                        logger.warning(f"Corrupt block in sentiment log segment {path}, skipping rest")
+                        break
+                    if max_ts < start or min_ts >= end:
+                        f.seek(length, os.SEEK_CUR)
+                        continue
+                    payload = f.read(length)
+                    if len(payload) < length:
+                        break  # Torn write at the tail of the segment
+                    yield _decode_block(payload, count)
+
+    def read_columns(self, start: float, end: float, symbols: Optional[List[str]] = None,
+                     sources: Optional[List[str]] = None) -> Dict[str, List]:
+        """Read all records within [start, end) as column lists"""
+        self.flush()
+        symbol_filter = set(symbols) if symbols else None
+        source_filter = set(sources) if sources else None
+
+        result: Dict[str, List] = {name: [] for name, _ in NUMERIC_COLUMNS}
+        result.update({name: [] for name in STRING_COLUMNS})
+
+        for columns in self._iter_blocks(start, end):
+            timestamps = columns['timestamp']
+            for i, ts in enumerate(timestamps):
+                if ts < start or ts >= end:
+                    continue
+                if symbol_filter is not None and columns['symbol'][i] not in symbol_filter:
+                    continue
+                if source_filter is not None and columns['source'][i] not in source_filter:
+                    continue
+                for name in result:
+                    result[name].append(columns[name][i])
+        return result
+
+    def read_range(self, start: float, end: float, symbols: Optional[List[str]] = None,
+                   sources: Optional[List[str]] = None) -> Iterator[Dict]:
+        """Iterate records within [start, end) as dicts"""
+        columns = self.read_columns(start, end, symbols, sources)
+        names = list(columns)
+        for values in zip(*(columns[n] for n in names)):
+            yield dict(zip(names, values))
+
+
+def recompute_combined_scores(log: SentimentLog, start: float, end: float, bucket_seconds: int = 3600,
+                              vader_weight: float = 0.6, textblob_weight: float = 0.4,
+                              source_weights: Optional[Dict[str, float]] = None,
+                              symbols: Optional[List[str]] = None) -> Dict[str, List[Dict]]:
+    """
+    Replay logged items into combined sentiment scores per symbol and time bucket,
+    using the same aggregation as SentimentAnalyzer but with alternative weights.
+    """
+    if source_weights is None:
+        source_weights = {'twitter': 0.4, 'reddit': 0.3, 'lunarcrush': 0.3}
+
+    columns = log.read_columns(start, end, symbols)
+
+    # (symbol, bucket, source) -> [weighted sum, total weight]
+    sums: Dict[Tuple[str, int, str], List[float]] = {}
+    for ts, source, symbol, vader, textblob, score, engagement in zip(
+        columns['timestamp'], columns['source'], columns['symbol'],
+        columns['vader'], columns['textblob'], columns['score'], columns['engagement']
+    ):
+        if math.isnan(vader) or math.isnan(textblob):
+            value = score  # Pre-scored sources such as LunarCrush
+        else:
+            value = vader * vader_weight + textblob * textblob_weight
+        if math.isnan(value):
+            continue
+
+        # Reddit is weighted by upvotes, everything else is a plain average
+        weight = max(engagement, 1) if source == 'reddit' else 1.0
+        key = (symbol, int(ts // bucket_seconds), source)
+        acc = sums.setdefault(key, [0.0, 0.0])
+        acc[0] += value * weight
+        acc[1] += weight
+
+    buckets: Dict[Tuple[str, int], Dict[str, float]] = {}
+    for (symbol, bucket, source), (total, weight) in sums.items():
+        buckets.setdefault((symbol, bucket), {})[source] = total / weight
+
+    result: Dict[str, List[Dict]] = {}
+    for (symbol, bucket), per_source in sorted(buckets.items()):
+        weighted = [(score, source_weights.get(src, 0.0)) for src, score in per_source.items()]
+        total_weight = sum(w for _, w in weighted)
+        if not total_weight:
+            continue
+        result.setdefault(symbol, []).append({
+            'timestamp': bucket * bucket_seconds,
+            'combined_sentiment_score': sum(s * w for s, w in weighted) / total_weight,
+            'sources': per_source
+        })
+    return result
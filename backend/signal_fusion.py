@@ -0,0 +1,290 @@
+"""
+Hybrid signal fusion: technical and sentiment inputs combined into one Signal.
+
+Each input source keeps the last reading per key with the time it was
+loaded. A fusion pass reads every source concurrently and never blocks on a
+reading it already has: values within max_age are used at full weight,
+values up to max_stale are used at a weight that decays linearly with age
+while a background refresh runs, and only keys with no usable value wait
+for the loader, for at most `timeout` seconds. Refreshes are batched per
+source and shared by concurrent passes, so fusing hundreds of symbols is
+one loader call per source plus a few microseconds of arithmetic each.
+"""
+import asyncio
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+from config import Config
+from metrics import registry
+from tracing import tracer
+import logging
+
+logger = logging.getLogger(__name__)
+
+FUSION_INPUTS = registry.counter(
+    'hybridbot_fusion_inputs_total', 'Fusion input readings by freshness when used', ('source', 'state')
+)
+FUSION_LOAD_LATENCY = registry.histogram(
+    'hybridbot_fusion_load_seconds', 'Batched fusion input load latency', ('source',)
+)
+FUSION_LOAD_ERRORS = registry.counter(
+    'hybridbot_fusion_load_errors_total', 'Fusion input loads that raised', ('source',)
+)
+
+Target = Tuple[str, str, str]  # (exchange, symbol, timeframe)
+
+
+class Reading:
+    """One input's view of a key: a score in [-1, 1] and what produced it"""
+
+    __slots__ = ('score', 'source', 'detail', 'price', 'loaded_at')
+
+    def __init__(self, score: float, source: str, detail: str = '', price: Optional[float] = None):
+        self.score = max(-1.0, min(1.0, float(score)))
+        self.source = source  # Frontend Signal source this reading is attributed to
+        self.detail = detail
+        self.price = price
+        self.loaded_at = 0.0
+
+
+class InputSource:
+    """
+    Cached, batch-loaded readings for one fusion input.
+
+    `loader` takes a list of keys and returns raw values keyed the same way;
+    `reader` turns a raw value into a Reading (or None when it has nothing
+    usable, e.g. an error result). `key` maps a fusion target to this
+    source's key, so inputs shared by several targets load once.
+    """
+
+    def __init__(self, name: str, loader: Callable[[List[Hashable]], Awaitable[Dict]],
+                 reader: Callable[[Dict], Optional[Reading]], weight: float, max_age: float,
+                 max_stale: float, timeout: float, key: Callable[[Target], Hashable] = lambda target: target):
+        self.name = name
+        self.loader = loader
+        self.reader = reader
+        self.weight = weight
+        self.max_age = max_age
+        self.max_stale = max(max_stale, max_age)
+        self.timeout = timeout
+        self.key = key
+        self._readings: Dict[Hashable, Reading] = {}
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    def freshness(self, reading: Reading, now: float) -> float:
+        """1.0 up to max_age, falling linearly to 0.0 at max_stale"""
+        age = now - reading.loaded_at
+        if age <= self.max_age:
+            return 1.0
+        if age >= self.max_stale:
+            return 0.0
+        return 1.0 - (age - self.max_age) / (self.max_stale - self.max_age)
+
+    async def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Optional[Reading]]:
+        """Usable readings for keys, waiting up to `timeout` only for keys that have none"""
+        now = time.monotonic()
+        readings: Dict[Hashable, Optional[Reading]] = {}
+        refresh, waiting = [], []
+        fresh = stale = 0
+        for key in keys:
+            reading = self._readings.get(key)
+            age = now - reading.loaded_at if reading is not None else None
+            if age is not None and age <= self.max_age:
+                readings[key] = reading
+                fresh += 1
+                continue
+            refresh.append(key)
+            if age is not None and age < self.max_stale:
+                readings[key] = reading  # Served as is while the refresh runs
+                stale += 1
+            else:
+                waiting.append(key)
+
+        if refresh:
+            tasks = self._refresh(refresh)
+            if waiting:
+                pending = {tasks[key] for key in waiting}
+                await asyncio.wait(pending, timeout=self.timeout)
+                # Stale keys whose refresh landed while waiting get the new reading too
+                now = time.monotonic()
+                for key in refresh:
+                    reading = self._readings.get(key)
+                    readings[key] = reading if reading is not None and now - reading.loaded_at < self.max_stale else None
+                loaded = sum(1 for key in waiting if readings[key] is not None)
+                self._count('loaded', loaded)
+                self._count('unavailable', len(waiting) - loaded)
+        self._count('fresh', fresh)
+        self._count('stale', stale)
+        return readings
+
+    def _count(self, state: str, amount: int):
+        if amount:
+            FUSION_INPUTS.labels(self.name, state).inc(amount)
+
+    def _refresh(self, keys: List[Hashable]) -> Dict[Hashable, asyncio.Task]:
+        """Start one batched load for keys not already loading; returns each key's load task"""
+        tasks = {}
+        missing = []
+        for key in keys:
+            task = self._inflight.get(key)
+            if task is None:
+                missing.append(key)
+            else:
+                tasks[key] = task
+        if missing:
+            task = asyncio.ensure_future(self._load(missing))
+            for key in missing:
+                self._inflight[key] = tasks[key] = task
+        return tasks
+
+    async def _load(self, keys: List[Hashable]):
+        try:
+            with tracer.span('fusion.load', source=self.name, keys=len(keys)), \
+                    FUSION_LOAD_LATENCY.time(self.name, errors=FUSION_LOAD_ERRORS):
+                raw = await self.loader(keys)
+            loaded_at = time.monotonic()
+            for key in keys:
+                value = raw.get(key) if isinstance(raw, dict) else None
+                reading = self.reader(value) if isinstance(value, dict) else None
+                if reading is not None:
+                    reading.loaded_at = loaded_at
+                    self._readings[key] = reading
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Fusion input {self.name} failed to load {len(keys)} keys: {e}")
+        finally:
+            current = asyncio.current_task()
+            for key in keys:
+                if self._inflight.get(key) is current:
+                    del self._inflight[key]
+
+    async def close(self):
+        tasks = set(self._inflight.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._inflight.clear()
+
+    def stats(self) -> Dict:
+        return {'readings': len(self._readings), 'loading': len(self._inflight)}
+
+
+def technical_reading(analysis: Dict) -> Optional[Reading]:
+    """Reading from a TechnicalAnalyzer.analyze result"""
+    if 'error' in analysis:
+        return None
+    score = analysis.get('signal_score')
+    if score is None:
+        # Cached before analyses carried a score
+        score = {'buy': 0.5, 'sell': -0.5}.get(analysis.get('overall_signal'), 0.0)
+    return Reading(score, 'technical', f"technical {analysis.get('overall_signal', 'neutral')}",
+                   analysis.get('current_price'))
+
+
+def sentiment_reading(sentiment: Dict) -> Optional[Reading]:
+    """Reading from a SentimentAnalyzer combined sentiment; attributed to its strongest source"""
+    if 'combined_sentiment_score' not in sentiment:
+        return None
+    sources = {
+        name: abs(result['sentiment_score'])
+        for name, result in (sentiment.get('sources') or {}).items()
+        if isinstance(result, dict) and 'sentiment_score' in result
+    }
+    source = max(sources, key=sources.get) if sources else 'twitter'
+    return Reading(sentiment['combined_sentiment_score'], source,
+                   f"sentiment {sentiment.get('sentiment_label', 'neutral')}")
+
+
+class SignalFusion:
+    """
+    Weighted combination of input sources into frontend Signal records.
+
+    The fused score is the freshness-weighted sum of the input scores over
+    the sum of the configured weights, so a missing or stale input weakens
+    the signal instead of letting the remaining input speak for both.
+    """
+
+    def __init__(self, sources: List[InputSource], neutral_band: Optional[float] = None):
+        self.sources = sources
+        self.neutral_band = Config.FUSION_NEUTRAL_BAND if neutral_band is None else neutral_band
+        self._total_weight = sum(source.weight for source in sources) or 1.0
+
+    async def fuse_many(self, targets: Iterable[Target]) -> Dict[Target, Optional[Dict]]:
+        """Fused Signal per (exchange, symbol, timeframe) target; None when no input is usable"""
+        targets = list(dict.fromkeys(targets))
+        if not targets:
+            return {}
+        keys = [[source.key(target) for target in targets] for source in self.sources]
+        with tracer.span('fusion.gather', targets=len(targets)):
+            readings = await asyncio.gather(*(
+                source.get_many(dict.fromkeys(source_keys)) for source, source_keys in zip(self.sources, keys)
+            ))
+        now = time.monotonic()
+        return {
+            target: self.combine(target[1], [
+                (source, readings[i].get(keys[i][n])) for i, source in enumerate(self.sources)
+            ], now)
+            for n, target in enumerate(targets)
+        }
+
+    async def fuse(self, target: Target) -> Optional[Dict]:
+        return (await self.fuse_many([target])).get(target)
+
+    def combine(self, symbol: str, inputs: List[Tuple[InputSource, Optional[Reading]]],
+                now: Optional[float] = None) -> Optional[Dict]:
+        """Signal record from (source, reading) pairs"""
+        now = time.monotonic() if now is None else now
+        weighted = 0.0
+        used = 0
+        strongest, attributed, price = -1.0, None, None
+        parts, contributions = [], {}
+        for source, reading in inputs:
+            if reading is None:
+                parts.append(f"{source.name} n/a")
+                continue
+            weight = source.weight * source.freshness(reading, now)
+            if weight <= 0:
+                parts.append(f"{source.name} expired")
+                continue
+            used += 1
+            contribution = weight * reading.score
+            weighted += contribution
+            if abs(contribution) > strongest:
+                strongest, attributed = abs(contribution), reading.source
+            if price is None:
+                price = reading.price
+            age = now - reading.loaded_at
+            stale = f", {age:.0f}s old" if age > source.max_age else ''
+            parts.append(f"{reading.detail} {reading.score:+.2f} (w {weight:.2f}{stale})")
+            contributions[source.name] = {'score': reading.score, 'weight': weight, 'age': age}
+        if not used:
+            return None
+
+        score = weighted / self._total_weight
+        if score > self.neutral_band:
+            sentiment = 'bullish'
+        elif score < -self.neutral_band:
+            sentiment = 'bearish'
+        else:
+            sentiment = 'neutral'
+        return {
+            'id': uuid.uuid4().hex,
+            'source': attributed,
+            'symbol': symbol,
+            'sentiment': sentiment,
+            'strength': min(1.0, abs(score)),
+            'content': f"hybrid {score:+.2f}: {', '.join(parts)}",
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'score': score,
+            'price': price,
+            'inputs': contributions,
+        }
+
+    async def close(self):
+        await asyncio.gather(*(source.close() for source in self.sources))
+
+    def stats(self) -> Dict:
+        return {source.name: source.stats() for source in self.sources}
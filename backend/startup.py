@@ -0,0 +1,92 @@
+"""
+Startup timing and lazy loading of heavy dependencies.
+
+ccxt (every exchange class), pandas, ta and the social media / NLP
+libraries each take hundreds of milliseconds to import. Modules bind them
+with lazy_module() so the import happens on first attribute access, i.e.
+when a configured bot or refresher actually needs them, and the time it
+took is recorded for the startup report.
+"""
+import importlib
+import sys
+import threading
+import time
+from types import ModuleType
+from typing import Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+_started = time.perf_counter()
+_marks: List[Tuple[str, float]] = []
+_lazy_modules: Dict[str, 'LazyModule'] = {}
+_import_lock = threading.Lock()
+
+
+def mark(name: str):
+    """Record a startup milestone, relative to when this module was first imported"""
+    _marks.append((name, time.perf_counter() - _started))
+
+
+class LazyModule:
+    """Stands in for a module until one of its attributes is used"""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module: Optional[ModuleType] = None
+        self.import_seconds: Optional[float] = None
+        self.loaded_at: Optional[float] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    def load(self) -> ModuleType:
+        if self._module is None:
+            with _import_lock:
+                if self._module is None:
+                    already_imported = self._name in sys.modules
+                    started = time.perf_counter()
+                    module = importlib.import_module(self._name)
+                    if not already_imported:
+                        self.import_seconds = time.perf_counter() - started
+                        logger.info(f"Loaded {self._name} in {self.import_seconds * 1000:.0f}ms")
+                    self.loaded_at = time.perf_counter() - _started
+                    self._module = module
+        return self._module
+
+    def __getattr__(self, attribute: str):
+        return getattr(self.load(), attribute)
+
+    def __repr__(self) -> str:
+        return f"<lazy module {self._name!r} ({'loaded' if self.loaded else 'not loaded'})>"
+
+
+def lazy_module(name: str) -> LazyModule:
+    """Return a shared lazy proxy for a module"""
+    module = _lazy_modules.get(name)
+    if module is None:
+        module = _lazy_modules[name] = LazyModule(name)
+    return module
+
+
+def report() -> Dict:
+    """Startup milestones and which heavy dependencies have been loaded so far"""
+    return {
+        'uptime': time.perf_counter() - _started,
+        'marks': [{'name': name, 'seconds': round(seconds, 4)} for name, seconds in _marks],
+        'lazy_modules': {
+            name: {
+                'loaded': module.loaded,
+                'import_seconds': round(module.import_seconds, 4) if module.import_seconds is not None else None,
+                'loaded_at': round(module.loaded_at, 4) if module.loaded_at is not None else None,
+            }
+            for name, module in _lazy_modules.items()
+        },
+    }
+
+
+def log_report():
+    marks = ', '.join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in _marks)
+    deferred = [name for name, module in _lazy_modules.items() if not module.loaded]
+    logger.info(f"Startup: {marks}; deferred imports: {', '.join(deferred) or 'none'}")
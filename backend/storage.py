@@ -0,0 +1,328 @@
+import json
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from metrics import registry
+import logging
+
+logger = logging.getLogger(__name__)
+
+STORE_PENDING = registry.gauge('hybridbot_store_pending_writes', 'Rows queued for the SQLite writer')
+STORE_DROPPED_TICKS = registry.counter('hybridbot_store_dropped_ticks_total', 'Price ticks shed by the SQLite writer')
+STORE_BATCH_LATENCY = registry.histogram('hybridbot_store_batch_seconds', 'SQLite write batch latency')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    id TEXT PRIMARY KEY,
+    bot_id TEXT,
+    symbol TEXT NOT NULL,
+    side TEXT NOT NULL,
+    amount REAL,
+    price REAL,
+    pnl REAL,
+    status TEXT,
+    timestamp REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_trades_symbol_ts ON trades (symbol, timestamp);
+CREATE INDEX IF NOT EXISTS idx_trades_bot_ts ON trades (bot_id, timestamp);
+
+CREATE TABLE IF NOT EXISTS signals (
+    id TEXT PRIMARY KEY,
+    bot_id TEXT,
+    source TEXT,
+    symbol TEXT NOT NULL,
+    sentiment TEXT,
+    strength REAL,
+    content TEXT,
+    timestamp REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_signals_symbol_ts ON signals (symbol, timestamp);
+CREATE INDEX IF NOT EXISTS idx_signals_bot_ts ON signals (bot_id, timestamp);
+
+CREATE TABLE IF NOT EXISTS price_ticks (
+    symbol TEXT NOT NULL,
+    price REAL,
+    bid REAL,
+    ask REAL,
+    volume REAL,
+    timestamp REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_price_ticks_symbol_ts ON price_ticks (symbol, timestamp);
+
+CREATE TABLE IF NOT EXISTS bot_state (
+    bot_id TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+INSERTS = {
+    'trades': "INSERT OR REPLACE INTO trades (id, bot_id, symbol, side, amount, price, pnl, status, timestamp) "
+              "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+    'signals': "INSERT OR REPLACE INTO signals (id, bot_id, source, symbol, sentiment, strength, content, timestamp) "
+               "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+    'price_ticks': "INSERT INTO price_ticks (symbol, price, bid, ask, volume, timestamp) VALUES (?, ?, ?, ?, ?, ?)",
+    'bot_state': "INSERT OR REPLACE INTO bot_state (bot_id, state, updated_at) VALUES (?, ?, ?)",
+}
+
+_STOP = object()
+
+
+def sqlite_path(database_url: str) -> str:
+    """'sqlite:///trading_bot.db' -> 'trading_bot.db', 'sqlite:////abs/path.db' -> '/abs/path.db'"""
+    prefix = 'sqlite:///'
+    if not database_url.startswith(prefix):
+        raise ValueError(f"Only sqlite DATABASE_URLs are supported, got {database_url!r}")
+    return database_url[len(prefix):] or ':memory:'
+
+
+def _to_epoch(value) -> float:
+    if value is None:
+        return time.time()
+    if isinstance(value, (int, float)):
+        return float(value) / 1000.0 if value > 1e12 else float(value)
+    return datetime.fromisoformat(str(value).replace('Z', '+00:00')).timestamp()
+
+
+def _to_iso(epoch: float) -> str:
+    return datetime.fromtimestamp(epoch, timezone.utc).isoformat()
+
+
+class TradingStore:
+    """
+    SQLite (WAL mode) storage for trades, signals, price ticks and bot state.
+
+    Writes are queued and applied by a background thread in batched
+    transactions, so callers on the event loop never wait on disk. Reads use
+    their own per-thread connections; WAL lets them run alongside the writer.
+    """
+
+    def __init__(self, path: str, batch_size: int = 500, flush_interval: float = 0.5,
+                 max_pending_ticks: int = 50000):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending_ticks = max_pending_ticks
+
+        self._queue: queue.Queue = queue.Queue()
+        self._pending_ticks = 0
+        self._dropped_ticks = 0
+        self._ticks_lock = threading.Lock()
+        self._local = threading.local()
+
+        # Create the schema before accepting writes
+        connection = self._connect()
+        connection.executescript(SCHEMA)
+        connection.commit()
+
+        self._writer = threading.Thread(target=self._write_loop, name='trading-store-writer', daemon=True)
+        self._writer.start()
+        registry.add_collector(self._collect_metrics)
+
+    @classmethod
+    def from_url(cls, database_url: str, **kwargs) -> 'TradingStore':
+        return cls(sqlite_path(database_url), **kwargs)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.row_factory = sqlite3.Row
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    def _reader(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = self._connect()
+        return connection
+
+    # ------------------------------------------------------------------
+    # Write-behind queue
+    # ------------------------------------------------------------------
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    @property
+    def dropped_ticks(self) -> int:
+        return self._dropped_ticks
+
+    def _collect_metrics(self):
+        STORE_PENDING.set(self.pending)
+        STORE_DROPPED_TICKS.labels().set_total(self._dropped_ticks)
+
+    def record_trade(self, trade: Dict):
+        """Queue a trade (MarketState trade record)"""
+        self._queue.put(('trades', (
+            trade['id'], trade.get('botId') or None, trade.get('pair') or trade.get('symbol'),
+            trade['side'], trade.get('amount'), trade.get('price'), trade.get('pnl'),
+            trade.get('status'), _to_epoch(trade.get('timestamp'))
+        )))
+
+    def record_signal(self, signal: Dict):
+        """Queue a signal (MarketState signal record)"""
+        self._queue.put(('signals', (
+            signal['id'], signal.get('botId'), signal.get('source'), signal['symbol'],
+            signal.get('sentiment'), signal.get('strength'), signal.get('content'),
+            _to_epoch(signal.get('timestamp'))
+        )))
+
+    def record_tick(self, price: Dict, timestamp: Optional[float] = None):
+        """Queue a price tick; ticks are shed first if the writer falls far behind"""
+        with self._ticks_lock:
+            if self._pending_ticks >= self.max_pending_ticks:
+                self._dropped_ticks += 1
+                return
+            self._pending_ticks += 1
+        self._queue.put(('price_ticks', (
+            price['symbol'], price.get('price'), price.get('bid'), price.get('ask'),
+            price.get('volume24h', price.get('volume')), timestamp or time.time()
+        )))
+
+    def save_bot_state(self, bot_id: str, state: Dict):
+        """Queue a snapshot of a bot's state"""
+        self._queue.put(('bot_state', (str(bot_id), json.dumps(state, default=str), time.time())))
+
+    def on_market_state_change(self, dataset: str, item: Optional[Dict]):
+        """MarketState listener persisting every change"""
+        if item is None:
+            return
+        if dataset == 'trades':
+            self.record_trade(item)
+        elif dataset == 'signals':
+            self.record_signal(item)
+        elif dataset == 'prices':
+            self.record_tick(item)
+        elif dataset == 'bots':
+            self.save_bot_state(item['id'], item)
+
+    def _write_loop(self):
+        connection = self._connect()
+        stopping = False
+        while not stopping:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            item = first
+            while True:
+                if item is _STOP:
+                    stopping = True
+                else:
+                    batch.append(item)
+                if stopping or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+
+            self._write_batch(connection, batch)
+        connection.close()
+
+    def _write_batch(self, connection: sqlite3.Connection, batch: List):
+        rows: Dict[str, List[Tuple]] = {}
+        waiters = []
+        for item in batch:
+            if isinstance(item, threading.Event):
+                waiters.append(item)
+                continue
+            table, row = item
+            rows.setdefault(table, []).append(row)
+
+        if 'price_ticks' in rows:
+            with self._ticks_lock:
+                self._pending_ticks -= len(rows['price_ticks'])
+
+        if rows:
+            try:
+                with STORE_BATCH_LATENCY.time(), connection:
+                    for table, table_rows in rows.items():
+                        connection.executemany(INSERTS[table], table_rows)
+            except sqlite3.Error as e:
+                logger.error(f"Error writing {sum(len(r) for r in rows.values())} rows to {self.path}: {e}")
+
+        for waiter in waiters:
+            waiter.set()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything queued so far is written"""
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout: float = 10.0):
+        """Write remaining rows and stop the writer thread"""
+        registry.remove_collector(self._collect_metrics)
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join(timeout)
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    # ------------------------------------------------------------------
+    # Queries (blocking; call from a worker thread)
+    # ------------------------------------------------------------------
+
+    def trades(self, symbol: Optional[str] = None, bot_id: Optional[str] = None,
+               start: Optional[float] = None, end: Optional[float] = None, limit: int = 100) -> List[Dict]:
+        """Latest trades, optionally filtered by symbol or bot and time range, newest first"""
+        rows = self._select('trades', symbol, bot_id, start, end, limit)
+        return [{
+            'id': r['id'], 'botId': r['bot_id'] or '', 'pair': r['symbol'], 'side': r['side'],
+            'amount': r['amount'], 'price': r['price'], 'pnl': r['pnl'],
+            'timestamp': _to_iso(r['timestamp']), 'status': r['status'],
+        } for r in rows]
+
+    def signals(self, symbol: Optional[str] = None, bot_id: Optional[str] = None,
+                start: Optional[float] = None, end: Optional[float] = None, limit: int = 100) -> List[Dict]:
+        """Latest signals, optionally filtered by symbol or bot and time range, newest first"""
+        rows = self._select('signals', symbol, bot_id, start, end, limit)
+        return [{
+            'id': r['id'], 'source': r['source'], 'symbol': r['symbol'], 'sentiment': r['sentiment'],
+            'strength': r['strength'], 'content': r['content'], 'timestamp': _to_iso(r['timestamp']),
+        } for r in rows]
+
+    def price_ticks(self, symbol: str, start: Optional[float] = None, end: Optional[float] = None,
+                    limit: int = 1000) -> List[Dict]:
+        """Price ticks for a symbol within a time range, oldest first"""
+        rows = self._select('price_ticks', symbol, None, start, end, limit)
+        return [{
+            'symbol': r['symbol'], 'price': r['price'], 'bid': r['bid'], 'ask': r['ask'],
+            'volume': r['volume'], 'timestamp': r['timestamp'],
+        } for r in reversed(rows)]
+
+    def bot_states(self) -> Dict[str, Dict]:
+        rows = self._reader().execute('SELECT bot_id, state FROM bot_state').fetchall()
+        return {r['bot_id']: json.loads(r['state']) for r in rows}
+
+    def _select(self, table: str, symbol: Optional[str], bot_id: Optional[str],
+                start: Optional[float], end: Optional[float], limit: int) -> List[sqlite3.Row]:
+        # Filters line up with the (symbol, timestamp) and (bot_id, timestamp) indexes
+        clauses, params = [], []
+        if symbol is not None:
+            clauses.append('symbol = ?')
+            params.append(symbol)
+        if bot_id is not None:
+            clauses.append('bot_id = ?')
+            params.append(bot_id)
+        if start is not None:
+            clauses.append('timestamp >= ?')
+            params.append(start)
+        if end is not None:
+            clauses.append('timestamp < ?')
+            params.append(end)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        params.append(max(0, limit))  # SQLite treats a negative LIMIT as no limit
+        return self._reader().execute(
+            f"SELECT * FROM {table} {where} ORDER BY timestamp DESC LIMIT ?", params
+        ).fetchall()
@@ -0,0 +1,364 @@
+import asyncio
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Set, Tuple
+from config import Config
+from fast_json import dumps, loads
+from market_state import MarketState, market_state
+from metrics import registry
+import logging
+
+logger = logging.getLogger(__name__)
+
+STREAM_CLIENTS = registry.gauge('hybridbot_stream_clients', 'Connected WebSocket stream clients')
+STREAM_PENDING = registry.gauge('hybridbot_stream_pending_updates', 'Coalesced updates waiting to be sent')
+STREAM_COALESCED = registry.counter('hybridbot_stream_coalesced_total', 'Updates superseded before sending')
+STREAM_DISCONNECTS = registry.counter('hybridbot_stream_slow_disconnects_total', 'Clients closed for not reading')
+
+# Channels carrying per-item deltas keyed by symbol
+EVENT_CHANNELS = ('prices', 'signals', 'trades')
+# Channels sent as a whole snapshot whenever they change
+SNAPSHOT_CHANNELS = ('bots', 'portfolio')
+CHANNELS = EVENT_CHANNELS + SNAPSHOT_CHANNELS
+# Price ticks move PnL without changing what is held; they go out as per-item deltas
+# on these keys (bot id, asset) instead of re-sending the snapshot channel
+PNL_DELTAS = {'botPnl': 'bots', 'portfolioDelta': 'portfolio'}
+# Slowest push rate a client may ask for; the fastest is the hub's max_hz
+MIN_CLIENT_HZ = 0.1
+
+
+def _normalize_symbol(symbol: Optional[str]) -> str:
+    """'BTC/USDT', 'btcusdt' and 'BTC-USDT' all map to 'BTCUSDT'"""
+    return (symbol or '').replace('/', '').replace('-', '').upper()
+
+
+def _is_str_list(value) -> bool:
+    return isinstance(value, list) and all(isinstance(v, str) for v in value)
+
+
+def _item_key(channel: str, item: Dict) -> Tuple[str, str]:
+    """Return (symbol, coalescing key) for a delta item"""
+    if channel == 'prices':
+        symbol = _normalize_symbol(item['symbol'])
+        return symbol, symbol  # Only the latest price per symbol matters
+    if channel == 'signals':
+        return _normalize_symbol(item['symbol']), item['id']
+    return _normalize_symbol(item.get('pair')), item['id']
+
+
+class ClientStream:
+    """Per-connection subscription state and coalescing buffer"""
+
+    def __init__(self, websocket, max_hz: float, max_pending: int):
+        self.websocket = websocket
+        self.symbols: Optional[Set[str]] = None  # None means every symbol
+        self.channels: Set[str] = set(CHANNELS)
+        self.min_interval = 1.0 / max_hz
+        self.max_pending = max_pending
+        self.dropped = 0
+
+        self._pending: Dict[str, OrderedDict] = {channel: OrderedDict() for channel in EVENT_CHANNELS + tuple(PNL_DELTAS)}
+        self._totals: Optional[Dict] = None  # Portfolio totals sent with the next portfolioDelta
+        self._dirty: Set[str] = set()
+        self._wakeup = asyncio.Event()
+
+    def wants(self, channel: str, symbol: Optional[str] = None) -> bool:
+        if channel not in self.channels:
+            return False
+        return symbol is None or self.symbols is None or symbol in self.symbols
+
+    def push(self, channel: str, key: str, item: Dict):
+        """Queue a delta, replacing any unsent update with the same key"""
+        pending = self._pending[channel]
+        if key in pending:
+            self.dropped += 1  # Intermediate tick superseded before it was sent
+            STREAM_COALESCED.inc()
+            pending.move_to_end(key)
+        pending[key] = item
+        if len(pending) > self.max_pending:
+            pending.popitem(last=False)
+            self.dropped += 1
+            STREAM_COALESCED.inc()
+        self._wakeup.set()
+
+    def push_totals(self, totals: Dict):
+        """Portfolio totals for the next portfolioDelta; only the latest is kept"""
+        self._totals = totals
+        self._wakeup.set()
+
+    def mark_dirty(self, channel: str):
+        self._dirty.add(channel)
+        self._wakeup.set()
+
+    def drain(self, snapshot) -> Optional[Dict]:
+        """Collect everything pending into one message"""
+        message: Dict = {}
+        for key, channel in PNL_DELTAS.items():
+            if channel in self._dirty:
+                self._pending[key].clear()  # The snapshot going out already has them
+        if 'portfolio' in self._dirty:
+            self._totals = None
+        for channel, pending in self._pending.items():
+            if pending:
+                message[channel] = list(pending.values())
+                pending.clear()
+        if self._totals is not None or 'portfolioDelta' in message:
+            message['portfolioDelta'] = {**(self._totals or {}), 'assets': message.get('portfolioDelta', [])}
+            self._totals = None
+        for channel in self._dirty:
+            message[channel] = snapshot(channel)
+        self._dirty.clear()
+        if not message:
+            return None
+        message['type'] = 'delta'
+        return message
+
+
+class StreamHub:
+    """
+    Fans MarketState changes out to WebSocket clients.
+
+    Each client gets its own coalescing buffer and writer task: updates that
+    arrive while a client is waiting for its next send slot overwrite older
+    ones, so slow consumers receive the latest state instead of a backlog,
+    and no client is sent more than max_hz messages per second. A price tick
+    sends only the PnL it moved (botPnl records for the bots holding that
+    asset, and a portfolioDelta with the asset's entry and new totals)
+    rather than the whole bots and portfolio datasets.
+    """
+
+    def __init__(self, state: MarketState, max_hz: float = 4.0, max_pending: int = 500,
+                 send_timeout: float = 10.0):
+        self.state = state
+        self.max_hz = max_hz
+        self.max_pending = max_pending
+        self.send_timeout = send_timeout
+
+        self._clients: Set[ClientStream] = set()
+        # Clients subscribed to every symbol, and per-symbol subscriber sets
+        self._all_symbols: Set[ClientStream] = set()
+        self._by_symbol: Dict[str, Set[ClientStream]] = {}
+        self._snapshots: Dict[str, Tuple[int, object]] = {}
+        self._attached = False
+
+    def attach(self):
+        if not self._attached:
+            self.state.add_listener(self._on_change)
+            self._attached = True
+
+    def detach(self):
+        if self._attached:
+            self.state.remove_listener(self._on_change)
+            self._attached = False
+
+    def collect_metrics(self):
+        STREAM_CLIENTS.set(len(self._clients))
+        STREAM_PENDING.set(sum(len(p) for c in self._clients for p in c._pending.values()))
+
+    @property
+    def client_count(self) -> int:
+        return len(self._clients)
+
+    # ------------------------------------------------------------------
+    # Subscription bookkeeping
+    # ------------------------------------------------------------------
+
+    def _index(self, client: ClientStream):
+        if client.symbols is None:
+            self._all_symbols.add(client)
+        else:
+            for symbol in client.symbols:
+                self._by_symbol.setdefault(symbol, set()).add(client)
+
+    def _unindex(self, client: ClientStream):
+        self._all_symbols.discard(client)
+        for symbol in client.symbols or ():
+            subscribers = self._by_symbol.get(symbol)
+            if subscribers is not None:
+                subscribers.discard(client)
+                if not subscribers:
+                    del self._by_symbol[symbol]
+
+    def subscribe(self, client: ClientStream, symbols: Optional[Iterable[str]] = None,
+                  channels: Optional[Iterable[str]] = None):
+        """Replace a client's subscription; None symbols means all symbols"""
+        self._unindex(client)
+        client.symbols = None if symbols is None else {_normalize_symbol(s) for s in symbols}
+        if channels is not None:
+            client.channels = {c for c in channels if c in CHANNELS}
+        self._index(client)
+
+    def unsubscribe(self, client: ClientStream, symbols: Iterable[str]):
+        """Remove symbols from a client's subscription"""
+        if client.symbols is None:
+            return
+        self._unindex(client)
+        client.symbols -= {_normalize_symbol(s) for s in symbols}
+        self._index(client)
+
+    # ------------------------------------------------------------------
+    # Fan-out
+    # ------------------------------------------------------------------
+
+    def _snapshot(self, channel: str):
+        """Shared snapshot for whole-dataset channels, rebuilt once per version"""
+        version = self.state.version(channel)
+        cached = self._snapshots.get(channel)
+        if cached is None or cached[0] != version:
+            cached = (version, self.state.snapshot(channel))
+            self._snapshots[channel] = cached
+        return cached[1]
+
+    def _mark_dirty(self, channel: str):
+        for client in self._clients:
+            if client.wants(channel):
+                client.mark_dirty(channel)
+
+    def _on_change(self, dataset: str, item: Optional[Dict]):
+        if not self._clients or dataset not in CHANNELS:
+            return
+
+        if dataset in SNAPSHOT_CHANNELS or item is None:
+            self._mark_dirty(dataset)
+        else:
+            symbol, key = _item_key(dataset, item)
+            for client in self._all_symbols:
+                if dataset in client.channels:
+                    client.push(dataset, key, item)
+            for client in self._by_symbol.get(symbol, ()):
+                if dataset in client.channels:
+                    client.push(dataset, key, item)
+
+        if dataset == 'prices' and item is not None:
+            self._push_pnl(item['symbol'])
+
+    def _push_pnl(self, symbol: str):
+        """Send the PnL a tick moved: bots holding the symbol's asset, its portfolio entry and the totals"""
+        pnl = self.state.pnl
+        portfolio_clients = [c for c in self._clients if c.wants('portfolio')]
+        if portfolio_clients:
+            asset = pnl.asset(symbol)
+            totals = pnl.totals()
+            for client in portfolio_clients:
+                if asset is not None:
+                    client.push('portfolioDelta', asset['symbol'], asset)
+                client.push_totals(totals)
+
+        bot_ids = pnl.bots_holding(symbol)
+        bot_clients = [c for c in self._clients if c.wants('bots')] if bot_ids else ()
+        if bot_clients:
+            records = [{'id': bot_id, **pnl.bot_stats(bot_id)} for bot_id in bot_ids]
+            for client in bot_clients:
+                for record in records:
+                    client.push('botPnl', record['id'], record)
+
+    def _initial_snapshot(self, client: ClientStream) -> Dict:
+        message: Dict = {'type': 'snapshot'}
+        for channel in EVENT_CHANNELS:
+            if channel not in client.channels:
+                continue
+            items = self.state.snapshot(channel)
+            if client.symbols is not None:
+                items = [i for i in items if _item_key(channel, i)[0] in client.symbols]
+            message[channel] = items
+        for channel in SNAPSHOT_CHANNELS:
+            if channel in client.channels:
+                message[channel] = self._snapshot(channel)
+        return message
+
+    # ------------------------------------------------------------------
+    # Connection handling
+    # ------------------------------------------------------------------
+
+    async def _send(self, client: ClientStream, message: Dict):
+        await asyncio.wait_for(client.websocket.send_text(dumps(message).decode()), self.send_timeout)
+
+    async def _writer(self, client: ClientStream):
+        while True:
+            await client._wakeup.wait()
+            client._wakeup.clear()
+            message = client.drain(self._snapshot)
+            if message is not None:
+                await self._send(client, message)
+            # Updates arriving during this pause are coalesced into the next message
+            await asyncio.sleep(client.min_interval)
+
+    def _client_interval(self, max_hz) -> float:
+        """Minimum seconds between pushes for a client-requested rate, clamped to the hub's limits"""
+        if isinstance(max_hz, bool) or not isinstance(max_hz, (int, float)) or not max_hz > 0:
+            raise ValueError('max_hz must be a positive number')
+        return 1.0 / max(MIN_CLIENT_HZ, min(float(max_hz), self.max_hz))
+
+    async def _handle_command(self, client: ClientStream, command: Dict):
+        action = command.get('action')
+        if action == 'subscribe':
+            symbols, channels = command.get('symbols'), command.get('channels')
+            for name, value in (('symbols', symbols), ('channels', channels)):
+                if value is not None and not _is_str_list(value):
+                    raise ValueError(f"{name} must be a list of strings")
+            # Validated before anything changes, so a bad command leaves the subscription as it was
+            interval = self._client_interval(command['max_hz']) if command.get('max_hz') is not None else None
+            self.subscribe(client, symbols, channels)
+            if interval is not None:
+                client.min_interval = interval
+            await self._send(client, self._initial_snapshot(client))
+        elif action == 'unsubscribe':
+            symbols = command.get('symbols') or []
+            if not _is_str_list(symbols):
+                raise ValueError('symbols must be a list of strings')
+            self.unsubscribe(client, symbols)
+        elif action == 'ping':
+            await self._send(client, {'type': 'pong'})
+        else:
+            await self._send(client, {'type': 'error', 'error': f"Unknown action: {action}"})
+
+    async def _reader(self, client: ClientStream):
+        while True:
+            raw = await client.websocket.receive_text()
+            try:
+                command = loads(raw)
+            except ValueError:
+                await self._send(client, {'type': 'error', 'error': 'Invalid JSON'})
+                continue
+            if not isinstance(command, dict):
+                await self._send(client, {'type': 'error', 'error': 'Commands must be JSON objects'})
+                continue
+            try:
+                await self._handle_command(client, command)
+            except (TypeError, ValueError, AttributeError) as e:
+                # A malformed command is answered; it must not end the connection
+                await self._send(client, {'type': 'error', 'error': f"Invalid {command.get('action')} command: {e}"})
+
+    async def serve(self, websocket):
+        """Run one WebSocket connection until it closes"""
+        await websocket.accept()
+        client = ClientStream(websocket, self.max_hz, self.max_pending)
+        self._clients.add(client)
+        self._index(client)
+        tasks = []
+        try:
+            await self._send(client, self._initial_snapshot(client))
+            tasks = [asyncio.create_task(self._reader(client)), asyncio.create_task(self._writer(client))]
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                error = task.exception()
+                if isinstance(error, asyncio.TimeoutError):
+                    logger.info("Closing stream client that stopped reading")
+                    STREAM_DISCONNECTS.inc()
+                    await websocket.close()
+                elif error is not None:
+                    # Disconnects surface as framework-specific exceptions
+                    logger.debug(f"Stream client disconnected: {error}")
+        except Exception as e:
+            logger.debug(f"Stream client disconnected: {e}")
+        finally:
+            for task in tasks:
+                task.cancel()
+            self._unindex(client)
+            self._clients.discard(client)
+            if client.dropped:
+                logger.debug(f"Stream client coalesced {client.dropped} updates")
+
+
+# Process-wide hub fed by the shared market state
+stream_hub = StreamHub(market_state, max_hz=Config.STREAM_MAX_HZ)
+registry.add_collector(stream_hub.collect_metrics)
@@ -0,0 +1,400 @@
+"""
+Multi-process mode: symbols are sharded across worker processes by
+consistent hashing. Each worker runs the bot scheduler and price refresher
+for its shard and publishes into the shared-memory PriceBoard, which the API
+process reads directly. Bot decisions are sent back to the API process and
+traded by its risk engine, which sees every fill and price.
+"""
+import asyncio
+import json
+import logging
+import multiprocessing
+import queue
+import signal
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Set
+from config import Config
+from logging_pipeline import setup_logging, shutdown_logging
+from metrics import registry
+from price_board import PriceBoard, board_indicator_record, board_price_record
+from sharding import HashRing
+
+logger = logging.getLogger(__name__)
+
+WORKER_EVENTS_DROPPED = registry.counter(
+    'hybridbot_worker_events_dropped_total', 'Worker events dropped before reaching the supervisor', ('dataset',)
+)
+
+# Signals a worker buffers while the supervisor's event queue is full; trades and decisions are never dropped
+MAX_BUFFERED_SIGNALS = 1000
+
+
+def shard_symbols(seed_path: str) -> List[str]:
+    """Every symbol the deployment trades or watches: the market watchlist plus bot pairs"""
+    symbols = list(Config.MARKET_SYMBOLS)
+    try:
+        with open(seed_path) as f:
+            bots = json.load(f).get('bots', [])
+        symbols.extend(b.get('pair') or 'BTC/USDT' for b in bots)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read bots from {seed_path}: {e}")
+    return list(dict.fromkeys(symbols))
+
+
+# ----------------------------------------------------------------------
+# Worker process
+# ----------------------------------------------------------------------
+
+class EventForwarder:
+    """
+    Hands a worker's signals, trades and bot decisions to the supervisor in order.
+
+    Events the shared queue can't take yet wait in a local buffer that is
+    flushed in the background, so a busy supervisor never blocks the
+    worker's event loop. Trades and decisions are kept however long that
+    takes, since a lost fill corrupts the API process's PnL and risk
+    positions and a lost decision is a missed order; past
+    MAX_BUFFERED_SIGNALS the oldest buffered signals are dropped and counted.
+    """
+
+    def __init__(self, event_queue, max_buffered_signals: int = MAX_BUFFERED_SIGNALS):
+        self.event_queue = event_queue
+        self.max_buffered_signals = max_buffered_signals
+        self._pending: Deque = deque()
+        self._signals = 0
+        self.dropped = 0
+
+    def put(self, dataset: str, item: Dict):
+        self._pending.append((dataset, item))
+        if dataset == 'signals':
+            self._signals += 1
+            if self._signals > self.max_buffered_signals:
+                self._drop_oldest_signal()
+        self.flush()
+
+    def _drop_oldest_signal(self):
+        for index, (dataset, _) in enumerate(self._pending):
+            if dataset == 'signals':
+                del self._pending[index]
+                self._signals -= 1
+                self.dropped += 1
+                WORKER_EVENTS_DROPPED.labels('signals').inc()
+                logger.warning(f"Supervisor event queue full, dropped a buffered signal ({self.dropped} so far)")
+                return
+
+    def flush(self) -> bool:
+        """Move buffered events onto the queue until it is full; True when nothing is left"""
+        while self._pending:
+            try:
+                self.event_queue.put_nowait(self._pending[0])
+            except queue.Full:
+                return False
+            dataset, _ = self._pending.popleft()
+            if dataset == 'signals':
+                self._signals -= 1
+        return True
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    async def run(self, interval: float = 0.1):
+        while True:
+            if self._pending:
+                self.flush()
+            await asyncio.sleep(interval)
+
+    def close(self, timeout: float):
+        """Block for up to `timeout` seconds handing over what is still buffered"""
+        deadline = time.monotonic() + timeout
+        while self._pending:
+            try:
+                self.event_queue.put(self._pending[0], timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Full:
+                break
+            self._pending.popleft()
+        for dataset, item in self._pending:
+            WORKER_EVENTS_DROPPED.labels(dataset).inc()
+            logger.error(f"Worker exiting with undelivered {dataset[:-1]}: {item}")
+        self._pending.clear()
+        self._signals = 0
+
+
+def worker_main(worker_id: str, board_name: str, symbols: List[str], control_queue, event_queue):
+    """Entry point of a worker process"""
+    # The supervisor decides when workers stop; Ctrl+C goes to the whole process group
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Workers log to stdout only; rotating one file from several processes is unsafe
+    setup_logging(
+        level=Config.LOG_LEVEL,
+        json_format=Config.LOG_JSON,
+        repeat_window=Config.LOG_REPEAT_WINDOW,
+        repeat_burst=Config.LOG_REPEAT_BURST,
+        process_label=worker_id
+    )
+    try:
+        asyncio.run(_run_worker(worker_id, board_name, symbols, control_queue, event_queue))
+    finally:
+        shutdown_logging()
+
+
+async def _run_worker(worker_id: str, board_name: str, symbols: List[str], control_queue, event_queue):
+    from bot_scheduler import BotScheduler
+    from cache import cache
+    from exchange_client import ExchangeClient
+    from market_state import MarketState, PriceRefresher
+
+    board = PriceBoard.attach(board_name)
+    state = MarketState()
+    state.external_price_feed = True
+    state.load_seed(Config.SEED_DATA_PATH)
+    events = EventForwarder(event_queue)
+
+    def forward(dataset: str, item: Optional[Dict]):
+        """Publish this worker's results to the board and the supervisor"""
+        if item is None:
+            return
+        if dataset == 'prices':
+            board.publish_price(item)
+        elif dataset == 'indicators':
+            board.publish_indicators(item['symbol'], {
+                'indicators': item.get('indicators'),
+                'overall_signal': item.get('signal'),
+            })
+        elif dataset in ('signals', 'trades'):
+            events.put(dataset, item)
+
+    state.add_listener(forward)
+
+    async def forward_decision(bot, decision: Dict):
+        """Orders are placed by the API process's risk engine, which sees every fill and price"""
+        if decision['action'] in ('buy', 'sell'):
+            events.put('decisions', {'botId': bot.id, 'symbol': bot.symbol, **decision})
+
+    scheduler = BotScheduler(
+        state,
+        max_concurrency=Config.BOT_MAX_CONCURRENCY,
+        time_budget=Config.BOT_TIME_BUDGET,
+        cpu_budget=Config.BOT_CPU_BUDGET,
+        on_decision=forward_decision,
+        symbols=set(symbols)
+    )
+    client = ExchangeClient(Config.MARKET_EXCHANGE, Config, cache=cache)
+    refresher = PriceRefresher(state, client, list(symbols), Config.PRICE_REFRESH_INTERVAL)
+
+    logger.info(f"Worker {worker_id} starting with {len(symbols)} symbols")
+    await scheduler.start()
+    refresher.start()
+    events_task = asyncio.create_task(events.run())
+
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            message = await loop.run_in_executor(None, control_queue.get)
+            if message.get('type') == 'stop':
+                break
+            if message.get('type') == 'assign':
+                symbols = message['symbols']
+                logger.info(f"Worker {worker_id} reassigned to {len(symbols)} symbols")
+                refresher.symbols = list(symbols)
+                scheduler.set_symbols(set(symbols))
+    finally:
+        await refresher.stop()
+        await client.close()
+        await scheduler.stop(Config.BOT_DRAIN_TIMEOUT)
+        events_task.cancel()
+        # Trades from the drained runs go out before the worker exits
+        await loop.run_in_executor(None, events.close, Config.BOT_DRAIN_TIMEOUT)
+        board.close()
+        logger.info(f"Worker {worker_id} stopped")
+
+
+# ----------------------------------------------------------------------
+# Supervisor (API process)
+# ----------------------------------------------------------------------
+
+class WorkerHandle:
+    def __init__(self, worker_id: str, symbols: List[str]):
+        self.worker_id = worker_id
+        self.symbols = symbols
+        self.process: Optional[multiprocessing.Process] = None
+        self.control = None
+        self.restarts: Deque[float] = deque()
+
+
+class Supervisor:
+    """
+    Spawns one worker per shard, restarts crashed workers and, when a worker
+    keeps crashing, removes it from the ring so its symbols move to the others.
+
+    `on_decision(bot_id, symbol, decision)` trades the decisions workers send.
+    """
+
+    def __init__(self, board: PriceBoard, symbols: Iterable[str], workers: int, market_state,
+                 max_restarts: int = 5, restart_window: float = 60.0,
+                 on_decision: Optional[Callable[[str, str, Dict], Awaitable]] = None):
+        self.board = board
+        self.symbols = list(symbols)
+        self.market_state = market_state
+        self.on_decision = on_decision
+        self.max_restarts = max_restarts
+        self.restart_window = restart_window
+
+        self._ctx = multiprocessing.get_context('spawn')
+        self._events = self._ctx.Queue(maxsize=10000)
+        self.ring = HashRing(f"worker-{i}" for i in range(workers))
+        self.workers: Dict[str, WorkerHandle] = {}
+        self._monitor_task: Optional[asyncio.Task] = None
+        self._orders: Set[asyncio.Task] = set()
+
+    def _spawn(self, handle: WorkerHandle):
+        handle.control = self._ctx.Queue()
+        handle.process = self._ctx.Process(
+            target=worker_main,
+            args=(handle.worker_id, self.board.name, handle.symbols, handle.control, self._events),
+            name=handle.worker_id,
+            daemon=True
+        )
+        handle.process.start()
+        logger.info(f"Started {handle.worker_id} (pid {handle.process.pid}) with {len(handle.symbols)} symbols")
+
+    def start(self):
+        for worker_id, shard in self.ring.assign(self.symbols).items():
+            handle = WorkerHandle(worker_id, shard)
+            self.workers[worker_id] = handle
+            self._spawn(handle)
+        self._monitor_task = asyncio.create_task(self._monitor())
+
+    def _rebalance(self):
+        """Reassign shards after ring membership changed; only moved symbols change owner"""
+        for worker_id, shard in self.ring.assign(self.symbols).items():
+            handle = self.workers[worker_id]
+            if set(shard) != set(handle.symbols):
+                handle.symbols = shard
+                handle.control.put({'type': 'assign', 'symbols': shard})
+
+    def _handle_exit(self, handle: WorkerHandle):
+        code = handle.process.exitcode
+        now = time.monotonic()
+        handle.restarts.append(now)
+        while handle.restarts and now - handle.restarts[0] > self.restart_window:
+            handle.restarts.popleft()
+
+        if len(handle.restarts) > self.max_restarts and len(self.workers) > 1:
+            logger.error(f"{handle.worker_id} crashed {len(handle.restarts)} times in "
+                         f"{self.restart_window:.0f}s (exit code {code}); moving its symbols to other workers")
+            del self.workers[handle.worker_id]
+            self.ring.remove_node(handle.worker_id)
+            self._rebalance()
+        else:
+            logger.warning(f"{handle.worker_id} exited with code {code}, restarting")
+            self._spawn(handle)
+
+    def _drain_events(self):
+        while True:
+            try:
+                dataset, item = self._events.get_nowait()
+            except queue.Empty:
+                return
+            if dataset == 'signals':
+                self.market_state.add_signal(item)
+            elif dataset == 'trades':
+                self.market_state.add_trade(item)
+            elif dataset == 'decisions' and self.on_decision is not None:
+                task = asyncio.get_running_loop().create_task(
+                    self.on_decision(item['botId'], item['symbol'], item)
+                )
+                self._orders.add(task)
+                task.add_done_callback(self._order_done)
+
+    def _order_done(self, task: asyncio.Task):
+        self._orders.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Error trading a worker decision: {task.exception()}")
+
+    async def _monitor(self):
+        while True:
+            for handle in list(self.workers.values()):
+                if not handle.process.is_alive():
+                    self._handle_exit(handle)
+            self._drain_events()
+            await asyncio.sleep(0.5)
+
+    async def stop(self, timeout: float = 30.0):
+        """Ask workers to drain and exit, terminating any that do not"""
+        if self._monitor_task is not None:
+            self._monitor_task.cancel()
+            self._monitor_task = None
+        for handle in self.workers.values():
+            if handle.process.is_alive():
+                handle.control.put({'type': 'stop'})
+
+        loop = asyncio.get_running_loop()
+        deadline = time.monotonic() + timeout
+        for handle in self.workers.values():
+            # Keep draining while workers flush their last trades, or a full queue would stall their exit
+            while handle.process.is_alive() and time.monotonic() < deadline:
+                await loop.run_in_executor(None, handle.process.join, min(0.5, max(0.0, deadline - time.monotonic())))
+                self._drain_events()
+            if handle.process.is_alive():
+                logger.warning(f"{handle.worker_id} did not stop in time, terminating")
+                handle.process.terminate()
+        self._drain_events()
+        if self._orders:
+            _, pending = await asyncio.wait(set(self._orders), timeout=max(0.0, deadline - time.monotonic()))
+            for task in pending:
+                task.cancel()
+
+
+class BoardReader:
+    """Copies changed price board slots into the API process's MarketState"""
+
+    def __init__(self, board: PriceBoard, market_state, interval: float = 0.25):
+        self.board = board
+        self.market_state = market_state
+        self.interval = interval
+        self._seen: Dict[str, int] = {}
+        self._price_ts: Dict[str, float] = {}
+        self._indicator_ts: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def poll(self):
+        for symbol in self.board.symbols:
+            sequence = self.board.sequence(symbol)
+            if sequence == self._seen.get(symbol):
+                continue
+            slot = self.board.read_slot(symbol)
+            if slot is None:
+                continue
+            self._seen[symbol], values = slot
+
+            if values['price_ts'] != self._price_ts.get(symbol):
+                self._price_ts[symbol] = values['price_ts']
+                record = board_price_record(symbol, values)
+                if record is not None:
+                    self.market_state.update_price(record)
+            if values['indicators_ts'] != self._indicator_ts.get(symbol):
+                self._indicator_ts[symbol] = values['indicators_ts']
+                record = board_indicator_record(symbol, values)
+                if record is not None:
+                    self.market_state.update_indicators(symbol, record)
+
+    async def _run(self):
+        while True:
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"Error reading price board: {e}", exc_info=True)
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
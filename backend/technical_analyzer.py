@@ -1,14 +1,26 @@
-import ccxt
-import pandas as pd
-import numpy as np
-import ta
-from typing import Dict, List
+from typing import Dict, List, Optional
 # Update import for ExchangeClient
 from exchange_client import ExchangeClient # From the new generic client
+from metrics import registry
+from startup import lazy_module
+from tracing import cpu_block, tracer
 import logging
 
 logger = logging.getLogger(__name__)
 
+pd = lazy_module('pandas')
+ta = lazy_module('ta')
+
+ANALYSIS_LATENCY = registry.histogram(
+    'hybridbot_analysis_stage_seconds', 'Technical analysis latency per stage', ('stage',)
+)
+ANALYSIS_ERRORS = registry.counter(
+    'hybridbot_analysis_errors_total', 'Technical analysis stages that raised', ('stage',)
+)
+
+# RSI, MACD, Bollinger Bands, SMA/EMA crossover, Stochastic and Williams %R each cast one vote
+TECHNICAL_VOTERS = 6
+
 class TechnicalAnalyzer:
     # Update __init__ to accept injected ExchangeClient
     def __init__(self, exchange_client: ExchangeClient):
@@ -18,78 +30,103 @@ class TechnicalAnalyzer:
         """Perform technical analysis on a symbol"""
         try:
             # Use the injected exchange_client to fetch OHLCV
-            ohlcv = await self.exchange_client.fetch_ohlcv(
-                symbol, timeframe, limit=limit
-            )
+            with tracer.span('technical.fetch_ohlcv', symbol=symbol, timeframe=timeframe), \
+                    ANALYSIS_LATENCY.time('fetch', errors=ANALYSIS_ERRORS):
+                ohlcv = await self.exchange_client.fetch_ohlcv(
+                    symbol, timeframe, limit=limit
+                )
 
             if not ohlcv:
                 return {'error': 'No historical data available'}
 
-            # Convert to DataFrame
-            df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-
-            # Calculate technical indicators
-            indicators = {}
-
-            # RSI
-            indicators['rsi'] = ta.momentum.RSIIndicator(df['close']).rsi().iloc[-1]
-
-            # MACD
-            macd = ta.trend.MACD(df['close'])
-            indicators['macd'] = {
-                'macd': macd.macd().iloc[-1],
-                'signal': macd.macd_signal().iloc[-1],
-                'histogram': macd.macd_diff().iloc[-1]
-            }
-
-            # Bollinger Bands
-            bb = ta.volatility.BollingerBands(df['close'])
-            indicators['bollinger_bands'] = {
-                'upper': bb.bollinger_hband().iloc[-1],
-                'middle': bb.bollinger_mavg().iloc[-1],
-                'lower': bb.bollinger_lband().iloc[-1]
-            }
-
-            # Moving Averages
-            indicators['sma_20'] = ta.trend.SMAIndicator(df['close'], window=20).sma_indicator().iloc[-1]
-            indicators['ema_50'] = ta.trend.EMAIndicator(df['close'], window=50).ema_indicator().iloc[-1]
-
-            # Volume SMA (example)
-            indicators['volume_sma_20'] = ta.volume.VolumeWeightedAveragePrice(
-                df['high'], df['low'], df['close'], df['volume'], window=20
-            ).volume_weighted_average_price().iloc[-1] # Corrected from SMAIndicator for volume
-
-            # Stochastic Oscillator
-            stoch = ta.momentum.StochasticOscillator(df['high'], df['low'], df['close'])
-            indicators['stochastic'] = {
-                'k': stoch.stoch().iloc[-1],
-                'd': stoch.stoch_signal().iloc[-1]
-            }
-
-            # Williams %R
-            indicators['williams_r'] = ta.momentum.WilliamsRIndicator(df['high'], df['low'], df['close']).williams_r().iloc[-1]
-
-            # Average True Range (ATR)
-            indicators['atr'] = ta.volatility.AverageTrueRange(df['high'], df['low'], df['close']).average_true_range().iloc[-1]
-
-
-            overall_signal = self._generate_technical_signals(indicators)
+            with ANALYSIS_LATENCY.time('indicators', errors=ANALYSIS_ERRORS), cpu_block():
+                # Convert to DataFrame
+                with tracer.span('technical.dataframe', rows=len(ohlcv)):
+                    df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+                    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+
+                # Calculate technical indicators
+                indicators = {}
+
+                # RSI
+                with tracer.span('indicator.rsi'):
+                    indicators['rsi'] = ta.momentum.RSIIndicator(df['close']).rsi().iloc[-1]
+
+                # MACD
+                with tracer.span('indicator.macd'):
+                    macd = ta.trend.MACD(df['close'])
+                    indicators['macd'] = {
+                        'macd': macd.macd().iloc[-1],
+                        'signal': macd.macd_signal().iloc[-1],
+                        'histogram': macd.macd_diff().iloc[-1]
+                    }
+
+                # Bollinger Bands
+                with tracer.span('indicator.bollinger_bands'):
+                    bb = ta.volatility.BollingerBands(df['close'])
+                    indicators['bollinger_bands'] = {
+                        'upper': bb.bollinger_hband().iloc[-1],
+                        'middle': bb.bollinger_mavg().iloc[-1],
+                        'lower': bb.bollinger_lband().iloc[-1]
+                    }
+
+                # Moving Averages
+                with tracer.span('indicator.moving_averages'):
+                    indicators['sma_20'] = ta.trend.SMAIndicator(df['close'], window=20).sma_indicator().iloc[-1]
+                    indicators['ema_50'] = ta.trend.EMAIndicator(df['close'], window=50).ema_indicator().iloc[-1]
+
+                # Volume SMA (example)
+                with tracer.span('indicator.vwap'):
+                    indicators['volume_sma_20'] = ta.volume.VolumeWeightedAveragePrice(
+                        df['high'], df['low'], df['close'], df['volume'], window=20
+                    ).volume_weighted_average_price().iloc[-1] # Corrected from SMAIndicator for volume
+
+                # Stochastic Oscillator
+                with tracer.span('indicator.stochastic'):
+                    stoch = ta.momentum.StochasticOscillator(df['high'], df['low'], df['close'])
+                    indicators['stochastic'] = {
+                        'k': stoch.stoch().iloc[-1],
+                        'd': stoch.stoch_signal().iloc[-1]
+                    }
+
+                # Williams %R
+                with tracer.span('indicator.williams_r'):
+                    indicators['williams_r'] = ta.momentum.WilliamsRIndicator(df['high'], df['low'], df['close']).williams_r().iloc[-1]
+
+                # Average True Range (ATR)
+                with tracer.span('indicator.atr'):
+                    indicators['atr'] = ta.volatility.AverageTrueRange(df['high'], df['low'], df['close']).average_true_range().iloc[-1]
+
+            with tracer.span('technical.signal'), ANALYSIS_LATENCY.time('signal', errors=ANALYSIS_ERRORS), cpu_block():
+                signal_score = self._score_technical_signals(indicators)
+                overall_signal = self._generate_technical_signals(indicators, signal_score)
 
             return {
                 'symbol': symbol,
                 'timeframe': timeframe,
                 'current_price': df['close'].iloc[-1],
                 'indicators': indicators,
-                'overall_signal': overall_signal
+                'overall_signal': overall_signal,
+                'signal_score': signal_score
             }
 
         except Exception as e:
             logger.error(f"Error performing technical analysis for {symbol}: {e}", exc_info=True)
             return {'error': str(e)}
 
-    def _generate_technical_signals(self, indicators: Dict) -> str:
+    def _generate_technical_signals(self, indicators: Dict, signal_score: Optional[float] = None) -> str:
         """Generate a simple buy/sell/neutral signal based on indicators"""
+        if signal_score is None:
+            signal_score = self._score_technical_signals(indicators)
+        if signal_score > 0:
+            return 'buy'
+        elif signal_score < 0:
+            return 'sell'
+        else:
+            return 'neutral'
+
+    def _score_technical_signals(self, indicators: Dict) -> float:
+        """Net indicator vote in [-1, 1]: (buy votes - sell votes) / indicators voting"""
         buy_strength = 0
         sell_strength = 0
 
@@ -130,12 +167,7 @@ class TechnicalAnalyzer:
         elif indicators['williams_r'] > -20: # Overbought
             sell_strength += 1
 
-        if buy_strength > sell_strength:
-            return 'buy'
-        elif sell_strength > buy_strength:
-            return 'sell'
-        else:
-            return 'neutral'
+        return (buy_strength - sell_strength) / TECHNICAL_VOTERS
 
     async def get_support_resistance(self, symbol: str, timeframe: str = '1d', limit: int = 100) -> Dict:
         """Calculate support and resistance levels"""
@@ -0,0 +1,183 @@
+import asyncio
+import time
+from bot_scheduler import BotGroup, BotScheduler
+from cache import build_cache
+from config import Config
+from market_state import MarketState
+from tracing import cpu_block
+
+
+class FakeSentiment:
+    """Combined sentiment per asset, with a configurable delay"""
+
+    def __init__(self, label='bullish', delay=0.0, sources=('twitter', 'reddit', 'lunarcrush')):
+        self.label = label
+        self.delay = delay
+        self.sources = sources
+        self.calls = []
+
+    async def get_combined_sentiment_many(self, assets):
+        self.calls.append(list(assets))
+        await asyncio.sleep(self.delay)
+        score = {'bullish': 0.5, 'bearish': -0.5}.get(self.label, 0.0)
+        # Like SentimentAnalyzer, every source is listed; the ones that failed carry an error
+        sources = {name: {'sentiment_score': score} if name in self.sources else {'error': 'unavailable'}
+                   for name in ('twitter', 'reddit', 'lunarcrush')}
+        return {asset: {'combined_sentiment_score': score, 'sentiment_label': self.label,
+                        'confidence': 0.8, 'sources': sources} for asset in assets}
+
+    async def close(self):
+        pass
+
+
+def make_scheduler(sentiment, **kwargs):
+    decisions = []
+
+    async def on_decision(bot, decision):
+        decisions.append((bot.id, decision['action']))
+
+    state = MarketState()
+    scheduler = BotScheduler(state, on_decision=on_decision, cache=build_cache('local'),
+                             sentiment_factory=lambda: sentiment, **kwargs)
+    return state, scheduler, decisions
+
+
+def bot_record(bot_id, pair='BTC/USDT', **kwargs):
+    return {'id': bot_id, 'name': f"Bot {bot_id}", 'strategy': 'sentiment', 'exchange': 'binance',
+            'pair': pair, 'status': 'active', **kwargs}
+
+
+def test_bots_are_grouped_and_sharded():
+    _, scheduler, _ = make_scheduler(FakeSentiment(), symbols={'BTC/USDT', 'ETH/USDT'})
+    scheduler.upsert_bot(bot_record('1'))
+    scheduler.upsert_bot(bot_record('2'))
+    scheduler.upsert_bot(bot_record('3', pair='ETH/USDT'))
+    scheduler.upsert_bot(bot_record('4', pair='SOL/USDT'))
+    scheduler.upsert_bot(bot_record('5', strategy='martingale'))
+    assert sorted(scheduler.bots) == ['1', '2', '3']
+    assert scheduler.groups[('binance', 'BTC/USDT', '1h')].members == {'1', '2'}
+
+    scheduler.set_symbols({'ETH/USDT'})
+    assert sorted(scheduler.bots) == ['3']
+    assert list(scheduler.groups) == [('binance', 'ETH/USDT', '1h')]
+
+
+def test_run_publishes_signal_and_hands_decision_on():
+    async def main():
+        sentiment = FakeSentiment('bullish')
+        state, scheduler, decisions = make_scheduler(sentiment)
+        scheduler.upsert_bot(bot_record('1'))
+        scheduler.upsert_bot(bot_record('2', pair='ETH/USDT'))
+        await asyncio.gather(*(scheduler._run_bot(bot) for bot in scheduler.bots.values()))
+        assert sorted(decisions) == [('1', 'buy'), ('2', 'buy')]
+        assert sentiment.calls == [['BTC', 'ETH']]  # One batched refresh for every sentiment bot
+        assert {s['botId'] for s in state.snapshot('signals')} == {'1', '2'}
+
+        # Signals are published when the decision changes, decisions are handed on every run
+        await scheduler._run_bot(scheduler.bots['1'])
+        assert len(state.snapshot('signals')) == 2
+        assert decisions[-1] == ('1', 'buy')
+        await scheduler.stop()
+
+    asyncio.run(main())
+
+
+def test_signal_is_attributed_to_a_source_that_answered():
+    async def main():
+        state, scheduler, _ = make_scheduler(FakeSentiment(sources=('lunarcrush',)))
+        scheduler.upsert_bot(bot_record('1'))
+        await scheduler._run_bot(scheduler.bots['1'])
+        assert [s['source'] for s in state.snapshot('signals')] == ['lunarcrush']
+        await scheduler.stop()
+
+    asyncio.run(main())
+
+
+def test_overrunning_bot_is_paused():
+    async def main():
+        _, scheduler, decisions = make_scheduler(FakeSentiment(delay=0.2), time_budget=0.01, max_overruns=2)
+        scheduler.upsert_bot(bot_record('1'))
+        bot = scheduler.bots['1']
+        await scheduler._run_bot(bot)
+        assert bot.overruns == 1 and not bot.paused
+        await scheduler._run_bot(bot)
+        assert bot.paused and bot.pause_reason == 'overrun'
+        assert decisions == []
+        await scheduler.stop()
+
+    asyncio.run(main())
+
+
+def test_group_load_survives_a_timed_out_member():
+    async def main():
+        group = BotGroup(('binance', 'BTC/USDT', '1h'))
+        loads = []
+
+        async def loader():
+            loads.append(1)
+            await asyncio.sleep(0.05)
+            return {'loaded': True}
+
+        try:
+            await asyncio.wait_for(group.get(loader, max_age=60), 0.01)
+        except asyncio.TimeoutError:
+            pass
+        assert await group.get(loader, max_age=60) == {'loaded': True}
+        assert await group.get(loader, max_age=60) == {'loaded': True}
+        assert len(loads) == 1
+
+    asyncio.run(main())
+
+
+def test_dispatch_loop_runs_bots_on_their_interval(monkeypatch):
+    monkeypatch.setattr(Config, 'BOT_DEFAULT_INTERVAL', 0.05)
+    monkeypatch.setattr(Config, 'SENTIMENT_REFRESH_INTERVAL', 0.0)
+
+    async def main():
+        state, scheduler, decisions = make_scheduler(FakeSentiment('bearish'))
+        state.upsert_bot(bot_record('1'))
+        state.upsert_bot(bot_record('2', status='paused'))
+        await scheduler.start()
+        await asyncio.sleep(0.4)
+        await scheduler.stop()
+        assert scheduler.bots['1'].runs >= 3
+        assert scheduler.bots['2'].runs == 0
+        assert set(decisions) == {('1', 'sell')}
+
+    asyncio.run(main())
+
+
+def test_shared_load_cpu_is_charged_to_the_group():
+    async def main():
+        _, scheduler, decisions = make_scheduler(FakeSentiment(), cpu_budget=0.01, max_overruns=1)
+        scheduler.upsert_bot(bot_record('1'))
+        bot = scheduler.bots['1']
+        group = scheduler.groups[bot.group_key]
+
+        async def heavy_load(group):
+            with cpu_block():
+                deadline = time.process_time() + 0.03
+                while time.process_time() < deadline:
+                    pass
+            return {'sentiment': None}
+
+        scheduler._load_group_data = heavy_load
+        await scheduler._run_bot(bot)
+        assert group.loads == 1 and group.last_load_cpu >= 0.02
+        assert bot.last_cpu < 0.01 and bot.overruns == 0 and not bot.paused
+        await scheduler.stop()
+
+    asyncio.run(main())
+
+
+def test_run_of_a_removed_bot_does_nothing():
+    async def main():
+        _, scheduler, decisions = make_scheduler(FakeSentiment())
+        scheduler.upsert_bot(bot_record('1'))
+        bot = scheduler.bots['1']
+        scheduler.remove_bot('1')
+        await scheduler._run_bot(bot)
+        assert bot.errors == 0 and decisions == []
+        await scheduler.stop()
+
+    asyncio.run(main())
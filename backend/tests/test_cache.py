@@ -0,0 +1,150 @@
+import asyncio
+import time
+import pytest
+from cache import LocalCache, MemorySharedCache, TieredCache, build_cache
+
+
+def test_local_cache_expires_and_evicts():
+    local = LocalCache(max_entries=2)
+    local.set('a', 1, time.time() + 60)
+    local.set('b', 2, time.time() - 1)
+    assert local.get('a') == 1
+    assert local.get('b') is None
+    local.set('c', 3, time.time() + 60)
+    local.set('d', 4, time.time() + 60)
+    assert local.get('a') is None
+    assert len(local) == 2
+
+
+@pytest.mark.parametrize('backend', ['local', 'memory'])
+def test_concurrent_loads_coalesce(backend):
+    async def main():
+        cache = build_cache(backend)
+        calls = []
+
+        async def loader(keys):
+            calls.append(sorted(keys))
+            await asyncio.sleep(0.05)
+            return {key: {'key': key} for key in keys}
+
+        results = await asyncio.gather(
+            cache.get_or_load_many('analysis', ['a', 'b'], loader, 60),
+            cache.get_or_load_many('analysis', ['b', 'c'], loader, 60),
+            cache.get_or_load('analysis', 'a', lambda: loader(['a']), 60),
+        )
+        assert results[0] == {'a': {'key': 'a'}, 'b': {'key': 'b'}}
+        assert results[1] == {'b': {'key': 'b'}, 'c': {'key': 'c'}}
+        assert results[2] == {'key': 'a'}
+        assert calls == [['a', 'b'], ['c']]
+        assert cache.stats()['analysis']['coalesced'] == 2
+
+        assert await cache.get_or_load_many('analysis', ['a', 'c'], loader, 60) == {
+            'a': {'key': 'a'}, 'c': {'key': 'c'}
+        }
+        assert len(calls) == 2
+        await cache.close()
+
+    asyncio.run(main())
+
+
+def test_waiter_loads_when_starter_is_cancelled():
+    async def main():
+        cache = TieredCache()
+        started = asyncio.Event()
+        calls = 0
+
+        async def loader(keys):
+            nonlocal calls
+            calls += 1
+            started.set()
+            await asyncio.sleep(0.05)
+            return {key: 'value' for key in keys}
+
+        starter = asyncio.create_task(cache.get_or_load_many('tickers', ['k'], loader, 60))
+        await started.wait()
+        waiter = asyncio.create_task(cache.get_or_load_many('tickers', ['k'], loader, 60))
+        await asyncio.sleep(0)
+        starter.cancel()
+        assert await waiter == {'k': 'value'}
+        assert starter.cancelled()
+        assert calls == 2
+
+    asyncio.run(main())
+
+
+def test_slow_loader_does_not_release_a_lock_taken_over_by_another():
+    async def main():
+        shared = MemorySharedCache()
+        slow = TieredCache(shared=shared, lock_timeout=0.02, poll_interval=0.005)
+        other = TieredCache(shared=shared, lock_timeout=10.0, poll_interval=0.005)
+        other_started, other_release = asyncio.Event(), asyncio.Event()
+
+        async def slow_loader(keys):
+            await asyncio.sleep(0.05)  # Outlives its lock
+            return {key: 'slow' for key in keys}
+
+        async def other_loader(keys):
+            other_started.set()
+            await other_release.wait()
+            return {key: 'other' for key in keys}
+
+        slow_task = asyncio.create_task(slow.get_or_load_many('tickers', ['k'], slow_loader, 60))
+        await asyncio.sleep(0.03)  # The slow loader's lock has expired
+        other_task = asyncio.create_task(other.get_or_load_many('tickers', ['k'], other_loader, 60))
+        await other_started.wait()
+        assert await slow_task == {'k': 'slow'}
+        # The slow loader's release left the current owner's lock in place
+        assert [key for key in shared._entries if key.endswith(':lock')]
+        other_release.set()
+        assert await other_task == {'k': 'other'}
+        assert not [key for key in shared._entries if key.endswith(':lock')]
+
+    asyncio.run(main())
+
+
+def test_loader_error_reaches_waiters_and_is_not_cached():
+    async def main():
+        cache = TieredCache()
+
+        async def failing(keys):
+            await asyncio.sleep(0.01)
+            raise RuntimeError('upstream down')
+
+        results = await asyncio.gather(
+            cache.get_or_load_many('candles', ['k'], failing, 60),
+            cache.get_or_load_many('candles', ['k'], failing, 60),
+            return_exceptions=True,
+        )
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+        async def loader(keys):
+            return {key: [1, 2] for key in keys}
+
+        assert await cache.get_or_load_many('candles', ['k'], loader, 60) == {'k': [1, 2]}
+
+    asyncio.run(main())
+
+
+def test_error_results_are_returned_but_not_cached():
+    async def main():
+        cache = TieredCache()
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            return {'error': 'rate limited'}
+
+        assert await cache.get_or_load('tickers', 'k', loader, 60) == {'error': 'rate limited'}
+        await cache.get_or_load('tickers', 'k', loader, 60)
+        assert calls == 2
+
+    asyncio.run(main())
+
+
+def test_unknown_namespace_is_rejected():
+    async def main():
+        with pytest.raises(KeyError):
+            await TieredCache().get_or_load_many('other', ['k'], None, 60)
+
+    asyncio.run(main())
@@ -0,0 +1,88 @@
+import asyncio
+import pytest
+from capture import CaptureWriter, RecordedError, Replay, ReplayExchange, ReplayMiss, read_capture
+
+
+def write_capture(path):
+    writer = CaptureWriter(str(path / 'capture-1-1.hbc'), block_size=2)
+    writer.record('binance', 'fetch_ticker', [['BTC/USDT'], {}], {'symbol': 'BTC/USDT', 'last': 100.0}, timestamp=1000.0)
+    writer.record('binance', 'fetch_ticker', [['BTC/USDT'], {}], {'symbol': 'BTC/USDT', 'last': 101.0}, timestamp=1010.0)
+    writer.record('binance', 'fetch_ticker', [['ETH/USDT'], {}], error='rate limited', timestamp=1005.0)
+    writer.record('binance', 'create_limit_order', [['ETH/USDT', 'buy', 2.0, 10.0], {}],
+                  {'id': '9', 'symbol': 'ETH/USDT', 'amount': 2.0, 'filled': 1.0, 'status': 'open', 'price': 10.0},
+                  timestamp=1020.0)
+    writer.record('binance', 'fetch_order', [['9', 'ETH/USDT'], {}],
+                  {'id': '9', 'symbol': 'ETH/USDT', 'amount': 2.0, 'filled': 2.0, 'status': 'closed'}, timestamp=1030.0)
+    writer.close()
+    return writer
+
+
+def test_records_round_trip(tmp_path):
+    writer = write_capture(tmp_path)
+    records = list(read_capture(str(tmp_path)))
+    assert writer.records == len(records) == 5
+    assert [r[0] for r in read_capture(str(tmp_path), start=1005.0, end=1020.0)] == [1010.0, 1005.0]
+
+
+def test_unpaced_replay_serves_responses_in_order(tmp_path):
+    write_capture(tmp_path)
+
+    async def main():
+        replay = Replay(str(tmp_path), speed=None)
+        exchange = ReplayExchange(replay, 'binance')
+        assert replay.sources() == {'binance'}
+        assert (await exchange.fetch_ticker('BTC/USDT'))['last'] == 100.0
+        assert (await exchange.fetch_ticker('BTC/USDT'))['last'] == 101.0
+        assert (await exchange.fetch_ticker('BTC/USDT'))['last'] == 101.0
+        with pytest.raises(RecordedError):
+            await exchange.fetch_ticker('ETH/USDT')
+        with pytest.raises(ReplayMiss):
+            await exchange.fetch_ticker('SOL/USDT')
+        assert replay.misses == {'binance.fetch_ticker': 1}
+
+    asyncio.run(main())
+
+
+def test_order_acks_follow_the_requested_order(tmp_path):
+    write_capture(tmp_path)
+
+    async def main():
+        replay = Replay(str(tmp_path), speed=None)
+        exchange = ReplayExchange(replay, 'binance')
+        ack = await exchange.create_limit_order('ETH/USDT', 'sell', 4.0, 12.0)
+        assert ack['id'].startswith('replay-')
+        assert (ack['side'], ack['amount'], ack['price']) == ('sell', 4.0, 12.0)
+        assert ack['filled'] == 2.0  # The recorded fill ratio, for the requested amount
+
+        update = await exchange.fetch_order(ack['id'], 'ETH/USDT')
+        assert update['id'] == ack['id']
+        assert (update['status'], update['side'], update['amount']) == ('closed', 'sell', 4.0)
+
+        other = await exchange.create_limit_order('BTC/USDT', 'buy', 1.0, 100.0)
+        assert 'average' not in other and other['price'] == 100.0
+        assert (await exchange.cancel_order(other['id'], 'BTC/USDT'))['status'] == 'canceled'
+        with pytest.raises(ReplayMiss):
+            await exchange.fetch_order('unknown', 'BTC/USDT')
+
+    asyncio.run(main())
+
+
+def test_paced_replay_waits_for_capture_time(tmp_path):
+    write_capture(tmp_path)
+
+    async def main():
+        replay = Replay(str(tmp_path), speed=1000.0, simulate_latency=False)
+        replay.clock.begin()
+        assert (await replay.fetch('binance', 'fetch_ticker', [['BTC/USDT'], {}]))['last'] == 100.0
+        await replay.clock.sleep_until(1010.0)
+        assert (await replay.fetch('binance', 'fetch_ticker', [['BTC/USDT'], {}]))['last'] == 101.0
+        assert not replay.finished
+        await replay.clock.sleep_until(1030.0)
+        assert replay.finished
+
+    asyncio.run(main())
+
+
+def test_empty_capture_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        Replay(str(tmp_path))
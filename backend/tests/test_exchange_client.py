@@ -0,0 +1,108 @@
+import asyncio
+import pytest
+from benchmarks.fake_exchange import FakeExchange
+from config import Config
+from exchange_client import ExchangeClient, filled_amount
+
+
+class ThinBook(FakeExchange):
+    """Fixed two-level book; a resting limit order fills at most one unit"""
+
+    async def fetch_order_book(self, symbol, limit=None, params=None):
+        await self._request('fetch_order_book')
+        return {'bids': [[99.0, 1.0], [98.0, 1.0]], 'asks': [[100.0, 1.0], [101.0, 1.0], [150.0, 100.0]]}
+
+    async def fetch_order(self, order_id, symbol=None, params=None):
+        await self._request('fetch_order')
+        order = self._orders[order_id]
+        if order['status'] == 'open':
+            order['filled'] = min(order['amount'], 1.0)
+            if order['filled'] >= order['amount']:
+                order['status'] = 'closed'
+        return dict(order)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(Config, 'ORDER_SLICE_INTERVAL', 0.02)
+    monkeypatch.setattr(Config, 'ORDER_POLL_INTERVAL', 0.005)
+    monkeypatch.setattr(Config, 'ORDER_MAX_SLICES', 10)
+    return ExchangeClient('fake', Config, exchange=ThinBook(['BTC/USDT']))
+
+
+def test_filled_amount():
+    assert filled_amount({'status': 'closed'}, 2.0) == 2.0
+    assert filled_amount({'status': 'open'}, 2.0) == 0.0
+    assert filled_amount({'status': 'canceled', 'filled': 0.5}, 2.0) == 0.5
+
+
+def test_absorbable_order_goes_out_at_market(client):
+    async def main():
+        result = await client.place_depth_aware_order('BTC/USDT', 'buy', 0.5, max_slippage=0.02, fill_timeout=1.0)
+        assert len(result['orders']) == 1
+        assert result['orders'][0]['type'] == 'market'
+        assert result['filled'] == 0.5
+        assert result['expected_vwap'] == 100.0
+
+    asyncio.run(main())
+
+
+def test_thin_book_is_sliced_until_filled(client):
+    async def main():
+        result = await client.place_depth_aware_order('BTC/USDT', 'buy', 3.0, max_slippage=0.02)
+        orders = result['orders']
+        assert [(o['amount'], o['price'], o['filled']) for o in orders] == [(2.0, 101.0, 1.0), (2.0, 101.0, 1.0),
+                                                                           (1.0, 100.0, 1.0)]
+        assert [o['status'] for o in orders] == ['canceled', 'canceled', 'closed']
+        assert result['placed'] == 5.0
+        assert result['filled'] == 3.0
+        assert result['average'] == pytest.approx((101.0 + 101.0 + 100.0) / 3)
+        assert client.exchange.calls['cancel_order'] == 2
+
+    asyncio.run(main())
+
+
+def test_no_depth_within_slippage_without_split(client):
+    async def main():
+        result = await client.place_depth_aware_order('BTC/USDT', 'sell', 5.0, max_slippage=0.005, split=False)
+        # Capped to the 99 level plus the part of the 98 level that keeps the VWAP at 98.505
+        assert result['filled'] == pytest.approx(1.0 + (99.0 - 98.505) / (98.505 - 98.0))
+        result = await client.place_depth_aware_order('BTC/USDT', 'buy', 5.0, max_slippage=-0.5, split=False)
+        assert 'error' in result and result['filled'] == 0.0
+
+    asyncio.run(main())
+
+
+def test_unfilled_order_is_cancelled_after_timeout(monkeypatch):
+    async def main():
+        client = ExchangeClient('fake', Config, exchange=FakeExchange(['BTC/USDT']))
+        mark = (await client.exchange.fetch_ticker('BTC/USDT'))['last']
+        order = await client.place_limit_order('BTC/USDT', 'buy', 1.0, mark / 2)
+        final = await client.follow_order(order, 'BTC/USDT', timeout=0.03, poll_interval=0.01)
+        assert final['status'] == 'canceled'
+        assert filled_amount(final, 1.0) == 0.0
+
+    asyncio.run(main())
+
+
+class StuckCancel(ThinBook):
+    """Cancels are acknowledged but never land"""
+
+    async def cancel_order(self, order_id, symbol=None, params=None):
+        await self._request('cancel_order')
+        return dict(self._orders[order_id])
+
+
+def test_unconfirmed_cancel_leaves_the_order_working(monkeypatch):
+    monkeypatch.setattr(Config, 'ORDER_SLICE_INTERVAL', 0.02)
+    monkeypatch.setattr(Config, 'ORDER_POLL_INTERVAL', 0.005)
+
+    async def main():
+        client = ExchangeClient('fake', Config, exchange=StuckCancel(['BTC/USDT']))
+        result = await client.place_depth_aware_order('BTC/USDT', 'buy', 3.0, max_slippage=0.02)
+        [order] = result['orders']  # No further slices while the first may still fill
+        assert order['status'] == 'open'
+        assert 'not confirmed' in result['error']
+        assert result['filled'] == 1.0
+
+    asyncio.run(main())
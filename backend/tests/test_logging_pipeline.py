@@ -0,0 +1,79 @@
+import logging
+import queue
+import sys
+import time
+from logging_pipeline import FilteringQueueListener, JsonFormatter, NonBlockingQueueHandler, RepeatFilter
+
+
+def record(message, level=logging.WARNING, name='bot', args=None, exc_info=None):
+    return logging.LogRecord(name, level, __file__, 1, message, args, exc_info)
+
+
+def passed(record_filter, records):
+    return [r.getMessage() for r in records if record_filter.filter(r)]
+
+
+def test_repeat_filter_allows_a_burst_per_window():
+    record_filter = RepeatFilter(window=0.05, burst=2)
+    assert passed(record_filter, [record('down') for _ in range(5)]) == ['down', 'down']
+    # Other loggers, levels and messages are counted separately
+    assert passed(record_filter, [record('down', name='api'), record('down', level=logging.ERROR),
+                                  record('up')]) == ['down', 'down', 'up']
+
+    time.sleep(0.06)
+    first = record('down')
+    assert record_filter.filter(first)
+    assert first.getMessage() == 'down (suppressed 3 identical messages)'
+    assert first.suppressed == 3
+    assert passed(record_filter, [record('down')]) == ['down']
+
+
+def test_repeat_filter_ignores_records_below_min_level():
+    record_filter = RepeatFilter(window=60, burst=1)
+    assert len(passed(record_filter, [record('tick', level=logging.INFO) for _ in range(3)])) == 3
+    assert len(passed(RepeatFilter(burst=0), [record('down') for _ in range(3)])) == 3
+
+
+def test_repeat_filter_bounds_its_keys():
+    record_filter = RepeatFilter(window=60, burst=1, max_keys=2)
+    passed(record_filter, [record(f"error {i}") for i in range(3)])
+    assert len(record_filter._seen) == 1  # Cleared when full, then the new key added
+
+
+def test_queue_handler_resolves_the_message_on_the_calling_thread():
+    log_queue = queue.SimpleQueue()
+    handler = NonBlockingQueueHandler(log_queue)
+    state = {'price': 100}
+    try:
+        raise RuntimeError('boom')
+    except RuntimeError:
+        handler.handle(record('price %s', args=(state,), exc_info=sys.exc_info()))
+    state['price'] = 200  # Mutated after logging: the queued message is unaffected
+    queued = log_queue.get_nowait()
+    assert (queued.msg, queued.args) == ("price {'price': 100}", None)
+    assert queued.exc_info[0] is RuntimeError  # The traceback is formatted by the listener
+
+
+def test_listener_filters_then_formats_off_thread():
+    log_queue = queue.SimpleQueue()
+    lines = []
+
+    class Collect(logging.Handler):
+        def emit(self, record):
+            lines.append(self.format(record))
+
+    collect = Collect()
+    collect.setFormatter(JsonFormatter())
+    listener = FilteringQueueListener(log_queue, collect, record_filter=RepeatFilter(window=60, burst=1))
+    listener.start()
+    handler = NonBlockingQueueHandler(log_queue)
+    for _ in range(3):
+        handler.handle(record('exchange unavailable'))
+    extra = record('order placed', level=logging.INFO)
+    extra.order_id = '42'
+    handler.handle(extra)
+    listener.stop()
+
+    assert len(lines) == 2
+    assert '"message":"exchange unavailable"' in lines[0]
+    assert '"order_id":"42"' in lines[1] and '"level":"INFO"' in lines[1]
@@ -0,0 +1,88 @@
+import pytest
+from metrics import MetricsRegistry
+
+
+def test_counter_and_gauge_render_with_labels():
+    registry = MetricsRegistry()
+    requests = registry.counter('app_requests_total', 'Requests', ('route', 'status'))
+    requests.labels('/bots', 200).inc()
+    requests.labels('/bots', '200').inc(2)  # Raw and string label values share one child
+    depth = registry.gauge('app_queue_depth', 'Queued items')
+    depth.set(3)
+    depth.labels().dec()
+
+    lines = registry.render().splitlines()
+    assert lines[:3] == ['# HELP app_requests_total Requests', '# TYPE app_requests_total counter',
+                         'app_requests_total{route="/bots",status="200"} 3.0']
+    assert 'app_queue_depth 2.0' in lines
+
+
+def test_label_values_are_escaped_and_checked():
+    registry = MetricsRegistry()
+    errors = registry.counter('app_errors_total', 'Errors', ('reason',))
+    errors.labels('bad "quote"\nnewline\\').inc()
+    assert 'app_errors_total{reason="bad \\"quote\\"\\nnewline\\\\"} 1.0' in registry.render()
+    with pytest.raises(ValueError):
+        errors.labels('a', 'b')
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    latency = registry.histogram('app_latency_seconds', 'Latency', ('endpoint',), buckets=(0.5, 0.1))
+    for value in (0.05, 0.1, 0.3, 2.0):
+        latency.labels('ticker').observe(value)
+
+    lines = registry.render().splitlines()
+    assert lines[2:] == [
+        'app_latency_seconds_bucket{endpoint="ticker",le="0.1"} 2',
+        'app_latency_seconds_bucket{endpoint="ticker",le="0.5"} 3',
+        'app_latency_seconds_bucket{endpoint="ticker",le="+Inf"} 4',
+        'app_latency_seconds_sum{endpoint="ticker"} 2.45',
+        'app_latency_seconds_count{endpoint="ticker"} 4',
+    ]
+
+
+def test_timer_counts_errors_with_the_same_labels():
+    registry = MetricsRegistry()
+    latency = registry.histogram('app_call_seconds', 'Call latency', ('endpoint',))
+    errors = registry.counter('app_call_errors_total', 'Call errors', ('endpoint',))
+    with latency.time('ticker', errors=errors):
+        pass
+    with pytest.raises(RuntimeError):
+        with latency.time('ticker', errors=errors):
+            raise RuntimeError('upstream down')
+    assert latency.labels('ticker').count == 2
+    assert errors.labels('ticker').value == 1.0
+
+
+def test_reregistering_returns_the_existing_metric():
+    registry = MetricsRegistry()
+    counter = registry.counter('app_total', 'Total', ('kind',))
+    assert registry.counter('app_total', 'Total', ('kind',)) is counter
+    with pytest.raises(ValueError):
+        registry.gauge('app_total', 'Total', ('kind',))
+    with pytest.raises(ValueError):
+        registry.counter('app_total', 'Total', ('other',))
+
+
+def test_collectors_run_before_each_render():
+    registry = MetricsRegistry()
+    pending = registry.gauge('app_pending', 'Pending')
+    backlog = [5]
+
+    def collect():
+        pending.set(backlog[0])
+
+    def broken():
+        raise RuntimeError('collector failed')
+
+    registry.add_collector(collect)
+    registry.add_collector(collect)
+    registry.add_collector(broken)  # Logged; the scrape still succeeds
+    assert 'app_pending 5' in registry.render()
+    backlog[0] = 7
+    assert 'app_pending 7' in registry.render()
+
+    registry.remove_collector(collect)
+    backlog[0] = 9
+    assert 'app_pending 7' in registry.render()
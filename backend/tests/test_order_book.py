@@ -0,0 +1,70 @@
+import pytest
+from order_book import OrderBook
+
+
+def make_book():
+    book = OrderBook('BTC/USDT')
+    book.apply_snapshot({
+        'bids': [[99.0, 1.0], [98.0, 2.0], [97.0, 3.0]],
+        'asks': [[101.0, 1.0], [102.0, 2.0], [103.0, 3.0]],
+    })
+    return book
+
+
+def test_best_mid_and_spread():
+    book = make_book()
+    assert book.bids.best() == 99.0
+    assert book.asks.best() == 101.0
+    assert book.mid == 100.0
+    assert book.spread == 2.0
+
+
+def test_vwap_for_size_walks_levels():
+    book = make_book()
+    assert book.vwap_for_size('buy', 1.0) == (101.0, 1.0)
+    vwap, filled = book.vwap_for_size('buy', 2.0)
+    assert filled == 2.0
+    assert vwap == pytest.approx((101.0 + 102.0) / 2)
+    vwap, filled = book.vwap_for_size('sell', 2.5)
+    assert filled == 2.5
+    assert vwap == pytest.approx((99.0 + 98.0 * 1.5) / 2.5)
+
+
+def test_vwap_for_size_beyond_depth_fills_what_is_there():
+    book = make_book()
+    vwap, filled = book.vwap_for_size('buy', 10.0)
+    assert filled == 6.0
+    assert vwap == pytest.approx((101.0 + 102.0 * 2 + 103.0 * 3) / 6)
+    assert book.slippage_for_size('buy', 10.0) is None
+
+
+def test_vwap_for_size_empty_or_zero():
+    book = OrderBook('BTC/USDT')
+    assert book.vwap_for_size('buy', 1.0) == (None, 0.0)
+    assert make_book().vwap_for_size('buy', 0.0) == (None, 0.0)
+
+
+def test_size_for_slippage_inverts_vwap():
+    book = make_book()
+    size = book.size_for_slippage('buy', 0.01)
+    vwap, filled = book.vwap_for_size('buy', size)
+    assert filled == pytest.approx(size)
+    assert vwap == pytest.approx(101.0 * 1.01)
+    assert book.size_for_slippage('buy', 0.0) == 1.0
+
+
+def test_deltas_remove_and_add_levels():
+    book = make_book()
+    book.apply_deltas(asks=[[101.0, 0.0], [100.5, 0.5]])
+    assert book.asks.best() == 100.5
+    assert book.vwap_for_size('buy', 1.5) == (pytest.approx((100.5 * 0.5 + 102.0) / 1.5), 1.5)
+
+
+def test_plan_slice_stays_within_slippage():
+    book = make_book()
+    amount, price = book.plan_slice('buy', 10.0, 0.015)
+    assert amount == 3.0  # The 101 and 102 levels are within 1.5% of 101
+    assert price == 102.0
+    amount, price = book.plan_slice('sell', 0.5, 0.05)
+    assert (amount, price) == (0.5, 99.0)
+    assert OrderBook('ETH/USDT').plan_slice('buy', 1.0, 0.01) == (0.0, None)
@@ -0,0 +1,94 @@
+import pytest
+from pnl_engine import PnlEngine, Position
+
+
+def test_position_average_cost_on_adds():
+    position = Position()
+    assert position.fill('buy', 1.0, 100.0) == (0.0, 100.0)
+    position.fill('buy', 3.0, 200.0)
+    assert position.amount == 4.0
+    assert position.avg_price == pytest.approx(175.0)
+
+
+def test_position_partial_close_keeps_average():
+    position = Position(2.0, 100.0)
+    realized, opened = position.fill('sell', 0.5, 120.0)
+    assert realized == pytest.approx(10.0)
+    assert opened == 0.0
+    assert position.amount == 1.5
+    assert position.avg_price == 100.0
+
+
+def test_position_flip_long_to_short_and_back():
+    position = Position(1.0, 100.0)
+    realized, opened = position.fill('sell', 3.0, 110.0)
+    assert realized == pytest.approx(10.0)
+    assert opened == pytest.approx(220.0)
+    assert position.amount == -2.0
+    assert position.avg_price == 110.0
+
+    realized, _ = position.fill('buy', 3.0, 100.0)
+    assert realized == pytest.approx(20.0)  # Short of 2 covered 10 lower
+    assert position.amount == 1.0
+    assert position.avg_price == 100.0
+
+
+def test_position_close_clears_average():
+    position = Position(-1.0, 50.0)
+    position.fill('buy', 1.0, 40.0)
+    assert position.amount == 0.0
+    assert position.avg_price is None
+
+
+def test_engine_bot_stats_and_fees():
+    engine = PnlEngine()
+    engine.set_portfolio(10000.0, {})
+    engine.update_price('BTC/USDT', 100.0)
+    engine.apply_fill('1', 'BTC/USDT', 'buy', 2.0, 100.0)
+    engine.update_price('BTC/USDT', 110.0)
+    assert engine.bot_stats('1')['pnl'] == pytest.approx(20.0)
+
+    realized = engine.apply_fill('1', 'BTC/USDT', 'sell', 2.0, 110.0, fee={'cost': 1.0})
+    assert realized == pytest.approx(19.0)
+    stats = engine.bot_stats('1')
+    assert stats['trades'] == 2
+    assert stats['winRate'] == 100.0
+    assert stats['pnl'] == pytest.approx(19.0)
+    assert engine.bot_position('1', 'BTC/USDT') is None
+
+
+def test_engine_totals_follow_marks():
+    engine = PnlEngine()
+    engine.set_portfolio(1000.0, {})
+    engine.apply_fill(None, 'ETH/USDT', 'buy', 2.0, 100.0)
+    engine.update_price('ETH/USDT', 150.0)
+    totals = engine.totals()
+    assert totals['totalValue'] == pytest.approx(800.0 + 300.0)
+    assert totals['totalPnl'] == pytest.approx(100.0)
+    assert engine.asset('ETH/USDT') == {'symbol': 'ETH', 'amount': 2.0, 'value': 300.0, 'change24h': 0.0}
+
+
+def test_engine_prefers_usdt_marks():
+    engine = PnlEngine()
+    assert engine.update_price('BTC/USDT', 100.0)
+    assert not engine.update_price('BTC/USDC', 200.0)
+    assert engine.mark_price('BTC/USD') == 100.0
+
+
+def test_bots_holding_tracks_open_positions():
+    engine = PnlEngine()
+    engine.apply_fill('1', 'BTC/USDT', 'buy', 1.0, 100.0)
+    engine.apply_fill('2', 'BTC/USDT', 'sell', 1.0, 100.0)
+    engine.apply_fill('3', 'ETH/USDT', 'buy', 1.0, 10.0)
+    assert sorted(engine.bots_holding('BTC/USDT')) == ['1', '2']
+    engine.apply_fill('1', 'BTC/USDT', 'sell', 1.0, 100.0)
+    assert engine.bots_holding('BTC/USDT') == ['2']
+    engine.apply_fill('2', 'BTC/USDT', 'buy', 1.0, 100.0)
+    assert engine.bots_holding('BTC/USDT') == []
+
+
+def test_invalid_fill_is_ignored():
+    engine = PnlEngine()
+    assert engine.apply_fill('1', 'BTC/USDT', 'hold', 1.0, 100.0) == 0.0
+    assert engine.apply_fill('1', 'BTC/USDT', 'buy', 0.0, 100.0) == 0.0
+    assert not engine.has_bot('1')
@@ -0,0 +1,55 @@
+import math
+import pytest
+from price_board import PriceBoard, board_price_record
+
+
+@pytest.fixture
+def board():
+    board = PriceBoard.create(['BTCUSDT', 'ETHUSDT'])
+    yield board
+    board.close()
+
+
+def test_publish_and_read(board):
+    assert board.publish_price({'symbol': 'BTCUSDT', 'price': 100.0, 'bid': 99.5, 'ask': 100.5, 'change': 2.0})
+    seq, values = board.read_slot('BTCUSDT')
+    assert seq == 2
+    assert values['price'] == 100.0
+    assert values['change24h'] == 2.0
+    assert math.isnan(values['rsi'])
+    assert board_price_record('BTCUSDT', values)['bid'] == 99.5
+
+
+def test_sequence_moves_by_two_per_write(board):
+    assert board.sequence('ETHUSDT') == 0
+    board.publish_price({'symbol': 'ETHUSDT', 'price': 10.0})
+    board.publish_price({'symbol': 'ETHUSDT', 'price': 11.0})
+    assert board.sequence('ETHUSDT') == 4
+    assert board.sequence('BTCUSDT') == 0
+
+
+def test_unknown_symbol(board):
+    assert not board.publish_price({'symbol': 'XRPUSDT', 'price': 1.0})
+    assert board.read_slot('XRPUSDT') is None
+    assert board.sequence('XRPUSDT') == 0
+
+
+def test_reader_retries_while_write_in_progress(board):
+    board.publish_price({'symbol': 'BTCUSDT', 'price': 100.0})
+    offset = board._offset('BTCUSDT')
+    board._buf[offset] = 3  # Odd counter: a writer is mid-update
+    assert board.read_slot('BTCUSDT', max_retries=5) is None
+    board.publish_price({'symbol': 'BTCUSDT', 'price': 101.0})  # A crashed writer's odd counter is recovered
+    seq, values = board.read_slot('BTCUSDT')
+    assert seq % 2 == 0
+    assert values['price'] == 101.0
+
+
+def test_attached_reader_sees_writes(board):
+    reader = PriceBoard.attach(board.name)
+    try:
+        board.publish_price({'symbol': 'ETHUSDT', 'price': 12.5})
+        assert reader.read_slot('ETHUSDT')[1]['price'] == 12.5
+    finally:
+        reader.close()
+    assert board_price_record('BTCUSDT', board.read_slot('BTCUSDT')[1]) is None
@@ -0,0 +1,47 @@
+import threading
+import time
+from profiler import SamplingProfiler
+
+
+def spin(stop):
+    while not stop.is_set():
+        sum(range(100))
+
+
+def test_samples_other_threads_in_collapsed_format():
+    profiler = SamplingProfiler()
+    stop = threading.Event()
+    worker = threading.Thread(target=spin, args=(stop,), name='spinner')
+    worker.start()
+    try:
+        assert profiler.start(interval=0.001)
+        assert not profiler.start(interval=0.001)  # One session at a time
+        time.sleep(0.1)
+        report = profiler.stop()
+    finally:
+        stop.set()
+        worker.join()
+
+    assert not report['running']
+    assert report['samples'] > 0
+    lines = report['collapsed'].splitlines()
+    spinner = [line for line in lines if line.startswith('spinner;')]
+    assert spinner and all('spin (test_profiler.py:' in line for line in spinner)
+    assert not any('sampling-profiler' in line for line in lines)
+    stack, count = lines[0].rsplit(' ', 1)
+    assert int(count) >= 1
+
+
+def test_session_ends_after_max_duration():
+    profiler = SamplingProfiler()
+    assert profiler.start(interval=0.001, max_duration=0.05)
+    deadline = time.monotonic() + 2
+    while profiler.running and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not profiler.running
+    report = profiler.stop()
+    assert report['stopped_at'] is not None
+    assert profiler.start(interval=0.001)  # A finished session can be restarted
+    assert profiler.running
+    profiler.stop()
+    assert not profiler.running
@@ -0,0 +1,187 @@
+import asyncio
+import pytest
+from market_state import MarketState
+from risk_engine import RiskEngine
+
+
+class FakeClient:
+    """Fills depth-aware orders at the order's mark unless told not to"""
+
+    def __init__(self, state):
+        self.state = state
+        self.fill = True
+        self.stuck = False
+        self.orders = []
+
+    async def place_depth_aware_order(self, symbol, side, amount, fill_timeout=None):
+        self.orders.append((symbol, side, amount))
+        price = self.state.pnl.mark_price(symbol)
+        if self.stuck:
+            return {'id': str(len(self.orders)), 'status': 'open', 'filled': 0.0, 'error': 'Cancel not confirmed'}
+        if not self.fill:
+            return {'id': str(len(self.orders)), 'status': 'canceled', 'filled': 0.0}
+        return {'id': str(len(self.orders)), 'status': 'closed', 'filled': amount, 'average': price}
+
+    async def close(self):
+        pass
+
+
+def make_engine(live_trading=True, **kwargs):
+    state = MarketState()
+    state.pnl.set_portfolio(10000.0, {})
+    state.update_price({'symbol': 'BTCUSDT', 'price': 100.0})
+    client = FakeClient(state)
+    engine = RiskEngine(state, stop_loss=0.05, take_profit=0.10, max_position_size=0.1, order_size=0.05,
+                        retry_delay=0.01, live_trading=live_trading, client_for=lambda exchange_id: client, **kwargs)
+    return state, client, engine
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0.02)
+
+
+def test_fill_arms_stop_and_target():
+    async def main():
+        state, _, engine = make_engine()
+        engine.start()
+        state.add_trade({'botId': '1', 'symbol': 'BTC/USDT', 'side': 'buy', 'amount': 1.0, 'price': 100.0})
+        [position] = engine.open_positions()
+        assert position['stopLoss'] == pytest.approx(95.0)
+        assert position['takeProfit'] == pytest.approx(110.0)
+        await engine.stop()
+
+    asyncio.run(main())
+
+
+@pytest.mark.parametrize('price, kind', [(94.0, 'stop'), (111.0, 'target')])
+def test_crossing_closes_long(price, kind):
+    async def main():
+        state, client, engine = make_engine()
+        engine.start()
+        state.add_trade({'botId': '1', 'symbol': 'BTC/USDT', 'side': 'buy', 'amount': 1.0, 'price': 100.0})
+        state.update_price({'symbol': 'BTCUSDT', 'price': 99.0})  # Between the levels
+        await settle()
+        assert client.orders == []
+
+        state.update_price({'symbol': 'BTCUSDT', 'price': price})
+        await settle()
+        assert client.orders == [('BTC/USDT', 'sell', 1.0)]
+        assert engine.open_positions() == []
+        assert state.pnl.bot_position('1', 'BTC/USDT') is None
+        await engine.stop()
+
+    asyncio.run(main())
+
+
+def test_short_stop_fires_on_rising_price():
+    async def main():
+        state, client, engine = make_engine()
+        engine.start()
+        state.add_trade({'botId': '1', 'symbol': 'BTC/USDT', 'side': 'sell', 'amount': 1.0, 'price': 100.0})
+        state.update_price({'symbol': 'BTCUSDT', 'price': 106.0})
+        await settle()
+        assert client.orders == [('BTC/USDT', 'buy', 1.0)]
+        await engine.stop()
+
+    asyncio.run(main())
+
+
+def test_unfilled_exit_is_rearmed():
+    async def main():
+        state, client, engine = make_engine()
+        engine.start()
+        state.add_trade({'botId': '1', 'symbol': 'BTC/USDT', 'side': 'buy', 'amount': 1.0, 'price': 100.0})
+        client.fill = False
+        state.update_price({'symbol': 'BTCUSDT', 'price': 94.0})
+        await settle()
+        assert len(client.orders) == 1
+        assert state.snapshot('trades')[0]['status'] == 'cancelled'
+        assert len(engine.open_positions()) == 1
+
+        client.fill = True
+        state.update_price({'symbol': 'BTCUSDT', 'price': 93.0})
+        await settle()
+        assert len(client.orders) == 2
+        assert engine.open_positions() == []
+        await engine.stop()
+
+    asyncio.run(main())
+
+
+def test_order_with_unconfirmed_cancel_stays_pending():
+    async def main():
+        state, client, engine = make_engine()
+        client.stuck = True
+        order = await engine.place_order('1', 'BTC/USDT', 'buy', 1.0)
+        assert order['filled'] == 0.0 and 'error' in order
+        assert [t['status'] for t in state.snapshot('trades')] == ['pending']
+
+    asyncio.run(main())
+
+
+def test_check_order_enforces_max_position_size():
+    state, _, engine = make_engine()
+    assert engine.check_order('1', 'BTC/USDT', 'buy', 10.0) is None  # 1000 of 10000
+    reason = engine.check_order('1', 'BTC/USDT', 'buy', 10.1)
+    assert 'MAX_POSITION_SIZE' in reason
+    assert engine.check_order('1', 'BTC/USDT', 'buy', 0.0) == 'invalid order'
+    assert engine.check_order('1', 'ETH/USDT', 'buy', 1.0) == 'no price available to size the position'
+
+    state.add_trade({'botId': '1', 'symbol': 'BTC/USDT', 'side': 'buy', 'amount': 50.0, 'price': 100.0})
+    assert engine.check_order('1', 'BTC/USDT', 'sell', 10.0) is None  # Reducing is always allowed
+
+
+def test_decisions_open_and_close_positions():
+    async def main():
+        state, client, engine = make_engine()
+        engine.start()
+        order = await engine.execute_decision('1', 'BTC/USDT', {'action': 'buy'})
+        assert order['filled'] == pytest.approx(5.0)  # 5% of 10000 at 100
+        assert await engine.execute_decision('1', 'BTC/USDT', {'action': 'buy'}) is None
+        assert await engine.execute_decision('1', 'BTC/USDT', {'action': 'neutral'}) is None
+
+        await engine.execute_decision('1', 'BTC/USDT', {'action': 'sell'})
+        assert client.orders[-1] == ('BTC/USDT', 'sell', pytest.approx(5.0))
+        assert state.pnl.bot_position('1', 'BTC/USDT') is None
+        assert [t['status'] for t in state.snapshot('trades')] == ['filled', 'filled']
+        await engine.stop()
+
+    asyncio.run(main())
+
+
+def test_decisions_leave_pre_start_positions_alone():
+    async def main():
+        state, client, engine = make_engine()
+        state.add_trade({'botId': '2', 'symbol': 'BTC/USDT', 'side': 'sell', 'amount': 1.0, 'price': 100.0})
+        state.add_trade({'botId': '3', 'symbol': 'BTC/USDT', 'side': 'buy', 'amount': 1.0, 'price': 100.0})
+        engine.start()
+        assert await engine.execute_decision('2', 'BTC/USDT', {'action': 'buy'}) is None
+        assert await engine.execute_decision('3', 'BTC/USDT', {'action': 'sell'}) is None
+        assert client.orders == []
+        assert state.pnl.bot_position('2', 'BTC/USDT').amount == -1.0
+        await engine.stop()
+
+    asyncio.run(main())
+
+
+def test_dry_run_sends_nothing():
+    async def main():
+        state, client, engine = make_engine(live_trading=False)
+        order = await engine.execute_decision('1', 'BTC/USDT', {'action': 'buy'})
+        assert 'BOT_LIVE_TRADING' in order['error']
+        assert client.orders == []
+        assert state.snapshot('trades') == []
+
+    asyncio.run(main())
+
+
+def test_rejected_order_records_nothing():
+    async def main():
+        state, client, engine = make_engine()
+        order = await engine.place_order('1', 'BTC/USDT', 'buy', 100.0)
+        assert 'error' in order
+        assert client.orders == []
+        assert state.snapshot('trades') == []
+
+    asyncio.run(main())
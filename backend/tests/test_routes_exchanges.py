@@ -0,0 +1,86 @@
+import pytest
+
+pytest.importorskip('fastapi')
+pytest.importorskip('httpx')
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from config import Config
+from market_state import MarketState
+from routes import exchanges
+
+
+@pytest.fixture
+def state(monkeypatch):
+    state = MarketState()
+    state.update_price({'symbol': 'BTCUSDT', 'price': 100.0})
+    monkeypatch.setattr(exchanges, 'market_state', state)
+    monkeypatch.setattr(exchanges, '_response_cache', {})
+    monkeypatch.setattr(Config, 'API_CACHE_TTL', 60.0)
+    return state
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(exchanges.router)
+    return TestClient(app)  # Not entered, so the startup hooks do not run
+
+
+def test_unchanged_dataset_revalidates_with_304(state, client):
+    response = client.get('/prices')
+    assert response.status_code == 200
+    assert response.json()[0]['price'] == 100.0
+    etag = response.headers['etag']
+    assert response.headers['cache-control'] == 'no-cache'
+
+    for header in (etag, f"W/{etag}", f'"other", {etag}', '*'):
+        revalidated = client.get('/prices', headers={'If-None-Match': header})
+        assert revalidated.status_code == 304
+        assert revalidated.content == b''
+        assert revalidated.headers['etag'] == etag
+    assert client.get('/prices', headers={'If-None-Match': '"other"'}).status_code == 200
+
+
+def test_changed_dataset_is_served_once_the_ttl_passes(state, client, monkeypatch):
+    first = client.get('/prices')
+    state.update_price({'symbol': 'BTCUSDT', 'price': 101.0})
+
+    # Within API_CACHE_TTL the serialized body is reused while the data keeps changing
+    cached = client.get('/prices', headers={'If-None-Match': first.headers['etag']})
+    assert cached.status_code == 304
+
+    monkeypatch.setattr(Config, 'API_CACHE_TTL', 0.0)
+    fresh = client.get('/prices', headers={'If-None-Match': first.headers['etag']})
+    assert fresh.status_code == 200
+    assert fresh.json()[0]['price'] == 101.0
+    assert fresh.headers['etag'] != first.headers['etag']
+
+
+def test_unchanged_dataset_is_not_reserialized(state, client, monkeypatch):
+    client.get('/prices')
+    monkeypatch.setattr(Config, 'API_CACHE_TTL', 0.0)
+    calls = []
+    monkeypatch.setattr(exchanges, 'dumps', lambda value: calls.append(value) or b'[]')
+    assert client.get('/prices').status_code == 200
+    assert calls == []  # Same dataset version: the cached body is served past its TTL
+
+
+def test_risk_positions_require_the_admin_token(state, client, monkeypatch):
+    monkeypatch.setattr(exchanges.risk_engine, 'open_positions', lambda: [{'botId': '1'}])
+    monkeypatch.setattr(Config, 'ADMIN_TOKEN', '')
+    assert client.get('/risk/positions').status_code == 403
+    monkeypatch.setattr(Config, 'ADMIN_TOKEN', 'secret')
+    assert client.get('/risk/positions').status_code == 401
+    assert client.get('/risk/positions', headers={'X-Admin-Token': 'wrong'}).status_code == 401
+    response = client.get('/risk/positions', headers={'X-Admin-Token': 'secret'})
+    assert response.status_code == 200
+    assert response.json() == [{'botId': '1'}]
+
+
+def test_cache_stats_require_the_admin_token(client, monkeypatch):
+    monkeypatch.setattr(Config, 'ADMIN_TOKEN', 'secret')
+    assert client.get('/cache/stats').status_code == 401
+    response = client.get('/cache/stats', headers={'X-Admin-Token': 'secret'})
+    assert response.status_code == 200
+    assert 'tickers' in response.json()
@@ -0,0 +1,168 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip('aiohttp')
+
+from sentiment_analyzer import SentimentAnalyzer
+
+
+def make_analyzer():
+    analyzer = SentimentAnalyzer()
+    # Positive text mentions the moon; everything else scores negative
+    analyzer._score_text = lambda text: (0.5, 0.5) if 'moon' in text else (-0.5, -0.5)
+    return analyzer
+
+
+def tweet(tweet_id, text):
+    return SimpleNamespace(id=tweet_id, text=text, public_metrics={'like_count': 1}, created_at=None)
+
+
+def post(post_id, title, score=10):
+    return SimpleNamespace(id=post_id, title=title, selftext='', score=score, num_comments=0, created_utc=1000.0)
+
+
+def test_pack_queries_respects_the_length_limit():
+    analyzer = make_analyzer()
+    symbols = [f"SYM{i}" for i in range(40)]
+    queries = analyzer._pack_queries(symbols, lambda s: f"${s} OR #{s}", " lang:en", 120)
+    assert len(queries) > 1
+    assert all(len(query) <= 120 for _, query in queries)
+    assert [s for chunk, _ in queries for s in chunk] == symbols
+    chunk, query = queries[0]
+    assert query == f"({' OR '.join(f'${s} OR #{s}' for s in chunk)}) lang:en"
+
+
+def test_pack_queries_keeps_an_oversized_term_on_its_own():
+    analyzer = make_analyzer()
+    queries = analyzer._pack_queries(['BTC', 'X' * 50, 'ETH'], lambda s: s, '', 20)
+    assert [chunk for chunk, _ in queries] == [['BTC'], ['X' * 50], ['ETH']]
+
+
+def test_mentioned_symbols_match_whole_words_cashtags_and_hashtags():
+    analyzer = make_analyzer()
+    symbols = ['BTC', 'ETH', 'SOL']
+    pattern = analyzer._symbol_pattern(symbols)
+    lookup = {s.upper(): s for s in symbols}
+    assert analyzer._mentioned_symbols('$btc and #ETH to the moon', pattern, lookup) == {'BTC', 'ETH'}
+    assert analyzer._mentioned_symbols('ETHER, BTCUSD and SOLANA', pattern, lookup) == set()
+    assert analyzer._mentioned_symbols(None, pattern, lookup) == set()
+
+
+def test_combined_sentiment_many_shares_upstream_queries():
+    async def main():
+        analyzer = make_analyzer()
+        searches = {'twitter': [], 'reddit': [], 'lunarcrush': []}
+
+        async def search_tweets(query, limit):
+            searches['twitter'].append(query)
+            return [tweet(1, '$BTC to the moon'), tweet(2, '#ETH dumping'), tweet(3, 'nothing relevant')]
+
+        async def search_reddit(subreddit, query, limit):
+            searches['reddit'].append(query)
+            return [post(1, 'BTC moon soon'), post(2, 'ETH and BTC moon')]
+
+        async def request_lunarcrush(symbols):
+            searches['lunarcrush'].append(symbols)
+            return {'BTC': {'sentiment': 2.5, 'reading_time': 1000.0}}
+
+        analyzer._search_tweets = search_tweets
+        analyzer._search_reddit = search_reddit
+        analyzer._request_lunarcrush_assets = request_lunarcrush
+
+        results = await analyzer.get_combined_sentiment_many(['BTC', 'ETH', 'BTC'])
+        assert list(results) == ['BTC', 'ETH']
+        assert [len(calls) for calls in searches.values()] == [1, 1, 1]
+        assert searches['lunarcrush'] == [['BTC', 'ETH']]
+
+        btc, eth = results['BTC'], results['ETH']
+        assert btc['sources']['twitter']['tweet_count'] == 1
+        assert btc['sources']['reddit']['post_count'] == 2
+        assert btc['combined_sentiment_score'] == pytest.approx((0.5 * 0.4 + 0.5 * 0.3 + 0.5 * 0.3) / 1.0)
+        assert eth['sources']['lunarcrush'] == {'error': 'No LunarCrush data found'}
+        assert eth['combined_sentiment_score'] == pytest.approx((-0.5 * 0.4 + 0.5 * 0.3) / 0.7)
+        assert await analyzer.get_combined_sentiment_many([]) == {}
+        await analyzer.close()
+
+    asyncio.run(main())
+
+
+def test_combined_sentiment_many_survives_a_failing_source():
+    async def main():
+        analyzer = make_analyzer()
+
+        async def failing(*args):
+            raise ConnectionError('upstream down')
+
+        async def request_lunarcrush(symbols):
+            return {s: {'sentiment': -2.5} for s in symbols}
+
+        analyzer._search_tweets = failing
+        analyzer._search_reddit = failing
+        analyzer._request_lunarcrush_assets = request_lunarcrush
+
+        results = await analyzer.get_combined_sentiment_many(['BTC'])
+        assert results['BTC']['sources']['twitter'] == {'error': 'upstream down'}
+        assert results['BTC']['combined_sentiment_score'] == pytest.approx(-0.5)
+        assert results['BTC']['sentiment_label'] == 'bearish'
+        await analyzer.close()
+
+    asyncio.run(main())
+
+
+def test_waiters_get_an_error_when_the_shared_lunarcrush_fetch_is_cancelled():
+    async def main():
+        analyzer = make_analyzer()
+        started = asyncio.Event()
+
+        async def request_lunarcrush(symbols):
+            started.set()
+            await asyncio.sleep(10)
+
+        analyzer._request_lunarcrush_assets = request_lunarcrush
+        owner = asyncio.create_task(analyzer.get_lunarcrush_sentiment_many(['BTC']))
+        await started.wait()
+        waiter = asyncio.create_task(analyzer.get_lunarcrush_sentiment_many(['BTC']))
+        await asyncio.sleep(0)
+        owner.cancel()
+        # The waiter's own task is not cancelled; it reports the failed fetch like any other error
+        assert await waiter == {'BTC': {'error': 'LunarCrush fetch was cancelled'}}
+        assert owner.cancelled()
+        await analyzer.close()
+
+    asyncio.run(main())
+
+
+def test_scored_items_are_logged_off_the_event_loop(tmp_path):
+    from sentiment_log import SentimentLog
+
+    class ThreadCheckingLog(SentimentLog):
+        def append(self, *args, **kwargs):
+            self.threads.add(threading.get_ident())
+            return super().append(*args, **kwargs)
+
+    async def main():
+        log = ThreadCheckingLog(str(tmp_path))
+        log.threads = set()
+        analyzer = SentimentAnalyzer(post_log=log)
+        analyzer._score_text = lambda text: (0.5, 0.5)
+
+        async def search_tweets(query, limit):
+            return [tweet(1, '$BTC to the moon'), tweet(2, '$ETH too')]
+
+        async def request_lunarcrush(symbols):
+            return {'BTC': {'sentiment': 2.5, 'reading_time': 1000.0}}
+
+        analyzer._search_tweets = search_tweets
+        analyzer._request_lunarcrush_assets = request_lunarcrush
+        await analyzer.get_twitter_sentiment_many(['BTC', 'ETH'])
+        await analyzer.get_lunarcrush_sentiment_many(['BTC', 'ETH'])
+        await analyzer.close()
+        assert log.threads and threading.get_ident() not in log.threads
+        records = list(log.read_range(0, time.time() + 60))
+        assert sorted((r['source'], r['symbol']) for r in records) == [
+            ('lunarcrush', 'BTC'), ('twitter', 'BTC'), ('twitter', 'ETH')]
+
+    asyncio.run(main())
@@ -0,0 +1,44 @@
+import time
+import pytest
+from sentiment_log import SentimentLog
+
+
+def test_records_round_trip(tmp_path):
+    log = SentimentLog(str(tmp_path), block_size=2)
+    now = time.time()
+    log.append('twitter', 'BTC', now, engagement=3.0, vader=0.5, textblob=0.25, score=0.4)
+    log.append('reddit', 'ETH', now + 1, score=-0.2)
+    log.append('twitter', 'ETH', now + 2, score=0.1)
+    records = list(log.read_range(now, now + 10))
+    assert [(r['source'], r['symbol']) for r in records] == [('twitter', 'BTC'), ('reddit', 'ETH'), ('twitter', 'ETH')]
+    assert records[0]['engagement'] == 3.0
+    assert records[0]['score'] == pytest.approx(0.4)
+    assert len(list(log.read_range(now, now + 10, symbols=['ETH'], sources=['twitter']))) == 1
+    assert list(log.read_range(now + 5, now + 10)) == []
+
+
+def test_items_with_an_id_are_logged_once(tmp_path):
+    log = SentimentLog(str(tmp_path))
+    now = time.time()
+    assert log.append('twitter', 'BTC', now, score=0.5, item_id='t1')
+    assert not log.append('twitter', 'BTC', now + 60, score=0.5, item_id='t1')
+    assert log.append('twitter', 'ETH', now, score=0.5, item_id='t1')  # Counted once per symbol it mentions
+    assert log.append('reddit', 'BTC', now, score=0.5, item_id='t1')
+    assert log.append('twitter', 'BTC', now, score=0.5)
+    assert log.append('twitter', 'BTC', now, score=0.5)
+    log.close()
+    assert len(list(log.read_range(now - 1, now + 120))) == 5
+
+    # A restarted process loads the ids already logged
+    reopened = SentimentLog(str(tmp_path))
+    assert not reopened.append('twitter', 'BTC', now + 120, item_id='t1')
+    assert reopened.append('twitter', 'BTC', now + 120, item_id='t2')
+
+
+def test_dedup_forgets_the_oldest_ids(tmp_path):
+    log = SentimentLog(str(tmp_path), max_item_keys=2)
+    now = time.time()
+    for item_id in ('a', 'b', 'c'):
+        log.append('twitter', 'BTC', now, item_id=item_id)
+    assert log.append('twitter', 'BTC', now, item_id='a')
+    assert not log.append('twitter', 'BTC', now, item_id='c')
@@ -0,0 +1,38 @@
+from sharding import HashRing
+
+SYMBOLS = [f"SYM{i}/USDT" for i in range(500)]
+
+
+def test_assignment_is_stable_and_complete():
+    ring = HashRing(['w0', 'w1', 'w2'])
+    shards = ring.assign(SYMBOLS)
+    assert sorted(shards) == ['w0', 'w1', 'w2']
+    assert sorted(s for shard in shards.values() for s in shard) == sorted(SYMBOLS)
+    assert all(shards.values())
+    assert HashRing(['w2', 'w0', 'w1']).assign(SYMBOLS) == {n: shards[n] for n in ['w2', 'w0', 'w1']}
+
+
+def test_removing_a_node_only_moves_its_symbols():
+    ring = HashRing(['w0', 'w1', 'w2'])
+    before = {s: ring.node_for(s) for s in SYMBOLS}
+    ring.remove_node('w1')
+    for symbol, node in before.items():
+        if node != 'w1':
+            assert ring.node_for(symbol) == node
+        else:
+            assert ring.node_for(symbol) in ('w0', 'w2')
+
+
+def test_adding_a_node_only_takes_symbols():
+    ring = HashRing(['w0', 'w1'])
+    before = {s: ring.node_for(s) for s in SYMBOLS}
+    ring.add_node('w2')
+    moved = [s for s in SYMBOLS if ring.node_for(s) != before[s]]
+    assert moved
+    assert all(ring.node_for(s) == 'w2' for s in moved)
+
+
+def test_empty_ring():
+    ring = HashRing()
+    assert ring.node_for('BTC/USDT') is None
+    assert ring.assign(['BTC/USDT']) == {}
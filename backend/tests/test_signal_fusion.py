@@ -0,0 +1,112 @@
+import asyncio
+import pytest
+from signal_fusion import InputSource, Reading, SignalFusion
+
+TARGET = ('binance', 'BTC/USDT', '1h')
+
+
+def reader(value):
+    return Reading(value['score'], value.get('source', 'technical'), value.get('detail', ''), value.get('price'))
+
+
+def source(name, scores, weight=0.5, max_age=60.0, max_stale=300.0, timeout=1.0, delay=0.0, calls=None, **kwargs):
+    async def loader(keys):
+        if calls is not None:
+            calls.append(list(keys))
+        await asyncio.sleep(delay)
+        return {key: {'score': scores[key]} for key in keys if key in scores}
+
+    return InputSource(name, loader, reader, weight=weight, max_age=max_age, max_stale=max_stale,
+                       timeout=timeout, **kwargs)
+
+
+def test_reading_score_is_clamped():
+    assert Reading(3.0, 'twitter').score == 1.0
+    assert Reading(-2.0, 'twitter').score == -1.0
+
+
+def test_freshness_decays_linearly():
+    input_source = source('technical', {}, max_age=10.0, max_stale=30.0)
+    reading = Reading(1.0, 'technical')
+    reading.loaded_at = 100.0
+    assert input_source.freshness(reading, 105.0) == 1.0
+    assert input_source.freshness(reading, 120.0) == pytest.approx(0.5)
+    assert input_source.freshness(reading, 130.0) == 0.0
+
+
+def test_combine_weights_sources():
+    technical = source('technical', {}, weight=0.6)
+    sentiment = source('sentiment', {}, weight=0.4)
+    fusion = SignalFusion([technical, sentiment], neutral_band=0.15)
+    bullish, bearish = Reading(1.0, 'technical', 'rsi'), Reading(-0.5, 'twitter', 'mood')
+    bullish.loaded_at = bearish.loaded_at = 100.0
+
+    signal = fusion.combine('BTC/USDT', [(technical, bullish), (sentiment, bearish)], now=100.0)
+    assert signal['score'] == pytest.approx(0.6 - 0.2)
+    assert signal['sentiment'] == 'bullish'
+    assert signal['source'] == 'technical'
+
+    # A missing input weakens the signal rather than speaking for both
+    signal = fusion.combine('BTC/USDT', [(technical, None), (sentiment, bearish)], now=100.0)
+    assert signal['score'] == pytest.approx(-0.2)
+    assert signal['sentiment'] == 'bearish'
+    assert fusion.combine('BTC/USDT', [(technical, None), (sentiment, None)]) is None
+
+
+def test_fuse_many_batches_and_shares_keys():
+    async def main():
+        technical_calls, sentiment_calls = [], []
+        fusion = SignalFusion([
+            source('technical', {TARGET: 0.8, ('binance', 'ETH/USDT', '1h'): -0.8}, calls=technical_calls),
+            source('sentiment', {'BTC': 0.2, 'ETH': 0.2}, calls=sentiment_calls,
+                   key=lambda target: target[1].split('/')[0]),
+        ], neutral_band=0.15)
+        targets = [TARGET, ('binance', 'ETH/USDT', '1h'), ('kucoin', 'BTC/USDT', '1h')]
+        signals = await fusion.fuse_many(targets)
+        assert len(technical_calls) == 1 and len(technical_calls[0]) == 3
+        assert sentiment_calls == [['BTC', 'ETH']]
+        assert signals[TARGET]['score'] == pytest.approx(0.5)
+        assert signals[('binance', 'ETH/USDT', '1h')]['sentiment'] == 'bearish'
+        assert signals[('kucoin', 'BTC/USDT', '1h')]['score'] == pytest.approx(0.1)
+
+        await fusion.fuse_many(targets)
+        assert technical_calls[1:] == [[('kucoin', 'BTC/USDT', '1h')]]  # Only the key with no reading reloads
+        assert sentiment_calls == [['BTC', 'ETH']]
+        await fusion.close()
+
+    asyncio.run(main())
+
+
+def test_slow_source_is_not_waited_past_timeout():
+    async def main():
+        fusion = SignalFusion([
+            source('technical', {TARGET: 1.0}),
+            source('sentiment', {TARGET: 1.0}, delay=1.0, timeout=0.05),
+        ], neutral_band=0.15)
+        signal = await fusion.fuse(TARGET)
+        assert signal['score'] == pytest.approx(0.5)
+        assert 'sentiment n/a' in signal['content']
+        assert fusion.stats()['sentiment']['loading'] == 1
+        await fusion.close()
+        assert fusion.stats()['sentiment']['loading'] == 0
+
+    asyncio.run(main())
+
+
+def test_stale_reading_is_served_while_refreshing():
+    async def main():
+        scores = {TARGET: 0.5}
+        calls = []
+        technical = source('technical', scores, max_age=0.0, max_stale=60.0, delay=0.05, calls=calls)
+        fusion = SignalFusion([technical], neutral_band=0.15)
+        assert (await fusion.fuse(TARGET))['score'] == pytest.approx(0.5, abs=0.01)
+
+        scores[TARGET] = -0.5
+        signal = await fusion.fuse(TARGET)
+        assert signal['score'] == pytest.approx(0.5, abs=0.01)  # The old reading, without waiting
+        await asyncio.sleep(0.1)
+        assert len(calls) == 2
+        assert (await fusion.fuse(TARGET))['score'] < 0
+        await fusion.close()
+
+    asyncio.run(main())
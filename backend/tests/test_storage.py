@@ -0,0 +1,96 @@
+import pytest
+from storage import TradingStore, sqlite_path
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = TradingStore(str(tmp_path / 'trading.db'), batch_size=3, flush_interval=0.01)
+    yield store
+    store.close()
+
+
+def trade(trade_id, timestamp, symbol='BTC/USDT', bot_id='1', status='filled'):
+    return {'id': trade_id, 'botId': bot_id, 'pair': symbol, 'side': 'buy', 'amount': 1.0,
+            'price': 100.0, 'status': status, 'timestamp': timestamp}
+
+
+def test_sqlite_path():
+    assert sqlite_path('sqlite:///trading_bot.db') == 'trading_bot.db'
+    assert sqlite_path('sqlite:////var/lib/bot.db') == '/var/lib/bot.db'
+    assert sqlite_path('sqlite:///') == ':memory:'
+    with pytest.raises(ValueError):
+        sqlite_path('postgresql://localhost/bot')
+
+
+def test_batched_writes_are_all_flushed(store):
+    for i in range(10):
+        store.record_trade(trade(str(i), 1000.0 + i))
+    assert store.flush(5)
+    assert store.pending == 0
+    rows = store.trades(limit=100)
+    assert [r['id'] for r in rows] == [str(i) for i in range(9, -1, -1)]  # Newest first
+    assert rows[0]['timestamp'] == '1970-01-01T00:16:49+00:00'
+
+
+def test_trade_updates_replace_the_row(store):
+    store.record_trade(trade('a', 1000.0, status='pending'))
+    store.record_trade(trade('a', 1000.0, status='filled'))
+    store.flush(5)
+    assert [r['status'] for r in store.trades()] == ['filled']
+
+
+def test_queries_filter_by_symbol_bot_and_time(store):
+    store.record_trade(trade('1', 1000.0))
+    store.record_trade(trade('2', 2000.0, symbol='ETH/USDT'))
+    store.record_trade(trade('3', 3000.0, bot_id='2'))
+    store.record_trade(trade('4', '1970-01-01T01:06:40Z'))  # ISO timestamps: 4000
+    store.record_trade(trade('5', 1500000000000))  # Milliseconds: 1.5e9 seconds
+    store.flush(5)
+    assert [r['id'] for r in store.trades(symbol='BTC/USDT')] == ['5', '4', '3', '1']
+    assert store.trades(symbol='BTC/USDT')[0]['timestamp'] == '2017-07-14T02:40:00+00:00'
+    assert [r['id'] for r in store.trades(bot_id='2')] == ['3']
+    assert [r['id'] for r in store.trades(start=2000.0, end=4000.0)] == ['3', '2']
+    assert [r['id'] for r in store.trades(limit=2)] == ['5', '4']
+    assert store.trades(limit=-1) == []
+
+
+def test_signals_ticks_and_bot_state(store):
+    store.on_market_state_change('signals', {'id': 's1', 'botId': '1', 'source': 'twitter', 'symbol': 'BTC',
+                                             'sentiment': 'bullish', 'strength': 0.7, 'timestamp': 1000.0})
+    store.on_market_state_change('bots', {'id': '1', 'name': 'Alpha', 'status': 'active'})
+    store.on_market_state_change('prices', None)  # Removals are not persisted
+    for i in range(3):
+        store.record_tick({'symbol': 'BTCUSDT', 'price': 100.0 + i, 'volume24h': 5.0}, timestamp=1000.0 + i)
+    store.flush(5)
+
+    [signal] = store.signals(symbol='BTC')
+    assert (signal['source'], signal['sentiment'], signal['strength']) == ('twitter', 'bullish', 0.7)
+    assert store.bot_states() == {'1': {'id': '1', 'name': 'Alpha', 'status': 'active'}}
+    ticks = store.price_ticks('BTCUSDT', start=1001.0)
+    assert [t['price'] for t in ticks] == [101.0, 102.0]  # Oldest first
+    assert ticks[0]['volume'] == 5.0
+
+
+def test_ticks_are_shed_when_the_writer_falls_behind(tmp_path):
+    store = TradingStore(str(tmp_path / 'trading.db'), max_pending_ticks=0)
+    try:
+        store.record_tick({'symbol': 'BTCUSDT', 'price': 100.0})
+        store.record_trade(trade('1', 1000.0))
+        store.flush(5)
+        assert store.dropped_ticks == 1
+        assert store.price_ticks('BTCUSDT') == []
+        assert len(store.trades()) == 1  # Trades are never shed
+    finally:
+        store.close()
+
+
+def test_close_writes_what_is_queued(tmp_path):
+    path = str(tmp_path / 'trading.db')
+    store = TradingStore(path, flush_interval=5.0)
+    store.record_trade(trade('1', 1000.0))
+    store.close()
+    reopened = TradingStore(path)
+    try:
+        assert [r['id'] for r in reopened.trades()] == ['1']
+    finally:
+        reopened.close()
@@ -0,0 +1,111 @@
+import asyncio
+import json
+import pytest
+from market_state import MarketState
+from stream_hub import ClientStream, StreamHub
+
+
+def make_hub():
+    state = MarketState()
+    state.pnl.set_portfolio(10000.0, {})
+    state.update_price({'symbol': 'BTCUSDT', 'price': 100.0})
+    state.update_price({'symbol': 'ETHUSDT', 'price': 10.0})
+    state.add_trade({'botId': '1', 'symbol': 'BTC/USDT', 'side': 'buy', 'amount': 1.0, 'price': 100.0})
+    hub = StreamHub(state)
+    hub.attach()
+    client = ClientStream(None, max_hz=100, max_pending=100)
+    hub._clients.add(client)
+    hub.subscribe(client)
+    return state, hub, client
+
+
+def test_price_ticks_coalesce_and_stream_pnl_deltas():
+    state, hub, client = make_hub()
+    for price in (101.0, 102.0, 103.0):
+        state.update_price({'symbol': 'BTCUSDT', 'price': price})
+    message = client.drain(hub._snapshot)
+    assert message['type'] == 'delta'
+    assert [p['price'] for p in message['prices']] == [103.0]
+    assert message['botPnl'] == [{'id': '1', **state.pnl.bot_stats('1')}]
+    assert message['botPnl'][0]['pnl'] == pytest.approx(3.0)
+    delta = message['portfolioDelta']
+    assert delta['totalValue'] == pytest.approx(10003.0)
+    assert delta['assets'] == [{'symbol': 'BTC', 'amount': 1.0, 'value': 103.0, 'change24h': 0.0}]
+    assert 'bots' not in message and 'portfolio' not in message
+    assert client.drain(hub._snapshot) is None
+
+
+def test_tick_for_an_unheld_asset_sends_only_totals():
+    state, hub, client = make_hub()
+    state.update_price({'symbol': 'ETHUSDT', 'price': 11.0})
+    message = client.drain(hub._snapshot)
+    assert 'botPnl' not in message
+    assert message['portfolioDelta']['assets'] == []
+
+
+def test_snapshot_supersedes_pending_deltas():
+    state, hub, client = make_hub()
+    state.update_price({'symbol': 'BTCUSDT', 'price': 101.0})
+    state.add_trade({'botId': '1', 'symbol': 'BTC/USDT', 'side': 'sell', 'amount': 1.0, 'price': 101.0})
+    message = client.drain(hub._snapshot)
+    assert 'botPnl' not in message and 'portfolioDelta' not in message
+    assert message['portfolio'] == state.snapshot('portfolio')
+    assert message['trades'][0]['side'] == 'sell'
+
+
+def test_symbol_subscription_filters_events():
+    state, hub, client = make_hub()
+    hub.subscribe(client, ['ETH/USDT'], channels=['prices'])
+    state.update_price({'symbol': 'BTCUSDT', 'price': 101.0})
+    assert client.drain(hub._snapshot) is None
+    state.update_price({'symbol': 'ETHUSDT', 'price': 11.0})
+    assert [p['symbol'] for p in client.drain(hub._snapshot)['prices']] == ['ETHUSDT']
+
+
+class FakeWebSocket:
+    """Replays queued commands, then disconnects"""
+
+    def __init__(self, *commands):
+        self.incoming = list(commands)
+        self.sent = []
+
+    async def receive_text(self):
+        if not self.incoming:
+            raise ConnectionError('client went away')
+        return self.incoming.pop(0)
+
+    async def send_text(self, text):
+        self.sent.append(json.loads(text))
+
+
+def run_commands(hub, *commands):
+    client = ClientStream(FakeWebSocket(*commands), max_hz=hub.max_hz, max_pending=100)
+    hub._clients.add(client)
+    hub._index(client)
+    with pytest.raises(ConnectionError):
+        asyncio.run(hub._reader(client))
+    return client, client.websocket.sent
+
+
+def test_bad_commands_are_answered_without_ending_the_stream():
+    _, hub, _ = make_hub()
+    client, sent = run_commands(
+        hub, 'not json', '[1, 2]', '{"action": "subscribe", "max_hz": 0}',
+        '{"action": "subscribe", "max_hz": "fast"}', '{"action": "subscribe", "max_hz": -1}',
+        '{"action": "subscribe", "symbols": "BTC/USDT"}', '{"action": "subscribe", "symbols": [1]}',
+        '{"action": "ping"}',
+    )
+    assert [m['type'] for m in sent] == ['error'] * 7 + ['pong']
+    assert sent[1]['error'] == 'Commands must be JSON objects'
+    assert sent[2]['error'] == 'Invalid subscribe command: max_hz must be a positive number'
+    assert client.min_interval == 1.0 / hub.max_hz
+    assert client in hub._all_symbols  # Rejected subscribes leave the subscription untouched
+
+
+def test_requested_rate_is_clamped_to_the_hub_limits():
+    _, hub, _ = make_hub()
+    client, sent = run_commands(hub, '{"action": "subscribe", "symbols": ["BTC/USDT"], "max_hz": 1000}')
+    assert sent[0]['type'] == 'snapshot'
+    assert client.symbols == {'BTCUSDT'} and client.min_interval == 1.0 / hub.max_hz
+    client, _ = run_commands(hub, '{"action": "subscribe", "max_hz": 0.001}')
+    assert client.min_interval == 10.0
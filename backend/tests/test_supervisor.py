@@ -0,0 +1,52 @@
+import queue
+from supervisor import EventForwarder
+
+
+def drain(event_queue):
+    events = []
+    while True:
+        try:
+            events.append(event_queue.get_nowait())
+        except queue.Empty:
+            return events
+
+
+def test_events_pass_straight_through_when_there_is_room():
+    event_queue = queue.Queue()
+    forwarder = EventForwarder(event_queue)
+    forwarder.put('trades', {'id': 1})
+    forwarder.put('signals', {'id': 2})
+    assert len(forwarder) == 0
+    assert drain(event_queue) == [('trades', {'id': 1}), ('signals', {'id': 2})]
+
+
+def test_full_queue_keeps_trades_and_decisions_and_drops_oldest_signals():
+    event_queue = queue.Queue(maxsize=1)
+    forwarder = EventForwarder(event_queue, max_buffered_signals=2)
+    forwarder.put('signals', {'id': 0})  # Fills the queue
+    for i in range(1, 5):
+        forwarder.put('signals', {'id': i})
+        forwarder.put('trades', {'id': i})
+        forwarder.put('decisions', {'id': i})
+    assert forwarder.dropped == 2
+    assert len(forwarder) == 10
+
+    events = drain(event_queue)
+    while len(forwarder):
+        forwarder.flush()
+        events += drain(event_queue)
+    assert [item['id'] for dataset, item in events if dataset == 'trades'] == [1, 2, 3, 4]
+    assert [item['id'] for dataset, item in events if dataset == 'decisions'] == [1, 2, 3, 4]
+    assert [item['id'] for dataset, item in events if dataset == 'signals'] == [0, 3, 4]
+    # Order is preserved across datasets
+    assert events[1:4] == [('trades', {'id': 1}), ('decisions', {'id': 1}), ('trades', {'id': 2})]
+
+
+def test_close_hands_over_what_fits():
+    event_queue = queue.Queue(maxsize=2)
+    forwarder = EventForwarder(event_queue)
+    for i in range(4):
+        forwarder.put('trades', {'id': i})
+    forwarder.close(timeout=0.01)
+    assert len(forwarder) == 0
+    assert [item['id'] for _, item in drain(event_queue)] == [0, 1]
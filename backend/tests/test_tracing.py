@@ -0,0 +1,79 @@
+import asyncio
+import time
+from tracing import CpuMeter, Tracer, cpu_block
+
+
+def test_spans_outside_a_trace_are_noops():
+    tracer = Tracer(slow_threshold=0.0)
+    with tracer.span('orphan') as span:
+        assert span is None
+    tracer.annotate(ignored=True)
+    assert tracer.traces_started == 0
+    assert tracer.slow_traces() == []
+
+
+def test_spans_nest_across_awaits_and_gathered_tasks():
+    tracer = Tracer(slow_threshold=0.0)
+
+    async def fetch(name):
+        with tracer.span(name, kind='fetch'):
+            await asyncio.sleep(0.001)
+
+    async def main():
+        with tracer.trace('bot.run', bot='1'):
+            with tracer.span('load'):
+                await asyncio.gather(fetch('ticker'), fetch('ohlcv'))
+            tracer.annotate(decision='buy')
+            try:
+                with tracer.span('order'):
+                    raise ValueError('rejected')
+            except ValueError:
+                pass
+
+    asyncio.run(main())
+    [trace] = tracer.slow_traces()
+    root = trace['root']
+    assert (root['name'], root['attributes']) == ('bot.run', {'bot': '1', 'decision': 'buy'})
+    load, order = root['children']
+    assert sorted(child['name'] for child in load['children']) == ['ohlcv', 'ticker']
+    assert order['error'] == 'ValueError: rejected'
+    assert tracer.traces_started == tracer.traces_slow == 1
+
+
+def test_only_slow_traces_are_kept_newest_first():
+    tracer = Tracer(slow_threshold=0.01, capacity=2)
+    with tracer.trace('fast'):
+        pass
+    for name in ('slow1', 'slow2', 'slow3'):
+        with tracer.trace(name):
+            time.sleep(0.015)
+    assert tracer.traces_started == 4
+    assert tracer.traces_slow == 3
+    assert [t['root']['name'] for t in tracer.slow_traces()] == ['slow3', 'slow2']
+    assert len(tracer.slow_traces(1)) == 1
+    tracer.clear()
+    assert tracer.slow_traces() == []
+
+
+def test_nested_trace_becomes_a_span():
+    tracer = Tracer(slow_threshold=0.0)
+    with tracer.trace('outer'):
+        with tracer.trace('inner'):
+            pass
+    [trace] = tracer.slow_traces()
+    assert [child['name'] for child in trace['root']['children']] == ['inner']
+
+
+def test_cpu_meter_charges_blocks_run_under_it():
+    def burn(seconds):
+        deadline = time.process_time() + seconds
+        while time.process_time() < deadline:
+            pass
+
+    with cpu_block():
+        burn(0.01)  # No meter: nobody is charged
+    with CpuMeter() as meter:
+        with cpu_block():
+            burn(0.02)
+        time.sleep(0.02)  # Outside a block: not charged
+    assert 0.015 <= meter.used < 0.035
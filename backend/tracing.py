@@ -0,0 +1,193 @@
+"""
+Lightweight span tracing for bot decisions.
+
+A trace starts at the top of a unit of work (a bot run) and spans nest
+under it through a context variable, so they follow awaits and the tasks
+created by asyncio.gather without being passed around explicitly. Outside
+an active trace, span() returns a shared no-op context and costs one
+context variable lookup. Finished traces slower than the threshold are
+kept in a ring buffer for the admin API.
+"""
+import time
+import uuid
+from collections import deque
+from contextvars import ContextVar
+from typing import Deque, Dict, List, Optional
+from config import Config
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Span:
+    __slots__ = ('name', 'attributes', 'start', 'end', 'error', 'children')
+
+    def __init__(self, name: str, attributes: Dict):
+        self.name = name
+        self.attributes = attributes
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.error: Optional[str] = None
+        self.children: List['Span'] = []
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def to_dict(self, origin: float) -> Dict:
+        return {
+            'name': self.name,
+            'offset_ms': round((self.start - origin) * 1000, 3),
+            'duration_ms': round(self.duration * 1000, 3),
+            'attributes': self.attributes,
+            'error': self.error,
+            'children': [child.to_dict(origin) for child in self.children],
+        }
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar('current_span', default=None)
+
+
+class _SpanContext:
+    __slots__ = ('tracer', 'span', 'root', 'token')
+
+    def __init__(self, tracer: 'Tracer', span: Span, root: bool):
+        self.tracer = tracer
+        self.span = span
+        self.root = root
+
+    def __enter__(self) -> Span:
+        self.token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        self.span.end = time.perf_counter()
+        if exc_type is not None:
+            self.span.error = f"{exc_type.__name__}: {exc}"
+        _current_span.reset(self.token)
+        if self.root:
+            self.tracer._finish(self.span)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class Tracer:
+    """Creates traces and keeps the most recent slow ones"""
+
+    def __init__(self, slow_threshold: float = 1.0, capacity: int = 100):
+        self.slow_threshold = slow_threshold
+        self._slow: Deque[Dict] = deque(maxlen=capacity)
+        self.traces_started = 0
+        self.traces_slow = 0
+
+    def trace(self, name: str, **attributes):
+        """Start a new trace; nested calls inside an active trace become spans"""
+        parent = _current_span.get()
+        span = Span(name, attributes)
+        if parent is not None:
+            parent.children.append(span)
+            return _SpanContext(self, span, root=False)
+        self.traces_started += 1
+        return _SpanContext(self, span, root=True)
+
+    def span(self, name: str, **attributes):
+        """Child span of the active trace, or a no-op outside one"""
+        parent = _current_span.get()
+        if parent is None:
+            return _NOOP
+        span = Span(name, attributes)
+        parent.children.append(span)
+        return _SpanContext(self, span, root=False)
+
+    def annotate(self, **attributes):
+        """Add attributes to the innermost active span"""
+        current = _current_span.get()
+        if current is not None:
+            current.attributes.update(attributes)
+
+    def _finish(self, root: Span):
+        if root.duration < self.slow_threshold:
+            return
+        self.traces_slow += 1
+        self._slow.append({
+            'trace_id': uuid.uuid4().hex,
+            'finished_at': time.time(),
+            'duration_ms': round(root.duration * 1000, 3),
+            'root': root.to_dict(root.start),
+        })
+        logger.debug(f"Slow trace {root.name}: {root.duration * 1000:.1f}ms")
+
+    def slow_traces(self, limit: Optional[int] = None) -> List[Dict]:
+        """Most recent slow traces, newest first"""
+        traces = list(reversed(self._slow))
+        return traces[:limit] if limit else traces
+
+    def clear(self):
+        self._slow.clear()
+
+
+# ----------------------------------------------------------------------
+# CPU accounting
+# ----------------------------------------------------------------------
+
+_cpu_meter: ContextVar[Optional['CpuMeter']] = ContextVar('cpu_meter', default=None)
+
+
+class CpuMeter:
+    """
+    Sums the CPU time of cpu_block() sections run under it.
+
+    Like spans, the meter follows awaits and is inherited by tasks created
+    inside it; a nested meter takes over until it exits, which is how a
+    shared group load is charged to the group rather than to the bot run
+    that started it. process_time() can only be attributed to synchronous
+    sections: across an await it would include other tasks.
+    """
+
+    __slots__ = ('used', 'token')
+
+    def __init__(self):
+        self.used = 0.0
+        self.token = None
+
+    def __enter__(self) -> 'CpuMeter':
+        self.token = _cpu_meter.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _cpu_meter.reset(self.token)
+        return False
+
+
+class _CpuBlock:
+    __slots__ = ('started',)
+
+    def __enter__(self):
+        self.started = time.process_time()
+
+    def __exit__(self, exc_type, exc, tb):
+        meter = _cpu_meter.get()
+        if meter is not None:
+            meter.used += time.process_time() - self.started
+        return False
+
+
+def cpu_block() -> _CpuBlock:
+    """Charge a synchronous section's CPU time to the active CpuMeter, if any"""
+    return _CpuBlock()
+
+
+# Process-wide tracer used by the bot engine, analyzers and exchange client
+tracer = Tracer(Config.TRACE_SLOW_THRESHOLD, Config.TRACE_BUFFER_SIZE)
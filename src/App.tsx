@@ -13,14 +13,35 @@ import {
   fetchPortfolio,
   fetchTrades,
   fetchSignals,
-  fetchPrices
+  fetchPrices,
+  subscribeMarketStream,
+  StreamMessage
 } from './services/api';
-import ReconnectingWebSocket from 'reconnecting-websocket';
 
 // For local development, assuming your FastAPI runs on port 8000
-// UPDATE THESE URLs to point to your FastAPI backend
+// UPDATE THIS URL to point to your FastAPI backend
 const API_BASE = "https://hybridbot-backend-273820287691.us-central1.run.app"; // Your deployed Cloud Run API base URL
-const WS_URL = 'wss://hybridbot-backend-273820287691.us-central1.run.app/ws/data'; // Your deployed Cloud Run WebSocket URL (use wss for https)
+
+// Signal and trade feeds keep this many entries, newest first
+const FEED_LIMIT = 100;
+
+// Replace items whose key matches an update; new items are appended (prices) or,
+// for newest-first feeds, put in front. Updates arrive oldest first.
+function mergeBy<T>(items: T[], updates: T[] | undefined, key: (item: T) => string, newestFirst = false): T[] {
+  if (!updates || updates.length === 0) return items;
+  const merged = [...items];
+  const index = new Map(merged.map((item, i) => [key(item), i]));
+  const added: T[] = [];
+  for (const update of updates) {
+    const i = index.get(key(update));
+    if (i !== undefined) {
+      merged[i] = { ...merged[i], ...update };
+    } else {
+      added.push(update);
+    }
+  }
+  return newestFirst ? [...added.reverse(), ...merged].slice(0, FEED_LIMIT) : [...merged, ...added];
+}
 
 function App() {
   const [activeTab, setActiveTab] = useState('dashboard');
@@ -30,56 +51,64 @@ function App() {
   const [trades, setTrades] = useState<Trade[]>([]);
   const [prices, setPrices] = useState<Price[]>([]);
 
-  const wsRef = useRef<ReconnectingWebSocket | null>(null);
-  const reconnectTimeout = useRef<number | null>(null);
-
-  // Function to establish WebSocket connection
-  const connectWebSocket = () => {
-    wsRef.current = new ReconnectingWebSocket(WS_URL, [], {
-      reconnectInterval: 1000,
-      maxReconnectAttempts: 5,
-    });
-
-    wsRef.current.onopen = () => {
-      console.log('WebSocket connected');
-      if (reconnectTimeout.current) {
-        clearTimeout(reconnectTimeout.current);
-        reconnectTimeout.current = null;
-      }
-    };
-
-    wsRef.current.onmessage = (event) => {
-      const data = JSON.parse(event.data);
-      // Handle incoming messages as before
-      // ...
-    };
+  // Set once the stream's snapshot arrives; the REST load must not overwrite newer stream data
+  const streamed = useRef(false);
 
-    wsRef.current.onclose = (event) => {
-      console.warn('WebSocket disconnected:', event);
-      // Attempt to reconnect after a delay
-      if (!reconnectTimeout.current) {
-        reconnectTimeout.current = window.setTimeout(connectWebSocket, 5000);
-      }
-    };
+  // Apply a stream message: a snapshot replaces the channels it carries, a delta is merged in
+  const applyStreamMessage = (message: StreamMessage) => {
+    if (message.type === 'error') {
+      console.error('Stream error:', message.error);
+      return;
+    }
+    if (message.type !== 'snapshot' && message.type !== 'delta') return;
+    const isSnapshot = message.type === 'snapshot';
+    if (isSnapshot) streamed.current = true;
 
-    wsRef.current.onerror = (error) => {
-      console.error('WebSocket error:', error);
-      wsRef.current?.close(); // Close to trigger onclose and reconnect
-    };
+    if (message.prices) {
+      const update = message.prices;
+      setPrices((current) => (isSnapshot ? update : mergeBy(current, update, (p) => p.symbol)));
+    }
+    if (message.signals) {
+      const update = message.signals;
+      setSignals((current) => (isSnapshot ? update : mergeBy(current, update, (s) => s.id, true)));
+    }
+    if (message.trades) {
+      const update = message.trades;
+      setTrades((current) => (isSnapshot ? update : mergeBy(current, update, (t) => t.id, true)));
+    }
+    // bots and portfolio are always sent whole; price ticks only move their PnL fields
+    if (message.bots) setBots(message.bots);
+    if (message.portfolio) setPortfolio(message.portfolio);
+    if (message.botPnl) {
+      const update = message.botPnl;
+      setBots((current) =>
+        current.map((bot) => {
+          const pnl = update.find((u) => u.id === bot.id);
+          return pnl ? { ...bot, ...pnl } : bot;
+        })
+      );
+    }
+    if (message.portfolioDelta) {
+      const { assets, ...totals } = message.portfolioDelta;
+      setPortfolio((current) =>
+        current ? { ...current, ...totals, assets: mergeBy(current.assets, assets, (a) => a.symbol) } : current
+      );
+    }
   };
 
   useEffect(() => {
-    // Initial data fetches
+    // Initial data fetches, used until the stream's snapshot arrives
     const loadData = async () => {
       try {
         const [botsData, portfolioData, tradesData, signalsData, pricesData] =
           await Promise.all([
-            fetchBots(API_BASE),
-            fetchPortfolio(API_BASE),
-            fetchTrades(API_BASE),
-            fetchSignals(API_BASE),
-            fetchPrices(API_BASE),
+            fetchBots(),
+            fetchPortfolio(),
+            fetchTrades(),
+            fetchSignals(),
+            fetchPrices(),
           ]);
+        if (streamed.current) return;
         setBots(botsData);
         setPortfolio(portfolioData);
         setTrades(tradesData);
@@ -91,17 +120,11 @@ function App() {
     };
 
     loadData();
-    connectWebSocket(); // Establish WebSocket connection on component mount
+    // Server-push stream: a snapshot on (re)connect, then coalesced deltas
+    const unsubscribe = subscribeMarketStream(applyStreamMessage);
 
     // Cleanup on unmount
-    return () => {
-      if (wsRef.current) {
-        wsRef.current.close();
-      }
-      if (reconnectTimeout.current) {
-        clearTimeout(reconnectTimeout.current);
-      }
-    };
+    return unsubscribe;
   }, []); // Empty dependency array means this runs once on mount
 
   // Handlers for bot actions
@@ -113,7 +136,7 @@ function App() {
         body: JSON.stringify(newBot),
       });
       if (!response.ok) throw new Error('Failed to create bot');
-      // WebSocket will update state via 'bot_status_update'
+      // The stream sends the new bots snapshot
     } catch (error) {
       console.error('Error creating bot:', error);
     }
@@ -125,8 +148,7 @@ function App() {
         method: 'POST',
       });
       if (!response.ok) throw new Error('Failed to toggle bot status');
-      // Update local state if needed, or rely on WebSocket for updates
-      // For now, WebSocket listener handles bot_status_update
+      // The stream sends the new bots snapshot
     } catch (error) {
       console.error('Error toggling bot:', error);
     }
@@ -138,7 +160,7 @@ function App() {
         method: 'DELETE',
       });
       if (!response.ok) throw new Error('Failed to delete bot');
-      // WebSocket listener handles bot_deleted update
+      // The stream sends the new bots snapshot
     } catch (error) {
       console.error('Error deleting bot:', error);
     }
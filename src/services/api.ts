@@ -1,4 +1,4 @@
-import { TradingBot, Portfolio, Signal, Trade, Price } from '../types/trading';
+import { TradingBot, Portfolio, Asset, Signal, Trade, Price, PriceData } from '../types/trading';
 
 const API_BASE = "https://hybridbot-backend-273820287691.us-central1.run.app"; // Your deployed Cloud Run API base URL
 export async function fetchBots(): Promise<TradingBot[]> {
@@ -55,3 +55,64 @@ export async function fetchTrades(): Promise<Trade[]> {
     return [];
   }
 }
+
+export type StreamChannel = 'prices' | 'signals' | 'trades' | 'bots' | 'portfolio';
+
+// Price ticks update bot PnL and portfolio values in place; merge these into the last snapshot
+export type BotPnlDelta = Pick<TradingBot, 'id' | 'pnl' | 'pnlPercent' | 'trades' | 'winRate'>;
+export type PortfolioDelta = Partial<Omit<Portfolio, 'assets'>> & { assets: Asset[] };
+
+export interface StreamMessage {
+  type: 'snapshot' | 'delta' | 'pong' | 'error';
+  prices?: PriceData[];
+  signals?: Signal[];
+  trades?: Trade[];
+  bots?: TradingBot[];
+  portfolio?: Portfolio;
+  botPnl?: BotPnlDelta[];
+  portfolioDelta?: PortfolioDelta;
+  error?: string;
+}
+
+// Opens the server-push stream; returns a function that closes it.
+// Reconnects with backoff while the caller keeps the subscription open.
+export function subscribeMarketStream(
+  onMessage: (message: StreamMessage) => void,
+  options: { symbols?: string[]; channels?: StreamChannel[]; maxHz?: number } = {}
+): () => void {
+  const url = `${API_BASE.replace(/^http/, 'ws')}/ws/stream`;
+  let socket: WebSocket | null = null;
+  let closed = false;
+  let retryDelay = 1000;
+
+  const connect = () => {
+    socket = new WebSocket(url);
+    socket.onopen = () => {
+      retryDelay = 1000;
+      socket?.send(JSON.stringify({
+        action: 'subscribe',
+        symbols: options.symbols,
+        channels: options.channels,
+        max_hz: options.maxHz,
+      }));
+    };
+    socket.onmessage = (event) => {
+      try {
+        onMessage(JSON.parse(event.data));
+      } catch (err) {
+        console.error('Failed to parse stream message:', err);
+      }
+    };
+    socket.onclose = () => {
+      if (closed) return;
+      setTimeout(connect, retryDelay);
+      retryDelay = Math.min(retryDelay * 2, 30000);
+    };
+  };
+
+  connect();
+  return () => {
+    closed = true;
+    socket?.close();
+  };
+}